@@ -1,7 +1,14 @@
 //! Parser benchmarks.
+//!
+//! Besides the small fixtures, the suite parses deterministic generated
+//! corpora shaped like production documents, reporting throughput both in
+//! bytes/s and elements/s.
 
-use criterion::{criterion_group, criterion_main, Criterion, black_box};
-use seed_parser::parse_document;
+use std::fmt::Write;
+
+use criterion::{criterion_group, criterion_main, Criterion, Throughput, black_box};
+use seed_core::Element;
+use seed_parser::{parse_document, validate};
 
 const SIMPLE_DOC: &str = r#"
 Frame Button:
@@ -25,5 +32,126 @@ fn parse_medium(c: &mut Criterion) {
     });
 }
 
-criterion_group!(benches, parse_simple, parse_medium);
+// Generated corpora
+
+/// 10k sibling frames with a few plain properties each.
+fn flat_frames() -> String {
+    let mut doc = String::new();
+    for i in 0..10_000 {
+        writeln!(doc, "Frame Item{}:", i).unwrap();
+        writeln!(doc, "  fill: #{:06X}", (i * 2654435761u64) & 0xFFFFFF).unwrap();
+        writeln!(doc, "  width: {}px", 40 + i % 200).unwrap();
+        writeln!(doc, "  height: {}px", 20 + i % 50).unwrap();
+        writeln!(doc, "  opacity: 0.{}", i % 10).unwrap();
+    }
+    doc
+}
+
+/// 500 trees of frames nested 20 levels deep.
+fn deep_nesting() -> String {
+    let mut doc = String::new();
+    for tree in 0..500 {
+        for depth in 0..20 {
+            let indent = "  ".repeat(depth);
+            writeln!(doc, "{}Frame Level{}_{}:", indent, tree, depth).unwrap();
+            writeln!(doc, "{}  padding: {}px", indent, depth).unwrap();
+        }
+    }
+    doc
+}
+
+/// 2k frames dominated by gradient, shadow and transform values.
+fn gradient_shadow_heavy() -> String {
+    let mut doc = String::new();
+    for i in 0..2_000 {
+        writeln!(doc, "Frame Styled{}:", i).unwrap();
+        writeln!(doc, "  fill: linear-gradient({}deg, #3B82F6, #1D4ED8 50%, #1E3A8A)", i % 360).unwrap();
+        writeln!(doc, "  background: radial-gradient(circle, #FFFFFF 0%, #000000 100%)").unwrap();
+        writeln!(doc, "  stroke: conic-gradient(#FF0000, #00FF00, #0000FF)").unwrap();
+        writeln!(doc, "  shadow: drop-shadow(0px {}px 8px #00000040)", i % 16).unwrap();
+        writeln!(doc, "  box-shadow: box-shadow(0px 2px 4px 1px #0000001A)").unwrap();
+        writeln!(doc, "  inner: inset-shadow(0px 1px 2px #00000020)").unwrap();
+        writeln!(doc, "  transform: rotate({}deg)", i % 90).unwrap();
+    }
+    doc
+}
+
+/// 2k frames with equality, alignment, relative and inequality constraints.
+fn constraint_heavy() -> String {
+    let mut doc = String::new();
+    for i in 0..2_000 {
+        writeln!(doc, "Frame Box{}:", i).unwrap();
+        writeln!(doc, "  constraints:").unwrap();
+        writeln!(doc, "    - width = {}px", 100 + i % 300).unwrap();
+        writeln!(doc, "    - height = Parent.height - 16px").unwrap();
+        writeln!(doc, "    - left align Parent, gap: 8px").unwrap();
+        writeln!(doc, "    - center-y align Parent").unwrap();
+        if i > 0 {
+            writeln!(doc, "    - below Box{}, gap: 4px", i - 1).unwrap();
+        }
+        writeln!(doc, "    - width >= 50px").unwrap();
+        writeln!(doc, "    - height <= 400px").unwrap();
+    }
+    doc
+}
+
+/// 1k text elements with ~2 KB of content each.
+fn long_text() -> String {
+    let sentence = "The quick brown fox jumps over the lazy dog while the layout engine measures every glyph. ";
+    let mut doc = String::new();
+    for i in 0..1_000 {
+        writeln!(doc, "Text Paragraph{}:", i).unwrap();
+        writeln!(doc, "  content: \"{}\"", sentence.repeat(22).trim_end()).unwrap();
+        writeln!(doc, "  font-size: {}px", 12 + i % 8).unwrap();
+    }
+    doc
+}
+
+/// Count all elements in a tree, including nested ones.
+fn count_elements(elements: &[Element]) -> u64 {
+    elements.iter().map(|element| {
+        1 + match element {
+            Element::Frame(f) => count_elements(&f.children),
+            Element::Component(c) => count_elements(&c.children),
+            Element::Slot(s) => count_elements(&s.fallback),
+            Element::Text(_) | Element::Part(_) => 0,
+        }
+    }).sum()
+}
+
+fn parse_corpora(c: &mut Criterion) {
+    let corpora = [
+        ("flat_frames_10k", flat_frames()),
+        ("deep_nesting_20", deep_nesting()),
+        ("gradient_shadow_heavy", gradient_shadow_heavy()),
+        ("constraint_heavy", constraint_heavy()),
+        ("long_text", long_text()),
+    ];
+
+    for (name, source) in &corpora {
+        let elements = count_elements(&parse_document(source).unwrap().elements);
+
+        let mut group = c.benchmark_group(*name);
+        group.sample_size(20);
+
+        group.throughput(Throughput::Bytes(source.len() as u64));
+        group.bench_function("bytes", |b| {
+            b.iter(|| parse_document(black_box(source)))
+        });
+
+        group.throughput(Throughput::Elements(elements));
+        group.bench_function("elements", |b| {
+            b.iter(|| parse_document(black_box(source)))
+        });
+
+        group.throughput(Throughput::Bytes(source.len() as u64));
+        group.bench_function("validate", |b| {
+            b.iter(|| validate(black_box(source)))
+        });
+
+        group.finish();
+    }
+}
+
+criterion_group!(benches, parse_simple, parse_medium, parse_corpora);
 criterion_main!(benches);
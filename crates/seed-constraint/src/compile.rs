@@ -0,0 +1,567 @@
+//! Compilation of constraints to flat linear form.
+//!
+//! Every constraint in a document is lowered once to
+//! `constant + Σ coefficient × element.property (relation) 0`, with elements
+//! identified by their slot (index in document order) and properties by
+//! [`LayoutProperty`]. Adding a [`CompiledConstraints`] to a solver is then a
+//! plain loop over terms, with no expression tree walking and no name or
+//! property string lookups.
+//!
+//! References that reference resolution rewrote to element ids map to
+//! slots through a table indexed by id. Names are only hashed if the
+//! document still refers to elements by name.
+
+use std::cell::OnceCell;
+use std::collections::HashMap;
+use std::fmt::Write;
+
+use seed_core::{
+    ast::{self, ConstraintKind, Element, Expression, PropertyName, PropertyValue},
+    ConstraintError, ConstraintPriority, Document,
+};
+
+use crate::cassowary::{Relation, Strength};
+
+/// A layout property that constraints can refer to.
+#[derive(Debug, Clone, Copy, PartialEq, Eq, Hash)]
+pub enum LayoutProperty {
+    X,
+    Y,
+    Width,
+    Height,
+}
+
+impl LayoutProperty {
+    /// Look up a constraint property name (`left` and `top` alias `x` and `y`).
+    pub fn from_name(name: &str) -> Option<Self> {
+        match name {
+            "x" | "left" => Some(LayoutProperty::X),
+            "y" | "top" => Some(LayoutProperty::Y),
+            "width" => Some(LayoutProperty::Width),
+            "height" => Some(LayoutProperty::Height),
+            _ => None,
+        }
+    }
+
+    pub fn as_str(self) -> &'static str {
+        match self {
+            LayoutProperty::X => "x",
+            LayoutProperty::Y => "y",
+            LayoutProperty::Width => "width",
+            LayoutProperty::Height => "height",
+        }
+    }
+}
+
+/// One term of a linear expression: `coefficient × property` of the element in `slot`.
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub struct LinearTerm {
+    pub slot: usize,
+    pub property: LayoutProperty,
+    pub coefficient: f64,
+}
+
+/// A linear expression: `constant + Σ terms`.
+#[derive(Debug, Clone, Default, PartialEq)]
+pub struct LinearExpression {
+    pub constant: f64,
+    pub terms: Vec<LinearTerm>,
+}
+
+impl LinearExpression {
+    pub fn constant(value: f64) -> Self {
+        Self { constant: value, terms: Vec::new() }
+    }
+
+    pub fn term(slot: usize, property: LayoutProperty, coefficient: f64) -> Self {
+        let mut expr = Self::default();
+        expr.add_term(slot, property, coefficient);
+        expr
+    }
+
+    /// Add `coefficient × property` of `slot`, merging with an existing term.
+    pub fn add_term(&mut self, slot: usize, property: LayoutProperty, coefficient: f64) {
+        match self.terms.iter_mut().find(|t| t.slot == slot && t.property == property) {
+            Some(term) => term.coefficient += coefficient,
+            None => self.terms.push(LinearTerm { slot, property, coefficient }),
+        }
+    }
+
+    /// Add `multiplier × other`.
+    pub fn add_expression(&mut self, other: &LinearExpression, multiplier: f64) {
+        self.constant += other.constant * multiplier;
+        for term in &other.terms {
+            self.add_term(term.slot, term.property, term.coefficient * multiplier);
+        }
+    }
+
+    pub fn multiply(&mut self, scalar: f64) {
+        self.constant *= scalar;
+        for term in &mut self.terms {
+            term.coefficient *= scalar;
+        }
+    }
+
+    /// The value of the expression if it has no variable terms.
+    pub fn as_constant(&self) -> Option<f64> {
+        self.terms.is_empty().then_some(self.constant)
+    }
+}
+
+/// A constraint in linear form: `expression (relation) 0`.
+#[derive(Debug, Clone)]
+pub struct LinearConstraint {
+    pub expression: LinearExpression,
+    pub(crate) relation: Relation,
+    pub(crate) strength: Strength,
+}
+
+impl LinearConstraint {
+    /// Render the constraint like `1*Child.width - 1*Card.width + 32 = 0`,
+    /// using `names` (indexed by slot) for element names.
+    pub fn describe(&self, names: &[String]) -> String {
+        let sign = |value: f64| if value < 0.0 { '-' } else { '+' };
+
+        let mut out = String::new();
+        for term in &self.expression.terms {
+            let _ = write!(
+                out,
+                " {} {}*{}.{}",
+                sign(term.coefficient),
+                term.coefficient.abs(),
+                names[term.slot],
+                term.property.as_str(),
+            );
+        }
+        let constant = self.expression.constant;
+        let _ = write!(out, " {} {}", sign(constant), constant.abs());
+
+        let relation = match self.relation {
+            Relation::LessOrEqual => "<=",
+            Relation::Equal => "=",
+            Relation::GreaterOrEqual => ">=",
+        };
+        format!("{} {} 0", out.trim_start_matches(" +").trim_start(), relation)
+    }
+}
+
+/// The constraints of a document compiled to linear form.
+///
+/// Compile once with [`CompiledConstraints::compile`] and add to a fresh
+/// [`ConstraintSystem`](crate::ConstraintSystem) for every solve.
+#[derive(Debug, Clone, Default)]
+pub struct CompiledConstraints {
+    /// Element names, indexed by slot.
+    elements: Vec<String>,
+    constraints: Vec<LinearConstraint>,
+}
+
+impl CompiledConstraints {
+    /// Compile every constraint in `doc`.
+    ///
+    /// Frames and text elements get a slot each, in document order. Named
+    /// references resolve to the most recent element with that name declared
+    /// before the constraint.
+    pub fn compile(doc: &Document) -> Result<Self, ConstraintError> {
+        let mut compiler = Compiler::default();
+        compiler.number_elements(&doc.elements, &mut 0, true);
+        for element in &doc.elements {
+            compiler.add_element(element, None)?;
+        }
+        Ok(Self {
+            elements: compiler.elements,
+            constraints: compiler.constraints,
+        })
+    }
+
+    /// Element names, indexed by slot. Unnamed elements get generated names.
+    pub fn element_names(&self) -> &[String] {
+        &self.elements
+    }
+
+    pub fn constraints(&self) -> &[LinearConstraint] {
+        &self.constraints
+    }
+}
+
+#[derive(Default)]
+struct Compiler {
+    elements: Vec<String>,
+    /// Slot of each element id, if the element has one
+    slots_by_id: Vec<Option<usize>>,
+    /// Latest slot declared under each name, built on first use
+    slots: OnceCell<HashMap<String, usize>>,
+    constraints: Vec<LinearConstraint>,
+}
+
+impl Compiler {
+    /// Record the slot of every element id, numbering elements the way
+    /// reference resolution does (see [`ElementId`](seed_core::types::ElementId)).
+    /// Slots are counted in the order `add_element` hands them out.
+    fn number_elements(&mut self, elements: &[Element], next_slot: &mut usize, has_slots: bool) {
+        let first = self.slots_by_id.len();
+        self.slots_by_id.resize(first + elements.len(), None);
+
+        for (i, element) in elements.iter().enumerate() {
+            let has_slot = has_slots && matches!(element, Element::Frame(_) | Element::Text(_));
+            if has_slot {
+                self.slots_by_id[first + i] = Some(*next_slot);
+                *next_slot += 1;
+            }
+            self.number_elements(element.children(), next_slot, has_slot);
+        }
+    }
+
+    fn add_element(&mut self, element: &Element, parent: Option<usize>) -> Result<(), ConstraintError> {
+        let (name, prefix, constraints) = match element {
+            Element::Frame(f) => (&f.name, "frame", &f.constraints),
+            Element::Text(t) => (&t.name, "text", &t.constraints),
+            // Skip unsupported element types for now
+            _ => return Ok(()),
+        };
+
+        // Generate names matching the layout system's convention
+        let slot = self.elements.len();
+        let name = name
+            .as_ref()
+            .map(|n| n.0.clone())
+            .unwrap_or_else(|| format!("{}_{}", prefix, slot + 1));
+        if let Some(slots) = self.slots.get_mut() {
+            slots.insert(name.clone(), slot);
+        }
+        self.elements.push(name);
+
+        for constraint in constraints {
+            self.add_constraint(slot, parent, constraint)?;
+        }
+
+        if let Element::Frame(frame) = element {
+            // Layout properties are implicit required constraints
+            self.add_properties(slot, &frame.properties);
+
+            for child in &frame.children {
+                self.add_element(child, Some(slot))?;
+            }
+        }
+
+        Ok(())
+    }
+
+    fn add_properties(&mut self, slot: usize, properties: &[ast::Property]) {
+        for prop in properties {
+            let property = match prop.name {
+                PropertyName::Left | PropertyName::X => LayoutProperty::X,
+                PropertyName::Top | PropertyName::Y => LayoutProperty::Y,
+                PropertyName::Width => LayoutProperty::Width,
+                PropertyName::Height => LayoutProperty::Height,
+                _ => continue,
+            };
+
+            let value = match &prop.value {
+                PropertyValue::Length(len) => len.to_px(None).unwrap_or(0.0),
+                PropertyValue::Number(n) => *n,
+                _ => continue, // Skip non-numeric values
+            };
+
+            let mut expression = LinearExpression::term(slot, property, 1.0);
+            expression.constant = -value;
+            self.constraints.push(LinearConstraint {
+                expression,
+                relation: Relation::Equal,
+                strength: Strength::REQUIRED,
+            });
+        }
+    }
+
+    fn add_constraint(
+        &mut self,
+        slot: usize,
+        parent: Option<usize>,
+        constraint: &ast::Constraint,
+    ) -> Result<(), ConstraintError> {
+        let strength = convert_priority(constraint.priority);
+
+        let (expression, relation) = match &constraint.kind {
+            ConstraintKind::Equality { property, value } => {
+                // property - value = 0
+                let mut expr = LinearExpression::term(slot, layout_property(property)?, 1.0);
+                expr.add_expression(&self.lower(value, parent)?, -1.0);
+                (expr, Relation::Equal)
+            }
+            ConstraintKind::Inequality { property, op, value } => {
+                let mut expr = LinearExpression::term(slot, layout_property(property)?, 1.0);
+                expr.add_expression(&self.lower(value, parent)?, -1.0);
+                let relation = match op {
+                    ast::InequalityOp::LessThan | ast::InequalityOp::LessThanOrEqual => Relation::LessOrEqual,
+                    ast::InequalityOp::GreaterThan | ast::InequalityOp::GreaterThanOrEqual => {
+                        Relation::GreaterOrEqual
+                    }
+                };
+                (expr, relation)
+            }
+            ConstraintKind::Alignment { edge, target, target_edge } => {
+                // element.edge - target.target_edge = 0
+                let target_slot = self.resolve_element_ref(target, parent)?;
+                let mut expr = LinearExpression::default();
+                add_edge(&mut expr, slot, *edge, 1.0);
+                add_edge(&mut expr, target_slot, target_edge.unwrap_or(*edge), -1.0);
+                (expr, Relation::Equal)
+            }
+            ConstraintKind::Relative { relation, target, gap } => {
+                let target_slot = self.resolve_element_ref(target, parent)?;
+                let gap = gap.and_then(|g| g.to_px(None)).unwrap_or(0.0);
+                let expr = relative_expression(slot, *relation, target_slot, gap);
+                (expr, Relation::Equal)
+            }
+        };
+
+        self.constraints.push(LinearConstraint { expression, relation, strength });
+        Ok(())
+    }
+
+    /// Lower an expression tree to linear form.
+    fn lower(&self, expr: &Expression, parent: Option<usize>) -> Result<LinearExpression, ConstraintError> {
+        Ok(match expr {
+            Expression::Literal(n) => LinearExpression::constant(*n),
+            Expression::Length(len) => LinearExpression::constant(len.to_px(None).unwrap_or(0.0)),
+            Expression::PropertyRef { element, property } => {
+                let slot = self.resolve_element_ref(element, parent)?;
+                LinearExpression::term(slot, layout_property(property)?, 1.0)
+            }
+            // Token refs should be resolved before constraint solving
+            Expression::TokenRef(_) => LinearExpression::constant(0.0),
+            Expression::BinaryOp { left, op, right } => {
+                let mut left = self.lower(left, parent)?;
+                let mut right = self.lower(right, parent)?;
+                match op {
+                    ast::BinaryOp::Add => {
+                        left.add_expression(&right, 1.0);
+                        left
+                    }
+                    ast::BinaryOp::Sub => {
+                        left.add_expression(&right, -1.0);
+                        left
+                    }
+                    ast::BinaryOp::Mul => match (left.as_constant(), right.as_constant()) {
+                        (_, Some(r)) => {
+                            left.multiply(r);
+                            left
+                        }
+                        (Some(l), None) => {
+                            right.multiply(l);
+                            right
+                        }
+                        (None, None) => return Err(non_linear(expr)),
+                    },
+                    ast::BinaryOp::Div => match right.as_constant() {
+                        Some(r) => {
+                            left.multiply(1.0 / r);
+                            left
+                        }
+                        None => return Err(non_linear(expr)),
+                    },
+                }
+            }
+            Expression::Function { name, args } => {
+                let mut values = Vec::with_capacity(args.len());
+                for arg in args {
+                    let value = self.lower(arg, parent)?.as_constant().ok_or_else(|| non_linear(expr))?;
+                    values.push(value);
+                }
+                LinearExpression::constant(match name.as_str() {
+                    "min" => values.iter().copied().fold(f64::INFINITY, f64::min),
+                    "max" => values.iter().copied().fold(f64::NEG_INFINITY, f64::max),
+                    _ => 0.0,
+                })
+            }
+        })
+    }
+
+    /// Resolve an element reference to a slot.
+    fn resolve_element_ref(&self, target: &ast::ElementRef, parent: Option<usize>) -> Result<usize, ConstraintError> {
+        let unknown = |property: &str| ConstraintError::UnknownProperty {
+            property: property.to_string(),
+            span: Default::default(),
+        };
+
+        match target {
+            ast::ElementRef::Parent => parent.ok_or_else(|| unknown("Parent")),
+            ast::ElementRef::Resolved(id) => self.slots_by_id.get(id.0 as usize).copied().flatten()
+                .ok_or_else(|| unknown(&format!("element #{}", id.0))),
+            ast::ElementRef::Named(name) => {
+                let slots = self.slots.get_or_init(|| {
+                    self.elements.iter().enumerate().map(|(slot, name)| (name.clone(), slot)).collect()
+                });
+                slots.get(&name.0).copied().ok_or_else(|| unknown(&name.0))
+            }
+            // TODO: Implement sibling references
+            ast::ElementRef::Previous | ast::ElementRef::Next => Err(unknown("Previous/Next")),
+        }
+    }
+}
+
+fn layout_property(property: &str) -> Result<LayoutProperty, ConstraintError> {
+    LayoutProperty::from_name(property).ok_or_else(|| ConstraintError::UnknownProperty {
+        property: property.to_string(),
+        span: Default::default(),
+    })
+}
+
+fn non_linear(expr: &Expression) -> ConstraintError {
+    ConstraintError::NonLinear {
+        expression: format!("{:?}", expr),
+        span: Default::default(),
+    }
+}
+
+/// Convert Seed priority to Cassowary strength.
+fn convert_priority(priority: Option<ConstraintPriority>) -> Strength {
+    match priority.unwrap_or(ConstraintPriority::Required) {
+        ConstraintPriority::Required => Strength::REQUIRED,
+        ConstraintPriority::High => Strength::STRONG,
+        ConstraintPriority::Medium => Strength::MEDIUM,
+        ConstraintPriority::Low | ConstraintPriority::Weak => Strength::WEAK,
+    }
+}
+
+/// Add `sign × edge` of the element in `slot`.
+fn add_edge(expr: &mut LinearExpression, slot: usize, edge: ast::Edge, sign: f64) {
+    let (position, size, fraction) = match edge {
+        ast::Edge::Left => (LayoutProperty::X, LayoutProperty::Width, 0.0),
+        ast::Edge::Right => (LayoutProperty::X, LayoutProperty::Width, 1.0),
+        ast::Edge::CenterX => (LayoutProperty::X, LayoutProperty::Width, 0.5),
+        ast::Edge::Top => (LayoutProperty::Y, LayoutProperty::Height, 0.0),
+        ast::Edge::Bottom => (LayoutProperty::Y, LayoutProperty::Height, 1.0),
+        ast::Edge::CenterY => (LayoutProperty::Y, LayoutProperty::Height, 0.5),
+    };
+    expr.add_term(slot, position, sign);
+    if fraction != 0.0 {
+        expr.add_term(slot, size, sign * fraction);
+    }
+}
+
+/// Expression for placing `slot` next to `target` with a gap.
+fn relative_expression(slot: usize, relation: ast::Relation, target: usize, gap: f64) -> LinearExpression {
+    use LayoutProperty::*;
+
+    let mut expr = LinearExpression::default();
+    match relation {
+        ast::Relation::Below => {
+            // element.y = target.y + target.height + gap
+            expr.add_term(slot, Y, 1.0);
+            expr.add_term(target, Y, -1.0);
+            expr.add_term(target, Height, -1.0);
+            expr.constant = -gap;
+        }
+        ast::Relation::Above => {
+            // element.y + element.height + gap = target.y
+            expr.add_term(slot, Y, 1.0);
+            expr.add_term(slot, Height, 1.0);
+            expr.add_term(target, Y, -1.0);
+            expr.constant = gap;
+        }
+        ast::Relation::RightOf => {
+            // element.x = target.x + target.width + gap
+            expr.add_term(slot, X, 1.0);
+            expr.add_term(target, X, -1.0);
+            expr.add_term(target, Width, -1.0);
+            expr.constant = -gap;
+        }
+        ast::Relation::LeftOf => {
+            // element.x + element.width + gap = target.x
+            expr.add_term(slot, X, 1.0);
+            expr.add_term(slot, Width, 1.0);
+            expr.add_term(target, X, -1.0);
+            expr.constant = gap;
+        }
+    }
+    expr
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use seed_core::ast::*;
+    use seed_core::types::{Identifier, Length};
+
+    fn frame(name: &str, constraints: Vec<ConstraintKind>, children: Vec<Element>) -> Element {
+        Element::Frame(FrameElement {
+            name: Some(Identifier::from(name)),
+            properties: vec![],
+            constraints: constraints
+                .into_iter()
+                .map(|kind| Constraint { kind, priority: None, span: Span::default() })
+                .collect(),
+            children: children.into(),
+            span: Span::default(),
+        })
+    }
+
+    fn doc(elements: Vec<Element>) -> Document {
+        Document { meta: None, tokens: None, elements, span: Span::default() }
+    }
+
+    #[test]
+    fn test_property_refs_in_binary_ops_stay_linear() {
+        // width = Parent.width - 2 * 16px
+        let value = Expression::BinaryOp {
+            left: Box::new(Expression::PropertyRef { element: ElementRef::Parent, property: "width".into() }),
+            op: BinaryOp::Sub,
+            right: Box::new(Expression::BinaryOp {
+                left: Box::new(Expression::Literal(2.0)),
+                op: BinaryOp::Mul,
+                right: Box::new(Expression::Length(Length::px(16.0))),
+            }),
+        };
+        let child = frame("Child", vec![ConstraintKind::Equality { property: "width".into(), value }], vec![]);
+        let compiled = CompiledConstraints::compile(&doc(vec![frame("Card", vec![], vec![child])])).unwrap();
+
+        assert_eq!(compiled.element_names(), ["Card", "Child"]);
+        let expr = &compiled.constraints()[0].expression;
+        assert_eq!(expr.constant, 32.0);
+        assert_eq!(expr.terms, vec![
+            LinearTerm { slot: 1, property: LayoutProperty::Width, coefficient: 1.0 },
+            LinearTerm { slot: 0, property: LayoutProperty::Width, coefficient: -1.0 },
+        ]);
+    }
+
+    #[test]
+    fn test_non_linear_expression_is_rejected() {
+        let value = Expression::BinaryOp {
+            left: Box::new(Expression::PropertyRef { element: ElementRef::Parent, property: "width".into() }),
+            op: BinaryOp::Mul,
+            right: Box::new(Expression::PropertyRef { element: ElementRef::Parent, property: "height".into() }),
+        };
+        let child = frame("Child", vec![ConstraintKind::Equality { property: "width".into(), value }], vec![]);
+        let result = CompiledConstraints::compile(&doc(vec![frame("Card", vec![], vec![child])]));
+
+        assert!(matches!(result, Err(ConstraintError::NonLinear { .. })));
+    }
+
+    #[test]
+    fn test_resolved_references_use_element_ids() {
+        use seed_core::types::ElementId;
+
+        // Header, Content and Footer are 0..3, Content's children 3 and 4
+        // and Inner 5; the component and its content get ids but no slots
+        let below = |target| ConstraintKind::Relative { relation: ast::Relation::Below, target, gap: None };
+        let instance = Element::Component(ComponentElement {
+            component_name: Identifier::from("Badge"),
+            instance_name: None,
+            props: vec![],
+            children: vec![frame("Inner", vec![], vec![])].into(),
+            span: Span::default(),
+        });
+        let content = frame("Content", vec![below(ElementRef::Resolved(ElementId(0)))], vec![
+            instance,
+            frame("Label", vec![below(ElementRef::Resolved(ElementId(1)))], vec![]),
+        ]);
+        let tail = frame("Footer", vec![below(ElementRef::Resolved(ElementId(4)))], vec![]);
+        let compiled = CompiledConstraints::compile(&doc(vec![frame("Header", vec![], vec![]), content, tail]))
+            .unwrap();
+
+        assert_eq!(compiled.element_names(), ["Header", "Content", "Label", "Footer"]);
+        let targets: Vec<usize> = compiled.constraints().iter().map(|c| c.expression.terms[1].slot).collect();
+        assert_eq!(targets, [0, 1, 2]);
+    }
+}
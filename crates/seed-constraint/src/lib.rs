@@ -4,11 +4,14 @@
 //! - Cassowary simplex algorithm for 2D constraints
 //! - Geometric constraints for 3D parts
 //! - Priority handling
+//! - Compilation of constraint expressions to flat linear form
 
 mod cassowary;
+mod compile;
 mod solver;
 
 pub use cassowary::Variable;
+pub use compile::{CompiledConstraints, LayoutProperty, LinearConstraint, LinearExpression, LinearTerm};
 pub use solver::{ConstraintSystem, Solution};
 
 use seed_core::{Document, ConstraintError};
@@ -19,3 +22,12 @@ pub fn solve_constraints(doc: &Document) -> Result<Solution, ConstraintError> {
     system.add_document(doc)?;
     system.solve()
 }
+
+/// Solve constraints compiled ahead of time with [`CompiledConstraints::compile`].
+///
+/// Re-solving a document this way skips walking its expression trees.
+pub fn solve_compiled(compiled: &CompiledConstraints) -> Result<Solution, ConstraintError> {
+    let mut system = ConstraintSystem::new();
+    system.add_compiled(compiled)?;
+    system.solve()
+}
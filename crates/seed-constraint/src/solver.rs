@@ -5,14 +5,11 @@
 
 use std::collections::HashMap;
 
-use seed_core::{
-    ast::{self, ConstraintKind, Element, Expression as AstExpr, FrameElement, TextElement},
-    types::{ElementId, Length},
-    ConstraintError, ConstraintPriority, Document,
-};
+use seed_core::{types::ElementId, ConstraintError, Document};
 use indexmap::IndexMap;
 
-use crate::cassowary::{self, Constraint, Expression, Relation, Solver, Strength, Variable};
+use crate::cassowary::{self, Constraint, Expression, Solver, Variable};
+use crate::compile::{CompiledConstraints, LayoutProperty};
 
 /// Layout properties for an element.
 #[derive(Debug, Clone, Copy)]
@@ -24,6 +21,16 @@ pub struct ElementVars {
 }
 
 impl ElementVars {
+    /// Get the variable for a layout property.
+    pub fn get(&self, property: LayoutProperty) -> Variable {
+        match property {
+            LayoutProperty::X => self.x,
+            LayoutProperty::Y => self.y,
+            LayoutProperty::Width => self.width,
+            LayoutProperty::Height => self.height,
+        }
+    }
+
     /// Get center-x (x + width/2)
     pub fn center_x(&self, solver: &Solver) -> f64 {
         solver.get_value(self.x) + solver.get_value(self.width) / 2.0
@@ -71,14 +78,12 @@ impl Solution {
 #[derive(Debug)]
 pub struct ConstraintSystem {
     solver: Solver,
-    /// Map from element name to its variables
-    element_vars: HashMap<String, ElementVars>,
+    /// IDs and variables of every element added, in order
+    elements: Vec<(ElementId, ElementVars)>,
     /// Map from element ID to its name
     element_names: HashMap<ElementId, String>,
     /// Counter for generating element IDs
     id_counter: u64,
-    /// Parent stack for resolving Parent references
-    parent_stack: Vec<String>,
 }
 
 impl Default for ConstraintSystem {
@@ -92,198 +97,49 @@ impl ConstraintSystem {
     pub fn new() -> Self {
         Self {
             solver: Solver::new(),
-            element_vars: HashMap::new(),
+            elements: Vec::new(),
             element_names: HashMap::new(),
             id_counter: 0,
-            parent_stack: Vec::new(),
         }
     }
 
     /// Add constraints from a document.
     pub fn add_document(&mut self, doc: &Document) -> Result<(), ConstraintError> {
-        for element in &doc.elements {
-            self.add_element(element, None)?;
-        }
-        Ok(())
-    }
-
-    /// Add an element and its constraints.
-    fn add_element(
-        &mut self,
-        element: &Element,
-        parent: Option<&str>,
-    ) -> Result<String, ConstraintError> {
-        match element {
-            Element::Frame(frame) => self.add_frame(frame, parent),
-            Element::Text(text) => self.add_text(text, parent),
-            _ => {
-                // Skip unsupported element types for now
-                Ok(String::new())
-            }
-        }
-    }
-
-    /// Add a Frame element.
-    fn add_frame(
-        &mut self,
-        frame: &FrameElement,
-        parent: Option<&str>,
-    ) -> Result<String, ConstraintError> {
-        // Generate name matching layout system's convention
-        self.id_counter += 1;
-        let name = frame
-            .name
-            .as_ref()
-            .map(|n| n.0.clone())
-            .unwrap_or_else(|| format!("frame_{}", self.id_counter));
-
-        // Create variables for layout properties
-        let _vars = self.create_element_vars(&name);
-
-        // Add parent-relative constraints if we have a parent
-        if let Some(parent_name) = parent {
-            self.add_parent_constraints(&name, parent_name)?;
-        }
-
-        // Process explicit constraints
-        if let Some(parent_name) = parent {
-            self.parent_stack.push(parent_name.to_string());
-        }
-
-        for constraint in &frame.constraints {
-            self.add_constraint(&name, constraint)?;
-        }
-
-        // Also process layout-related properties as implicit constraints
-        self.add_properties_as_constraints(&name, &frame.properties)?;
-
-        // Process children
-        for child in &frame.children {
-            self.add_element(child, Some(&name))?;
-        }
-
-        if parent.is_some() {
-            self.parent_stack.pop();
-        }
-
-        Ok(name)
-    }
-
-    /// Add a Text element.
-    fn add_text(
-        &mut self,
-        text: &TextElement,
-        parent: Option<&str>,
-    ) -> Result<String, ConstraintError> {
-        // Generate name matching layout system's convention
-        self.id_counter += 1;
-        let name = text
-            .name
-            .as_ref()
-            .map(|n| n.0.clone())
-            .unwrap_or_else(|| format!("text_{}", self.id_counter));
-
-        // Create variables for layout properties
-        let _vars = self.create_element_vars(&name);
-
-        if let Some(parent_name) = parent {
-            self.add_parent_constraints(&name, parent_name)?;
-        }
-
-        // Process constraints
-        if let Some(parent_name) = parent {
-            self.parent_stack.push(parent_name.to_string());
-        }
-
-        for constraint in &text.constraints {
-            self.add_constraint(&name, constraint)?;
-        }
-
-        if parent.is_some() {
-            self.parent_stack.pop();
-        }
-
-        Ok(name)
-    }
-
-    /// Create variables for an element.
-    fn create_element_vars(&mut self, name: &str) -> ElementVars {
-        let vars = ElementVars {
-            x: self.solver.new_variable(),
-            y: self.solver.new_variable(),
-            width: self.solver.new_variable(),
-            height: self.solver.new_variable(),
-        };
-
-        // Use current counter value (already incremented by add_frame/add_text)
-        let id = ElementId(self.id_counter);
-        // Don't increment here - already done in add_frame/add_text
-
-        self.element_vars.insert(name.to_string(), vars);
-        self.element_names.insert(id, name.to_string());
-
-        vars
-    }
-
-    /// Add constraints that position an element relative to its parent.
-    fn add_parent_constraints(
-        &mut self,
-        _child: &str,
-        _parent: &str,
-    ) -> Result<(), ConstraintError> {
-        // By default, children start at (0, 0) relative to parent
-        // Explicit constraints will override this
-        Ok(())
-    }
-
-    /// Convert layout-related properties to implicit constraints.
-    fn add_properties_as_constraints(
-        &mut self,
-        element_name: &str,
-        properties: &[ast::Property],
-    ) -> Result<(), ConstraintError> {
-        use seed_core::ast::{Expression as AstExpr, PropertyValue};
-
-        for prop in properties {
-            // Only process layout-related properties
-            let layout_prop = match prop.name.as_str() {
-                "width" | "height" | "x" | "y" | "left" | "top" => true,
-                _ => false,
+        let compiled = CompiledConstraints::compile(doc)?;
+        self.add_compiled(&compiled)
+    }
+
+    /// Add constraints that were compiled ahead of time.
+    ///
+    /// Each element slot gets fresh variables, and each linear term maps
+    /// straight to one of them.
+    pub fn add_compiled(&mut self, compiled: &CompiledConstraints) -> Result<(), ConstraintError> {
+        let base = self.elements.len();
+
+        for name in compiled.element_names() {
+            self.id_counter += 1;
+            let id = ElementId(self.id_counter);
+            let vars = ElementVars {
+                x: self.solver.new_variable(),
+                y: self.solver.new_variable(),
+                width: self.solver.new_variable(),
+                height: self.solver.new_variable(),
             };
+            self.elements.push((id, vars));
+            self.element_names.insert(id, name.clone());
+        }
 
-            if !layout_prop {
-                continue;
+        for constraint in compiled.constraints() {
+            let mut expr = Expression::from_constant(constraint.expression.constant);
+            for term in &constraint.expression.terms {
+                let var = self.elements[base + term.slot].1.get(term.property);
+                expr.add_term(cassowary::Symbol::External(var.0), term.coefficient);
             }
 
-            // Convert property value to expression
-            let expression = match &prop.value {
-                PropertyValue::Length(len) => AstExpr::Length(len.clone()),
-                PropertyValue::Number(n) => AstExpr::Literal(*n),
-                _ => continue, // Skip non-numeric values
-            };
-
-            // Map property name to constraint property
-            let constraint_prop = match prop.name.as_str() {
-                "left" => "x",
-                "top" => "y",
-                other => other,
-            };
-
-            // Add as equality constraint with required strength
-            let vars = self.element_vars.get(element_name).ok_or_else(|| {
-                ConstraintError::UnknownProperty {
-                    property: element_name.to_string(),
-                    span: Default::default(),
-                }
-            })?;
-
-            let var = self.property_to_variable(vars, constraint_prop)?;
-            let expr = self.build_expression(var, &expression)?;
-
             self.solver
-                .add_constraint(Constraint::new(expr, Relation::Equal, Strength::REQUIRED))
+                .add_constraint(Constraint::new(expr, constraint.relation, constraint.strength))
                 .map_err(|_| ConstraintError::Unsatisfiable {
-                    constraint_desc: format!("{}.{} = {:?}", element_name, constraint_prop, prop.value),
+                    constraint_desc: constraint.describe(compiled.element_names()),
                     span: Default::default(),
                 })?;
         }
@@ -291,430 +147,14 @@ impl ConstraintSystem {
         Ok(())
     }
 
-    /// Add a single constraint.
-    fn add_constraint(
-        &mut self,
-        element_name: &str,
-        constraint: &ast::Constraint,
-    ) -> Result<(), ConstraintError> {
-        let strength = self.convert_priority(constraint.priority);
-
-        match &constraint.kind {
-            ConstraintKind::Equality { property, value } => {
-                self.add_equality_constraint(element_name, property, value, strength)?;
-            }
-            ConstraintKind::Inequality { property, op, value } => {
-                self.add_inequality_constraint(element_name, property, *op, value, strength)?;
-            }
-            ConstraintKind::Alignment { edge, target, target_edge } => {
-                self.add_alignment_constraint(
-                    element_name,
-                    *edge,
-                    target,
-                    *target_edge,
-                    strength,
-                )?;
-            }
-            ConstraintKind::Relative { relation, target, gap } => {
-                self.add_relative_constraint(element_name, *relation, target, gap.as_ref(), strength)?;
-            }
-        }
-
-        Ok(())
-    }
-
-    /// Convert Seed priority to Cassowary strength.
-    fn convert_priority(&self, priority: Option<ConstraintPriority>) -> Strength {
-        match priority.unwrap_or(ConstraintPriority::Required) {
-            ConstraintPriority::Required => Strength::REQUIRED,
-            ConstraintPriority::High => Strength::STRONG,
-            ConstraintPriority::Medium => Strength::MEDIUM,
-            ConstraintPriority::Low | ConstraintPriority::Weak => Strength::WEAK,
-        }
-    }
-
-    /// Add an equality constraint (property = value).
-    fn add_equality_constraint(
-        &mut self,
-        element_name: &str,
-        property: &str,
-        value: &AstExpr,
-        strength: Strength,
-    ) -> Result<(), ConstraintError> {
-        let vars = self.element_vars.get(element_name).ok_or_else(|| {
-            ConstraintError::UnknownProperty {
-                property: element_name.to_string(),
-                span: Default::default(),
-            }
-        })?;
-
-        let var = self.property_to_variable(vars, property)?;
-        let expr = self.build_expression(var, value)?;
-
-        self.solver
-            .add_constraint(Constraint::new(expr, Relation::Equal, strength))
-            .map_err(|_| ConstraintError::Unsatisfiable {
-                constraint_desc: format!("{}.{} = {:?}", element_name, property, value),
-                span: Default::default(),
-            })?;
-
-        Ok(())
-    }
-
-    /// Add an inequality constraint.
-    fn add_inequality_constraint(
-        &mut self,
-        element_name: &str,
-        property: &str,
-        op: ast::InequalityOp,
-        value: &AstExpr,
-        strength: Strength,
-    ) -> Result<(), ConstraintError> {
-        let vars = self.element_vars.get(element_name).ok_or_else(|| {
-            ConstraintError::UnknownProperty {
-                property: element_name.to_string(),
-                span: Default::default(),
-            }
-        })?;
-
-        let var = self.property_to_variable(vars, property)?;
-        let expr = self.build_expression(var, value)?;
-
-        let relation = match op {
-            ast::InequalityOp::LessThan | ast::InequalityOp::LessThanOrEqual => Relation::LessOrEqual,
-            ast::InequalityOp::GreaterThan | ast::InequalityOp::GreaterThanOrEqual => {
-                Relation::GreaterOrEqual
-            }
-        };
-
-        self.solver
-            .add_constraint(Constraint::new(expr, relation, strength))
-            .map_err(|_| ConstraintError::Unsatisfiable {
-                constraint_desc: format!("{}.{} {:?} {:?}", element_name, property, op, value),
-                span: Default::default(),
-            })?;
-
-        Ok(())
-    }
-
-    /// Add an alignment constraint (edge align target).
-    fn add_alignment_constraint(
-        &mut self,
-        element_name: &str,
-        edge: ast::Edge,
-        target: &ast::ElementRef,
-        target_edge: Option<ast::Edge>,
-        strength: Strength,
-    ) -> Result<(), ConstraintError> {
-        let target_name = self.resolve_element_ref(target)?;
-        let target_vars = self.element_vars.get(&target_name).cloned().ok_or_else(|| {
-            ConstraintError::UnknownProperty {
-                property: target_name.clone(),
-                span: Default::default(),
-            }
-        })?;
-
-        let element_vars = self.element_vars.get(element_name).cloned().ok_or_else(|| {
-            ConstraintError::UnknownProperty {
-                property: element_name.to_string(),
-                span: Default::default(),
-            }
-        })?;
-
-        let target_edge = target_edge.unwrap_or(edge);
-
-        // Build expression: element.edge = target.target_edge
-        let expr = self.build_alignment_expression(&element_vars, edge, &target_vars, target_edge)?;
-
-        self.solver
-            .add_constraint(Constraint::new(expr, Relation::Equal, strength))
-            .map_err(|_| ConstraintError::Unsatisfiable {
-                constraint_desc: format!("{:?} align {}", edge, target_name),
-                span: Default::default(),
-            })?;
-
-        Ok(())
-    }
-
-    /// Add a relative constraint (below/above/leftOf/rightOf target).
-    fn add_relative_constraint(
-        &mut self,
-        element_name: &str,
-        relation: ast::Relation,
-        target: &ast::ElementRef,
-        gap: Option<&Length>,
-        strength: Strength,
-    ) -> Result<(), ConstraintError> {
-        let target_name = self.resolve_element_ref(target)?;
-        let target_vars = self.element_vars.get(&target_name).cloned().ok_or_else(|| {
-            ConstraintError::UnknownProperty {
-                property: target_name.clone(),
-                span: Default::default(),
-            }
-        })?;
-
-        let element_vars = self.element_vars.get(element_name).cloned().ok_or_else(|| {
-            ConstraintError::UnknownProperty {
-                property: element_name.to_string(),
-                span: Default::default(),
-            }
-        })?;
-
-        let gap_value = gap.and_then(|g| g.to_px(None)).unwrap_or(0.0);
-
-        // Build the appropriate constraint based on relation
-        let expr = match relation {
-            ast::Relation::Below => {
-                // element.y = target.y + target.height + gap
-                let mut expr = Expression::from_variable(element_vars.y);
-                expr.add_term(cassowary::Symbol::External(target_vars.y.0), -1.0);
-                expr.add_term(cassowary::Symbol::External(target_vars.height.0), -1.0);
-                expr.constant = -gap_value;
-                expr
-            }
-            ast::Relation::Above => {
-                // element.y + element.height + gap = target.y
-                let mut expr = Expression::from_variable(element_vars.y);
-                expr.add_term(cassowary::Symbol::External(element_vars.height.0), 1.0);
-                expr.add_term(cassowary::Symbol::External(target_vars.y.0), -1.0);
-                expr.constant = gap_value;
-                expr
-            }
-            ast::Relation::RightOf => {
-                // element.x = target.x + target.width + gap
-                let mut expr = Expression::from_variable(element_vars.x);
-                expr.add_term(cassowary::Symbol::External(target_vars.x.0), -1.0);
-                expr.add_term(cassowary::Symbol::External(target_vars.width.0), -1.0);
-                expr.constant = -gap_value;
-                expr
-            }
-            ast::Relation::LeftOf => {
-                // element.x + element.width + gap = target.x
-                let mut expr = Expression::from_variable(element_vars.x);
-                expr.add_term(cassowary::Symbol::External(element_vars.width.0), 1.0);
-                expr.add_term(cassowary::Symbol::External(target_vars.x.0), -1.0);
-                expr.constant = gap_value;
-                expr
-            }
-        };
-
-        self.solver
-            .add_constraint(Constraint::new(expr, Relation::Equal, strength))
-            .map_err(|_| ConstraintError::Unsatisfiable {
-                constraint_desc: format!("{:?} {:?}", relation, target_name),
-                span: Default::default(),
-            })?;
-
-        Ok(())
-    }
-
-    /// Resolve an element reference to a name.
-    fn resolve_element_ref(&self, target: &ast::ElementRef) -> Result<String, ConstraintError> {
-        match target {
-            ast::ElementRef::Parent => self.parent_stack.last().cloned().ok_or_else(|| {
-                ConstraintError::UnknownProperty {
-                    property: "Parent".to_string(),
-                    span: Default::default(),
-                }
-            }),
-            ast::ElementRef::Named(name) => Ok(name.0.clone()),
-            ast::ElementRef::Previous | ast::ElementRef::Next => {
-                // TODO: Implement sibling references
-                Err(ConstraintError::UnknownProperty {
-                    property: "Previous/Next".to_string(),
-                    span: Default::default(),
-                })
-            }
-        }
-    }
-
-    /// Get the variable for a property.
-    fn property_to_variable(
-        &self,
-        vars: &ElementVars,
-        property: &str,
-    ) -> Result<Variable, ConstraintError> {
-        match property {
-            "x" | "left" => Ok(vars.x),
-            "y" | "top" => Ok(vars.y),
-            "width" => Ok(vars.width),
-            "height" => Ok(vars.height),
-            _ => Err(ConstraintError::UnknownProperty {
-                property: property.to_string(),
-                span: Default::default(),
-            }),
-        }
-    }
-
-    /// Build an expression: var - value = 0 (i.e., var = value)
-    fn build_expression(
-        &self,
-        var: Variable,
-        value: &AstExpr,
-    ) -> Result<Expression, ConstraintError> {
-        let mut expr = Expression::from_variable(var);
-
-        match value {
-            AstExpr::Literal(n) => {
-                expr.constant = -*n;
-            }
-            AstExpr::Length(len) => {
-                let px = len.to_px(None).unwrap_or(0.0);
-                expr.constant = -px;
-            }
-            AstExpr::PropertyRef { element, property } => {
-                let target_name = self.resolve_element_ref(element)?;
-                let target_vars = self.element_vars.get(&target_name).ok_or_else(|| {
-                    ConstraintError::UnknownProperty {
-                        property: target_name.clone(),
-                        span: Default::default(),
-                    }
-                })?;
-                let target_var = self.property_to_variable(target_vars, property)?;
-                expr.add_term(cassowary::Symbol::External(target_var.0), -1.0);
-            }
-            AstExpr::BinaryOp { left, op, right } => {
-                // For binary ops, we need to recursively evaluate
-                // This is simplified - full implementation would handle complex expressions
-                let left_val = self.evaluate_constant(left)?;
-                let right_val = self.evaluate_constant(right)?;
-                let result = match op {
-                    ast::BinaryOp::Add => left_val + right_val,
-                    ast::BinaryOp::Sub => left_val - right_val,
-                    ast::BinaryOp::Mul => left_val * right_val,
-                    ast::BinaryOp::Div => left_val / right_val,
-                };
-                expr.constant = -result;
-            }
-            AstExpr::Function { name, args } => {
-                // Handle min/max functions
-                let result = self.evaluate_function(name, args)?;
-                expr.constant = -result;
-            }
-            AstExpr::TokenRef(_) => {
-                // Token refs should be resolved before constraint solving
-                expr.constant = 0.0;
-            }
-        }
-
-        Ok(expr)
-    }
-
-    /// Evaluate a constant expression.
-    fn evaluate_constant(&self, expr: &AstExpr) -> Result<f64, ConstraintError> {
-        match expr {
-            AstExpr::Literal(n) => Ok(*n),
-            AstExpr::Length(len) => Ok(len.to_px(None).unwrap_or(0.0)),
-            AstExpr::BinaryOp { left, op, right } => {
-                let l = self.evaluate_constant(left)?;
-                let r = self.evaluate_constant(right)?;
-                Ok(match op {
-                    ast::BinaryOp::Add => l + r,
-                    ast::BinaryOp::Sub => l - r,
-                    ast::BinaryOp::Mul => l * r,
-                    ast::BinaryOp::Div => l / r,
-                })
-            }
-            AstExpr::Function { name, args } => self.evaluate_function(name, args),
-            _ => Ok(0.0), // Property refs need actual solving
-        }
-    }
-
-    /// Evaluate a function (min, max).
-    fn evaluate_function(&self, name: &str, args: &[AstExpr]) -> Result<f64, ConstraintError> {
-        let values: Result<Vec<f64>, _> = args.iter().map(|a| self.evaluate_constant(a)).collect();
-        let values = values?;
-
-        match name {
-            "min" => Ok(values.iter().copied().fold(f64::INFINITY, f64::min)),
-            "max" => Ok(values.iter().copied().fold(f64::NEG_INFINITY, f64::max)),
-            _ => Ok(0.0),
-        }
-    }
-
-    /// Build an alignment expression.
-    fn build_alignment_expression(
-        &self,
-        element: &ElementVars,
-        edge: ast::Edge,
-        target: &ElementVars,
-        target_edge: ast::Edge,
-    ) -> Result<Expression, ConstraintError> {
-        // element.edge = target.target_edge
-        // => element.edge - target.target_edge = 0
-
-        let mut expr = Expression::default();
-
-        // Add element side
-        match edge {
-            ast::Edge::Left => {
-                expr.add_term(cassowary::Symbol::External(element.x.0), 1.0);
-            }
-            ast::Edge::Right => {
-                expr.add_term(cassowary::Symbol::External(element.x.0), 1.0);
-                expr.add_term(cassowary::Symbol::External(element.width.0), 1.0);
-            }
-            ast::Edge::Top => {
-                expr.add_term(cassowary::Symbol::External(element.y.0), 1.0);
-            }
-            ast::Edge::Bottom => {
-                expr.add_term(cassowary::Symbol::External(element.y.0), 1.0);
-                expr.add_term(cassowary::Symbol::External(element.height.0), 1.0);
-            }
-            ast::Edge::CenterX => {
-                expr.add_term(cassowary::Symbol::External(element.x.0), 1.0);
-                expr.add_term(cassowary::Symbol::External(element.width.0), 0.5);
-            }
-            ast::Edge::CenterY => {
-                expr.add_term(cassowary::Symbol::External(element.y.0), 1.0);
-                expr.add_term(cassowary::Symbol::External(element.height.0), 0.5);
-            }
-        }
-
-        // Subtract target side
-        match target_edge {
-            ast::Edge::Left => {
-                expr.add_term(cassowary::Symbol::External(target.x.0), -1.0);
-            }
-            ast::Edge::Right => {
-                expr.add_term(cassowary::Symbol::External(target.x.0), -1.0);
-                expr.add_term(cassowary::Symbol::External(target.width.0), -1.0);
-            }
-            ast::Edge::Top => {
-                expr.add_term(cassowary::Symbol::External(target.y.0), -1.0);
-            }
-            ast::Edge::Bottom => {
-                expr.add_term(cassowary::Symbol::External(target.y.0), -1.0);
-                expr.add_term(cassowary::Symbol::External(target.height.0), -1.0);
-            }
-            ast::Edge::CenterX => {
-                expr.add_term(cassowary::Symbol::External(target.x.0), -1.0);
-                expr.add_term(cassowary::Symbol::External(target.width.0), -0.5);
-            }
-            ast::Edge::CenterY => {
-                expr.add_term(cassowary::Symbol::External(target.y.0), -1.0);
-                expr.add_term(cassowary::Symbol::External(target.height.0), -0.5);
-            }
-        }
-
-        Ok(expr)
-    }
-
     /// Solve the constraint system.
     pub fn solve(&mut self) -> Result<Solution, ConstraintError> {
         self.solver.update_variables();
 
         let mut solution = Solution::default();
 
-        for (name, vars) in &self.element_vars {
-            // Find the element ID for this name
-            let id = self
-                .element_names
-                .iter()
-                .find(|(_, n)| *n == name)
-                .map(|(id, _)| *id)
-                .unwrap_or(ElementId(0));
-
+        for (id, vars) in &self.elements {
+            let id = *id;
             solution
                 .variables
                 .insert((id, "x".to_string()), self.solver.get_value(vars.x));
@@ -733,11 +173,21 @@ impl ConstraintSystem {
     }
 
     /// Get the element ID for a given name.
+    ///
+    /// Names need not be unique; this returns the first element added with
+    /// the name. Use [`element_id`](Self::element_id) to address a specific
+    /// element.
     pub fn get_element_id(&self, name: &str) -> Option<ElementId> {
-        self.element_names
+        self.elements
             .iter()
-            .find(|(_, n)| *n == name)
             .map(|(id, _)| *id)
+            .find(|id| self.element_names[id] == name)
+    }
+
+    /// Get the element ID for a slot, counting elements in the order they
+    /// were added (see [`CompiledConstraints::element_names`]).
+    pub fn element_id(&self, slot: usize) -> Option<ElementId> {
+        self.elements.get(slot).map(|(id, _)| *id)
     }
 
     /// Get the element name for a given ID.
@@ -745,9 +195,11 @@ impl ConstraintSystem {
         self.element_names.get(&id).map(|s| s.as_str())
     }
 
-    /// Iterate over all element IDs and names.
+    /// Iterate over all element IDs and names, in the order they were added.
     pub fn elements(&self) -> impl Iterator<Item = (ElementId, &str)> {
-        self.element_names.iter().map(|(id, name)| (*id, name.as_str()))
+        self.elements
+            .iter()
+            .map(|(id, _)| (*id, self.element_names[id].as_str()))
     }
 }
 
@@ -755,7 +207,7 @@ impl ConstraintSystem {
 mod tests {
     use super::*;
     use seed_core::ast::*;
-    use seed_core::types::Identifier;
+    use seed_core::types::{Identifier, Length};
 
     fn make_frame(name: &str, constraints: Vec<Constraint>) -> Element {
         Element::Frame(FrameElement {
@@ -769,7 +221,7 @@ mod tests {
                     span: Span::default(),
                 })
                 .collect(),
-            children: vec![],
+            children: vec![].into(),
             span: Span::default(),
         })
     }
@@ -789,13 +241,13 @@ mod tests {
                     Constraint {
                         kind: ConstraintKind::Equality {
                             property: "width".to_string(),
-                            value: AstExpr::Length(Length::px(100.0)),
+                            value: seed_core::ast::Expression::Length(Length::px(100.0)),
                         },
                     },
                     Constraint {
                         kind: ConstraintKind::Equality {
                             property: "height".to_string(),
-                            value: AstExpr::Length(Length::px(50.0)),
+                            value: seed_core::ast::Expression::Length(Length::px(50.0)),
                         },
                     },
                 ],
@@ -813,4 +265,53 @@ mod tests {
         assert!((solution.get(box_id, "width").unwrap() - 100.0).abs() < 0.001);
         assert!((solution.get(box_id, "height").unwrap() - 50.0).abs() < 0.001);
     }
+
+    #[test]
+    fn test_compiled_constraints_resolve_repeatedly() {
+        // Inner.width = Box.width - 20px, declared before Box gets its width
+        let inner = Element::Frame(FrameElement {
+            name: Some(Identifier("Inner".to_string())),
+            properties: vec![],
+            constraints: vec![seed_core::ast::Constraint {
+                kind: ConstraintKind::Equality {
+                    property: "width".to_string(),
+                    value: seed_core::ast::Expression::BinaryOp {
+                        left: Box::new(seed_core::ast::Expression::PropertyRef {
+                            element: ElementRef::Parent,
+                            property: "width".to_string(),
+                        }),
+                        op: BinaryOp::Sub,
+                        right: Box::new(seed_core::ast::Expression::Length(Length::px(20.0))),
+                    },
+                },
+                priority: None,
+                span: Span::default(),
+            }],
+            children: vec![].into(),
+            span: Span::default(),
+        });
+        let mut outer = make_frame(
+            "Box",
+            vec![Constraint {
+                kind: ConstraintKind::Equality {
+                    property: "width".to_string(),
+                    value: seed_core::ast::Expression::Length(Length::px(100.0)),
+                },
+            }],
+        );
+        if let Element::Frame(frame) = &mut outer {
+            frame.children.push(inner);
+        }
+        let doc = Document { meta: None, tokens: None, elements: vec![outer], span: Span::default() };
+
+        let compiled = CompiledConstraints::compile(&doc).unwrap();
+        for _ in 0..2 {
+            let mut system = ConstraintSystem::new();
+            system.add_compiled(&compiled).unwrap();
+            let solution = system.solve().unwrap();
+
+            let inner_id = system.get_element_id("Inner").unwrap();
+            assert!((solution.get(inner_id, "width").unwrap() - 80.0).abs() < 0.001);
+        }
+    }
 }
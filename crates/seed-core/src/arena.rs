@@ -0,0 +1,624 @@
+//! Arena-allocated AST for Seed documents.
+//!
+//! [`Arena`] is a bump allocator: nodes are placed one after another in a
+//! few large chunks, and dropping the arena releases every chunk at once
+//! instead of freeing each node. The AST types in this module hold slices
+//! and references into an arena rather than `Vec`s and `Box`es, so a whole
+//! document costs a handful of allocations to build and to free.
+//!
+//! Nodes are `Copy` and have no destructors. The few values that own heap
+//! data (gradients and transforms) are stored with [`Arena::alloc_owned`],
+//! which drops them together with the arena.
+//!
+//! No stage after parsing reads these types: resolution, expansion, layout
+//! and rendering work on the owned [`crate::ast`]. [`Document::into_owned`]
+//! converts by deep-copying every node and string, so it is meant for tests
+//! and occasional hand-off, not as a step of the normal pipeline.
+
+use std::alloc::{self, Layout};
+use std::cell::{Cell, RefCell};
+use std::fmt;
+use std::mem;
+use std::ptr::{self, NonNull};
+
+use crate::ast;
+use crate::borrowed;
+use crate::names::PropertyName;
+use crate::types::{Color, Gradient, Identifier, Length, Shadow, Transform};
+
+pub use crate::ast::{BinaryOp, ConstraintPriority, Edge, InequalityOp, Relation, Span};
+
+/// Size of the first chunk of an arena.
+const FIRST_CHUNK_SIZE: usize = 8 * 1024;
+
+/// Chunks stop doubling in size at this limit.
+const MAX_CHUNK_SIZE: usize = 16 * 1024 * 1024;
+
+/// Alignment of every chunk.
+const CHUNK_ALIGN: usize = 16;
+
+/// A bump allocator that frees everything it allocated when dropped.
+pub struct Arena {
+    /// Start and size of every chunk. Only nodes are ever referenced inside
+    /// a chunk, never the chunk as a whole.
+    chunks: RefCell<Vec<(NonNull<u8>, usize)>>,
+    /// Next free byte in the current chunk.
+    ptr: Cell<*mut u8>,
+    /// End of the current chunk.
+    end: Cell<*mut u8>,
+    /// Size of the next chunk to allocate.
+    next_chunk_size: Cell<usize>,
+    /// Total size of the chunks.
+    allocated: Cell<usize>,
+    /// Values with destructors, dropped with the arena.
+    drops: RefCell<Vec<(*mut u8, unsafe fn(*mut u8))>>,
+}
+
+impl Arena {
+    /// Create an empty arena. No memory is allocated until the first node.
+    pub fn new() -> Self {
+        Self::with_capacity(FIRST_CHUNK_SIZE)
+    }
+
+    /// Create an empty arena whose first chunk holds at least `capacity` bytes.
+    pub fn with_capacity(capacity: usize) -> Self {
+        Self {
+            chunks: RefCell::new(Vec::new()),
+            ptr: Cell::new(ptr::null_mut()),
+            end: Cell::new(ptr::null_mut()),
+            next_chunk_size: Cell::new(capacity.max(FIRST_CHUNK_SIZE)),
+            allocated: Cell::new(0),
+            drops: RefCell::new(Vec::new()),
+        }
+    }
+
+    /// Move `value` into the arena.
+    pub fn alloc<T: Copy>(&self, value: T) -> &mut T {
+        let slot = self.alloc_layout(Layout::new::<T>()) as *mut T;
+        // SAFETY: the slot is fresh, aligned and sized for `T`
+        unsafe {
+            slot.write(value);
+            &mut *slot
+        }
+    }
+
+    /// Copy `values` into the arena.
+    pub fn alloc_slice_copy<T: Copy>(&self, values: &[T]) -> &mut [T] {
+        if values.is_empty() {
+            return &mut [];
+        }
+        let slot = self.alloc_layout(Layout::for_value(values)) as *mut T;
+        // SAFETY: the slot is fresh, aligned and sized for `values.len()` `T`s
+        unsafe {
+            ptr::copy_nonoverlapping(values.as_ptr(), slot, values.len());
+            std::slice::from_raw_parts_mut(slot, values.len())
+        }
+    }
+
+    /// Copy `s` into the arena.
+    pub fn alloc_str(&self, s: &str) -> &str {
+        let bytes = self.alloc_slice_copy(s.as_bytes());
+        // SAFETY: copied from a valid `str`
+        unsafe { std::str::from_utf8_unchecked(bytes) }
+    }
+
+    /// Move a value that owns heap data into the arena; it is dropped when
+    /// the arena is.
+    pub fn alloc_owned<T: 'static>(&self, value: T) -> &mut T {
+        let slot = self.alloc_layout(Layout::new::<T>()) as *mut T;
+        // SAFETY: the slot is fresh, aligned and sized for `T`
+        unsafe { slot.write(value) };
+        if mem::needs_drop::<T>() {
+            self.drops.borrow_mut().push((slot as *mut u8, drop_erased::<T>));
+        }
+        // SAFETY: initialized above
+        unsafe { &mut *slot }
+    }
+
+    /// Total bytes reserved by the arena's chunks.
+    pub fn allocated_bytes(&self) -> usize {
+        self.allocated.get()
+    }
+
+    fn alloc_layout(&self, layout: Layout) -> *mut u8 {
+        if layout.size() == 0 {
+            return layout.align() as *mut u8;
+        }
+
+        let ptr = self.ptr.get();
+        let pad = ptr.align_offset(layout.align());
+        let available = self.end.get() as usize - ptr as usize;
+        if pad.checked_add(layout.size()).is_some_and(|needed| needed <= available) {
+            // SAFETY: in bounds of the current chunk
+            unsafe {
+                let start = ptr.add(pad);
+                self.ptr.set(start.add(layout.size()));
+                return start;
+            }
+        }
+
+        self.grow(layout);
+        self.alloc_layout(layout)
+    }
+
+    /// Start a new chunk large enough for `layout`.
+    fn grow(&self, layout: Layout) {
+        let size = self.next_chunk_size.get().max(layout.size() + layout.align());
+        self.next_chunk_size.set((size * 2).min(MAX_CHUNK_SIZE));
+
+        let chunk_layout = Layout::from_size_align(size, CHUNK_ALIGN).expect("arena chunk too large");
+        // SAFETY: `size` is non-zero
+        let start = unsafe { alloc::alloc(chunk_layout) };
+        let Some(start) = NonNull::new(start) else {
+            alloc::handle_alloc_error(chunk_layout);
+        };
+
+        self.chunks.borrow_mut().push((start, size));
+        self.allocated.set(self.allocated.get() + size);
+        self.ptr.set(start.as_ptr());
+        // SAFETY: `start + size` is the end of the chunk
+        self.end.set(unsafe { start.as_ptr().add(size) });
+    }
+}
+
+impl Default for Arena {
+    fn default() -> Self {
+        Self::new()
+    }
+}
+
+impl Drop for Arena {
+    fn drop(&mut self) {
+        for (value, drop_fn) in self.drops.get_mut().drain(..) {
+            // SAFETY: registered by `alloc_owned` for a value of the matching type
+            unsafe { drop_fn(value) };
+        }
+        for &(start, size) in self.chunks.get_mut().iter() {
+            // SAFETY: allocated by `grow` with this layout, and no node
+            // outlives the arena
+            unsafe { alloc::dealloc(start.as_ptr(), Layout::from_size_align_unchecked(size, CHUNK_ALIGN)) };
+        }
+    }
+}
+
+impl fmt::Debug for Arena {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        f.debug_struct("Arena")
+            .field("chunks", &self.chunks.borrow().len())
+            .field("allocated_bytes", &self.allocated_bytes())
+            .finish()
+    }
+}
+
+unsafe fn drop_erased<T>(value: *mut u8) {
+    unsafe { ptr::drop_in_place(value as *mut T) }
+}
+
+/// A complete Seed document allocated in an [`Arena`].
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub struct Document<'a> {
+    /// Top-level elements
+    pub elements: &'a [Element<'a>],
+    /// Source span for error reporting
+    pub span: Span,
+}
+
+impl<'a> Document<'a> {
+    /// Convert to an owned [`ast::Document`] that no longer borrows the arena.
+    ///
+    /// This copies the whole tree, including every string.
+    pub fn into_owned(self) -> ast::Document {
+        ast::Document {
+            meta: None,
+            tokens: None,
+            elements: self.elements.iter().map(|e| e.into_owned()).collect(),
+            span: self.span,
+        }
+    }
+}
+
+/// A token path like `color.primary`.
+#[derive(Debug, Clone, Copy, PartialEq, Eq, Hash)]
+pub struct TokenPath<'a>(pub &'a [&'a str]);
+
+impl<'a> TokenPath<'a> {
+    pub fn from_borrowed(path: &borrowed::TokenPath<'a>, arena: &'a Arena) -> Self {
+        TokenPath(arena.alloc_slice_copy(&path.0))
+    }
+
+    pub fn into_owned(self) -> ast::TokenPath {
+        ast::TokenPath(self.0.iter().map(|s| s.to_string()).collect())
+    }
+}
+
+/// An element in the document.
+///
+/// Only the element kinds produced by the parser are represented.
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub enum Element<'a> {
+    Frame(FrameElement<'a>),
+    Text(TextElement<'a>),
+}
+
+impl<'a> Element<'a> {
+    pub fn into_owned(self) -> ast::Element {
+        match self {
+            Element::Frame(f) => ast::Element::Frame(f.into_owned()),
+            Element::Text(t) => ast::Element::Text(t.into_owned()),
+        }
+    }
+}
+
+/// A Frame element (2D container).
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub struct FrameElement<'a> {
+    pub name: Option<&'a str>,
+    pub properties: &'a [Property<'a>],
+    pub constraints: &'a [Constraint<'a>],
+    pub children: &'a [Element<'a>],
+    pub span: Span,
+}
+
+impl<'a> FrameElement<'a> {
+    pub fn into_owned(self) -> ast::FrameElement {
+        ast::FrameElement {
+            name: self.name.map(Identifier::from),
+            properties: owned_properties(self.properties),
+            constraints: owned_constraints(self.constraints),
+            children: self.children.iter().map(|e| e.into_owned()).collect(),
+            span: self.span,
+        }
+    }
+}
+
+/// A Text element.
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub struct TextElement<'a> {
+    pub name: Option<&'a str>,
+    pub content: TextContent<'a>,
+    pub properties: &'a [Property<'a>],
+    pub constraints: &'a [Constraint<'a>],
+    pub span: Span,
+}
+
+impl<'a> TextElement<'a> {
+    pub fn into_owned(self) -> ast::TextElement {
+        ast::TextElement {
+            name: self.name.map(Identifier::from),
+            content: self.content.into_owned(),
+            properties: owned_properties(self.properties),
+            constraints: owned_constraints(self.constraints),
+            span: self.span,
+        }
+    }
+}
+
+/// Text content (literal or token reference).
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub enum TextContent<'a> {
+    Literal(&'a str),
+    TokenRef(TokenPath<'a>),
+}
+
+impl<'a> TextContent<'a> {
+    pub fn into_owned(self) -> ast::TextContent {
+        match self {
+            TextContent::Literal(s) => ast::TextContent::Literal(s.to_string()),
+            TextContent::TokenRef(path) => ast::TextContent::TokenRef(path.into_owned()),
+        }
+    }
+}
+
+/// An element property.
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub struct Property<'a> {
+    pub name: PropertyName,
+    pub value: PropertyValue<'a>,
+    pub span: Span,
+}
+
+impl<'a> Property<'a> {
+    pub fn into_owned(self) -> ast::Property {
+        ast::Property {
+            name: self.name,
+            value: self.value.into_owned(),
+            span: self.span,
+        }
+    }
+}
+
+/// A property value.
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub enum PropertyValue<'a> {
+    Color(Color),
+    Gradient(&'a Gradient),
+    Shadow(Shadow),
+    Transform(&'a Transform),
+    Length(Length),
+    Number(f64),
+    String(&'a str),
+    Boolean(bool),
+    TokenRef(TokenPath<'a>),
+    Enum(&'a str),
+    /// Reference to a component prop (used in templates)
+    PropRef(&'a str),
+}
+
+impl<'a> PropertyValue<'a> {
+    pub fn from_borrowed(value: borrowed::PropertyValue<'a>, arena: &'a Arena) -> Self {
+        match value {
+            borrowed::PropertyValue::Color(c) => PropertyValue::Color(c),
+            borrowed::PropertyValue::Gradient(g) => PropertyValue::Gradient(arena.alloc_owned(g)),
+            borrowed::PropertyValue::Shadow(s) => PropertyValue::Shadow(s),
+            borrowed::PropertyValue::Transform(t) => PropertyValue::Transform(arena.alloc_owned(t)),
+            borrowed::PropertyValue::Length(l) => PropertyValue::Length(l),
+            borrowed::PropertyValue::Number(n) => PropertyValue::Number(n),
+            borrowed::PropertyValue::String(s) => PropertyValue::String(s),
+            borrowed::PropertyValue::Boolean(b) => PropertyValue::Boolean(b),
+            borrowed::PropertyValue::TokenRef(path) => {
+                PropertyValue::TokenRef(TokenPath::from_borrowed(&path, arena))
+            }
+            borrowed::PropertyValue::Enum(s) => PropertyValue::Enum(s),
+            borrowed::PropertyValue::PropRef(s) => PropertyValue::PropRef(s),
+        }
+    }
+
+    pub fn into_owned(self) -> ast::PropertyValue {
+        match self {
+            PropertyValue::Color(c) => ast::PropertyValue::Color(c),
+            PropertyValue::Gradient(g) => ast::PropertyValue::Gradient(g.clone()),
+            PropertyValue::Shadow(s) => ast::PropertyValue::Shadow(s),
+            PropertyValue::Transform(t) => ast::PropertyValue::Transform(t.clone()),
+            PropertyValue::Length(l) => ast::PropertyValue::Length(l),
+            PropertyValue::Number(n) => ast::PropertyValue::Number(n),
+            PropertyValue::String(s) => ast::PropertyValue::String(s.to_string()),
+            PropertyValue::Boolean(b) => ast::PropertyValue::Boolean(b),
+            PropertyValue::TokenRef(path) => ast::PropertyValue::TokenRef(path.into_owned()),
+            PropertyValue::Enum(s) => ast::PropertyValue::Enum(s.to_string()),
+            PropertyValue::PropRef(s) => ast::PropertyValue::PropRef(ast::PropRef(s.to_string())),
+        }
+    }
+}
+
+/// A constraint on an element.
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub struct Constraint<'a> {
+    pub kind: ConstraintKind<'a>,
+    pub priority: Option<ConstraintPriority>,
+    pub span: Span,
+}
+
+impl<'a> Constraint<'a> {
+    pub fn from_borrowed(constraint: borrowed::Constraint<'a>, arena: &'a Arena) -> Self {
+        Constraint {
+            kind: ConstraintKind::from_borrowed(constraint.kind, arena),
+            priority: constraint.priority,
+            span: constraint.span,
+        }
+    }
+
+    pub fn into_owned(self) -> ast::Constraint {
+        ast::Constraint {
+            kind: self.kind.into_owned(),
+            priority: self.priority,
+            span: self.span,
+        }
+    }
+}
+
+/// Types of constraints.
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub enum ConstraintKind<'a> {
+    /// width = 100px
+    Equality { property: &'a str, value: Expression<'a> },
+    /// center-x align Parent
+    Alignment { edge: Edge, target: ElementRef<'a>, target_edge: Option<Edge> },
+    /// below Header, gap: 24px
+    Relative { relation: Relation, target: ElementRef<'a>, gap: Option<Length> },
+    /// width >= 100px
+    Inequality { property: &'a str, op: InequalityOp, value: Expression<'a> },
+}
+
+impl<'a> ConstraintKind<'a> {
+    pub fn from_borrowed(kind: borrowed::ConstraintKind<'a>, arena: &'a Arena) -> Self {
+        match kind {
+            borrowed::ConstraintKind::Equality { property, value } => ConstraintKind::Equality {
+                property,
+                value: Expression::from_borrowed(value, arena),
+            },
+            borrowed::ConstraintKind::Alignment { edge, target, target_edge } => {
+                ConstraintKind::Alignment { edge, target: target.into(), target_edge }
+            }
+            borrowed::ConstraintKind::Relative { relation, target, gap } => {
+                ConstraintKind::Relative { relation, target: target.into(), gap }
+            }
+            borrowed::ConstraintKind::Inequality { property, op, value } => ConstraintKind::Inequality {
+                property,
+                op,
+                value: Expression::from_borrowed(value, arena),
+            },
+        }
+    }
+
+    pub fn into_owned(self) -> ast::ConstraintKind {
+        match self {
+            ConstraintKind::Equality { property, value } => ast::ConstraintKind::Equality {
+                property: property.to_string(),
+                value: value.into_owned(),
+            },
+            ConstraintKind::Alignment { edge, target, target_edge } => ast::ConstraintKind::Alignment {
+                edge,
+                target: target.into_owned(),
+                target_edge,
+            },
+            ConstraintKind::Relative { relation, target, gap } => ast::ConstraintKind::Relative {
+                relation,
+                target: target.into_owned(),
+                gap,
+            },
+            ConstraintKind::Inequality { property, op, value } => ast::ConstraintKind::Inequality {
+                property: property.to_string(),
+                op,
+                value: value.into_owned(),
+            },
+        }
+    }
+}
+
+/// Reference to another element.
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub enum ElementRef<'a> {
+    Parent,
+    Named(&'a str),
+    Previous,
+    Next,
+}
+
+impl<'a> From<borrowed::ElementRef<'a>> for ElementRef<'a> {
+    fn from(element: borrowed::ElementRef<'a>) -> Self {
+        match element {
+            borrowed::ElementRef::Parent => ElementRef::Parent,
+            borrowed::ElementRef::Named(name) => ElementRef::Named(name),
+            borrowed::ElementRef::Previous => ElementRef::Previous,
+            borrowed::ElementRef::Next => ElementRef::Next,
+        }
+    }
+}
+
+impl<'a> ElementRef<'a> {
+    pub fn into_owned(self) -> ast::ElementRef {
+        match self {
+            ElementRef::Parent => ast::ElementRef::Parent,
+            ElementRef::Named(name) => ast::ElementRef::Named(Identifier::from(name)),
+            ElementRef::Previous => ast::ElementRef::Previous,
+            ElementRef::Next => ast::ElementRef::Next,
+        }
+    }
+}
+
+/// A constraint expression.
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub enum Expression<'a> {
+    Literal(f64),
+    Length(Length),
+    PropertyRef { element: ElementRef<'a>, property: &'a str },
+    TokenRef(TokenPath<'a>),
+    BinaryOp { left: &'a Expression<'a>, op: BinaryOp, right: &'a Expression<'a> },
+    Function { name: &'a str, args: &'a [Expression<'a>] },
+}
+
+impl<'a> Expression<'a> {
+    pub fn from_borrowed(expr: borrowed::Expression<'a>, arena: &'a Arena) -> Self {
+        match expr {
+            borrowed::Expression::Literal(n) => Expression::Literal(n),
+            borrowed::Expression::Length(l) => Expression::Length(l),
+            borrowed::Expression::PropertyRef { element, property } => Expression::PropertyRef {
+                element: element.into(),
+                property,
+            },
+            borrowed::Expression::TokenRef(path) => {
+                Expression::TokenRef(TokenPath::from_borrowed(&path, arena))
+            }
+            borrowed::Expression::BinaryOp { left, op, right } => Expression::BinaryOp {
+                left: arena.alloc(Expression::from_borrowed(*left, arena)),
+                op,
+                right: arena.alloc(Expression::from_borrowed(*right, arena)),
+            },
+            borrowed::Expression::Function { name, args } => {
+                let args: Vec<_> = args.into_iter().map(|a| Expression::from_borrowed(a, arena)).collect();
+                Expression::Function { name, args: arena.alloc_slice_copy(&args) }
+            }
+        }
+    }
+
+    pub fn into_owned(self) -> ast::Expression {
+        match self {
+            Expression::Literal(n) => ast::Expression::Literal(n),
+            Expression::Length(l) => ast::Expression::Length(l),
+            Expression::PropertyRef { element, property } => ast::Expression::PropertyRef {
+                element: element.into_owned(),
+                property: property.to_string(),
+            },
+            Expression::TokenRef(path) => ast::Expression::TokenRef(path.into_owned()),
+            Expression::BinaryOp { left, op, right } => ast::Expression::BinaryOp {
+                left: Box::new(left.into_owned()),
+                op,
+                right: Box::new(right.into_owned()),
+            },
+            Expression::Function { name, args } => ast::Expression::Function {
+                name: name.to_string(),
+                args: args.iter().map(|a| a.into_owned()).collect(),
+            },
+        }
+    }
+}
+
+fn owned_properties(properties: &[Property<'_>]) -> Vec<ast::Property> {
+    properties.iter().map(|p| p.into_owned()).collect()
+}
+
+fn owned_constraints(constraints: &[Constraint<'_>]) -> Vec<ast::Constraint> {
+    constraints.iter().map(|c| c.into_owned()).collect()
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::types::{GradientStop, LinearGradient};
+    use std::rc::Rc;
+
+    #[test]
+    fn test_arena_alloc_alignment_and_growth() {
+        let arena = Arena::new();
+        assert_eq!(arena.allocated_bytes(), 0);
+        let byte = arena.alloc(1u8);
+        let wide = arena.alloc(2u64);
+        assert_eq!(*byte, 1);
+        assert_eq!(*wide, 2);
+        assert_eq!(wide as *const u64 as usize % mem::align_of::<u64>(), 0);
+
+        // Larger than the first chunk
+        let big = arena.alloc_slice_copy(&[7u32; 10_000]);
+        assert_eq!(big.len(), 10_000);
+        assert!(big.iter().all(|&v| v == 7));
+        assert_eq!(arena.alloc_str("hello"), "hello");
+        assert_eq!(*wide, 2);
+        assert!(arena.allocated_bytes() >= 40_000);
+    }
+
+    #[test]
+    fn test_arena_drops_owned_values() {
+        let marker = Rc::new(());
+        {
+            let arena = Arena::new();
+            arena.alloc_owned(marker.clone());
+            arena.alloc_owned(marker.clone());
+            assert_eq!(Rc::strong_count(&marker), 3);
+        }
+        assert_eq!(Rc::strong_count(&marker), 1);
+    }
+
+    #[test]
+    fn test_frame_into_owned() {
+        let arena = Arena::new();
+        let gradient = Gradient::Linear(LinearGradient::horizontal(vec![
+            GradientStop { position: 0.0, color: Color::rgb(1.0, 1.0, 1.0) },
+        ]));
+        let properties = arena.alloc_slice_copy(&[Property {
+            name: PropertyName::Fill,
+            value: PropertyValue::Gradient(arena.alloc_owned(gradient.clone())),
+            span: Span::default(),
+        }]);
+        let frame = FrameElement {
+            name: Some("Card"),
+            properties,
+            constraints: &[],
+            children: &[],
+            span: Span::default(),
+        };
+
+        let owned = frame.into_owned();
+        assert_eq!(owned.name, Some(Identifier::from("Card")));
+        assert_eq!(owned.properties[0].value, ast::PropertyValue::Gradient(gradient));
+    }
+}
@@ -1,6 +1,11 @@
 //! Abstract Syntax Tree types for Seed documents.
 
-use crate::types::{Color, Length, Identifier, Gradient, Shadow, Transform};
+pub use crate::names::PropertyName;
+use std::fmt;
+use std::ops::{Deref, DerefMut};
+use std::sync::Arc;
+
+use crate::types::{Color, ElementId, Length, Identifier, Gradient, Shadow, Transform};
 use smallvec::SmallVec;
 
 /// A complete Seed document.
@@ -78,6 +83,148 @@ pub enum Element {
     Slot(SlotElement),
 }
 
+impl Element {
+    /// The element's name, or a component instance's instance name.
+    pub fn name(&self) -> Option<&str> {
+        match self {
+            Element::Frame(f) => f.name.as_ref().map(|id| id.0.as_str()),
+            Element::Text(t) => t.name.as_ref().map(|id| id.0.as_str()),
+            Element::Part(p) => p.name.as_ref().map(|id| id.0.as_str()),
+            Element::Component(c) => c.instance_name.as_ref().map(|id| id.0.as_str()),
+            Element::Slot(_) => None,
+        }
+    }
+
+    /// A frame's children, or the content passed to a component instance.
+    ///
+    /// A slot's fallback content is not included.
+    pub fn children(&self) -> &[Element] {
+        match self {
+            Element::Frame(f) => &f.children,
+            Element::Component(c) => &c.children,
+            Element::Text(_) | Element::Part(_) | Element::Slot(_) => &[],
+        }
+    }
+}
+
+/// A list of child elements, shared between trees until one of them
+/// changes it.
+///
+/// Cloning a list only bumps a reference count, so a subtree that is the
+/// same in many places (such as the unchanged parts of a component
+/// template) is stored once. The list derefs to a `Vec`; mutable access
+/// copies it first if it is shared.
+#[derive(Clone, Default, PartialEq)]
+#[cfg_attr(feature = "serde", derive(serde::Serialize, serde::Deserialize))]
+#[cfg_attr(feature = "serde", serde(from = "Vec<Element>", into = "Vec<Element>"))]
+pub struct ElementList(Arc<Vec<Element>>);
+
+impl ElementList {
+    pub fn new() -> Self {
+        Self::default()
+    }
+
+    /// Check if two lists are the same shared list, not just equal.
+    pub fn ptr_eq(&self, other: &ElementList) -> bool {
+        Arc::ptr_eq(&self.0, &other.0)
+    }
+
+    /// Take the elements out, copying them only if the list is shared.
+    pub fn into_vec(self) -> Vec<Element> {
+        Arc::try_unwrap(self.0).unwrap_or_else(|shared| (*shared).clone())
+    }
+
+    /// Rewrite the list one element at a time, sharing it if nothing changes.
+    ///
+    /// `f` returns the elements that replace an element, or `None` to keep
+    /// it as it is.
+    pub fn try_rewrite<E>(
+        &self,
+        mut f: impl FnMut(&Element) -> Result<Option<Vec<Element>>, E>,
+    ) -> Result<ElementList, E> {
+        let mut rewritten: Option<Vec<Element>> = None;
+        for (i, element) in self.iter().enumerate() {
+            match (f(element)?, &mut rewritten) {
+                (None, None) => {}
+                (None, Some(out)) => out.push(element.clone()),
+                (Some(replacement), Some(out)) => out.extend(replacement),
+                (Some(replacement), rewritten @ None) => {
+                    let mut out = Vec::with_capacity(self.len() + replacement.len());
+                    out.extend_from_slice(&self[..i]);
+                    out.extend(replacement);
+                    *rewritten = Some(out);
+                }
+            }
+        }
+        Ok(rewritten.map_or_else(|| self.clone(), ElementList::from))
+    }
+}
+
+impl Deref for ElementList {
+    type Target = Vec<Element>;
+
+    fn deref(&self) -> &Vec<Element> {
+        &self.0
+    }
+}
+
+impl DerefMut for ElementList {
+    fn deref_mut(&mut self) -> &mut Vec<Element> {
+        Arc::make_mut(&mut self.0)
+    }
+}
+
+impl fmt::Debug for ElementList {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        self.0.fmt(f)
+    }
+}
+
+impl From<Vec<Element>> for ElementList {
+    fn from(elements: Vec<Element>) -> Self {
+        Self(Arc::new(elements))
+    }
+}
+
+impl From<ElementList> for Vec<Element> {
+    fn from(list: ElementList) -> Self {
+        list.into_vec()
+    }
+}
+
+impl FromIterator<Element> for ElementList {
+    fn from_iter<I: IntoIterator<Item = Element>>(iter: I) -> Self {
+        Self::from(iter.into_iter().collect::<Vec<_>>())
+    }
+}
+
+impl IntoIterator for ElementList {
+    type Item = Element;
+    type IntoIter = std::vec::IntoIter<Element>;
+
+    fn into_iter(self) -> Self::IntoIter {
+        self.into_vec().into_iter()
+    }
+}
+
+impl<'a> IntoIterator for &'a ElementList {
+    type Item = &'a Element;
+    type IntoIter = std::slice::Iter<'a, Element>;
+
+    fn into_iter(self) -> Self::IntoIter {
+        self.0.iter()
+    }
+}
+
+impl<'a> IntoIterator for &'a mut ElementList {
+    type Item = &'a mut Element;
+    type IntoIter = std::slice::IterMut<'a, Element>;
+
+    fn into_iter(self) -> Self::IntoIter {
+        self.iter_mut()
+    }
+}
+
 /// A Frame element (2D container).
 #[derive(Debug, Clone, PartialEq)]
 #[cfg_attr(feature = "serde", derive(serde::Serialize, serde::Deserialize))]
@@ -85,7 +232,7 @@ pub struct FrameElement {
     pub name: Option<Identifier>,
     pub properties: Vec<Property>,
     pub constraints: Vec<Constraint>,
-    pub children: Vec<Element>,
+    pub children: ElementList,
     pub span: Span,
 }
 
@@ -153,7 +300,7 @@ pub struct ComponentElement {
     pub component_name: Identifier,
     pub instance_name: Option<Identifier>,
     pub props: Vec<Property>,
-    pub children: Vec<Element>,
+    pub children: ElementList,
     pub span: Span,
 }
 
@@ -161,7 +308,7 @@ pub struct ComponentElement {
 #[derive(Debug, Clone, PartialEq)]
 #[cfg_attr(feature = "serde", derive(serde::Serialize, serde::Deserialize))]
 pub struct Property {
-    pub name: String,
+    pub name: PropertyName,
     pub value: PropertyValue,
     pub span: Span,
 }
@@ -264,6 +411,9 @@ pub enum ElementRef {
     Named(Identifier),
     Previous,
     Next,
+    /// A reference already resolved to an element of the document, written
+    /// by reference resolution.
+    Resolved(ElementId),
 }
 
 /// A constraint expression.
@@ -359,7 +509,7 @@ pub struct SlotElement {
     /// Slot name (None for default slot)
     pub name: Option<String>,
     /// Fallback content if no children provided
-    pub fallback: Vec<Element>,
+    pub fallback: ElementList,
     /// Source span
     pub span: Span,
 }
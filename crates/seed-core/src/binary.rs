@@ -0,0 +1,1053 @@
+//! Compact binary encoding of the owned AST.
+//!
+//! Layout of an encoded document:
+//!
+//! ```text
+//! magic     8 bytes   b"SEEDAST\0"
+//! version   u16 LE    BINARY_VERSION
+//! reserved  u16 LE    0
+//! strings   varint count, then (varint length, UTF-8 bytes) per string
+//! body      the document, depth-first
+//! ```
+//!
+//! Every string in the document is stored once in the string table and
+//! referenced by index. Integers are LEB128 varints, floats are little-endian
+//! IEEE 754 and enum variants are single tag bytes. Decoding is one forward
+//! pass over the bytes with no text parsing and always builds the whole
+//! owned document. Nesting of elements, geometry and expressions is limited
+//! to [`MAX_DECODE_DEPTH`] so corrupt input cannot overflow the stack.
+
+use std::io::{self, Write};
+use std::path::Path;
+
+use indexmap::IndexSet;
+use smallvec::SmallVec;
+
+use crate::ast::*;
+use crate::errors::BinaryError;
+use crate::types::*;
+
+/// Magic bytes at the start of every encoded document.
+pub const BINARY_MAGIC: &[u8; 8] = b"SEEDAST\0";
+
+/// Version of the binary format. Bump whenever the encoding changes.
+pub const BINARY_VERSION: u16 = 2;
+
+/// Deepest nesting of elements, geometry and expressions that decoding accepts.
+pub const MAX_DECODE_DEPTH: u32 = 256;
+
+impl Document {
+    /// Encode the document into the binary format.
+    pub fn to_binary(&self) -> Vec<u8> {
+        let mut encoder = Encoder::default();
+        self.encode(&mut encoder);
+
+        let mut out = Vec::with_capacity(12 + encoder.body.len() + encoder.strings.len() * 8);
+        out.extend_from_slice(BINARY_MAGIC);
+        out.extend_from_slice(&BINARY_VERSION.to_le_bytes());
+        out.extend_from_slice(&0u16.to_le_bytes());
+        write_varint(&mut out, encoder.strings.len() as u64);
+        for s in &encoder.strings {
+            write_varint(&mut out, s.len() as u64);
+            out.extend_from_slice(s.as_bytes());
+        }
+        out.extend_from_slice(&encoder.body);
+        out
+    }
+
+    /// Write the document in the binary format.
+    pub fn write_binary<W: Write>(&self, mut writer: W) -> io::Result<()> {
+        writer.write_all(&self.to_binary())
+    }
+
+    /// Decode a document from the binary format.
+    pub fn from_binary(bytes: &[u8]) -> Result<Document, BinaryError> {
+        let mut decoder = Decoder::new(bytes)?;
+        let document = Document::decode(&mut decoder)?;
+        if decoder.pos != bytes.len() {
+            return Err(BinaryError::TrailingBytes { offset: decoder.pos });
+        }
+        Ok(document)
+    }
+
+    /// Load a document written by [`Document::write_binary`] from `path`.
+    pub fn load_binary(path: impl AsRef<Path>) -> Result<Document, BinaryError> {
+        let bytes = std::fs::read(path)?;
+        Document::from_binary(&bytes)
+    }
+}
+
+// Encoding
+
+#[derive(Default)]
+pub(crate) struct Encoder<'a> {
+    pub(crate) strings: IndexSet<&'a str>,
+    pub(crate) body: Vec<u8>,
+}
+
+impl<'a> Encoder<'a> {
+    fn u8(&mut self, value: u8) {
+        self.body.push(value);
+    }
+
+    pub(crate) fn varint(&mut self, value: u64) {
+        write_varint(&mut self.body, value);
+    }
+
+    fn f32(&mut self, value: f32) {
+        self.body.extend_from_slice(&value.to_le_bytes());
+    }
+
+    fn f64(&mut self, value: f64) {
+        self.body.extend_from_slice(&value.to_le_bytes());
+    }
+
+    pub(crate) fn str(&mut self, value: &'a str) {
+        let (index, _) = self.strings.insert_full(value);
+        self.varint(index as u64);
+    }
+}
+
+fn write_varint(out: &mut Vec<u8>, mut value: u64) {
+    while value >= 0x80 {
+        out.push(value as u8 | 0x80);
+        value >>= 7;
+    }
+    out.push(value as u8);
+}
+
+pub(crate) trait Encode {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>);
+}
+
+// Decoding
+
+struct Decoder<'b> {
+    bytes: &'b [u8],
+    pos: usize,
+    strings: Vec<&'b str>,
+    /// Current nesting of recursive values
+    depth: u32,
+}
+
+impl<'b> Decoder<'b> {
+    fn new(bytes: &'b [u8]) -> Result<Self, BinaryError> {
+        if bytes.len() < 12 || &bytes[..8] != BINARY_MAGIC {
+            return Err(BinaryError::BadMagic);
+        }
+        let version = u16::from_le_bytes([bytes[8], bytes[9]]);
+        if version != BINARY_VERSION {
+            return Err(BinaryError::UnsupportedVersion {
+                found: version,
+                expected: BINARY_VERSION,
+            });
+        }
+
+        let mut decoder = Decoder { bytes, pos: 12, strings: Vec::new(), depth: 0 };
+        let count = decoder.len()?;
+        decoder.strings.reserve(count);
+        for _ in 0..count {
+            let len = decoder.len()?;
+            let offset = decoder.pos;
+            let raw = decoder.take(len)?;
+            let s = std::str::from_utf8(raw).map_err(|_| BinaryError::InvalidUtf8 { offset })?;
+            decoder.strings.push(s);
+        }
+        Ok(decoder)
+    }
+
+    fn take(&mut self, len: usize) -> Result<&'b [u8], BinaryError> {
+        let end = self.pos.checked_add(len).filter(|&end| end <= self.bytes.len())
+            .ok_or(BinaryError::UnexpectedEof)?;
+        let slice = &self.bytes[self.pos..end];
+        self.pos = end;
+        Ok(slice)
+    }
+
+    fn u8(&mut self) -> Result<u8, BinaryError> {
+        Ok(self.take(1)?[0])
+    }
+
+    fn varint(&mut self) -> Result<u64, BinaryError> {
+        let mut value = 0u64;
+        for shift in (0..64).step_by(7) {
+            let byte = self.u8()?;
+            value |= u64::from(byte & 0x7F) << shift;
+            if byte & 0x80 == 0 {
+                return Ok(value);
+            }
+        }
+        Err(BinaryError::InvalidVarint { offset: self.pos })
+    }
+
+    /// Decode a length or count, bounded by the remaining input so corrupt
+    /// data cannot trigger huge allocations.
+    fn len(&mut self) -> Result<usize, BinaryError> {
+        let len = self.varint()?;
+        if len > (self.bytes.len() - self.pos) as u64 {
+            return Err(BinaryError::UnexpectedEof);
+        }
+        Ok(len as usize)
+    }
+
+    fn f32(&mut self) -> Result<f32, BinaryError> {
+        let bytes = self.take(4)?;
+        Ok(f32::from_le_bytes(bytes.try_into().unwrap()))
+    }
+
+    fn f64(&mut self) -> Result<f64, BinaryError> {
+        let bytes = self.take(8)?;
+        Ok(f64::from_le_bytes(bytes.try_into().unwrap()))
+    }
+
+    fn str(&mut self) -> Result<&'b str, BinaryError> {
+        let offset = self.pos;
+        let index = self.varint()?;
+        self.strings.get(index as usize).copied()
+            .ok_or(BinaryError::InvalidString { index, offset })
+    }
+
+    /// Read an enum tag byte.
+    fn tag(&mut self, what: &'static str, max: u8) -> Result<u8, BinaryError> {
+        let offset = self.pos;
+        let tag = self.u8()?;
+        if tag > max {
+            return Err(BinaryError::InvalidTag { what, tag, offset });
+        }
+        Ok(tag)
+    }
+
+    /// Decode a value that can contain itself, enforcing [`MAX_DECODE_DEPTH`].
+    fn nested<T>(
+        &mut self,
+        decode: impl FnOnce(&mut Self) -> Result<T, BinaryError>,
+    ) -> Result<T, BinaryError> {
+        if self.depth >= MAX_DECODE_DEPTH {
+            return Err(BinaryError::TooDeep { offset: self.pos });
+        }
+        self.depth += 1;
+        let value = decode(self);
+        self.depth -= 1;
+        value
+    }
+}
+
+trait Decode: Sized {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError>;
+}
+
+// Primitive and container impls
+
+impl Encode for bool {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        e.u8(*self as u8);
+    }
+}
+
+impl Decode for bool {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        Ok(d.tag("bool", 1)? == 1)
+    }
+}
+
+impl Encode for f64 {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        e.f64(*self);
+    }
+}
+
+impl Decode for f64 {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        d.f64()
+    }
+}
+
+impl Encode for String {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        e.str(self);
+    }
+}
+
+impl Decode for String {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        d.str().map(str::to_string)
+    }
+}
+
+impl<T: Encode> Encode for Option<T> {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        match self {
+            None => e.u8(0),
+            Some(value) => {
+                e.u8(1);
+                value.encode(e);
+            }
+        }
+    }
+}
+
+impl<T: Decode> Decode for Option<T> {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        match d.tag("option", 1)? {
+            0 => Ok(None),
+            _ => T::decode(d).map(Some),
+        }
+    }
+}
+
+impl<T: Encode> Encode for Vec<T> {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        e.varint(self.len() as u64);
+        for item in self {
+            item.encode(e);
+        }
+    }
+}
+
+impl<T: Decode> Decode for Vec<T> {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        let len = d.len()?;
+        let mut items = Vec::with_capacity(len);
+        for _ in 0..len {
+            items.push(T::decode(d)?);
+        }
+        Ok(items)
+    }
+}
+
+impl Encode for ElementList {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        (**self).encode(e);
+    }
+}
+
+impl Decode for ElementList {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        Vec::<Element>::decode(d).map(ElementList::from)
+    }
+}
+
+impl<T: Encode> Encode for Box<T> {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        (**self).encode(e);
+    }
+}
+
+impl<T: Decode> Decode for Box<T> {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        T::decode(d).map(Box::new)
+    }
+}
+
+/// Implement `Encode`/`Decode` for a struct by encoding its fields in order.
+macro_rules! binary_struct {
+    ($ty:ident { $($field:ident),* $(,)? }) => {
+        impl Encode for $ty {
+            fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+                $(self.$field.encode(e);)*
+            }
+        }
+
+        impl Decode for $ty {
+            fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+                Ok($ty { $($field: Decode::decode(d)?,)* })
+            }
+        }
+    };
+}
+
+/// Implement `Encode`/`Decode` for a fieldless enum as a tag byte.
+macro_rules! binary_unit_enum {
+    ($ty:ident { $($variant:ident),* $(,)? }) => {
+        impl Encode for $ty {
+            fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+                const VARIANTS: &[$ty] = &[$($ty::$variant),*];
+                let tag = VARIANTS.iter().position(|v| v == self).unwrap();
+                e.u8(tag as u8);
+            }
+        }
+
+        impl Decode for $ty {
+            fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+                const VARIANTS: &[$ty] = &[$($ty::$variant),*];
+                let tag = d.tag(stringify!($ty), VARIANTS.len() as u8 - 1)?;
+                Ok(VARIANTS[tag as usize])
+            }
+        }
+    };
+}
+
+// Value types
+
+impl Encode for usize {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        e.varint(*self as u64);
+    }
+}
+
+impl Decode for usize {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        let offset = d.pos;
+        usize::try_from(d.varint()?).map_err(|_| BinaryError::IntegerOverflow { offset })
+    }
+}
+
+impl Encode for u32 {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        e.varint(u64::from(*self));
+    }
+}
+
+impl Decode for u32 {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        let offset = d.pos;
+        u32::try_from(d.varint()?).map_err(|_| BinaryError::IntegerOverflow { offset })
+    }
+}
+
+impl Encode for Color {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        e.f32(self.r);
+        e.f32(self.g);
+        e.f32(self.b);
+        e.f32(self.a);
+    }
+}
+
+impl Decode for Color {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        Ok(Color { r: d.f32()?, g: d.f32()?, b: d.f32()?, a: d.f32()? })
+    }
+}
+
+impl Encode for Identifier {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        e.str(&self.0);
+    }
+}
+
+impl Decode for Identifier {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        String::decode(d).map(Identifier)
+    }
+}
+
+impl Encode for PropRef {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        e.str(&self.0);
+    }
+}
+
+impl Decode for PropRef {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        String::decode(d).map(PropRef)
+    }
+}
+
+impl Encode for PropertyName {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        e.str(self.as_str());
+    }
+}
+
+impl Decode for PropertyName {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        d.str().map(PropertyName::new)
+    }
+}
+
+impl Encode for TokenPath {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        e.varint(self.0.len() as u64);
+        for segment in &self.0 {
+            e.str(segment);
+        }
+    }
+}
+
+impl Decode for TokenPath {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        let len = d.len()?;
+        let mut segments = SmallVec::with_capacity(len);
+        for _ in 0..len {
+            segments.push(String::decode(d)?);
+        }
+        Ok(TokenPath(segments))
+    }
+}
+
+binary_unit_enum!(LengthUnit { Px, Pt, Mm, Cm, In, Percent, Em, Rem });
+binary_unit_enum!(Profile { Seed2D, Seed3D });
+binary_unit_enum!(ConstraintPriority { Weak, Low, Medium, High, Required });
+binary_unit_enum!(Edge { Left, Right, Top, Bottom, CenterX, CenterY });
+binary_unit_enum!(Relation { Above, Below, LeftOf, RightOf });
+binary_unit_enum!(InequalityOp { LessThan, LessThanOrEqual, GreaterThan, GreaterThanOrEqual });
+binary_unit_enum!(BinaryOp { Add, Sub, Mul, Div });
+
+binary_struct!(Span { start, end, line, column });
+binary_struct!(Length { value, unit });
+binary_struct!(GradientStop { position, color });
+binary_struct!(LinearGradient { angle, stops });
+binary_struct!(RadialGradient { center_x, center_y, radius_x, radius_y, stops });
+binary_struct!(ConicGradient { center_x, center_y, start_angle, stops });
+binary_struct!(Shadow { offset_x, offset_y, blur, spread, color, inset });
+binary_struct!(Transform { operations });
+
+impl Encode for Gradient {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        match self {
+            Gradient::Linear(g) => { e.u8(0); g.encode(e); }
+            Gradient::Radial(g) => { e.u8(1); g.encode(e); }
+            Gradient::Conic(g) => { e.u8(2); g.encode(e); }
+        }
+    }
+}
+
+impl Decode for Gradient {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        Ok(match d.tag("Gradient", 2)? {
+            0 => Gradient::Linear(Decode::decode(d)?),
+            1 => Gradient::Radial(Decode::decode(d)?),
+            _ => Gradient::Conic(Decode::decode(d)?),
+        })
+    }
+}
+
+impl Encode for TransformOp {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        match self {
+            TransformOp::Rotate(angle) => { e.u8(0); e.f64(*angle); }
+            TransformOp::RotateAround { angle, cx, cy } => {
+                e.u8(1);
+                e.f64(*angle);
+                e.f64(*cx);
+                e.f64(*cy);
+            }
+            TransformOp::Scale(x, y) => { e.u8(2); e.f64(*x); e.f64(*y); }
+            TransformOp::Translate(x, y) => { e.u8(3); e.f64(*x); e.f64(*y); }
+            TransformOp::Skew(x, y) => { e.u8(4); e.f64(*x); e.f64(*y); }
+            TransformOp::Matrix(m) => {
+                e.u8(5);
+                for v in m {
+                    e.f64(*v);
+                }
+            }
+        }
+    }
+}
+
+impl Decode for TransformOp {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        Ok(match d.tag("TransformOp", 5)? {
+            0 => TransformOp::Rotate(d.f64()?),
+            1 => TransformOp::RotateAround { angle: d.f64()?, cx: d.f64()?, cy: d.f64()? },
+            2 => TransformOp::Scale(d.f64()?, d.f64()?),
+            3 => TransformOp::Translate(d.f64()?, d.f64()?),
+            4 => TransformOp::Skew(d.f64()?, d.f64()?),
+            _ => {
+                let mut m = [0.0; 6];
+                for v in &mut m {
+                    *v = d.f64()?;
+                }
+                TransformOp::Matrix(m)
+            }
+        })
+    }
+}
+
+// AST
+
+binary_struct!(Document { meta, tokens, elements, span });
+binary_struct!(MetaBlock { profile, version, span });
+binary_struct!(TokenBlock { definitions, span });
+binary_struct!(TokenDefinition { path, value, span });
+binary_struct!(FrameElement { name, properties, constraints, children, span });
+binary_struct!(TextElement { name, content, properties, constraints, span });
+binary_struct!(PartElement { name, geometry, properties, constraints, span });
+binary_struct!(ComponentElement { component_name, instance_name, props, children, span });
+binary_struct!(SlotElement { name, fallback, span });
+binary_struct!(Property { name, value, span });
+binary_struct!(Constraint { kind, priority, span });
+
+impl Encode for TokenValue {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        match self {
+            TokenValue::Color(c) => { e.u8(0); c.encode(e); }
+            TokenValue::Length(l) => { e.u8(1); l.encode(e); }
+            TokenValue::Number(n) => { e.u8(2); e.f64(*n); }
+            TokenValue::String(s) => { e.u8(3); e.str(s); }
+            TokenValue::Reference(path) => { e.u8(4); path.encode(e); }
+        }
+    }
+}
+
+impl Decode for TokenValue {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        Ok(match d.tag("TokenValue", 4)? {
+            0 => TokenValue::Color(Decode::decode(d)?),
+            1 => TokenValue::Length(Decode::decode(d)?),
+            2 => TokenValue::Number(d.f64()?),
+            3 => TokenValue::String(Decode::decode(d)?),
+            _ => TokenValue::Reference(Decode::decode(d)?),
+        })
+    }
+}
+
+impl Encode for Element {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        match self {
+            Element::Frame(f) => { e.u8(0); f.encode(e); }
+            Element::Text(t) => { e.u8(1); t.encode(e); }
+            Element::Part(p) => { e.u8(2); p.encode(e); }
+            Element::Component(c) => { e.u8(3); c.encode(e); }
+            Element::Slot(s) => { e.u8(4); s.encode(e); }
+        }
+    }
+}
+
+impl Decode for Element {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        d.nested(|d| {
+            Ok(match d.tag("Element", 4)? {
+                0 => Element::Frame(Decode::decode(d)?),
+                1 => Element::Text(Decode::decode(d)?),
+                2 => Element::Part(Decode::decode(d)?),
+                3 => Element::Component(Decode::decode(d)?),
+                _ => Element::Slot(Decode::decode(d)?),
+            })
+        })
+    }
+}
+
+impl Encode for TextContent {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        match self {
+            TextContent::Literal(s) => { e.u8(0); e.str(s); }
+            TextContent::TokenRef(path) => { e.u8(1); path.encode(e); }
+        }
+    }
+}
+
+impl Decode for TextContent {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        Ok(match d.tag("TextContent", 1)? {
+            0 => TextContent::Literal(Decode::decode(d)?),
+            _ => TextContent::TokenRef(Decode::decode(d)?),
+        })
+    }
+}
+
+impl Encode for Geometry {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        match self {
+            Geometry::Primitive(p) => { e.u8(0); p.encode(e); }
+            Geometry::Csg(op) => { e.u8(1); op.encode(e); }
+        }
+    }
+}
+
+impl Decode for Geometry {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        d.nested(|d| {
+            Ok(match d.tag("Geometry", 1)? {
+                0 => Geometry::Primitive(Decode::decode(d)?),
+                _ => Geometry::Csg(Decode::decode(d)?),
+            })
+        })
+    }
+}
+
+impl Encode for Primitive {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        match self {
+            Primitive::Box { width, height, depth } => {
+                e.u8(0);
+                width.encode(e);
+                height.encode(e);
+                depth.encode(e);
+            }
+            Primitive::Cylinder { radius, height } => {
+                e.u8(1);
+                radius.encode(e);
+                height.encode(e);
+            }
+            Primitive::Sphere { radius } => { e.u8(2); radius.encode(e); }
+        }
+    }
+}
+
+impl Decode for Primitive {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        Ok(match d.tag("Primitive", 2)? {
+            0 => Primitive::Box {
+                width: Decode::decode(d)?,
+                height: Decode::decode(d)?,
+                depth: Decode::decode(d)?,
+            },
+            1 => Primitive::Cylinder { radius: Decode::decode(d)?, height: Decode::decode(d)? },
+            _ => Primitive::Sphere { radius: Decode::decode(d)? },
+        })
+    }
+}
+
+impl Encode for CsgOperation {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        match self {
+            CsgOperation::Union(parts) => { e.u8(0); parts.encode(e); }
+            CsgOperation::Difference { base, subtract } => {
+                e.u8(1);
+                base.encode(e);
+                subtract.encode(e);
+            }
+            CsgOperation::Intersection(parts) => { e.u8(2); parts.encode(e); }
+        }
+    }
+}
+
+impl Decode for CsgOperation {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        Ok(match d.tag("CsgOperation", 2)? {
+            0 => CsgOperation::Union(Decode::decode(d)?),
+            1 => CsgOperation::Difference { base: Decode::decode(d)?, subtract: Decode::decode(d)? },
+            _ => CsgOperation::Intersection(Decode::decode(d)?),
+        })
+    }
+}
+
+impl Encode for PropertyValue {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        match self {
+            PropertyValue::Color(c) => { e.u8(0); c.encode(e); }
+            PropertyValue::Gradient(g) => { e.u8(1); g.encode(e); }
+            PropertyValue::Shadow(s) => { e.u8(2); s.encode(e); }
+            PropertyValue::Transform(t) => { e.u8(3); t.encode(e); }
+            PropertyValue::Length(l) => { e.u8(4); l.encode(e); }
+            PropertyValue::Number(n) => { e.u8(5); e.f64(*n); }
+            PropertyValue::String(s) => { e.u8(6); e.str(s); }
+            PropertyValue::Boolean(b) => { e.u8(7); b.encode(e); }
+            PropertyValue::TokenRef(path) => { e.u8(8); path.encode(e); }
+            PropertyValue::Enum(s) => { e.u8(9); e.str(s); }
+            PropertyValue::PropRef(r) => { e.u8(10); r.encode(e); }
+        }
+    }
+}
+
+impl Decode for PropertyValue {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        Ok(match d.tag("PropertyValue", 10)? {
+            0 => PropertyValue::Color(Decode::decode(d)?),
+            1 => PropertyValue::Gradient(Decode::decode(d)?),
+            2 => PropertyValue::Shadow(Decode::decode(d)?),
+            3 => PropertyValue::Transform(Decode::decode(d)?),
+            4 => PropertyValue::Length(Decode::decode(d)?),
+            5 => PropertyValue::Number(d.f64()?),
+            6 => PropertyValue::String(Decode::decode(d)?),
+            7 => PropertyValue::Boolean(Decode::decode(d)?),
+            8 => PropertyValue::TokenRef(Decode::decode(d)?),
+            9 => PropertyValue::Enum(Decode::decode(d)?),
+            _ => PropertyValue::PropRef(Decode::decode(d)?),
+        })
+    }
+}
+
+impl Encode for ConstraintKind {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        match self {
+            ConstraintKind::Equality { property, value } => {
+                e.u8(0);
+                e.str(property);
+                value.encode(e);
+            }
+            ConstraintKind::Alignment { edge, target, target_edge } => {
+                e.u8(1);
+                edge.encode(e);
+                target.encode(e);
+                target_edge.encode(e);
+            }
+            ConstraintKind::Relative { relation, target, gap } => {
+                e.u8(2);
+                relation.encode(e);
+                target.encode(e);
+                gap.encode(e);
+            }
+            ConstraintKind::Inequality { property, op, value } => {
+                e.u8(3);
+                e.str(property);
+                op.encode(e);
+                value.encode(e);
+            }
+        }
+    }
+}
+
+impl Decode for ConstraintKind {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        Ok(match d.tag("ConstraintKind", 3)? {
+            0 => ConstraintKind::Equality { property: Decode::decode(d)?, value: Decode::decode(d)? },
+            1 => ConstraintKind::Alignment {
+                edge: Decode::decode(d)?,
+                target: Decode::decode(d)?,
+                target_edge: Decode::decode(d)?,
+            },
+            2 => ConstraintKind::Relative {
+                relation: Decode::decode(d)?,
+                target: Decode::decode(d)?,
+                gap: Decode::decode(d)?,
+            },
+            _ => ConstraintKind::Inequality {
+                property: Decode::decode(d)?,
+                op: Decode::decode(d)?,
+                value: Decode::decode(d)?,
+            },
+        })
+    }
+}
+
+impl Encode for ElementRef {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        match self {
+            ElementRef::Parent => e.u8(0),
+            ElementRef::Named(name) => { e.u8(1); name.encode(e); }
+            ElementRef::Previous => e.u8(2),
+            ElementRef::Next => e.u8(3),
+            ElementRef::Resolved(id) => { e.u8(4); e.varint(id.0); }
+        }
+    }
+}
+
+impl Decode for ElementRef {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        Ok(match d.tag("ElementRef", 4)? {
+            0 => ElementRef::Parent,
+            1 => ElementRef::Named(Decode::decode(d)?),
+            2 => ElementRef::Previous,
+            3 => ElementRef::Next,
+            _ => ElementRef::Resolved(ElementId(d.varint()?)),
+        })
+    }
+}
+
+impl Encode for Expression {
+    fn encode<'a>(&'a self, e: &mut Encoder<'a>) {
+        match self {
+            Expression::Literal(n) => { e.u8(0); e.f64(*n); }
+            Expression::Length(l) => { e.u8(1); l.encode(e); }
+            Expression::PropertyRef { element, property } => {
+                e.u8(2);
+                element.encode(e);
+                e.str(property);
+            }
+            Expression::TokenRef(path) => { e.u8(3); path.encode(e); }
+            Expression::BinaryOp { left, op, right } => {
+                e.u8(4);
+                left.encode(e);
+                op.encode(e);
+                right.encode(e);
+            }
+            Expression::Function { name, args } => {
+                e.u8(5);
+                e.str(name);
+                args.encode(e);
+            }
+        }
+    }
+}
+
+impl Decode for Expression {
+    fn decode(d: &mut Decoder<'_>) -> Result<Self, BinaryError> {
+        d.nested(|d| {
+            Ok(match d.tag("Expression", 5)? {
+                0 => Expression::Literal(d.f64()?),
+                1 => Expression::Length(Decode::decode(d)?),
+                2 => Expression::PropertyRef { element: Decode::decode(d)?, property: Decode::decode(d)? },
+                3 => Expression::TokenRef(Decode::decode(d)?),
+                4 => Expression::BinaryOp {
+                    left: Decode::decode(d)?,
+                    op: Decode::decode(d)?,
+                    right: Decode::decode(d)?,
+                },
+                _ => Expression::Function { name: Decode::decode(d)?, args: Decode::decode(d)? },
+            })
+        })
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use smallvec::smallvec;
+
+    fn sample_document() -> Document {
+        let span = Span { start: 3, end: 300, line: 2, column: 1 };
+        let fill = Property {
+            name: PropertyName::Fill,
+            value: PropertyValue::Gradient(Gradient::Linear(LinearGradient {
+                angle: 90.0,
+                stops: vec![
+                    GradientStop { position: 0.0, color: Color::rgb(1.0, 0.0, 0.0) },
+                    GradientStop { position: 1.0, color: Color::rgba(0.0, 0.0, 1.0, 0.5) },
+                ],
+            })),
+            span,
+        };
+        let custom = Property {
+            name: PropertyName::new("custom-name"),
+            value: PropertyValue::TokenRef(TokenPath(smallvec!["colors".to_string(), "primary".to_string()])),
+            span: Span::default(),
+        };
+        let constraint = Constraint {
+            kind: ConstraintKind::Equality {
+                property: "width".to_string(),
+                value: Expression::BinaryOp {
+                    left: Box::new(Expression::PropertyRef {
+                        element: ElementRef::Named(Identifier::from("Header")),
+                        property: "width".to_string(),
+                    }),
+                    op: BinaryOp::Sub,
+                    right: Box::new(Expression::BinaryOp {
+                        left: Box::new(Expression::PropertyRef {
+                            element: ElementRef::Resolved(ElementId(300)),
+                            property: "x".to_string(),
+                        }),
+                        op: BinaryOp::Add,
+                        right: Box::new(Expression::Length(Length::px(16.0))),
+                    }),
+                },
+            },
+            priority: Some(ConstraintPriority::High),
+            span,
+        };
+
+        Document {
+            meta: Some(MetaBlock { profile: Profile::Seed3D, version: Some("1.0".to_string()), span }),
+            tokens: Some(TokenBlock {
+                definitions: vec![TokenDefinition {
+                    path: TokenPath(smallvec!["colors".to_string(), "primary".to_string()]),
+                    value: TokenValue::Color(Color::rgb(0.2, 0.4, 0.6)),
+                    span,
+                }],
+                span,
+            }),
+            elements: vec![
+                Element::Frame(FrameElement {
+                    name: Some(Identifier::from("Card")),
+                    properties: vec![fill, custom],
+                    constraints: vec![constraint],
+                    children: vec![Element::Text(TextElement {
+                        name: None,
+                        content: TextContent::Literal("Hello ✓".to_string()),
+                        properties: vec![],
+                        constraints: vec![],
+                        span,
+                    })].into(),
+                    span,
+                }),
+                Element::Part(PartElement {
+                    name: Some(Identifier::from("Bracket")),
+                    geometry: Geometry::Csg(CsgOperation::Difference {
+                        base: Box::new(Geometry::Primitive(Primitive::Box {
+                            width: Length::mm(10.0),
+                            height: Length::mm(5.0),
+                            depth: Length::mm(2.0),
+                        })),
+                        subtract: vec![Geometry::Primitive(Primitive::Sphere { radius: Length::mm(1.0) })],
+                    }),
+                    properties: vec![],
+                    constraints: vec![],
+                    span,
+                }),
+            ],
+            span: Span::default(),
+        }
+    }
+
+    #[test]
+    fn test_binary_round_trip() {
+        let doc = sample_document();
+        let bytes = doc.to_binary();
+        assert_eq!(&bytes[..8], BINARY_MAGIC);
+        assert_eq!(Document::from_binary(&bytes).unwrap(), doc);
+    }
+
+    #[test]
+    fn test_binary_rejects_bad_input() {
+        let bytes = sample_document().to_binary();
+
+        assert!(matches!(Document::from_binary(b"not a document"), Err(BinaryError::BadMagic)));
+
+        let mut wrong_version = bytes.clone();
+        wrong_version[8] = 99;
+        assert!(matches!(
+            Document::from_binary(&wrong_version),
+            Err(BinaryError::UnsupportedVersion { found: 99, .. })
+        ));
+
+        for len in [12, bytes.len() / 2, bytes.len() - 1] {
+            assert!(Document::from_binary(&bytes[..len]).is_err());
+        }
+    }
+
+    #[test]
+    fn test_binary_rejects_deep_nesting() {
+        fn nested_expression(depth: u32) -> Expression {
+            (0..depth).fold(Expression::Literal(1.0), |inner, _| Expression::BinaryOp {
+                left: Box::new(inner),
+                op: BinaryOp::Add,
+                right: Box::new(Expression::Literal(1.0)),
+            })
+        }
+        fn document(value: Expression) -> Document {
+            let constraint = Constraint {
+                kind: ConstraintKind::Equality { property: "width".to_string(), value },
+                priority: None,
+                span: Span::default(),
+            };
+            Document {
+                meta: None,
+                tokens: None,
+                elements: vec![Element::Frame(FrameElement {
+                    name: None,
+                    properties: vec![],
+                    constraints: vec![constraint],
+                    children: Default::default(),
+                    span: Span::default(),
+                })],
+                span: Span::default(),
+            }
+        }
+
+        // The element takes one level of nesting.
+        let doc = document(nested_expression(MAX_DECODE_DEPTH - 2));
+        assert_eq!(Document::from_binary(&doc.to_binary()).unwrap(), doc);
+
+        let doc = document(nested_expression(MAX_DECODE_DEPTH - 1));
+        assert!(matches!(
+            Document::from_binary(&doc.to_binary()),
+            Err(BinaryError::TooDeep { .. })
+        ));
+    }
+
+    #[test]
+    fn test_binary_rejects_out_of_range_integer() {
+        let mut bytes = Vec::new();
+        bytes.extend_from_slice(BINARY_MAGIC);
+        bytes.extend_from_slice(&BINARY_VERSION.to_le_bytes());
+        bytes.extend_from_slice(&0u16.to_le_bytes());
+        write_varint(&mut bytes, 0);
+        write_varint(&mut bytes, u64::from(u32::MAX) + 1);
+
+        let mut decoder = Decoder::new(&bytes).unwrap();
+        assert!(matches!(u32::decode(&mut decoder), Err(BinaryError::IntegerOverflow { offset: 13 })));
+    }
+
+    #[test]
+    fn test_load_binary() {
+        let doc = sample_document();
+        let path = std::env::temp_dir().join(format!("seed-binary-test-{}.seedb", std::process::id()));
+        doc.write_binary(std::fs::File::create(&path).unwrap()).unwrap();
+
+        let loaded = Document::load_binary(&path);
+        std::fs::remove_file(&path).unwrap();
+        assert_eq!(loaded.unwrap(), doc);
+    }
+}
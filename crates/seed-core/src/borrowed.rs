@@ -0,0 +1,432 @@
+//! Borrowed (zero-copy) AST types for Seed documents.
+//!
+//! These mirror the owned types in [`crate::ast`], but every identifier,
+//! property name, string literal and token path segment is a `&'src str`
+//! slice into the source buffer. Use [`Document::into_owned`] to convert to
+//! the owned AST when the data needs to outlive the source.
+
+use crate::ast;
+use crate::names::PropertyName;
+use crate::types::{Color, Gradient, Identifier, Length, Shadow, Transform};
+use smallvec::SmallVec;
+
+pub use crate::ast::{
+    BinaryOp, ConstraintPriority, Edge, Geometry, InequalityOp, MetaBlock, Profile, Relation,
+    Span, TokenBlock,
+};
+
+/// A complete Seed document borrowing from its source text.
+#[derive(Debug, Clone, PartialEq)]
+pub struct Document<'src> {
+    /// Document metadata (small, kept owned)
+    pub meta: Option<MetaBlock>,
+    /// Token definitions (small, kept owned)
+    pub tokens: Option<TokenBlock>,
+    /// Top-level elements
+    pub elements: Vec<Element<'src>>,
+    /// Source span for error reporting
+    pub span: Span,
+}
+
+impl<'src> Document<'src> {
+    /// Convert to an owned [`ast::Document`] that no longer borrows the source.
+    pub fn into_owned(self) -> ast::Document {
+        ast::Document {
+            meta: self.meta,
+            tokens: self.tokens,
+            elements: self.elements.into_iter().map(Element::into_owned).collect(),
+            span: self.span,
+        }
+    }
+}
+
+/// A token path like `color.primary`, borrowing its segments.
+#[derive(Debug, Clone, PartialEq, Eq, Hash)]
+pub struct TokenPath<'src>(pub SmallVec<[&'src str; 4]>);
+
+impl<'src> TokenPath<'src> {
+    pub fn into_owned(self) -> ast::TokenPath {
+        ast::TokenPath(self.0.into_iter().map(String::from).collect())
+    }
+}
+
+/// An element in the Seed document.
+#[derive(Debug, Clone, PartialEq)]
+pub enum Element<'src> {
+    Frame(FrameElement<'src>),
+    Text(TextElement<'src>),
+    Part(PartElement<'src>),
+    Component(ComponentElement<'src>),
+    Slot(SlotElement<'src>),
+}
+
+impl<'src> Element<'src> {
+    pub fn into_owned(self) -> ast::Element {
+        match self {
+            Element::Frame(f) => ast::Element::Frame(f.into_owned()),
+            Element::Text(t) => ast::Element::Text(t.into_owned()),
+            Element::Part(p) => ast::Element::Part(p.into_owned()),
+            Element::Component(c) => ast::Element::Component(c.into_owned()),
+            Element::Slot(s) => ast::Element::Slot(s.into_owned()),
+        }
+    }
+}
+
+/// A Frame element (2D container).
+#[derive(Debug, Clone, PartialEq)]
+pub struct FrameElement<'src> {
+    pub name: Option<&'src str>,
+    pub properties: Vec<Property<'src>>,
+    pub constraints: Vec<Constraint<'src>>,
+    pub children: Vec<Element<'src>>,
+    pub span: Span,
+}
+
+impl<'src> FrameElement<'src> {
+    pub fn into_owned(self) -> ast::FrameElement {
+        ast::FrameElement {
+            name: self.name.map(Identifier::from),
+            properties: owned_properties(self.properties),
+            constraints: owned_constraints(self.constraints),
+            children: self.children.into_iter().map(Element::into_owned).collect(),
+            span: self.span,
+        }
+    }
+}
+
+/// A Text element.
+#[derive(Debug, Clone, PartialEq)]
+pub struct TextElement<'src> {
+    pub name: Option<&'src str>,
+    pub content: TextContent<'src>,
+    pub properties: Vec<Property<'src>>,
+    pub constraints: Vec<Constraint<'src>>,
+    pub span: Span,
+}
+
+impl<'src> TextElement<'src> {
+    pub fn into_owned(self) -> ast::TextElement {
+        ast::TextElement {
+            name: self.name.map(Identifier::from),
+            content: self.content.into_owned(),
+            properties: owned_properties(self.properties),
+            constraints: owned_constraints(self.constraints),
+            span: self.span,
+        }
+    }
+}
+
+/// Text content (literal or token reference).
+#[derive(Debug, Clone, PartialEq)]
+pub enum TextContent<'src> {
+    Literal(&'src str),
+    TokenRef(TokenPath<'src>),
+}
+
+impl<'src> TextContent<'src> {
+    pub fn into_owned(self) -> ast::TextContent {
+        match self {
+            TextContent::Literal(s) => ast::TextContent::Literal(s.to_string()),
+            TextContent::TokenRef(path) => ast::TextContent::TokenRef(path.into_owned()),
+        }
+    }
+}
+
+/// A Part element (3D geometry).
+#[derive(Debug, Clone, PartialEq)]
+pub struct PartElement<'src> {
+    pub name: Option<&'src str>,
+    pub geometry: Geometry,
+    pub properties: Vec<Property<'src>>,
+    pub constraints: Vec<Constraint<'src>>,
+    pub span: Span,
+}
+
+impl<'src> PartElement<'src> {
+    pub fn into_owned(self) -> ast::PartElement {
+        ast::PartElement {
+            name: self.name.map(Identifier::from),
+            geometry: self.geometry,
+            properties: owned_properties(self.properties),
+            constraints: owned_constraints(self.constraints),
+            span: self.span,
+        }
+    }
+}
+
+/// A component instantiation.
+#[derive(Debug, Clone, PartialEq)]
+pub struct ComponentElement<'src> {
+    pub component_name: &'src str,
+    pub instance_name: Option<&'src str>,
+    pub props: Vec<Property<'src>>,
+    pub children: Vec<Element<'src>>,
+    pub span: Span,
+}
+
+impl<'src> ComponentElement<'src> {
+    pub fn into_owned(self) -> ast::ComponentElement {
+        ast::ComponentElement {
+            component_name: Identifier::from(self.component_name),
+            instance_name: self.instance_name.map(Identifier::from),
+            props: owned_properties(self.props),
+            children: self.children.into_iter().map(Element::into_owned).collect(),
+            span: self.span,
+        }
+    }
+}
+
+/// A slot placeholder in a component template.
+#[derive(Debug, Clone, PartialEq)]
+pub struct SlotElement<'src> {
+    pub name: Option<&'src str>,
+    pub fallback: Vec<Element<'src>>,
+    pub span: Span,
+}
+
+impl<'src> SlotElement<'src> {
+    pub fn into_owned(self) -> ast::SlotElement {
+        ast::SlotElement {
+            name: self.name.map(String::from),
+            fallback: self.fallback.into_iter().map(Element::into_owned).collect(),
+            span: self.span,
+        }
+    }
+}
+
+/// An element property.
+#[derive(Debug, Clone, PartialEq)]
+pub struct Property<'src> {
+    pub name: &'src str,
+    pub value: PropertyValue<'src>,
+    pub span: Span,
+}
+
+impl<'src> Property<'src> {
+    pub fn into_owned(self) -> ast::Property {
+        ast::Property {
+            name: PropertyName::new(self.name),
+            value: self.value.into_owned(),
+            span: self.span,
+        }
+    }
+}
+
+/// A property value.
+#[derive(Debug, Clone, PartialEq)]
+pub enum PropertyValue<'src> {
+    Color(Color),
+    Gradient(Gradient),
+    Shadow(Shadow),
+    Transform(Transform),
+    Length(Length),
+    Number(f64),
+    String(&'src str),
+    Boolean(bool),
+    TokenRef(TokenPath<'src>),
+    Enum(&'src str),
+    /// Reference to a component prop (used in templates)
+    PropRef(&'src str),
+}
+
+impl<'src> PropertyValue<'src> {
+    pub fn into_owned(self) -> ast::PropertyValue {
+        match self {
+            PropertyValue::Color(c) => ast::PropertyValue::Color(c),
+            PropertyValue::Gradient(g) => ast::PropertyValue::Gradient(g),
+            PropertyValue::Shadow(s) => ast::PropertyValue::Shadow(s),
+            PropertyValue::Transform(t) => ast::PropertyValue::Transform(t),
+            PropertyValue::Length(l) => ast::PropertyValue::Length(l),
+            PropertyValue::Number(n) => ast::PropertyValue::Number(n),
+            PropertyValue::String(s) => ast::PropertyValue::String(s.to_string()),
+            PropertyValue::Boolean(b) => ast::PropertyValue::Boolean(b),
+            PropertyValue::TokenRef(path) => ast::PropertyValue::TokenRef(path.into_owned()),
+            PropertyValue::Enum(s) => ast::PropertyValue::Enum(s.to_string()),
+            PropertyValue::PropRef(s) => ast::PropertyValue::PropRef(ast::PropRef(s.to_string())),
+        }
+    }
+}
+
+/// A constraint on an element.
+#[derive(Debug, Clone, PartialEq)]
+pub struct Constraint<'src> {
+    pub kind: ConstraintKind<'src>,
+    pub priority: Option<ConstraintPriority>,
+    pub span: Span,
+}
+
+impl<'src> Constraint<'src> {
+    pub fn into_owned(self) -> ast::Constraint {
+        ast::Constraint {
+            kind: self.kind.into_owned(),
+            priority: self.priority,
+            span: self.span,
+        }
+    }
+}
+
+/// Types of constraints.
+#[derive(Debug, Clone, PartialEq)]
+pub enum ConstraintKind<'src> {
+    /// width = 100px
+    Equality { property: &'src str, value: Expression<'src> },
+    /// center-x align Parent
+    Alignment { edge: Edge, target: ElementRef<'src>, target_edge: Option<Edge> },
+    /// below Header, gap: 24px
+    Relative { relation: Relation, target: ElementRef<'src>, gap: Option<Length> },
+    /// width >= 100px
+    Inequality { property: &'src str, op: InequalityOp, value: Expression<'src> },
+}
+
+impl<'src> ConstraintKind<'src> {
+    pub fn into_owned(self) -> ast::ConstraintKind {
+        match self {
+            ConstraintKind::Equality { property, value } => ast::ConstraintKind::Equality {
+                property: property.to_string(),
+                value: value.into_owned(),
+            },
+            ConstraintKind::Alignment { edge, target, target_edge } => ast::ConstraintKind::Alignment {
+                edge,
+                target: target.into_owned(),
+                target_edge,
+            },
+            ConstraintKind::Relative { relation, target, gap } => ast::ConstraintKind::Relative {
+                relation,
+                target: target.into_owned(),
+                gap,
+            },
+            ConstraintKind::Inequality { property, op, value } => ast::ConstraintKind::Inequality {
+                property: property.to_string(),
+                op,
+                value: value.into_owned(),
+            },
+        }
+    }
+}
+
+/// Reference to another element.
+#[derive(Debug, Clone, PartialEq)]
+pub enum ElementRef<'src> {
+    Parent,
+    Named(&'src str),
+    Previous,
+    Next,
+}
+
+impl<'src> ElementRef<'src> {
+    pub fn into_owned(self) -> ast::ElementRef {
+        match self {
+            ElementRef::Parent => ast::ElementRef::Parent,
+            ElementRef::Named(name) => ast::ElementRef::Named(Identifier::from(name)),
+            ElementRef::Previous => ast::ElementRef::Previous,
+            ElementRef::Next => ast::ElementRef::Next,
+        }
+    }
+}
+
+/// A constraint expression.
+#[derive(Debug, Clone, PartialEq)]
+pub enum Expression<'src> {
+    Literal(f64),
+    Length(Length),
+    PropertyRef { element: ElementRef<'src>, property: &'src str },
+    TokenRef(TokenPath<'src>),
+    BinaryOp { left: Box<Expression<'src>>, op: BinaryOp, right: Box<Expression<'src>> },
+    Function { name: &'src str, args: Vec<Expression<'src>> },
+}
+
+impl<'src> Expression<'src> {
+    pub fn into_owned(self) -> ast::Expression {
+        match self {
+            Expression::Literal(n) => ast::Expression::Literal(n),
+            Expression::Length(l) => ast::Expression::Length(l),
+            Expression::PropertyRef { element, property } => ast::Expression::PropertyRef {
+                element: element.into_owned(),
+                property: property.to_string(),
+            },
+            Expression::TokenRef(path) => ast::Expression::TokenRef(path.into_owned()),
+            Expression::BinaryOp { left, op, right } => ast::Expression::BinaryOp {
+                left: Box::new(left.into_owned()),
+                op,
+                right: Box::new(right.into_owned()),
+            },
+            Expression::Function { name, args } => ast::Expression::Function {
+                name: name.to_string(),
+                args: args.into_iter().map(Expression::into_owned).collect(),
+            },
+        }
+    }
+}
+
+fn owned_properties(properties: Vec<Property<'_>>) -> Vec<ast::Property> {
+    properties.into_iter().map(Property::into_owned).collect()
+}
+
+fn owned_constraints(constraints: Vec<Constraint<'_>>) -> Vec<ast::Constraint> {
+    constraints.into_iter().map(Constraint::into_owned).collect()
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use smallvec::smallvec;
+
+    #[test]
+    fn test_frame_into_owned() {
+        let source = String::from("Button fill primary");
+        let frame = FrameElement {
+            name: Some(&source[0..6]),
+            properties: vec![Property {
+                name: &source[7..11],
+                value: PropertyValue::TokenRef(TokenPath(smallvec!["color", &source[12..19]])),
+                span: Span::default(),
+            }],
+            constraints: vec![],
+            children: vec![],
+            span: Span::default(),
+        };
+
+        let owned = Element::Frame(frame).into_owned();
+        drop(source);
+
+        if let ast::Element::Frame(frame) = owned {
+            assert_eq!(frame.name.unwrap().0, "Button");
+            assert_eq!(frame.properties[0].name, "fill");
+            assert_eq!(
+                frame.properties[0].value,
+                ast::PropertyValue::TokenRef(ast::TokenPath(smallvec![
+                    "color".to_string(),
+                    "primary".to_string()
+                ]))
+            );
+        } else {
+            panic!("Expected Frame element");
+        }
+    }
+
+    #[test]
+    fn test_expression_into_owned() {
+        let expr = Expression::BinaryOp {
+            left: Box::new(Expression::PropertyRef {
+                element: ElementRef::Named("Header"),
+                property: "height",
+            }),
+            op: BinaryOp::Add,
+            right: Box::new(Expression::Length(Length::px(8.0))),
+        };
+
+        match expr.into_owned() {
+            ast::Expression::BinaryOp { left, op, .. } => {
+                assert_eq!(op, BinaryOp::Add);
+                assert_eq!(
+                    *left,
+                    ast::Expression::PropertyRef {
+                        element: ast::ElementRef::Named(Identifier::from("Header")),
+                        property: "height".to_string(),
+                    }
+                );
+            }
+            _ => panic!("Expected binary op"),
+        }
+    }
+}
@@ -60,6 +60,46 @@ pub enum ParseError {
 
     #[error("Unexpected end of input")]
     UnexpectedEof,
+
+    #[error("I/O error while reading source: {0}")]
+    Io(#[from] std::io::Error),
+}
+
+/// Errors decoding the binary AST format.
+#[derive(Debug, Error)]
+pub enum BinaryError {
+    #[error("Not a Seed binary document")]
+    BadMagic,
+
+    #[error("Unsupported binary format version {found} (expected {expected})")]
+    UnsupportedVersion { found: u16, expected: u16 },
+
+    #[error("Unexpected end of binary document")]
+    UnexpectedEof,
+
+    #[error("Invalid varint at byte {offset}")]
+    InvalidVarint { offset: usize },
+
+    #[error("Invalid {what} tag {tag} at byte {offset}")]
+    InvalidTag { what: &'static str, tag: u8, offset: usize },
+
+    #[error("Integer out of range at byte {offset}")]
+    IntegerOverflow { offset: usize },
+
+    #[error("Values nested too deeply at byte {offset}")]
+    TooDeep { offset: usize },
+
+    #[error("Invalid string index {index} at byte {offset}")]
+    InvalidString { index: u64, offset: usize },
+
+    #[error("Invalid UTF-8 in string table at byte {offset}")]
+    InvalidUtf8 { offset: usize },
+
+    #[error("Trailing bytes after document at byte {offset}")]
+    TrailingBytes { offset: usize },
+
+    #[error("I/O error while loading binary document: {0}")]
+    Io(#[from] std::io::Error),
 }
 
 /// Errors during token/reference resolution.
@@ -115,6 +155,9 @@ pub enum ConstraintError {
     #[error("Constraint references unknown property: {property}")]
     UnknownProperty { property: String, span: Span },
 
+    #[error("Constraint expression is not linear: {expression}")]
+    NonLinear { expression: String, span: Span },
+
     #[error("Conflicting required constraints")]
     ConflictingRequired {
         constraint1: String,
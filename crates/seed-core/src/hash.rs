@@ -0,0 +1,94 @@
+//! Hashing of AST values.
+//!
+//! AST nodes hold floats, so they don't implement [`Hash`]. They are hashed
+//! through their [binary encoding](crate::binary) instead.
+
+use std::collections::hash_map::DefaultHasher;
+use std::hash::{Hash, Hasher};
+
+use crate::ast::{Element, PropertyValue};
+use crate::binary::{Encode, Encoder};
+
+/// Hashes AST values by their binary encoding.
+///
+/// Values that encode the same get the same hash, which makes this usable
+/// as a key for caches of trees derived from them.
+#[derive(Default)]
+pub struct EncodedHasher<'a> {
+    encoder: Encoder<'a>,
+}
+
+impl<'a> EncodedHasher<'a> {
+    pub fn new() -> Self {
+        Self::default()
+    }
+
+    /// Add a string.
+    pub fn write_str(&mut self, value: &'a str) {
+        self.encoder.str(value);
+    }
+
+    /// Add a property value.
+    pub fn write_value(&mut self, value: &'a PropertyValue) {
+        value.encode(&mut self.encoder);
+    }
+
+    /// Add a list of elements, spans included.
+    pub fn write_elements(&mut self, elements: &'a [Element]) {
+        self.encoder.varint(elements.len() as u64);
+        for element in elements {
+            element.encode(&mut self.encoder);
+        }
+    }
+
+    /// Hash of everything added so far.
+    pub fn finish(&self) -> u64 {
+        let mut hasher = DefaultHasher::new();
+        for s in &self.encoder.strings {
+            s.hash(&mut hasher);
+        }
+        hasher.write(&self.encoder.body);
+        hasher.finish()
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::ast::{FrameElement, Property, Span};
+    use crate::types::{Identifier, Length};
+
+    fn frame(width: f64) -> Element {
+        Element::Frame(FrameElement {
+            name: Some(Identifier::from("Card")),
+            properties: vec![Property {
+                name: "width".into(),
+                value: PropertyValue::Length(Length::px(width)),
+                span: Span::default(),
+            }],
+            constraints: vec![],
+            children: Default::default(),
+            span: Span::default(),
+        })
+    }
+
+    #[test]
+    fn test_encoded_hash() {
+        let elements = vec![frame(100.0), frame(200.0)];
+        let copy = elements.clone();
+        fn hash(elements: &[Element]) -> u64 {
+            let mut hasher = EncodedHasher::new();
+            hasher.write_str("Card");
+            hasher.write_elements(elements);
+            hasher.finish()
+        }
+        assert_eq!(hash(&elements), hash(&copy));
+        assert_ne!(hash(&elements), hash(&elements[1..]));
+
+        let mut a = EncodedHasher::new();
+        a.write_value(&PropertyValue::Number(1.0));
+        let mut b = EncodedHasher::new();
+        b.write_value(&PropertyValue::Number(2.0));
+        assert_ne!(a.finish(), b.finish());
+    }
+}
@@ -2,16 +2,27 @@
 //!
 //! This crate provides the foundational types used across all other seed-engine crates:
 //! - AST node types for representing parsed Seed documents
+//! - Borrowed (zero-copy) AST variants that point into the source text
+//! - An arena-allocated AST that is freed in bulk
+//! - A compact, versioned binary encoding of the AST
+//! - Hashing of AST values by their encoding
+//! - Interned property names
 //! - Value types (units, colors, etc.)
 //! - Token system types
 //! - Error types
 
+pub mod arena;
 pub mod ast;
+pub mod binary;
+pub mod borrowed;
 pub mod errors;
+pub mod hash;
+pub mod names;
 pub mod tokens;
 pub mod types;
 
 pub use ast::*;
 pub use errors::*;
+pub use names::*;
 pub use tokens::*;
 pub use types::*;
@@ -0,0 +1,224 @@
+//! Interned property names.
+//!
+//! Property names are compared many times per element by layout, rendering
+//! and export. [`PropertyName`] stores well-known names as enum variants and
+//! everything else as an interned [`Symbol`], so names are 8-byte `Copy`
+//! values and every comparison is an integer compare.
+
+use std::collections::HashMap;
+use std::fmt;
+use std::sync::{OnceLock, RwLock};
+
+/// An interned string.
+///
+/// Interned strings live for the rest of the program, so the interner only
+/// grows with the number of distinct names ever seen.
+#[derive(Clone, Copy, PartialEq, Eq, Hash, PartialOrd, Ord)]
+pub struct Symbol(u32);
+
+#[derive(Default)]
+struct Interner {
+    ids: HashMap<&'static str, u32>,
+    names: Vec<&'static str>,
+}
+
+fn interner() -> &'static RwLock<Interner> {
+    static INTERNER: OnceLock<RwLock<Interner>> = OnceLock::new();
+    INTERNER.get_or_init(Default::default)
+}
+
+impl Symbol {
+    /// Intern `name`, returning the existing symbol if it was seen before.
+    pub fn intern(name: &str) -> Self {
+        if let Some(&id) = interner().read().unwrap().ids.get(name) {
+            return Symbol(id);
+        }
+
+        let mut interner = interner().write().unwrap();
+        if let Some(&id) = interner.ids.get(name) {
+            return Symbol(id);
+        }
+        let name: &'static str = Box::leak(name.into());
+        let id = interner.names.len() as u32;
+        interner.names.push(name);
+        interner.ids.insert(name, id);
+        Symbol(id)
+    }
+
+    /// The interned string.
+    pub fn as_str(self) -> &'static str {
+        interner().read().unwrap().names[self.0 as usize]
+    }
+}
+
+impl fmt::Debug for Symbol {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        f.debug_tuple("Symbol").field(&self.as_str()).finish()
+    }
+}
+
+macro_rules! property_names {
+    ($($variant:ident => $name:literal,)*) => {
+        /// A property name.
+        ///
+        /// Known names get their own variant; any other name is interned as
+        /// [`PropertyName::Other`].
+        #[derive(Debug, Clone, Copy, PartialEq, Eq, Hash)]
+        pub enum PropertyName {
+            $($variant,)*
+            Other(Symbol),
+        }
+
+        impl PropertyName {
+            /// Look up or intern a property name.
+            pub fn new(name: &str) -> Self {
+                match name {
+                    $($name => PropertyName::$variant,)*
+                    _ => PropertyName::Other(Symbol::intern(name)),
+                }
+            }
+
+            /// The property name as written in Seed source.
+            pub fn as_str(&self) -> &'static str {
+                match self {
+                    $(PropertyName::$variant => $name,)*
+                    PropertyName::Other(symbol) => symbol.as_str(),
+                }
+            }
+        }
+    };
+}
+
+property_names! {
+    // Geometry
+    X => "x",
+    Y => "y",
+    Left => "left",
+    Top => "top",
+    Width => "width",
+    Height => "height",
+    MinWidth => "min-width",
+    MinHeight => "min-height",
+    MaxWidth => "max-width",
+    MaxHeight => "max-height",
+
+    // Layout
+    Layout => "layout",
+    Direction => "direction",
+    Align => "align",
+    Gap => "gap",
+    Padding => "padding",
+    Clip => "clip",
+
+    // Fill and stroke
+    Fill => "fill",
+    Background => "background",
+    BackgroundColor => "background-color",
+    Stroke => "stroke",
+    StrokeWidth => "stroke-width",
+    BorderColor => "border-color",
+    BorderWidth => "border-width",
+    BorderRadius => "border-radius",
+    CornerRadius => "corner-radius",
+    CornerRadiusTopLeft => "corner-radius-top-left",
+    CornerRadiusTopRight => "corner-radius-top-right",
+    CornerRadiusBottomRight => "corner-radius-bottom-right",
+    CornerRadiusBottomLeft => "corner-radius-bottom-left",
+    Opacity => "opacity",
+
+    // Effects
+    Shadow => "shadow",
+    BoxShadow => "box-shadow",
+    DropShadow => "drop-shadow",
+
+    // Text
+    Content => "content",
+    Color => "color",
+    FontFamily => "font-family",
+    FontSize => "font-size",
+    FontWeight => "font-weight",
+    LineHeight => "line-height",
+    LetterSpacing => "letter-spacing",
+
+    // Materials
+    Metallic => "metallic",
+    Roughness => "roughness",
+}
+
+impl From<&str> for PropertyName {
+    fn from(name: &str) -> Self {
+        PropertyName::new(name)
+    }
+}
+
+impl From<String> for PropertyName {
+    fn from(name: String) -> Self {
+        PropertyName::new(&name)
+    }
+}
+
+impl From<PropertyName> for String {
+    fn from(name: PropertyName) -> Self {
+        name.as_str().to_string()
+    }
+}
+
+impl PartialEq<str> for PropertyName {
+    fn eq(&self, other: &str) -> bool {
+        self.as_str() == other
+    }
+}
+
+impl PartialEq<&str> for PropertyName {
+    fn eq(&self, other: &&str) -> bool {
+        self.as_str() == *other
+    }
+}
+
+impl fmt::Display for PropertyName {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        f.write_str(self.as_str())
+    }
+}
+
+#[cfg(feature = "serde")]
+impl serde::Serialize for PropertyName {
+    fn serialize<S: serde::Serializer>(&self, serializer: S) -> Result<S::Ok, S::Error> {
+        serializer.serialize_str(self.as_str())
+    }
+}
+
+#[cfg(feature = "serde")]
+impl<'de> serde::Deserialize<'de> for PropertyName {
+    fn deserialize<D: serde::Deserializer<'de>>(deserializer: D) -> Result<Self, D::Error> {
+        let name = String::deserialize(deserializer)?;
+        Ok(PropertyName::new(&name))
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_known_names() {
+        assert_eq!(PropertyName::new("fill"), PropertyName::Fill);
+        assert_eq!(PropertyName::new("corner-radius").as_str(), "corner-radius");
+        assert_eq!(PropertyName::Width, "width");
+    }
+
+    #[test]
+    fn test_other_names_are_interned() {
+        let a = PropertyName::new("cornerRadius");
+        let b = PropertyName::from("cornerRadius".to_string());
+        assert!(matches!(a, PropertyName::Other(_)));
+        assert_eq!(a, b);
+        assert_ne!(a, PropertyName::new("cornerradius"));
+        assert_eq!(a.as_str(), "cornerRadius");
+    }
+
+    #[test]
+    fn test_property_name_is_small() {
+        assert_eq!(std::mem::size_of::<PropertyName>(), 8);
+    }
+}
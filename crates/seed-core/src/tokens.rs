@@ -1,7 +1,11 @@
 //! Token system types and utilities.
 
+use std::hash::{BuildHasherDefault, Hasher};
+use std::sync::Arc;
+
 use crate::ast::TokenPath;
-use crate::types::{Color, Length};
+use crate::types::{Color, Length, TokenId};
+use indexmap::map::Entry;
 use indexmap::IndexMap;
 
 /// A resolved token value.
@@ -14,11 +18,58 @@ pub enum ResolvedToken {
     String(String),
 }
 
+impl TokenPath {
+    /// The id this path is stored under in a [`TokenMap`].
+    pub fn id(&self) -> TokenId {
+        TokenId::from_segments(self.0.iter().map(String::as_str))
+    }
+
+    /// Check whether this path spells the dotted path `dotted`.
+    pub fn matches(&self, dotted: &str) -> bool {
+        let mut rest = dotted;
+        for (i, segment) in self.0.iter().enumerate() {
+            if i > 0 {
+                match rest.strip_prefix('.') {
+                    Some(r) => rest = r,
+                    None => return false,
+                }
+            }
+            match rest.strip_prefix(segment.as_str()) {
+                Some(r) => rest = r,
+                None => return false,
+            }
+        }
+        rest.is_empty()
+    }
+}
+
 /// A map of resolved tokens.
+///
+/// Tokens are keyed by the [`TokenId`] of their path, so a [`TokenPath`]
+/// can be looked up without joining its segments into a string. Ids are
+/// 64-bit hashes; in the unlikely case that two paths share one, the later
+/// path is kept in a separate map keyed by path, and lookups by path still
+/// find both.
+///
+/// A map can be an overlay on a shared base map (see [`TokenMap::overlay`]).
+/// Lookups fall through to the base for tokens the overlay does not define,
+/// and inserts only ever change the overlay, so one base theme can back
+/// any number of variants without being copied.
 #[derive(Debug, Clone, Default)]
 #[cfg_attr(feature = "serde", derive(serde::Serialize, serde::Deserialize))]
+#[cfg_attr(feature = "serde", serde(from = "TokenMapRepr", into = "TokenMapRepr"))]
 pub struct TokenMap {
-    tokens: IndexMap<String, ResolvedToken>,
+    tokens: IndexMap<TokenId, TokenEntry, BuildHasherDefault<TokenIdHasher>>,
+    /// Tokens whose id is already taken in `tokens` by another path
+    collisions: IndexMap<String, ResolvedToken>,
+    /// Map that this one overrides, if it is an overlay
+    base: Option<Arc<TokenMap>>,
+}
+
+#[derive(Debug, Clone)]
+struct TokenEntry {
+    path: String,
+    value: ResolvedToken,
 }
 
 impl TokenMap {
@@ -26,40 +77,153 @@ impl TokenMap {
         Self::default()
     }
 
+    /// Create an empty overlay on `base`.
+    pub fn overlay(base: Arc<TokenMap>) -> Self {
+        Self {
+            tokens: IndexMap::default(),
+            collisions: IndexMap::new(),
+            base: Some(base),
+        }
+    }
+
+    /// The map this overlay falls through to, if any.
+    pub fn base(&self) -> Option<&Arc<TokenMap>> {
+        self.base.as_ref()
+    }
+
+    /// This map and its bases, from the top layer down.
+    fn layers(&self) -> impl Iterator<Item = &TokenMap> {
+        std::iter::successors(Some(self), |layer| layer.base.as_deref())
+    }
+
+    /// The value this layer itself defines for the path with id `id` that
+    /// `is_path` accepts.
+    fn own(&self, id: TokenId, is_path: impl Fn(&str) -> bool) -> Option<&ResolvedToken> {
+        match self.tokens.get(&id) {
+            Some(entry) if is_path(&entry.path) => Some(&entry.value),
+            Some(_) => self.collisions.iter().find(|(path, _)| is_path(path)).map(|(_, value)| value),
+            None => None,
+        }
+    }
+
     /// Insert a token with a dotted path (e.g., "color.primary").
+    ///
+    /// In an overlay this shadows the base's value without changing it.
     pub fn insert(&mut self, path: &str, value: ResolvedToken) {
-        self.tokens.insert(path.to_string(), value);
+        match self.tokens.entry(TokenId::from_dotted(path)) {
+            Entry::Occupied(entry) if entry.get().path != path => {
+                // Another path has the same id
+                self.collisions.insert(path.to_string(), value);
+            }
+            Entry::Occupied(mut entry) => entry.get_mut().value = value,
+            Entry::Vacant(entry) => {
+                entry.insert(TokenEntry { path: path.to_string(), value });
+            }
+        }
     }
 
     /// Get a token by dotted path.
     pub fn get(&self, path: &str) -> Option<&ResolvedToken> {
-        self.tokens.get(path)
+        let id = TokenId::from_dotted(path);
+        self.layers().find_map(|layer| layer.own(id, |p| p == path))
     }
 
     /// Get a token by TokenPath.
     pub fn get_by_path(&self, path: &TokenPath) -> Option<&ResolvedToken> {
-        let path_str = path.0.join(".");
-        self.tokens.get(&path_str)
+        let id = path.id();
+        self.layers().find_map(|layer| layer.own(id, |p| path.matches(p)))
+    }
+
+    /// Get a token by the id of its path.
+    ///
+    /// If several paths share the id, this is the value of the one inserted
+    /// first; look up by path to tell them apart.
+    pub fn get_by_id(&self, id: TokenId) -> Option<&ResolvedToken> {
+        self.layers().find_map(|layer| layer.tokens.get(&id)).map(|entry| &entry.value)
     }
 
     /// Check if a token exists.
     pub fn contains(&self, path: &str) -> bool {
-        self.tokens.contains_key(path)
+        self.get(path).is_some()
     }
 
-    /// Iterate over all tokens.
+    /// Iterate over all tokens, the overlay's own first, then those of each
+    /// base that are not overridden.
     pub fn iter(&self) -> impl Iterator<Item = (&String, &ResolvedToken)> {
-        self.tokens.iter()
+        self.layers().enumerate().flat_map(move |(depth, layer)| {
+            layer.own_iter()
+                .filter(move |&(id, path, _)| {
+                    !self.layers().take(depth).any(|upper| upper.own(id, |p| p == path).is_some())
+                })
+                .map(|(_, path, value)| (path, value))
+        })
+    }
+
+    /// The tokens this layer itself defines, with the ids of their paths.
+    fn own_iter(&self) -> impl Iterator<Item = (TokenId, &String, &ResolvedToken)> {
+        let tokens = self.tokens.iter().map(|(&id, entry)| (id, &entry.path, &entry.value));
+        let collisions = self.collisions.iter().map(|(path, value)| (TokenId::from_dotted(path), path, value));
+        tokens.chain(collisions)
     }
 
     /// Number of tokens in the map.
     pub fn len(&self) -> usize {
-        self.tokens.len()
+        match self.base {
+            None => self.tokens.len() + self.collisions.len(),
+            Some(_) => self.iter().count(),
+        }
     }
 
     /// Check if the map is empty.
     pub fn is_empty(&self) -> bool {
-        self.tokens.is_empty()
+        self.layers().all(|layer| layer.tokens.is_empty())
+    }
+}
+
+/// Serialized form of a [`TokenMap`], keyed by dotted path.
+#[cfg(feature = "serde")]
+#[derive(serde::Serialize, serde::Deserialize)]
+struct TokenMapRepr {
+    tokens: IndexMap<String, ResolvedToken>,
+}
+
+#[cfg(feature = "serde")]
+impl From<TokenMapRepr> for TokenMap {
+    fn from(repr: TokenMapRepr) -> Self {
+        let mut map = TokenMap::new();
+        for (path, value) in repr.tokens {
+            map.insert(&path, value);
+        }
+        map
+    }
+}
+
+#[cfg(feature = "serde")]
+impl From<TokenMap> for TokenMapRepr {
+    fn from(map: TokenMap) -> Self {
+        Self {
+            tokens: map.iter().map(|(path, value)| (path.clone(), value.clone())).collect(),
+        }
+    }
+}
+
+/// Hasher for [`TokenId`] keys, which are already hashes.
+#[derive(Default)]
+struct TokenIdHasher(u64);
+
+impl Hasher for TokenIdHasher {
+    fn finish(&self) -> u64 {
+        self.0
+    }
+
+    fn write(&mut self, bytes: &[u8]) {
+        for &byte in bytes {
+            self.0 = self.0.rotate_left(8) ^ byte as u64;
+        }
+    }
+
+    fn write_u64(&mut self, id: u64) {
+        self.0 = id;
     }
 }
 
@@ -96,3 +260,83 @@ impl ResolvedToken {
         }
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use smallvec::smallvec;
+
+    #[test]
+    fn test_path_id_matches_dotted_id() {
+        let path = TokenPath(smallvec!["colors".to_string(), "primary".to_string()]);
+        assert_eq!(path.id(), TokenId::from_dotted("colors.primary"));
+        assert_ne!(path.id(), TokenId::from_dotted("colorsprimary"));
+
+        assert!(path.matches("colors.primary"));
+        assert!(!path.matches("colors.primary.dark"));
+        assert!(!path.matches("colorsXprimary"));
+        assert!(!path.matches("colors"));
+    }
+
+    #[test]
+    fn test_lookup_by_path() {
+        let mut tokens = TokenMap::new();
+        tokens.insert("spacing.md", ResolvedToken::Length(Length::px(16.0)));
+        tokens.insert("colors.primary", ResolvedToken::Number(1.0));
+        tokens.insert("spacing.md", ResolvedToken::Length(Length::px(12.0)));
+
+        let path = TokenPath(smallvec!["spacing".to_string(), "md".to_string()]);
+        assert_eq!(tokens.get_by_path(&path), Some(&ResolvedToken::Length(Length::px(12.0))));
+        assert_eq!(tokens.get_by_id(path.id()), tokens.get("spacing.md"));
+        assert!(tokens.get("spacing").is_none());
+
+        let paths: Vec<&String> = tokens.iter().map(|(path, _)| path).collect();
+        assert_eq!(paths, ["spacing.md", "colors.primary"]);
+    }
+
+    #[test]
+    fn test_overlay_falls_through_to_base() {
+        let mut base = TokenMap::new();
+        base.insert("colors.surface", ResolvedToken::Color(Color::WHITE));
+        base.insert("spacing.md", ResolvedToken::Length(Length::px(16.0)));
+        let base = Arc::new(base);
+
+        let mut dark = TokenMap::overlay(base.clone());
+        dark.insert("colors.surface", ResolvedToken::Color(Color::BLACK));
+
+        assert_eq!(dark.get("colors.surface"), Some(&ResolvedToken::Color(Color::BLACK)));
+        assert_eq!(dark.get("spacing.md"), Some(&ResolvedToken::Length(Length::px(16.0))));
+        assert_eq!(base.get("colors.surface"), Some(&ResolvedToken::Color(Color::WHITE)));
+
+        let paths: Vec<&String> = dark.iter().map(|(path, _)| path).collect();
+        assert_eq!(paths, ["colors.surface", "spacing.md"]);
+        assert_eq!(dark.len(), 2);
+    }
+
+    #[test]
+    fn test_paths_with_the_same_id_are_both_kept() {
+        // Real 64-bit collisions are impractical to find, so plant an entry
+        // for another path under the id of `spacing.md`
+        let mut base = TokenMap::new();
+        base.tokens.insert(TokenId::from_dotted("spacing.md"), TokenEntry {
+            path: "spacing.sm".to_string(),
+            value: ResolvedToken::Length(Length::px(8.0)),
+        });
+        base.insert("spacing.md", ResolvedToken::Length(Length::px(16.0)));
+        base.insert("spacing.md", ResolvedToken::Length(Length::px(12.0)));
+
+        assert_eq!(base.get("spacing.md"), Some(&ResolvedToken::Length(Length::px(12.0))));
+        let id = TokenId::from_dotted("spacing.md");
+        assert_eq!(base.get_by_id(id), Some(&ResolvedToken::Length(Length::px(8.0))));
+        let path = TokenPath(smallvec!["spacing".to_string(), "md".to_string()]);
+        assert_eq!(base.get_by_path(&path), Some(&ResolvedToken::Length(Length::px(12.0))));
+        assert_eq!(base.len(), 2);
+
+        let mut overlay = TokenMap::overlay(Arc::new(base));
+        overlay.insert("spacing.md", ResolvedToken::Length(Length::px(20.0)));
+        assert_eq!(overlay.get("spacing.md"), Some(&ResolvedToken::Length(Length::px(20.0))));
+        let paths: Vec<&String> = overlay.iter().map(|(path, _)| path).collect();
+        assert_eq!(paths, ["spacing.md", "spacing.sm"]);
+        assert_eq!(overlay.len(), 2);
+    }
+}
@@ -163,6 +163,12 @@ impl Default for Color {
 }
 
 /// Unique identifier for elements (used internally after parsing).
+///
+/// Reference resolution numbers the elements of a document depth-first in
+/// document order, from 0, following [`Element::children`]. An id is only
+/// meaningful for the tree it was assigned in.
+///
+/// [`Element::children`]: crate::ast::Element::children
 #[derive(Debug, Clone, Copy, PartialEq, Eq, Hash)]
 #[cfg_attr(feature = "serde", derive(serde::Serialize, serde::Deserialize))]
 pub struct ElementId(pub u64);
@@ -172,6 +178,53 @@ pub struct ElementId(pub u64);
 #[cfg_attr(feature = "serde", derive(serde::Serialize, serde::Deserialize))]
 pub struct TokenId(pub u64);
 
+impl TokenId {
+    const SEED: u64 = 0xcbf2_9ce4_8422_2325;
+    const K: u64 = 0x517c_c1b7_2722_0a95;
+
+    /// The id of a dotted token path such as `color.primary`.
+    pub fn from_dotted(path: &str) -> Self {
+        Self::from_segments(path.split('.'))
+    }
+
+    /// The id of a token path given as segments, equal to the id of the
+    /// segments joined with dots.
+    pub fn from_segments<'a>(segments: impl IntoIterator<Item = &'a str>) -> Self {
+        let mut hash = Self::SEED;
+        for segment in segments {
+            let mut words = segment.as_bytes().chunks_exact(8);
+            for word in &mut words {
+                hash = Self::mix(hash, u64::from_le_bytes(word.try_into().unwrap()));
+            }
+            hash = Self::mix(hash, Self::tail_word(words.remainder(), segment.len()));
+        }
+        Self(Self::mix(hash, Self::SEED))
+    }
+
+    /// The last 0-7 bytes of a segment as one word, with the segment length
+    /// in the top byte so that it also separates the segment from the next.
+    fn tail_word(bytes: &[u8], segment_len: usize) -> u64 {
+        let mut word = (segment_len as u64) << 56;
+        if bytes.len() >= 4 {
+            // Two overlapping reads cover 4-7 bytes without a copy
+            let low = u32::from_le_bytes([bytes[0], bytes[1], bytes[2], bytes[3]]);
+            let high = u32::from_le_bytes(bytes[bytes.len() - 4..].try_into().unwrap());
+            word |= low as u64 | (high as u64) << (8 * (bytes.len() - 4));
+        } else {
+            for (i, &byte) in bytes.iter().enumerate() {
+                word |= (byte as u64) << (8 * i);
+            }
+        }
+        word
+    }
+
+    /// Folded multiply: the high and low halves of the full product xored.
+    fn mix(hash: u64, word: u64) -> u64 {
+        let product = ((hash ^ word) as u128).wrapping_mul(Self::K as u128);
+        (product as u64) ^ ((product >> 64) as u64)
+    }
+}
+
 /// Unique identifier for constraints.
 #[derive(Debug, Clone, Copy, PartialEq, Eq, Hash)]
 #[cfg_attr(feature = "serde", derive(serde::Serialize, serde::Deserialize))]
@@ -0,0 +1,145 @@
+//! Memoized component expansion.
+//!
+//! Instances of a component with the same props and the same slot content
+//! expand to the same tree, so the first expansion is kept and shared by
+//! the rest. Entries are keyed by component name and a hash of the
+//! instance's props and children, and checked against the stored props and
+//! children on lookup, so a hash collision costs a miss rather than a
+//! wrong tree.
+
+use std::collections::HashMap;
+use std::sync::Arc;
+
+use seed_core::{
+    ast::{Element, Property},
+    hash::EncodedHasher,
+};
+
+/// Hit and miss counts of an [`ExpansionCache`].
+#[derive(Debug, Clone, Copy, Default, PartialEq, Eq)]
+pub struct ExpansionStats {
+    /// Instances served from the cache.
+    pub hits: u64,
+    /// Instances that had to be expanded.
+    pub misses: u64,
+}
+
+impl ExpansionStats {
+    /// Number of instances looked up.
+    pub fn lookups(&self) -> u64 {
+        self.hits + self.misses
+    }
+}
+
+/// Expanded component instances, shared between identical instances.
+///
+/// A cache may be kept across expansions of several documents, as long as
+/// the component registry does not change in between; call
+/// [`ExpansionCache::clear`] when it does.
+#[derive(Debug, Default)]
+pub struct ExpansionCache {
+    entries: HashMap<CacheKey, CacheEntry>,
+    stats: ExpansionStats,
+}
+
+#[derive(Debug, PartialEq, Eq, Hash)]
+struct CacheKey {
+    component: String,
+    hash: u64,
+}
+
+#[derive(Debug)]
+struct CacheEntry {
+    props: Vec<Property>,
+    children: Vec<Element>,
+    /// Nesting depth of the components expanded inside the instance.
+    depth: u32,
+    expanded: Arc<[Element]>,
+}
+
+/// The cache slot for one component instance, from [`ExpansionCache::lookup`].
+pub(crate) struct CacheSlot {
+    key: CacheKey,
+}
+
+impl ExpansionCache {
+    pub fn new() -> Self {
+        Self::default()
+    }
+
+    /// Hit and miss counts since the cache was created or cleared.
+    pub fn stats(&self) -> ExpansionStats {
+        self.stats
+    }
+
+    /// Number of distinct instances stored.
+    pub fn len(&self) -> usize {
+        self.entries.len()
+    }
+
+    /// Check if nothing is stored.
+    pub fn is_empty(&self) -> bool {
+        self.entries.is_empty()
+    }
+
+    /// Drop every entry and reset the stats.
+    pub fn clear(&mut self) {
+        self.entries.clear();
+        self.stats = ExpansionStats::default();
+    }
+
+    /// Find the expansion of an instance of `component` with `props` and
+    /// `children`, whose own nesting depth is `depth`.
+    ///
+    /// A stored expansion whose nested components would exceed `max_depth`
+    /// at this depth is not returned, so that the expansion is redone and
+    /// fails as it would without the cache. On a miss, the returned slot is
+    /// passed to [`ExpansionCache::insert`] with the expanded tree.
+    pub(crate) fn lookup(
+        &mut self,
+        component: &str,
+        props: &[Property],
+        children: &[Element],
+        depth: u32,
+        max_depth: u32,
+    ) -> Result<(Arc<[Element]>, u32), CacheSlot> {
+        let mut hasher = EncodedHasher::new();
+        for prop in props {
+            hasher.write_str(prop.name.as_str());
+            hasher.write_value(&prop.value);
+        }
+        hasher.write_elements(children);
+        let key = CacheKey { component: component.to_string(), hash: hasher.finish() };
+
+        if let Some(entry) = self.entries.get(&key) {
+            let same_props = entry.props.len() == props.len()
+                && entry.props.iter().zip(props).all(|(a, b)| a.name == b.name && a.value == b.value);
+            if same_props && entry.children == children && depth + entry.depth <= max_depth {
+                self.stats.hits += 1;
+                return Ok((entry.expanded.clone(), entry.depth));
+            }
+        }
+
+        self.stats.misses += 1;
+        Err(CacheSlot { key })
+    }
+
+    /// Store the expansion of the instance that missed with `slot`.
+    pub(crate) fn insert(
+        &mut self,
+        slot: CacheSlot,
+        props: &[Property],
+        children: &[Element],
+        depth: u32,
+        expanded: Vec<Element>,
+    ) -> Arc<[Element]> {
+        let expanded: Arc<[Element]> = expanded.into();
+        self.entries.insert(slot.key, CacheEntry {
+            props: props.to_vec(),
+            children: children.to_vec(),
+            depth,
+            expanded: expanded.clone(),
+        });
+        expanded
+    }
+}
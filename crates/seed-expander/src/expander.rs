@@ -10,26 +10,42 @@ use std::collections::HashMap;
 use seed_core::{
     Document, ExpandError,
     ast::{
-        Element, FrameElement, TextElement, PartElement, ComponentElement,
+        Element, ElementList, FrameElement, TextElement, PartElement, ComponentElement,
         SlotElement, Property, PropertyValue, TextContent,
     },
 };
-use crate::ComponentRegistry;
+use seed_resolver::{has_resolved_references, relink_references, unlink_references};
+use crate::{ComponentRegistry, ExpansionCache};
 
 /// Maximum nesting depth for component expansion (prevent infinite recursion).
-const MAX_EXPANSION_DEPTH: u32 = 100;
+pub(crate) const MAX_EXPANSION_DEPTH: u32 = 100;
 
 /// Expand all component instances in a document.
+///
+/// Instances with the same props and children are expanded once (see
+/// [`ExpansionCache`]).
 pub fn expand_components(
     doc: &Document,
     registry: &ComponentRegistry,
 ) -> Result<Document, ExpandError> {
-    let mut expander = ComponentExpander::new(registry);
-    expander.expand_document(doc)
+    expand_components_cached(doc, registry, &mut ExpansionCache::new())
+}
+
+/// Like [`expand_components`], but reuse and add to the expansions in
+/// `cache`, which may hold instances from earlier documents.
+pub fn expand_components_cached(
+    doc: &Document,
+    registry: &ComponentRegistry,
+    cache: &mut ExpansionCache,
+) -> Result<Document, ExpandError> {
+    let mut expander = ComponentExpander::new(registry, std::mem::take(cache));
+    let result = expander.expand_linked(doc);
+    *cache = expander.cache;
+    result
 }
 
 /// Context for prop substitution during expansion.
-struct PropContext {
+pub(crate) struct PropContext {
     /// Map of prop name to value.
     props: HashMap<String, PropertyValue>,
 }
@@ -48,6 +64,61 @@ impl PropContext {
     fn insert(&mut self, name: String, value: PropertyValue) {
         self.props.insert(name, value);
     }
+
+    /// Check if `properties` refer to any of the props.
+    pub(crate) fn substitutes(&self, properties: &[Property]) -> bool {
+        properties.iter().any(|property| {
+            matches!(&property.value, PropertyValue::PropRef(prop_ref) if self.props.contains_key(&prop_ref.0))
+        })
+    }
+
+    /// Replace prop references in `properties` with the prop values.
+    ///
+    /// References to unknown props are kept.
+    pub(crate) fn substitute(&self, properties: &mut [Property]) {
+        for property in properties {
+            if let PropertyValue::PropRef(prop_ref) = &property.value {
+                if let Some(value) = self.get(&prop_ref.0) {
+                    property.value = value.clone();
+                }
+            }
+        }
+    }
+}
+
+/// Build the props for an instance of `definition`: defaults overridden by
+/// `props`, which are the instance's props after any earlier rewriting.
+pub(crate) fn build_prop_context(
+    comp: &ComponentElement,
+    props: &[Property],
+    definition: &seed_core::ast::ComponentDefinition,
+) -> Result<PropContext, ExpandError> {
+    let mut context = PropContext::new();
+
+    // First, add all defaults
+    for prop_def in &definition.props {
+        if let Some(default) = &prop_def.default {
+            context.insert(prop_def.name.clone(), default.clone());
+        }
+    }
+
+    // Then, override with provided props
+    for prop in props {
+        context.insert(prop.name.to_string(), prop.value.clone());
+    }
+
+    // Validate required props
+    for prop_def in &definition.props {
+        if prop_def.required && context.get(&prop_def.name).is_none() {
+            return Err(ExpandError::MissingRequiredProp {
+                component: comp.component_name.0.clone(),
+                prop: prop_def.name.clone(),
+                span: comp.span,
+            });
+        }
+    }
+
+    Ok(context)
 }
 
 /// Component expander state.
@@ -57,17 +128,38 @@ struct ComponentExpander<'a> {
     depth: u32,
     /// Stack of component names being expanded (for error messages).
     expansion_stack: Vec<String>,
+    /// Expanded instances, shared by identical instances.
+    cache: ExpansionCache,
+    /// Deepest nesting depth reached inside the current instance.
+    deepest: u32,
 }
 
 impl<'a> ComponentExpander<'a> {
-    fn new(registry: &'a ComponentRegistry) -> Self {
+    fn new(registry: &'a ComponentRegistry, cache: ExpansionCache) -> Self {
         Self {
             registry,
             depth: 0,
             expansion_stack: Vec::new(),
+            cache,
+            deepest: 0,
         }
     }
 
+    /// Expand a document whose references may be linked to element ids.
+    fn expand_linked(&mut self, doc: &Document) -> Result<Document, ExpandError> {
+        if !has_resolved_references(doc) {
+            return self.expand_document(doc);
+        }
+
+        // Element ids do not survive expansion, so refer to elements by
+        // relation again and link the expanded tree afresh
+        let mut unlinked = doc.clone();
+        unlink_references(&mut unlinked);
+        let mut expanded = self.expand_document(&unlinked)?;
+        relink_references(&mut expanded);
+        Ok(expanded)
+    }
+
     fn expand_document(&mut self, doc: &Document) -> Result<Document, ExpandError> {
         let mut expanded = doc.clone();
         expanded.elements = self.expand_elements(&doc.elements)?;
@@ -83,38 +175,35 @@ impl<'a> ComponentExpander<'a> {
     }
 
     fn expand_element(&mut self, element: &Element) -> Result<Vec<Element>, ExpandError> {
+        Ok(self.expand_nested(element)?.unwrap_or_else(|| vec![element.clone()]))
+    }
+
+    /// Expand the components in a list, sharing any part of it that has none.
+    fn expand_list(&mut self, elements: &ElementList) -> Result<ElementList, ExpandError> {
+        elements.try_rewrite(|element| self.expand_nested(element))
+    }
+
+    /// Expand the components in an element, or return `None` if it has none.
+    fn expand_nested(&mut self, element: &Element) -> Result<Option<Vec<Element>>, ExpandError> {
         match element {
             Element::Frame(frame) => {
-                Ok(vec![Element::Frame(self.expand_frame(frame)?)])
-            }
-            Element::Text(text) => {
-                Ok(vec![Element::Text(text.clone())])
-            }
-            Element::Part(part) => {
-                Ok(vec![Element::Part(self.expand_part(part)?)])
-            }
-            Element::Component(comp) => {
-                self.expand_component(comp)
+                let children = self.expand_list(&frame.children)?;
+                if children.ptr_eq(&frame.children) {
+                    return Ok(None);
+                }
+                Ok(Some(vec![Element::Frame(FrameElement { children, ..frame.clone() })]))
             }
+            // Parts and text don't have children
+            Element::Text(_) | Element::Part(_) => Ok(None),
+            Element::Component(comp) => self.expand_component(comp).map(Some),
             Element::Slot(slot) => {
                 // Slots should only appear in component templates, not in final output
                 // If we see one here, it means no children were injected - use fallback
-                Ok(slot.fallback.clone())
+                Ok(Some(slot.fallback.to_vec()))
             }
         }
     }
 
-    fn expand_frame(&mut self, frame: &FrameElement) -> Result<FrameElement, ExpandError> {
-        let mut expanded = frame.clone();
-        expanded.children = self.expand_elements(&frame.children)?;
-        Ok(expanded)
-    }
-
-    fn expand_part(&mut self, part: &PartElement) -> Result<PartElement, ExpandError> {
-        // Parts don't have children, just return as-is
-        Ok(part.clone())
-    }
-
     fn expand_component(&mut self, comp: &ComponentElement) -> Result<Vec<Element>, ExpandError> {
         let component_name = &comp.component_name.0;
 
@@ -123,6 +212,16 @@ impl<'a> ComponentExpander<'a> {
             return Err(ExpandError::MaxDepthExceeded { depth: MAX_EXPANSION_DEPTH });
         }
 
+        let slot = match self.cache.lookup(component_name, &comp.props, &comp.children, self.depth, MAX_EXPANSION_DEPTH) {
+            Ok((expanded, levels)) => {
+                self.deepest = self.deepest.max(self.depth + levels);
+                return Ok(expanded.to_vec());
+            }
+            Err(slot) => slot,
+        };
+        let start = self.depth;
+        let outer = std::mem::replace(&mut self.deepest, start);
+
         // Look up the component definition
         let definition = self.registry.get(component_name)
             .ok_or_else(|| ExpandError::UndefinedComponent {
@@ -131,11 +230,12 @@ impl<'a> ComponentExpander<'a> {
             })?;
 
         // Build prop context with provided props and defaults
-        let prop_context = self.build_prop_context(comp, definition)?;
+        let prop_context = build_prop_context(comp, &comp.props, definition)?;
 
         // Push onto expansion stack
         self.expansion_stack.push(component_name.clone());
         self.depth += 1;
+        self.deepest = self.deepest.max(self.depth);
 
         // Expand the template with prop substitution
         let expanded_template = self.expand_template(
@@ -149,40 +249,12 @@ impl<'a> ComponentExpander<'a> {
         self.expansion_stack.pop();
 
         // Recursively expand any nested components
-        self.expand_elements(&expanded_template)
-    }
-
-    fn build_prop_context(
-        &self,
-        comp: &ComponentElement,
-        definition: &seed_core::ast::ComponentDefinition,
-    ) -> Result<PropContext, ExpandError> {
-        let mut context = PropContext::new();
-
-        // First, add all defaults
-        for prop_def in &definition.props {
-            if let Some(default) = &prop_def.default {
-                context.insert(prop_def.name.clone(), default.clone());
-            }
-        }
+        let expanded = self.expand_elements(&expanded_template)?;
 
-        // Then, override with provided props
-        for prop in &comp.props {
-            context.insert(prop.name.clone(), prop.value.clone());
-        }
-
-        // Validate required props
-        for prop_def in &definition.props {
-            if prop_def.required && context.get(&prop_def.name).is_none() {
-                return Err(ExpandError::MissingRequiredProp {
-                    component: comp.component_name.0.clone(),
-                    prop: prop_def.name.clone(),
-                    span: comp.span,
-                });
-            }
-        }
-
-        Ok(context)
+        let levels = self.deepest - start;
+        self.deepest = outer.max(self.deepest);
+        let expanded = self.cache.insert(slot, &comp.props, &comp.children, levels, expanded);
+        Ok(expanded.to_vec())
     }
 
     fn expand_template(
@@ -194,38 +266,71 @@ impl<'a> ComponentExpander<'a> {
         let mut result = Vec::with_capacity(template.len());
 
         for element in template {
-            match element {
-                Element::Frame(frame) => {
-                    result.push(Element::Frame(self.substitute_frame(frame, prop_context, children)?));
-                }
-                Element::Text(text) => {
-                    result.push(Element::Text(self.substitute_text(text, prop_context)?));
-                }
-                Element::Part(part) => {
-                    result.push(Element::Part(self.substitute_part(part, prop_context)?));
-                }
-                Element::Component(comp) => {
-                    // Keep component for later expansion, but substitute props
-                    result.push(Element::Component(self.substitute_component(comp, prop_context)?));
-                }
-                Element::Slot(slot) => {
-                    // Inject children or use fallback
-                    let injected = self.inject_slot(slot, children)?;
-                    result.extend(injected);
-                }
+            match self.substitute_element(element, prop_context, children)? {
+                Some(substituted) => result.extend(substituted),
+                None => result.push(element.clone()),
             }
         }
 
         Ok(result)
     }
 
+    /// Substitute props into a list of template elements, sharing any part
+    /// of it that has nothing to substitute.
+    fn substitute_list(
+        &self,
+        template: &ElementList,
+        prop_context: &PropContext,
+        children: &[Element],
+    ) -> Result<ElementList, ExpandError> {
+        template.try_rewrite(|element| self.substitute_element(element, prop_context, children))
+    }
+
+    /// Substitute props into a template element, or return `None` if it
+    /// has nothing to substitute.
+    fn substitute_element(
+        &self,
+        element: &Element,
+        prop_context: &PropContext,
+        children: &[Element],
+    ) -> Result<Option<Vec<Element>>, ExpandError> {
+        let substituted = match element {
+            Element::Frame(frame) => match self.substitute_frame(frame, prop_context, children)? {
+                Some(frame) => Element::Frame(frame),
+                None => return Ok(None),
+            },
+            Element::Text(text) if prop_context.substitutes(&text.properties) => {
+                Element::Text(self.substitute_text(text, prop_context)?)
+            }
+            Element::Part(part) if prop_context.substitutes(&part.properties) => {
+                Element::Part(self.substitute_part(part, prop_context)?)
+            }
+            Element::Text(_) | Element::Part(_) => return Ok(None),
+            Element::Component(comp) => {
+                // Keep component for later expansion, but substitute props
+                Element::Component(self.substitute_component(comp, prop_context)?)
+            }
+            Element::Slot(slot) => {
+                // Inject children or use fallback
+                return self.inject_slot(slot, children).map(Some);
+            }
+        };
+        Ok(Some(vec![substituted]))
+    }
+
     fn substitute_frame(
         &self,
         frame: &FrameElement,
         prop_context: &PropContext,
         children: &[Element],
-    ) -> Result<FrameElement, ExpandError> {
-        let mut result = frame.clone();
+    ) -> Result<Option<FrameElement>, ExpandError> {
+        // Recursively process children
+        let substituted_children = self.substitute_list(&frame.children, prop_context, children)?;
+        if substituted_children.ptr_eq(&frame.children) && !prop_context.substitutes(&frame.properties) {
+            return Ok(None);
+        }
+
+        let mut result = FrameElement { children: substituted_children, ..frame.clone() };
 
         // Substitute props in properties
         result.properties = frame.properties
@@ -233,10 +338,7 @@ impl<'a> ComponentExpander<'a> {
             .map(|p| self.substitute_property(p, prop_context))
             .collect::<Result<Vec<_>, _>>()?;
 
-        // Recursively process children
-        result.children = self.expand_template(&frame.children, prop_context, children)?;
-
-        Ok(result)
+        Ok(Some(result))
     }
 
     fn substitute_text(
@@ -296,29 +398,10 @@ impl<'a> ComponentExpander<'a> {
         prop_context: &PropContext,
     ) -> Result<Property, ExpandError> {
         let mut result = property.clone();
-        result.value = self.substitute_value(&property.value, prop_context)?;
+        prop_context.substitute(std::slice::from_mut(&mut result));
         Ok(result)
     }
 
-    fn substitute_value(
-        &self,
-        value: &PropertyValue,
-        prop_context: &PropContext,
-    ) -> Result<PropertyValue, ExpandError> {
-        match value {
-            PropertyValue::PropRef(prop_ref) => {
-                // Look up the prop value
-                if let Some(prop_value) = prop_context.get(&prop_ref.0) {
-                    Ok(prop_value.clone())
-                } else {
-                    // Prop not found - keep the reference (might be an error)
-                    Ok(value.clone())
-                }
-            }
-            _ => Ok(value.clone()),
-        }
-    }
-
     fn substitute_text_content(
         &self,
         content: &TextContent,
@@ -338,14 +421,14 @@ impl<'a> ComponentExpander<'a> {
             // Default slot - inject all children
             if children.is_empty() {
                 // Use fallback
-                Ok(slot.fallback.clone())
+                Ok(slot.fallback.to_vec())
             } else {
                 Ok(children.to_vec())
             }
         } else {
             // Named slot - for now, just use fallback
             // Named slot injection would require children to be tagged
-            Ok(slot.fallback.clone())
+            Ok(slot.fallback.to_vec())
         }
     }
 }
@@ -362,14 +445,14 @@ mod tests {
             name: name.map(|n| Identifier(n.to_string())),
             properties: props,
             constraints: vec![],
-            children,
+            children: children.into(),
             span: Span::default(),
         }
     }
 
     fn make_prop(name: &str, value: PropertyValue) -> Property {
         Property {
-            name: name.to_string(),
+            name: name.into(),
             value,
             span: Span::default(),
         }
@@ -416,7 +499,7 @@ mod tests {
                     component_name: Identifier("Unknown".to_string()),
                     instance_name: None,
                     props: vec![],
-                    children: vec![],
+                    children: vec![].into(),
                     span: Span::default(),
                 }),
             ],
@@ -453,7 +536,7 @@ mod tests {
                     component_name: Identifier("Button".to_string()),
                     instance_name: None,
                     props: vec![make_prop("label", PropertyValue::String("Click me".to_string()))],
-                    children: vec![],
+                    children: vec![].into(),
                     span: Span::default(),
                 }),
             ],
@@ -484,7 +567,7 @@ mod tests {
                     component_name: Identifier("Button".to_string()),
                     instance_name: None,
                     props: vec![], // Missing required label prop
-                    children: vec![],
+                    children: vec![].into(),
                     span: Span::default(),
                 }),
             ],
@@ -519,7 +602,7 @@ mod tests {
                     component_name: Identifier("Card".to_string()),
                     instance_name: None,
                     props: vec![], // Not providing padding, should use default
-                    children: vec![],
+                    children: vec![].into(),
                     span: Span::default(),
                 }),
             ],
@@ -549,7 +632,7 @@ mod tests {
                     vec![
                         Element::Slot(SlotElement {
                             name: None,
-                            fallback: vec![],
+                            fallback: vec![].into(),
                             span: Span::default(),
                         }),
                     ],
@@ -572,7 +655,7 @@ mod tests {
                     children: vec![
                         Element::Frame(make_frame(Some("Child1"), vec![], vec![])),
                         Element::Frame(make_frame(Some("Child2"), vec![], vec![])),
-                    ],
+                    ].into(),
                     span: Span::default(),
                 }),
             ],
@@ -603,7 +686,7 @@ mod tests {
                             name: None,
                             fallback: vec![
                                 Element::Frame(make_frame(Some("DefaultChild"), vec![], vec![])),
-                            ],
+                            ].into(),
                             span: Span::default(),
                         }),
                     ],
@@ -623,7 +706,7 @@ mod tests {
                     component_name: Identifier("Container".to_string()),
                     instance_name: None,
                     props: vec![],
-                    children: vec![], // No children - should use fallback
+                    children: vec![].into(), // No children - should use fallback
                     span: Span::default(),
                 }),
             ],
@@ -646,6 +729,96 @@ mod tests {
         }
     }
 
+    #[test]
+    fn test_identical_instances_share_expansion() {
+        let badge = ComponentBuilder::new("Badge")
+            .optional_prop("size", PropType::Length, PropertyValue::Length(Length::px(16.0)))
+            .template(vec![
+                Element::Frame(make_frame(
+                    Some("Dot"),
+                    vec![make_prop("width", PropertyValue::PropRef(PropRef("size".to_string())))],
+                    vec![],
+                )),
+            ])
+            .build();
+
+        let mut registry = ComponentRegistry::new();
+        registry.register(badge);
+
+        let badge = |size: f64| Element::Component(ComponentElement {
+            component_name: Identifier("Badge".to_string()),
+            instance_name: None,
+            props: vec![make_prop("size", PropertyValue::Length(Length::px(size)))],
+            children: vec![].into(),
+            span: Span::default(),
+        });
+        let doc = Document {
+            meta: None,
+            tokens: None,
+            elements: vec![badge(8.0), badge(8.0), badge(24.0), badge(8.0)],
+            span: Span::default(),
+        };
+
+        let mut cache = ExpansionCache::new();
+        let result = expand_components_cached(&doc, &registry, &mut cache).unwrap();
+        assert_eq!(cache.stats(), crate::ExpansionStats { hits: 2, misses: 2 });
+        assert_eq!(cache.len(), 2);
+        assert_eq!(result.elements[0], result.elements[3]);
+        assert_ne!(result.elements[0], result.elements[2]);
+
+        // Without the cache's entries, each instance expands the same way
+        assert_eq!(result, expand_components(&doc, &registry).unwrap());
+    }
+
+    #[test]
+    fn test_instances_share_unsubstituted_subtrees() {
+        let fixed = make_frame(Some("Fixed"), vec![], vec![
+            Element::Frame(make_frame(Some("Detail"), vec![], vec![])),
+        ]);
+        let card = ComponentBuilder::new("Card")
+            .prop("padding", PropType::Length)
+            .template(vec![
+                Element::Frame(make_frame(
+                    Some("Root"),
+                    vec![make_prop("padding", PropertyValue::PropRef(PropRef("padding".to_string())))],
+                    vec![Element::Frame(fixed)],
+                )),
+            ])
+            .build();
+
+        let mut registry = ComponentRegistry::new();
+        registry.register(card);
+
+        let card = |padding: f64| Element::Component(ComponentElement {
+            component_name: Identifier("Card".to_string()),
+            instance_name: None,
+            props: vec![make_prop("padding", PropertyValue::Length(Length::px(padding)))],
+            children: vec![].into(),
+            span: Span::default(),
+        });
+        let doc = Document {
+            meta: None,
+            tokens: None,
+            elements: vec![card(8.0), card(16.0)],
+            span: Span::default(),
+        };
+
+        let template_root = &registry.get("Card").unwrap().template[0];
+        let expanded = expand_components(&doc, &registry).unwrap();
+        let fused = crate::resolve_and_expand(&doc, &seed_core::TokenMap::new(), &registry).unwrap();
+        for elements in [&expanded.elements, &fused.elements] {
+            // Each root is substituted, but holds the template's own children
+            assert_ne!(elements[0], elements[1]);
+            for root in elements {
+                assert_eq!(root.children().len(), 1);
+                let (Element::Frame(root), Element::Frame(template)) = (root, template_root) else {
+                    panic!("Expected Frame elements");
+                };
+                assert!(root.children.ptr_eq(&template.children));
+            }
+        }
+    }
+
     #[test]
     fn test_nested_component_expansion() {
         // Inner component
@@ -666,7 +839,7 @@ mod tests {
                             component_name: Identifier("Inner".to_string()),
                             instance_name: None,
                             props: vec![],
-                            children: vec![],
+                            children: vec![].into(),
                             span: Span::default(),
                         }),
                     ],
@@ -686,7 +859,7 @@ mod tests {
                     component_name: Identifier("Outer".to_string()),
                     instance_name: None,
                     props: vec![],
-                    children: vec![],
+                    children: vec![].into(),
                     span: Span::default(),
                 }),
             ],
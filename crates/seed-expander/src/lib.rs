@@ -5,12 +5,18 @@
 //! - Prop substitution
 //! - Slot injection
 //! - Circular reference detection
+//! - Sharing the expansion of identical instances
+//! - A fused resolve-and-expand pass
 
 mod registry;
 mod expander;
+mod pipeline;
+mod cache;
 
 pub use registry::ComponentRegistry;
-pub use expander::expand_components;
+pub use expander::{expand_components, expand_components_cached};
+pub use pipeline::{resolve_and_expand, resolve_and_expand_cached, resolve_and_expand_tracked};
+pub use cache::{ExpansionCache, ExpansionStats};
 
 use seed_core::{Document, ExpandError};
 
@@ -0,0 +1,565 @@
+//! Fused resolve-and-expand pass.
+//!
+//! [`resolve_and_expand`] produces the same tree as running
+//! `resolve_tokens`, `resolve_references` and [`expand_components`] one
+//! after the other, but does all three in a single recursive walk that
+//! builds the final tree directly. No intermediate copy of the document is
+//! made between the stages.
+//!
+//! Element references in the result are resolved to ids of the expanded
+//! tree.
+//!
+//! [`resolve_and_expand_tracked`] also reports where tokens ended up in the
+//! expanded tree, so that a token change can be patched in place.
+//!
+//! [`expand_components`]: crate::expand_components
+
+use seed_core::{
+    Document, ExpandError, SeedError, TokenMap,
+    ast::{ComponentElement, Element, ElementList, FrameElement, Property},
+};
+use seed_resolver::{
+    has_resolved_references, relink_references, unlink_references, ReferenceScope, TokenResolver,
+    TokenUsage,
+};
+
+use crate::expander::{build_prop_context, PropContext, MAX_EXPANSION_DEPTH};
+use crate::{ComponentRegistry, ExpansionCache};
+
+/// Resolve tokens, validate element references and expand components in
+/// one pass over `doc`.
+///
+/// As with the separate passes, tokens are resolved and references checked
+/// in the document's own elements, not in component templates. If the
+/// document has several errors, the first one met in tree order is returned.
+pub fn resolve_and_expand(
+    doc: &Document,
+    tokens: &TokenMap,
+    registry: &ComponentRegistry,
+) -> Result<Document, SeedError> {
+    FusedPass::new(tokens, registry, None).run(doc)
+}
+
+/// Like [`resolve_and_expand`], but reuse and add to the component
+/// expansions in `cache`, which may hold instances from earlier documents.
+pub fn resolve_and_expand_cached(
+    doc: &Document,
+    tokens: &TokenMap,
+    registry: &ComponentRegistry,
+    cache: &mut ExpansionCache,
+) -> Result<Document, SeedError> {
+    let mut pass = FusedPass::new(tokens, registry, None);
+    pass.cache = std::mem::take(cache);
+    let result = pass.run(doc);
+    *cache = pass.cache;
+    result
+}
+
+/// Like [`resolve_and_expand`], but also record the slots of the expanded
+/// document that consumed tokens.
+///
+/// Tokens used by component props, or by content passed into a component,
+/// have no fixed place in the expanded tree; they are recorded as needing a
+/// rebuild (see [`TokenUsage::requires_rebuild`] and
+/// [`TokenUsage::requires_rebuild_any`]).
+pub fn resolve_and_expand_tracked(
+    doc: &Document,
+    tokens: &TokenMap,
+    registry: &ComponentRegistry,
+) -> Result<(Document, TokenUsage), SeedError> {
+    let mut pass = FusedPass::new(tokens, registry, Some(TokenUsage::default()));
+    let doc = pass.run(doc)?;
+    Ok((doc, pass.usage.unwrap_or_default()))
+}
+
+struct FusedPass<'a> {
+    tokens: TokenResolver<'a>,
+    registry: &'a ComponentRegistry,
+    /// Current component nesting depth.
+    depth: u32,
+    /// Where tokens were consumed, when tracking.
+    usage: Option<TokenUsage>,
+    /// Child indices of the current output element.
+    path: Vec<u32>,
+    /// Whether output elements stay where they are pushed, rather than
+    /// being moved into a component's slot.
+    placed: bool,
+    /// Expanded instances, shared by identical instances.
+    cache: ExpansionCache,
+    /// Deepest nesting depth reached inside the current instance.
+    deepest: u32,
+}
+
+impl<'a> FusedPass<'a> {
+    fn new(tokens: &'a TokenMap, registry: &'a ComponentRegistry, usage: Option<TokenUsage>) -> Self {
+        Self {
+            tokens: TokenResolver::new(tokens),
+            registry,
+            depth: 0,
+            usage,
+            path: Vec::new(),
+            placed: true,
+            cache: ExpansionCache::new(),
+            deepest: 0,
+        }
+    }
+
+    fn run(&mut self, doc: &Document) -> Result<Document, SeedError> {
+        // Ids from an earlier resolution would not match the expanded tree
+        let unlinked;
+        let doc = if has_resolved_references(doc) {
+            let mut copy = doc.clone();
+            unlink_references(&mut copy);
+            unlinked = copy;
+            &unlinked
+        } else {
+            doc
+        };
+
+        let mut elements = Vec::with_capacity(doc.elements.len());
+        self.source_elements(&doc.elements, false, &mut elements)?;
+
+        let mut doc = Document {
+            meta: doc.meta.clone(),
+            tokens: doc.tokens.clone(),
+            elements,
+            span: doc.span,
+        };
+        // References were checked in the source; point them at the
+        // elements they ended up as
+        relink_references(&mut doc);
+        Ok(doc)
+    }
+
+    /// Record the tokens used by `element`, whose output is pushed at
+    /// `index` among its siblings.
+    fn track(&mut self, element: &Element, index: usize) {
+        let Some(usage) = &mut self.usage else { return };
+        if self.placed {
+            self.path.push(index as u32);
+            usage.record(&self.path, element);
+            self.path.pop();
+        } else {
+            usage.record_unplaced(element);
+        }
+    }
+
+    /// Resolve, validate and expand a list of siblings from the document.
+    fn source_elements(
+        &mut self,
+        elements: &[Element],
+        has_parent: bool,
+        out: &mut Vec<Element>,
+    ) -> Result<(), SeedError> {
+        let scope = ReferenceScope::new(elements, has_parent);
+
+        for (i, element) in elements.iter().enumerate() {
+            match element {
+                Element::Frame(frame) => {
+                    scope.validate_constraints(i, &frame.constraints)?;
+                    self.track(element, out.len());
+
+                    let mut properties = frame.properties.clone();
+                    self.tokens.resolve_properties(&mut properties)?;
+                    let mut constraints = frame.constraints.clone();
+                    self.tokens.resolve_constraints(&mut constraints)?;
+                    let mut children = Vec::with_capacity(frame.children.len());
+                    self.path.push(out.len() as u32);
+                    self.source_elements(&frame.children, true, &mut children)?;
+                    self.path.pop();
+
+                    out.push(Element::Frame(FrameElement {
+                        name: frame.name.clone(),
+                        properties,
+                        constraints,
+                        children: children.into(),
+                        span: frame.span,
+                    }));
+                }
+                Element::Text(text) => {
+                    self.track(element, out.len());
+                    let mut text = text.clone();
+                    self.tokens.resolve_text_content(&mut text.content)?;
+                    self.tokens.resolve_properties(&mut text.properties)?;
+                    out.push(Element::Text(text));
+                }
+                Element::Part(part) => {
+                    scope.validate_constraints(i, &part.constraints)?;
+                    self.track(element, out.len());
+
+                    let mut part = part.clone();
+                    self.tokens.resolve_properties(&mut part.properties)?;
+                    self.tokens.resolve_constraints(&mut part.constraints)?;
+                    out.push(Element::Part(part));
+                }
+                Element::Component(comp) => {
+                    if let Some(usage) = &mut self.usage {
+                        usage.record_unplaced(element);
+                    }
+                    let mut props = comp.props.clone();
+                    self.tokens.resolve_properties(&mut props)?;
+                    let mut children = Vec::with_capacity(comp.children.len());
+                    let placed = std::mem::replace(&mut self.placed, false);
+                    self.source_elements(&comp.children, true, &mut children)?;
+                    self.placed = placed;
+
+                    self.instantiate(comp, &props, &children, out)?;
+                }
+                Element::Slot(slot) => {
+                    // No children were injected, so the fallback is used as-is
+                    out.extend(slot.fallback.iter().cloned());
+                }
+            }
+        }
+
+        Ok(())
+    }
+
+    /// Expand one component instance whose props and children are final.
+    fn instantiate(
+        &mut self,
+        comp: &ComponentElement,
+        props: &[Property],
+        children: &[Element],
+        out: &mut Vec<Element>,
+    ) -> Result<(), SeedError> {
+        if self.depth >= MAX_EXPANSION_DEPTH {
+            return Err(ExpandError::MaxDepthExceeded { depth: MAX_EXPANSION_DEPTH }.into());
+        }
+
+        // Template output holds no tokens to track, and slot content was
+        // tracked before it was passed in, so an instance can be shared
+        let slot = match self.cache.lookup(&comp.component_name.0, props, children, self.depth, MAX_EXPANSION_DEPTH) {
+            Ok((expanded, levels)) => {
+                self.deepest = self.deepest.max(self.depth + levels);
+                out.extend_from_slice(&expanded);
+                return Ok(());
+            }
+            Err(slot) => slot,
+        };
+
+        let registry = self.registry;
+        let definition = registry.get(&comp.component_name.0)
+            .ok_or_else(|| ExpandError::UndefinedComponent {
+                name: comp.component_name.0.clone(),
+                span: comp.span,
+            })?;
+        let prop_context = build_prop_context(comp, props, definition)?;
+
+        let start = self.depth;
+        let outer = std::mem::replace(&mut self.deepest, start + 1);
+        self.depth += 1;
+        let mut expanded = Vec::with_capacity(definition.template.len());
+        let result = self.template_elements(&definition.template, &prop_context, children, &mut expanded);
+        self.depth -= 1;
+        result?;
+
+        let levels = self.deepest - start;
+        self.deepest = outer.max(self.deepest);
+        let expanded = self.cache.insert(slot, props, children, levels, expanded);
+        out.extend_from_slice(&expanded);
+        Ok(())
+    }
+
+    /// Substitute props into a component template and expand it.
+    fn template_elements(
+        &mut self,
+        template: &[Element],
+        prop_context: &PropContext,
+        children: &[Element],
+        out: &mut Vec<Element>,
+    ) -> Result<(), SeedError> {
+        for element in template {
+            match self.template_element(element, prop_context, children)? {
+                Some(expanded) => out.extend(expanded),
+                None => out.push(element.clone()),
+            }
+        }
+
+        Ok(())
+    }
+
+    /// Substitute props into a list of template elements and expand it,
+    /// sharing any part of it that has no props, slots or components.
+    fn template_list(
+        &mut self,
+        template: &ElementList,
+        prop_context: &PropContext,
+        children: &[Element],
+    ) -> Result<ElementList, SeedError> {
+        template.try_rewrite(|element| self.template_element(element, prop_context, children))
+    }
+
+    /// Substitute props into a template element and expand it, or return
+    /// `None` if it stays as it is.
+    fn template_element(
+        &mut self,
+        element: &Element,
+        prop_context: &PropContext,
+        children: &[Element],
+    ) -> Result<Option<Vec<Element>>, SeedError> {
+        let mut out = Vec::new();
+        match element {
+            Element::Frame(frame) => {
+                let frame_children = self.template_list(&frame.children, prop_context, children)?;
+                if frame_children.ptr_eq(&frame.children) && !prop_context.substitutes(&frame.properties) {
+                    return Ok(None);
+                }
+
+                let mut properties = frame.properties.clone();
+                prop_context.substitute(&mut properties);
+                out.push(Element::Frame(FrameElement {
+                    name: frame.name.clone(),
+                    properties,
+                    constraints: frame.constraints.clone(),
+                    children: frame_children,
+                    span: frame.span,
+                }));
+            }
+            Element::Text(text) if prop_context.substitutes(&text.properties) => {
+                let mut text = text.clone();
+                prop_context.substitute(&mut text.properties);
+                out.push(Element::Text(text));
+            }
+            Element::Part(part) if prop_context.substitutes(&part.properties) => {
+                let mut part = part.clone();
+                prop_context.substitute(&mut part.properties);
+                out.push(Element::Part(part));
+            }
+            Element::Text(_) | Element::Part(_) => return Ok(None),
+            Element::Component(nested) => {
+                let mut props = nested.props.clone();
+                prop_context.substitute(&mut props);
+                let nested_children = self.expand_list(&nested.children)?;
+
+                self.instantiate(nested, &props, &nested_children, &mut out)?;
+            }
+            Element::Slot(slot) => {
+                // Named slots are not injected yet and always use their fallback
+                if slot.name.is_none() && !children.is_empty() {
+                    out.extend_from_slice(children);
+                } else {
+                    self.expand_elements(&slot.fallback, &mut out)?;
+                }
+            }
+        }
+
+        Ok(Some(out))
+    }
+
+    /// Expand the components in elements that need no token or prop rewriting.
+    fn expand_elements(&mut self, elements: &[Element], out: &mut Vec<Element>) -> Result<(), SeedError> {
+        for element in elements {
+            match self.expand_element(element)? {
+                Some(expanded) => out.extend(expanded),
+                None => out.push(element.clone()),
+            }
+        }
+
+        Ok(())
+    }
+
+    /// Expand the components in a list, sharing any part of it that has none.
+    fn expand_list(&mut self, elements: &ElementList) -> Result<ElementList, SeedError> {
+        elements.try_rewrite(|element| self.expand_element(element))
+    }
+
+    /// Expand the components in an element, or return `None` if it has none.
+    fn expand_element(&mut self, element: &Element) -> Result<Option<Vec<Element>>, SeedError> {
+        match element {
+            Element::Frame(frame) => {
+                let children = self.expand_list(&frame.children)?;
+                if children.ptr_eq(&frame.children) {
+                    return Ok(None);
+                }
+                Ok(Some(vec![Element::Frame(FrameElement { children, ..frame.clone() })]))
+            }
+            Element::Text(_) | Element::Part(_) => Ok(None),
+            Element::Component(comp) => {
+                let children = self.expand_list(&comp.children)?;
+                let mut out = Vec::new();
+                self.instantiate(comp, &comp.props, &children, &mut out)?;
+                Ok(Some(out))
+            }
+            Element::Slot(slot) => Ok(Some(slot.fallback.to_vec())),
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::expand_components;
+    use crate::registry::ComponentBuilder;
+    use seed_core::ast::{
+        Constraint, ConstraintKind, ElementRef, PropRef, PropType,
+        PropertyValue, SlotElement, Span, TextContent, TextElement, TokenPath,
+    };
+    use seed_core::types::{Color, Identifier, Length, TokenId};
+    use seed_core::{ResolveError, ResolvedToken};
+    use seed_resolver::{resolve_references, resolve_tokens};
+
+    fn frame(name: &str, properties: Vec<Property>, children: Vec<Element>) -> Element {
+        Element::Frame(FrameElement {
+            name: Some(Identifier(name.to_string())),
+            properties,
+            constraints: vec![],
+            children: children.into(),
+            span: Span::default(),
+        })
+    }
+
+    fn prop(name: &str, value: PropertyValue) -> Property {
+        Property { name: name.into(), value, span: Span::default() }
+    }
+
+    fn token(parts: &[&str]) -> PropertyValue {
+        PropertyValue::TokenRef(TokenPath(parts.iter().map(|s| s.to_string()).collect()))
+    }
+
+    fn instance(component: &str, props: Vec<Property>, children: Vec<Element>) -> Element {
+        Element::Component(ComponentElement {
+            component_name: Identifier(component.to_string()),
+            instance_name: None,
+            props,
+            children: children.into(),
+            span: Span::default(),
+        })
+    }
+
+    fn fixture() -> (Document, TokenMap, ComponentRegistry) {
+        let mut tokens = TokenMap::new();
+        tokens.insert("colors.primary", ResolvedToken::Color(Color::rgb(0.0, 0.4, 1.0)));
+        tokens.insert("spacing.md", ResolvedToken::Length(Length::px(16.0)));
+        tokens.insert("labels.ok", ResolvedToken::String("OK".to_string()));
+
+        let mut registry = ComponentRegistry::new();
+        registry.register(
+            ComponentBuilder::new("Icon")
+                .optional_prop("size", PropType::Length, PropertyValue::Length(Length::px(12.0)))
+                .template(vec![frame("Glyph", vec![prop("width", PropertyValue::PropRef(PropRef("size".to_string())))], vec![])])
+                .build(),
+        );
+        registry.register(
+            ComponentBuilder::new("Button")
+                .prop("color", PropType::Color)
+                .default_slot()
+                .template(vec![frame("Root", vec![prop("fill", PropertyValue::PropRef(PropRef("color".to_string())))], vec![
+                    instance("Icon", vec![], vec![]),
+                    Element::Slot(SlotElement {
+                        name: None,
+                        fallback: vec![frame("Empty", vec![], vec![])].into(),
+                        span: Span::default(),
+                    }),
+                ])])
+                .build(),
+        );
+
+        let label = Element::Text(TextElement {
+            name: Some(Identifier("Label".to_string())),
+            content: TextContent::TokenRef(TokenPath(["labels", "ok"].iter().map(|s| s.to_string()).collect())),
+            properties: vec![],
+            constraints: vec![],
+            span: Span::default(),
+        });
+        let mut card = FrameElement {
+            name: Some(Identifier("Card".to_string())),
+            properties: vec![prop("padding", token(&["spacing", "md"]))],
+            constraints: vec![],
+            children: vec![
+                instance("Button", vec![prop("color", token(&["colors", "primary"]))], vec![label]),
+                instance("Button", vec![prop("color", token(&["colors", "primary"]))], vec![]),
+            ].into(),
+            span: Span::default(),
+        };
+        card.constraints.push(Constraint {
+            kind: ConstraintKind::Alignment {
+                edge: seed_core::ast::Edge::Left,
+                target: ElementRef::Next,
+                target_edge: None,
+            },
+            priority: None,
+            span: Span::default(),
+        });
+
+        let doc = Document {
+            meta: None,
+            tokens: None,
+            elements: vec![Element::Frame(card), frame("Footer", vec![], vec![])],
+            span: Span::default(),
+        };
+        (doc, tokens, registry)
+    }
+
+    #[test]
+    fn test_matches_separate_passes() {
+        let (doc, tokens, registry) = fixture();
+
+        let doc_tokens = resolve_tokens(&doc, &tokens).unwrap();
+        let doc_refs = resolve_references(&doc_tokens).unwrap();
+        let expected = expand_components(&doc_refs, &registry).unwrap();
+
+        let fused = resolve_and_expand(&doc, &tokens, &registry).unwrap();
+        assert_eq!(fused, expected);
+
+        // The card's `Next` now names the footer by id
+        let Element::Frame(card) = &fused.elements[0] else { unreachable!() };
+        assert!(matches!(
+            card.constraints[0].kind,
+            ConstraintKind::Alignment { target: ElementRef::Resolved(seed_core::types::ElementId(1)), .. }
+        ));
+    }
+
+    #[test]
+    fn test_cached_expansion_is_reused() {
+        let (doc, tokens, registry) = fixture();
+        let expected = resolve_and_expand(&doc, &tokens, &registry).unwrap();
+
+        // The buttons differ in their slot content; the icon inside each
+        // button is the same
+        let mut cache = ExpansionCache::new();
+        assert_eq!(resolve_and_expand_cached(&doc, &tokens, &registry, &mut cache).unwrap(), expected);
+        assert_eq!(cache.stats(), crate::ExpansionStats { hits: 1, misses: 3 });
+
+        // A second document reuses the whole buttons
+        assert_eq!(resolve_and_expand_cached(&doc, &tokens, &registry, &mut cache).unwrap(), expected);
+        assert_eq!(cache.stats(), crate::ExpansionStats { hits: 3, misses: 3 });
+    }
+
+    #[test]
+    fn test_reports_each_kind_of_error() {
+        let (doc, tokens, registry) = fixture();
+
+        let result = resolve_and_expand(&doc, &TokenMap::new(), &registry);
+        assert!(matches!(result, Err(SeedError::Resolve(ResolveError::UndefinedToken { .. }))));
+
+        let result = resolve_and_expand(&doc, &tokens, &ComponentRegistry::new());
+        assert!(matches!(result, Err(SeedError::Expand(ExpandError::UndefinedComponent { .. }))));
+
+        // Without the footer the card has no next sibling
+        let mut doc = doc;
+        doc.elements.pop();
+        let result = resolve_and_expand(&doc, &tokens, &registry);
+        assert!(matches!(result, Err(SeedError::Resolve(ResolveError::InvalidReference { .. }))));
+    }
+
+    #[test]
+    fn test_tracked_usage_patches_expanded_tree() {
+        let (doc, mut tokens, registry) = fixture();
+        let (mut expanded, usage) = resolve_and_expand_tracked(&doc, &tokens, &registry).unwrap();
+        assert_eq!(expanded, resolve_and_expand(&doc, &tokens, &registry).unwrap());
+
+        // The button color and label are moved into component templates
+        assert!(usage.requires_rebuild(TokenId::from_dotted("colors.primary")));
+        assert!(usage.requires_rebuild(TokenId::from_dotted("labels.ok")));
+        assert!(usage.requires_rebuild_any());
+
+        let id = TokenId::from_dotted("spacing.md");
+        assert!(!usage.requires_rebuild(id));
+        tokens.insert("spacing.md", ResolvedToken::Length(Length::px(24.0)));
+        let change = usage.apply_token(&mut expanded, &tokens, id).unwrap();
+        assert_eq!(change.elements, [vec![0]]);
+        assert!(change.affects_layout);
+        assert_eq!(expanded, resolve_and_expand(&doc, &tokens, &registry).unwrap());
+    }
+}
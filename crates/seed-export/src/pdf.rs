@@ -4,7 +4,7 @@
 
 use pdf_writer::{Content, Finish, Name, Pdf, Rect, Ref, Str, TextStr};
 use seed_core::{
-    ast::{Element, FrameElement, TextElement, Property, PropertyValue, TextContent},
+    ast::{Element, FrameElement, TextElement, Property, PropertyName, PropertyValue, TextContent},
     types::Color,
     Document, ExportError,
 };
@@ -206,9 +206,9 @@ impl<'a> PdfBuilder<'a> {
         };
 
         // Get text properties
-        let color = get_color_property(&text.properties, "color")
+        let color = get_color_property(&text.properties, PropertyName::Color)
             .unwrap_or(Color::BLACK);
-        let font_size = get_length_property(&text.properties, "font-size")
+        let font_size = get_length_property(&text.properties, PropertyName::FontSize)
             .unwrap_or(12.0) as f32;
 
         // Draw text
@@ -288,33 +288,33 @@ impl<'a> PdfBuilder<'a> {
 // Property extraction helpers
 
 fn get_fill_color(properties: &[Property]) -> Option<Color> {
-    get_color_property(properties, "fill")
-        .or_else(|| get_color_property(properties, "background"))
-        .or_else(|| get_color_property(properties, "background-color"))
+    get_color_property(properties, PropertyName::Fill)
+        .or_else(|| get_color_property(properties, PropertyName::Background))
+        .or_else(|| get_color_property(properties, PropertyName::BackgroundColor))
 }
 
 fn get_stroke_color(properties: &[Property]) -> Option<Color> {
-    get_color_property(properties, "stroke")
-        .or_else(|| get_color_property(properties, "border-color"))
+    get_color_property(properties, PropertyName::Stroke)
+        .or_else(|| get_color_property(properties, PropertyName::BorderColor))
 }
 
 fn get_stroke_width(properties: &[Property]) -> f32 {
-    get_length_property(properties, "stroke-width")
-        .or_else(|| get_length_property(properties, "border-width"))
+    get_length_property(properties, PropertyName::StrokeWidth)
+        .or_else(|| get_length_property(properties, PropertyName::BorderWidth))
         .unwrap_or(1.0) as f32
 }
 
 fn get_corner_radius(properties: &[Property]) -> CornerRadius {
-    if let Some(r) = get_length_property(properties, "corner-radius")
-        .or_else(|| get_length_property(properties, "border-radius"))
+    if let Some(r) = get_length_property(properties, PropertyName::CornerRadius)
+        .or_else(|| get_length_property(properties, PropertyName::BorderRadius))
     {
         return CornerRadius::uniform(r as f32);
     }
 
-    let tl = get_length_property(properties, "corner-radius-top-left").unwrap_or(0.0) as f32;
-    let tr = get_length_property(properties, "corner-radius-top-right").unwrap_or(0.0) as f32;
-    let br = get_length_property(properties, "corner-radius-bottom-right").unwrap_or(0.0) as f32;
-    let bl = get_length_property(properties, "corner-radius-bottom-left").unwrap_or(0.0) as f32;
+    let tl = get_length_property(properties, PropertyName::CornerRadiusTopLeft).unwrap_or(0.0) as f32;
+    let tr = get_length_property(properties, PropertyName::CornerRadiusTopRight).unwrap_or(0.0) as f32;
+    let br = get_length_property(properties, PropertyName::CornerRadiusBottomRight).unwrap_or(0.0) as f32;
+    let bl = get_length_property(properties, PropertyName::CornerRadiusBottomLeft).unwrap_or(0.0) as f32;
 
     CornerRadius::new(tl, tr, br, bl)
 }
@@ -326,7 +326,7 @@ fn is_rounded(radius: &CornerRadius) -> bool {
         || radius.bottom_left > 0.0
 }
 
-fn get_color_property(properties: &[Property], name: &str) -> Option<Color> {
+fn get_color_property(properties: &[Property], name: PropertyName) -> Option<Color> {
     properties.iter().find(|p| p.name == name).and_then(|p| {
         match &p.value {
             PropertyValue::Color(c) => Some(*c),
@@ -336,7 +336,7 @@ fn get_color_property(properties: &[Property], name: &str) -> Option<Color> {
     })
 }
 
-fn get_length_property(properties: &[Property], name: &str) -> Option<f64> {
+fn get_length_property(properties: &[Property], name: PropertyName) -> Option<f64> {
     properties.iter().find(|p| p.name == name).and_then(|p| {
         match &p.value {
             PropertyValue::Length(l) => l.to_px(None),
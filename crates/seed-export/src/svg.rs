@@ -2,7 +2,7 @@
 
 use seed_core::{
     Document, ExportError,
-    ast::{Element, FrameElement, TextElement, Property, PropertyValue},
+    ast::{Element, FrameElement, TextElement, Property, PropertyName, PropertyValue},
     types::{Color, Gradient, LinearGradient, RadialGradient, ConicGradient, GradientStop},
 };
 use seed_layout::{LayoutTree, LayoutNodeId};
@@ -383,11 +383,11 @@ impl<'a> SvgBuilder<'a> {
             seed_core::ast::TextContent::TokenRef(path) => format!("[{}]", path.0.join(".")),
         };
 
-        let color = get_color_property(&text.properties, "color")
+        let color = get_color_property(&text.properties, PropertyName::Color)
             .unwrap_or(Color::BLACK);
-        let font_size = get_number_property(&text.properties, "font-size")
+        let font_size = get_number_property(&text.properties, PropertyName::FontSize)
             .unwrap_or(16.0);
-        let font_family = get_string_property(&text.properties, "font-family")
+        let font_family = get_string_property(&text.properties, PropertyName::FontFamily)
             .unwrap_or_else(|| "sans-serif".to_string());
 
         self.write_indent();
@@ -429,7 +429,7 @@ fn escape_xml(s: &str) -> String {
 
 fn get_fill(properties: &[Property], gradients: &HashMap<String, Gradient>) -> FillValue {
     for prop in properties {
-        if prop.name == "fill" || prop.name == "background" || prop.name == "background-color" {
+        if matches!(prop.name, PropertyName::Fill | PropertyName::Background | PropertyName::BackgroundColor) {
             match &prop.value {
                 PropertyValue::Color(c) => return FillValue::Color(*c),
                 PropertyValue::Gradient(gradient) => {
@@ -454,31 +454,31 @@ fn get_fill(properties: &[Property], gradients: &HashMap<String, Gradient>) -> F
 
 #[allow(dead_code)]
 fn get_fill_color(properties: &[Property]) -> Option<Color> {
-    get_color_property(properties, "fill")
-        .or_else(|| get_color_property(properties, "background"))
-        .or_else(|| get_color_property(properties, "background-color"))
+    get_color_property(properties, PropertyName::Fill)
+        .or_else(|| get_color_property(properties, PropertyName::Background))
+        .or_else(|| get_color_property(properties, PropertyName::BackgroundColor))
 }
 
 fn get_stroke_color(properties: &[Property]) -> Option<Color> {
-    get_color_property(properties, "stroke")
-        .or_else(|| get_color_property(properties, "border-color"))
+    get_color_property(properties, PropertyName::Stroke)
+        .or_else(|| get_color_property(properties, PropertyName::BorderColor))
 }
 
 fn get_stroke_width(properties: &[Property]) -> Option<f64> {
-    get_length_property(properties, "stroke-width")
-        .or_else(|| get_length_property(properties, "border-width"))
+    get_length_property(properties, PropertyName::StrokeWidth)
+        .or_else(|| get_length_property(properties, PropertyName::BorderWidth))
 }
 
 fn get_corner_radius(properties: &[Property]) -> Option<f64> {
-    get_length_property(properties, "corner-radius")
-        .or_else(|| get_length_property(properties, "border-radius"))
+    get_length_property(properties, PropertyName::CornerRadius)
+        .or_else(|| get_length_property(properties, PropertyName::BorderRadius))
 }
 
 fn get_opacity(properties: &[Property]) -> Option<f64> {
-    get_number_property(properties, "opacity")
+    get_number_property(properties, PropertyName::Opacity)
 }
 
-fn get_color_property(properties: &[Property], name: &str) -> Option<Color> {
+fn get_color_property(properties: &[Property], name: PropertyName) -> Option<Color> {
     properties.iter()
         .find(|p| p.name == name)
         .and_then(|p| match &p.value {
@@ -488,7 +488,7 @@ fn get_color_property(properties: &[Property], name: &str) -> Option<Color> {
         })
 }
 
-fn get_length_property(properties: &[Property], name: &str) -> Option<f64> {
+fn get_length_property(properties: &[Property], name: PropertyName) -> Option<f64> {
     properties.iter()
         .find(|p| p.name == name)
         .and_then(|p| match &p.value {
@@ -498,7 +498,7 @@ fn get_length_property(properties: &[Property], name: &str) -> Option<f64> {
         })
 }
 
-fn get_number_property(properties: &[Property], name: &str) -> Option<f64> {
+fn get_number_property(properties: &[Property], name: PropertyName) -> Option<f64> {
     properties.iter()
         .find(|p| p.name == name)
         .and_then(|p| match &p.value {
@@ -507,7 +507,7 @@ fn get_number_property(properties: &[Property], name: &str) -> Option<f64> {
         })
 }
 
-fn get_string_property(properties: &[Property], name: &str) -> Option<String> {
+fn get_string_property(properties: &[Property], name: PropertyName) -> Option<String> {
     properties.iter()
         .find(|p| p.name == name)
         .and_then(|p| match &p.value {
@@ -3,7 +3,7 @@
 use std::collections::HashMap;
 
 use seed_core::{
-    ast::{Element, FrameElement, TextElement, Property, PropertyValue},
+    ast::{Element, FrameElement, TextElement, Property, PropertyName, PropertyValue},
     types::ElementId,
     Document, LayoutError,
 };
@@ -44,6 +44,8 @@ struct LayoutContext<'a> {
     constraint_system: ConstraintSystem,
     element_names: HashMap<String, ElementId>,
     name_counter: u64,
+    /// Constraint slot of the next Frame or Text element laid out
+    next_slot: usize,
 }
 
 impl<'a> LayoutContext<'a> {
@@ -54,6 +56,7 @@ impl<'a> LayoutContext<'a> {
             constraint_system: ConstraintSystem::new(),
             element_names: HashMap::new(),
             name_counter: 0,
+            next_slot: 0,
         }
     }
 
@@ -61,6 +64,17 @@ impl<'a> LayoutContext<'a> {
         self.name_counter += 1;
         format!("{}_{}", prefix, self.name_counter)
     }
+
+    /// Take the constraint slot of the element being laid out.
+    ///
+    /// Frames and Text elements are visited in the same order the constraint
+    /// compiler numbers them, so this identifies the element even when
+    /// several share a name.
+    fn take_slot(&mut self) -> usize {
+        let slot = self.next_slot;
+        self.next_slot += 1;
+        slot
+    }
 }
 
 /// Compute layout for a document.
@@ -142,13 +156,14 @@ fn layout_frame(
         .as_ref()
         .map(|n| n.0.clone())
         .unwrap_or_else(|| ctx.generate_name("frame"));
+    let slot = ctx.take_slot();
 
     // Get bounds from constraint solution or use defaults
-    let bounds = get_bounds_from_solution(ctx, &name, solution, parent_id);
+    let bounds = get_bounds_from_solution(ctx, slot, solution, parent_id);
 
     // Get auto-layout settings from properties
     let auto_layout = get_auto_layout_from_properties(&frame.properties);
-    let clips = get_bool_property(&frame.properties, "clip").unwrap_or(false);
+    let clips = get_bool_property(&frame.properties, PropertyName::Clip).unwrap_or(false);
 
     let node_id = ctx.tree.next_id();
     let element_id = ElementId(node_id.0);
@@ -197,6 +212,7 @@ fn layout_text(
         .as_ref()
         .map(|n| n.0.clone())
         .unwrap_or_else(|| ctx.generate_name("text"));
+    let slot = ctx.take_slot();
 
     // Get text content
     let content = match &text.content {
@@ -216,7 +232,7 @@ fn layout_text(
     let metrics = measure_text(&content, &style, max_width);
 
     // Get bounds from constraint solution or use measured size
-    let mut bounds = get_bounds_from_solution(ctx, &name, solution, parent_id);
+    let mut bounds = get_bounds_from_solution(ctx, slot, solution, parent_id);
 
     // If width/height not constrained, use measured values
     if bounds.width == 0.0 {
@@ -248,12 +264,12 @@ fn layout_text(
 /// Get bounds from constraint solution.
 fn get_bounds_from_solution(
     ctx: &LayoutContext,
-    name: &str,
+    slot: usize,
     solution: &Solution,
     parent_id: Option<LayoutNodeId>,
 ) -> Bounds {
     // Look up the element ID from the constraint system
-    let element_id = ctx.constraint_system.get_element_id(name);
+    let element_id = ctx.constraint_system.element_id(slot);
 
     let (x, y, width, height) = if let Some(eid) = element_id {
         (
@@ -277,7 +293,7 @@ fn get_bounds_from_solution(
 
 /// Get auto-layout configuration from properties.
 fn get_auto_layout_from_properties(properties: &[Property]) -> Option<AutoLayout> {
-    let layout_mode = get_string_property(properties, "layout");
+    let layout_mode = get_string_property(properties, PropertyName::Layout);
 
     match layout_mode.as_deref() {
         Some("horizontal") | Some("row") => {
@@ -302,15 +318,15 @@ fn get_auto_layout_from_properties(properties: &[Property]) -> Option<AutoLayout
 
 /// Apply additional auto-layout properties.
 fn apply_auto_layout_properties(auto: &mut AutoLayout, properties: &[Property]) {
-    if let Some(gap) = get_length_property(properties, "gap") {
+    if let Some(gap) = get_length_property(properties, PropertyName::Gap) {
         auto.gap = gap;
     }
 
-    if let Some(padding) = get_length_property(properties, "padding") {
+    if let Some(padding) = get_length_property(properties, PropertyName::Padding) {
         auto.padding = Padding::uniform(padding);
     }
 
-    if let Some(align) = get_string_property(properties, "align") {
+    if let Some(align) = get_string_property(properties, PropertyName::Align) {
         auto.alignment = match align.as_str() {
             "start" => Alignment::Start,
             "center" => Alignment::Center,
@@ -324,16 +340,16 @@ fn apply_auto_layout_properties(auto: &mut AutoLayout, properties: &[Property])
 /// Get text style from properties.
 fn get_text_style_from_properties(properties: &[Property], options: &LayoutOptions) -> TextStyle {
     TextStyle {
-        font_family: get_string_property(properties, "font-family")
+        font_family: get_string_property(properties, PropertyName::FontFamily)
             .unwrap_or_else(|| "sans-serif".to_string()),
-        font_size: get_length_property(properties, "font-size")
+        font_size: get_length_property(properties, PropertyName::FontSize)
             .unwrap_or(options.default_font_size),
-        font_weight: get_number_property(properties, "font-weight")
+        font_weight: get_number_property(properties, PropertyName::FontWeight)
             .map(|n| n as u16)
             .unwrap_or(400),
-        line_height: get_number_property(properties, "line-height")
+        line_height: get_number_property(properties, PropertyName::LineHeight)
             .unwrap_or(options.default_line_height),
-        letter_spacing: get_length_property(properties, "letter-spacing")
+        letter_spacing: get_length_property(properties, PropertyName::LetterSpacing)
             .unwrap_or(0.0),
     }
 }
@@ -391,7 +407,7 @@ fn layout_children_auto(
 
 // Property accessors
 
-fn get_string_property(properties: &[Property], name: &str) -> Option<String> {
+fn get_string_property(properties: &[Property], name: PropertyName) -> Option<String> {
     properties.iter().find(|p| p.name == name).and_then(|p| {
         match &p.value {
             PropertyValue::String(s) => Some(s.clone()),
@@ -401,7 +417,7 @@ fn get_string_property(properties: &[Property], name: &str) -> Option<String> {
     })
 }
 
-fn get_length_property(properties: &[Property], name: &str) -> Option<f64> {
+fn get_length_property(properties: &[Property], name: PropertyName) -> Option<f64> {
     properties.iter().find(|p| p.name == name).and_then(|p| {
         match &p.value {
             PropertyValue::Length(l) => l.to_px(None),
@@ -411,7 +427,7 @@ fn get_length_property(properties: &[Property], name: &str) -> Option<f64> {
     })
 }
 
-fn get_number_property(properties: &[Property], name: &str) -> Option<f64> {
+fn get_number_property(properties: &[Property], name: PropertyName) -> Option<f64> {
     properties.iter().find(|p| p.name == name).and_then(|p| {
         match &p.value {
             PropertyValue::Number(n) => Some(*n),
@@ -421,7 +437,7 @@ fn get_number_property(properties: &[Property], name: &str) -> Option<f64> {
     })
 }
 
-fn get_bool_property(properties: &[Property], name: &str) -> Option<bool> {
+fn get_bool_property(properties: &[Property], name: PropertyName) -> Option<bool> {
     properties.iter().find(|p| p.name == name).and_then(|p| {
         match &p.value {
             PropertyValue::Boolean(b) => Some(*b),
@@ -467,7 +483,7 @@ mod tests {
                     span: Span::default(),
                 },
             ],
-            children: vec![],
+            children: vec![].into(),
             span: Span::default(),
         })
     }
@@ -519,7 +535,7 @@ mod tests {
                     span: Span::default(),
                 },
             ],
-            children: vec![child],
+            children: vec![child].into(),
             span: Span::default(),
         });
 
@@ -534,4 +550,24 @@ mod tests {
         let parent_node = tree.get(tree.roots()[0]).unwrap();
         assert_eq!(parent_node.children.len(), 1);
     }
+
+    #[test]
+    fn test_frames_with_same_name() {
+        let mut doc = make_empty_doc();
+        doc.elements.push(make_frame_element("Card", 100.0, 50.0));
+        doc.elements.push(make_frame_element("Card", 200.0, 80.0));
+
+        let options = LayoutOptions::default();
+        let tree = compute_layout(&doc, &options).unwrap();
+
+        let sizes: Vec<_> = tree
+            .roots()
+            .iter()
+            .map(|&id| {
+                let bounds = tree.get(id).unwrap().bounds;
+                (bounds.width, bounds.height)
+            })
+            .collect();
+        assert_eq!(sizes, vec![(100.0, 50.0), (200.0, 80.0)]);
+    }
 }
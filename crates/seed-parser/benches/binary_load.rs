@@ -0,0 +1,30 @@
+//! Startup comparison: parsing source text vs loading the binary AST.
+
+use criterion::{criterion_group, criterion_main, black_box, Criterion, Throughput};
+use seed_core::Document;
+use seed_parser::parse_document;
+
+const CARD: &str = include_str!("../../../tests/fixtures/card.seed");
+
+fn load_card_x1000(c: &mut Criterion) {
+    let source = CARD.repeat(1000);
+    let document = parse_document(&source).unwrap();
+    let path = std::env::temp_dir().join("seed-bench-card-x1000.seedb");
+    document.write_binary(std::fs::File::create(&path).unwrap()).unwrap();
+
+    let mut group = c.benchmark_group("load_card_x1000");
+    group.throughput(Throughput::Elements(document.elements.len() as u64));
+    group.sample_size(20);
+    group.bench_function("parse_document", |b| {
+        b.iter(|| parse_document(black_box(&source)).unwrap())
+    });
+    group.bench_function("load_binary", |b| {
+        b.iter(|| Document::load_binary(black_box(&path)).unwrap())
+    });
+    group.finish();
+
+    std::fs::remove_file(&path).ok();
+}
+
+criterion_group!(benches, load_card_x1000);
+criterion_main!(benches);
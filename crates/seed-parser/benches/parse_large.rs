@@ -0,0 +1,74 @@
+//! Throughput benchmarks on large generated documents.
+
+use criterion::{criterion_group, criterion_main, black_box, Criterion, Throughput};
+use seed_parser::{parse_borrowed, parse_document, Line, LineCursor};
+
+const CARD: &str = include_str!("../../../tests/fixtures/card.seed");
+
+/// Repeat the card fixture until the document is at least `size` bytes.
+fn large_document(size: usize) -> String {
+    let mut doc = String::with_capacity(size + CARD.len());
+    while doc.len() < size {
+        doc.push_str(CARD);
+        doc.push('\n');
+    }
+    doc
+}
+
+/// The line splitter the parser used before [`LineCursor`]: collects every
+/// line into a `Vec` up front and counts indentation over chars.
+fn split_lines(input: &str) -> Vec<Line<'_>> {
+    let base = input.as_ptr() as usize;
+    input
+        .lines()
+        .enumerate()
+        .filter_map(|(i, line)| {
+            let trimmed = line.trim();
+            // Skip empty lines and comment-only lines
+            if trimmed.is_empty() || trimmed.starts_with("//") {
+                None
+            } else {
+                Some(Line {
+                    indent: line.chars().take_while(|&c| c == ' ').count(),
+                    content: trimmed,
+                    line_number: i + 1,
+                    offset: line.as_ptr() as usize - base,
+                    end: trimmed.as_ptr() as usize - base + trimmed.len(),
+                })
+            }
+        })
+        .collect()
+}
+
+fn scan_lines_10mb(c: &mut Criterion) {
+    let doc = large_document(10 * 1024 * 1024);
+
+    let mut group = c.benchmark_group("scan_lines_10mb");
+    group.throughput(Throughput::Bytes(doc.len() as u64));
+    group.sample_size(10);
+    group.bench_function("split_lines", |b| {
+        b.iter(|| split_lines(black_box(&doc)).iter().map(|line| line.indent).sum::<usize>())
+    });
+    group.bench_function("line_cursor", |b| {
+        b.iter(|| LineCursor::new(black_box(&doc)).map(|line| line.indent).sum::<usize>())
+    });
+    group.finish();
+}
+
+fn parse_10mb(c: &mut Criterion) {
+    let doc = large_document(10 * 1024 * 1024);
+
+    let mut group = c.benchmark_group("parse_10mb");
+    group.throughput(Throughput::Bytes(doc.len() as u64));
+    group.sample_size(10);
+    group.bench_function("parse_document", |b| {
+        b.iter(|| parse_document(black_box(&doc)))
+    });
+    group.bench_function("parse_borrowed", |b| {
+        b.iter(|| parse_borrowed(black_box(&doc)))
+    });
+    group.finish();
+}
+
+criterion_group!(benches, scan_lines_10mb, parse_10mb);
+criterion_main!(benches);
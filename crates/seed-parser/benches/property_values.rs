@@ -0,0 +1,48 @@
+//! Micro-benchmark for property value parsing.
+
+use criterion::{criterion_group, criterion_main, black_box, Criterion, Throughput};
+use seed_parser::parse_borrowed;
+
+const PROPERTIES: &[&str] = &[
+    "fill: linear-gradient(90deg, #3B82F6, #1D4ED8)",
+    "background: radial-gradient(circle, #FFFFFF 0%, #000000 100%)",
+    "stroke: conic-gradient(#FF0000, #00FF00, #0000FF)",
+    "shadow: drop-shadow(0px 4px 8px #00000040)",
+    "box-shadow: box-shadow(0px 2px 4px 1px #0000001A)",
+    "inner: inset-shadow(0px 1px 2px #00000020)",
+    "transform: rotate(45deg)",
+    "origin: translate(10px, 20px)",
+    "zoom: scale(1.5, 2)",
+    "color: #111827",
+    "width: 120px",
+    "opacity: 0.5",
+    "layout: row",
+    "visible: true",
+    "label: \"Hello\"",
+    "accent: $colors.primary",
+];
+
+/// A single frame with `count` property lines cycling through `PROPERTIES`.
+fn property_heavy_document(count: usize) -> String {
+    let mut doc = String::from("Frame Styles:\n");
+    for property in PROPERTIES.iter().cycle().take(count) {
+        doc.push_str("  ");
+        doc.push_str(property);
+        doc.push('\n');
+    }
+    doc
+}
+
+fn parse_property_values(c: &mut Criterion) {
+    let doc = property_heavy_document(10_000);
+
+    let mut group = c.benchmark_group("property_values");
+    group.throughput(Throughput::Elements(10_000));
+    group.bench_function("parse_borrowed", |b| {
+        b.iter(|| parse_borrowed(black_box(&doc)))
+    });
+    group.finish();
+}
+
+criterion_group!(benches, parse_property_values);
+criterion_main!(benches);
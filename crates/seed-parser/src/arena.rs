@@ -0,0 +1,150 @@
+//! Parsing into an arena-allocated AST.
+//!
+//! Runs the grammar walk with a sink that places every node of the document
+//! in a caller-provided [`Arena`]. Properties, constraints and children are
+//! collected on the walk's scratch stacks, which are reused across elements,
+//! and copied into the arena once an element is complete, so parsing makes
+//! no per-element heap allocations.
+
+use seed_core::arena::*;
+use seed_core::{ParseError, PropertyName};
+
+use crate::grammar::{parse_constraint, parse_property_value, walk, Body, ElementKind, Header, Scratch, Sink};
+
+/// Parse a Seed document with every node allocated in `arena`.
+///
+/// Strings in the returned AST are slices of `input`. The document is freed
+/// all at once when `arena` is dropped.
+///
+/// The arena AST is a parser-side representation for code that only reads
+/// the parse result, such as validation or indexing passes. Resolution,
+/// expansion, layout and rendering all take an owned
+/// [`seed_core::Document`]; converting with
+/// [`Document::into_owned`](seed_core::arena::Document::into_owned) deep-copies
+/// every node and string, which costs more than [`parse`](crate::parse)
+/// would have. Use `parse` when the document goes through the pipeline.
+pub fn parse_arena<'a>(input: &'a str, arena: &'a Arena) -> Result<Document<'a>, ParseError> {
+    let mut scratch = Scratch::default();
+    let elements = walk(input, &mut ArenaSink { arena }, &mut scratch)?;
+
+    Ok(Document {
+        elements: arena.alloc_slice_copy(elements.as_slice()),
+        span: Span::default(),
+    })
+}
+
+/// Builds nodes in an arena.
+struct ArenaSink<'a> {
+    arena: &'a Arena,
+}
+
+impl<'a> Sink<'a> for ArenaSink<'a> {
+    type Property = Property<'a>;
+    type Constraint = Constraint<'a>;
+    type Element = Element<'a>;
+
+    fn property(&mut self, name: &'a str, value: &'a str) -> Result<Property<'a>, ParseError> {
+        Ok(Property {
+            name: PropertyName::new(name),
+            value: PropertyValue::from_borrowed(parse_property_value(value)?, self.arena),
+            span: Span::default(),
+        })
+    }
+
+    fn constraint(&mut self, text: &'a str) -> Result<Option<Constraint<'a>>, ParseError> {
+        Ok(parse_constraint(text)?.map(|constraint| Constraint::from_borrowed(constraint, self.arena)))
+    }
+
+    fn element(
+        &mut self,
+        header: Header<'a>,
+        body: Body<'_, Property<'a>, Constraint<'a>, Element<'a>>,
+    ) -> Element<'a> {
+        let properties = self.arena.alloc_slice_copy(body.properties.as_slice());
+        let constraints = self.arena.alloc_slice_copy(body.constraints.as_slice());
+
+        match header.kind {
+            ElementKind::Frame => Element::Frame(FrameElement {
+                name: header.name,
+                properties,
+                constraints,
+                children: self.arena.alloc_slice_copy(body.children.as_slice()),
+                span: header.span,
+            }),
+            ElementKind::Text => {
+                let content = properties.iter()
+                    .find(|p| p.name == PropertyName::Content)
+                    .and_then(|p| match p.value {
+                        PropertyValue::String(s) => Some(TextContent::Literal(s)),
+                        PropertyValue::TokenRef(path) => Some(TextContent::TokenRef(path)),
+                        _ => None,
+                    })
+                    .unwrap_or(TextContent::Literal(""));
+
+                Element::Text(TextElement {
+                    name: header.name,
+                    content,
+                    properties,
+                    constraints,
+                    span: header.span,
+                })
+            }
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::grammar::parse;
+
+    const SOURCE: &str = r#"Frame Card:
+  fill: linear-gradient(90deg, #FFFFFF, #000000)
+  shadow: drop-shadow(0px 2px 4px #00000040)
+  constraints:
+    - width = Parent.width - 32px
+    - below Header, gap: 8px
+  Text Title:
+    content: $copy.title
+    font-size: 16px
+  Frame:
+    transform: rotate(45deg)
+    Text Body:
+      content: "Hello"
+Frame Footer:
+  constraints:
+    - height = 48px
+  constraints:
+    - height >= 24px
+"#;
+
+    #[test]
+    fn test_parse_arena_matches_parse() {
+        let arena = Arena::new();
+        let doc = parse_arena(SOURCE, &arena).unwrap();
+
+        assert_eq!(doc.elements.len(), 2);
+        assert_eq!(doc.into_owned(), parse(SOURCE).unwrap());
+    }
+
+    #[test]
+    fn test_parse_arena_text_content() {
+        let arena = Arena::new();
+        let doc = parse_arena(SOURCE, &arena).unwrap();
+
+        let Element::Frame(card) = doc.elements[0] else { panic!("expected frame") };
+        let Element::Text(title) = card.children[0] else { panic!("expected text") };
+        assert_eq!(title.content, TextContent::TokenRef(TokenPath(&["copy", "title"])));
+    }
+
+    #[test]
+    fn test_parse_arena_error() {
+        let arena = Arena::new();
+        for source in ["Frame Card:\n  fill: linear-gradient()\n", "Frame Card:\nFram Header:\n"] {
+            assert_eq!(
+                parse_arena(source, &arena).unwrap_err().to_string(),
+                parse(source).unwrap_err().to_string(),
+            );
+        }
+    }
+}
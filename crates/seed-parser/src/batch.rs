@@ -0,0 +1,135 @@
+//! Batch parsing of many small documents.
+//!
+//! [`parse_many`] parses a list of sources with one set of parser scratch
+//! buffers, so per-document setup is limited to the document's own nodes.
+//! Property names share the global interner. With the `parallel` feature
+//! the documents are spread over the rayon thread pool, with one set of
+//! scratch buffers per worker; without it they are parsed sequentially.
+
+use std::time::{Duration, Instant};
+
+#[cfg(feature = "parallel")]
+use rayon::prelude::*;
+
+use seed_core::{Document, Element, ParseError};
+
+use crate::grammar::{parse_with_scratch, Scratch};
+
+/// Aggregate statistics for a batch parse.
+#[derive(Debug, Clone, Copy, Default, PartialEq)]
+pub struct BatchStats {
+    /// Number of documents parsed
+    pub documents: usize,
+    /// Number of documents that failed to parse
+    pub failed: usize,
+    /// Total source size in bytes
+    pub bytes: usize,
+    /// Total elements in the successfully parsed documents
+    pub elements: usize,
+    /// Wall-clock time for the whole batch
+    pub elapsed: Duration,
+}
+
+impl BatchStats {
+    pub fn bytes_per_second(&self) -> f64 {
+        self.per_second(self.bytes)
+    }
+
+    pub fn documents_per_second(&self) -> f64 {
+        self.per_second(self.documents)
+    }
+
+    pub fn elements_per_second(&self) -> f64 {
+        self.per_second(self.elements)
+    }
+
+    /// Rate of `count` over the batch, or 0 if no time was measured.
+    fn per_second(&self, count: usize) -> f64 {
+        let seconds = self.elapsed.as_secs_f64();
+        if seconds > 0.0 {
+            count as f64 / seconds
+        } else {
+            0.0
+        }
+    }
+}
+
+/// Parse every source in `sources`, returning results in the same order.
+pub fn parse_many(sources: &[&str]) -> Vec<Result<Document, ParseError>> {
+    parse_many_with_stats(sources).0
+}
+
+/// Like [`parse_many`], also returning aggregate statistics for the batch.
+pub fn parse_many_with_stats(sources: &[&str]) -> (Vec<Result<Document, ParseError>>, BatchStats) {
+    let start = Instant::now();
+
+    #[cfg(feature = "parallel")]
+    let results: Vec<_> = sources
+        .par_iter()
+        .map_init(Scratch::default, |scratch, source| parse_with_scratch(source, scratch))
+        .collect();
+    #[cfg(not(feature = "parallel"))]
+    let results: Vec<_> = {
+        let mut scratch = Scratch::default();
+        sources.iter().map(|source| parse_with_scratch(source, &mut scratch)).collect()
+    };
+
+    let stats = BatchStats {
+        documents: sources.len(),
+        failed: results.iter().filter(|r| r.is_err()).count(),
+        bytes: sources.iter().map(|s| s.len()).sum(),
+        elements: results.iter().flatten().map(|doc| count_elements(&doc.elements)).sum(),
+        elapsed: start.elapsed(),
+    };
+    (results, stats)
+}
+
+/// Count all elements in a tree, including nested ones.
+fn count_elements(elements: &[Element]) -> usize {
+    elements.iter().map(|element| {
+        1 + match element {
+            Element::Frame(f) => count_elements(&f.children),
+            Element::Component(c) => count_elements(&c.children),
+            Element::Slot(s) => count_elements(&s.fallback),
+            Element::Text(_) | Element::Part(_) => 0,
+        }
+    }).sum()
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::grammar::parse;
+
+    #[test]
+    fn test_parse_many_matches_parse() {
+        let sources: Vec<String> = (0..20)
+            .map(|i| format!("Frame Tile{}:\n  fill: #FFFFFF\n  Text Price:\n    content: \"${}\"\n", i, i))
+            .collect();
+        let mut sources: Vec<&str> = sources.iter().map(String::as_str).collect();
+        sources.insert(3, "Frame Broken\n");
+
+        let (results, stats) = parse_many_with_stats(&sources);
+
+        assert_eq!(results.len(), sources.len());
+        for (source, result) in sources.iter().zip(&results) {
+            match (result, parse(source)) {
+                (Ok(doc), Ok(expected)) => assert_eq!(doc, &expected),
+                (Err(_), Err(_)) => {}
+                _ => panic!("result differs from parse() for {:?}", source),
+            }
+        }
+        assert_eq!(stats.documents, 21);
+        assert_eq!(stats.failed, 1);
+        assert_eq!(stats.elements, 40);
+        assert_eq!(stats.bytes, sources.iter().map(|s| s.len()).sum::<usize>());
+    }
+
+    #[test]
+    fn test_empty_batch_rates() {
+        let stats = BatchStats::default();
+        assert_eq!(stats.bytes_per_second(), 0.0);
+        assert_eq!(stats.documents_per_second(), 0.0);
+        assert_eq!(stats.elements_per_second(), 0.0);
+    }
+}
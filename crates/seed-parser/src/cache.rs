@@ -0,0 +1,328 @@
+//! Content-addressed on-disk parse cache.
+//!
+//! [`ParseCache`] stores parsed documents in a local directory, keyed by a
+//! hash of the source text and the parser and grammar versions, using the
+//! binary AST encoding from [`seed_core::binary`]. Unchanged inputs are
+//! loaded instead of parsed. The cache is size-bounded: when it grows past
+//! its limit the least recently used entries are removed.
+//!
+//! Cache I/O failures never fail a parse; the cache is simply bypassed.
+
+use std::fs;
+use std::io;
+use std::path::{Path, PathBuf};
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::Mutex;
+use std::time::SystemTime;
+
+use seed_core::{Document, ParseError};
+
+use crate::grammar::PARSER_VERSION;
+
+/// Extension of cache entry files.
+const ENTRY_EXTENSION: &str = "seedb";
+
+/// Distinguishes temporary files written concurrently by one process.
+static NEXT_TEMP_FILE: AtomicU64 = AtomicU64::new(0);
+
+/// Default size limit of a cache directory (256 MiB).
+pub const DEFAULT_CACHE_SIZE: u64 = 256 * 1024 * 1024;
+
+/// Hit/miss counters for a [`ParseCache`].
+#[derive(Debug, Clone, Copy, Default, PartialEq, Eq)]
+pub struct CacheStats {
+    pub hits: u64,
+    pub misses: u64,
+}
+
+/// An on-disk cache of parsed documents.
+#[derive(Debug)]
+pub struct ParseCache {
+    dir: PathBuf,
+    max_size: u64,
+    /// Approximate total size of the entries in `dir`.
+    size: Mutex<u64>,
+    hits: AtomicU64,
+    misses: AtomicU64,
+}
+
+impl ParseCache {
+    /// Open (creating if needed) a cache in `dir` with the default size limit.
+    pub fn new(dir: impl Into<PathBuf>) -> io::Result<Self> {
+        let dir = dir.into();
+        fs::create_dir_all(&dir)?;
+        let size = entries(&dir)?.iter().map(|e| e.len).sum();
+
+        Ok(Self {
+            dir,
+            max_size: DEFAULT_CACHE_SIZE,
+            size: Mutex::new(size),
+            hits: AtomicU64::new(0),
+            misses: AtomicU64::new(0),
+        })
+    }
+
+    /// Set the size limit of the cache directory in bytes.
+    pub fn with_max_size(mut self, max_size: u64) -> Self {
+        self.max_size = max_size;
+        self
+    }
+
+    /// The cache directory.
+    pub fn dir(&self) -> &Path {
+        &self.dir
+    }
+
+    /// Parse `source`, loading the result from the cache if it was parsed before.
+    pub fn parse_document(&self, source: &str) -> Result<Document, ParseError> {
+        let path = self.entry_path(source);
+
+        if let Ok(bytes) = fs::read(&path) {
+            if let Ok(document) = Document::from_binary(&bytes) {
+                self.hits.fetch_add(1, Ordering::Relaxed);
+                // Mark the entry as recently used
+                let _ = fs::File::options()
+                    .write(true)
+                    .open(&path)
+                    .and_then(|f| f.set_modified(SystemTime::now()));
+                return Ok(document);
+            }
+        }
+
+        self.misses.fetch_add(1, Ordering::Relaxed);
+        let document = crate::parse_document(source)?;
+        let _ = self.store(&path, &document);
+        Ok(document)
+    }
+
+    /// Hit/miss counts since the cache was opened.
+    pub fn stats(&self) -> CacheStats {
+        CacheStats {
+            hits: self.hits.load(Ordering::Relaxed),
+            misses: self.misses.load(Ordering::Relaxed),
+        }
+    }
+
+    /// Remove every entry from the cache.
+    pub fn clear(&self) -> io::Result<()> {
+        let mut size = self.size.lock().unwrap();
+        for entry in entries(&self.dir)? {
+            fs::remove_file(entry.path)?;
+        }
+        *size = 0;
+        Ok(())
+    }
+
+    fn entry_path(&self, source: &str) -> PathBuf {
+        let key = cache_key(source);
+        self.dir.join(format!("{:032x}.{}", key, ENTRY_EXTENSION))
+    }
+
+    /// Write an entry atomically and evict old entries if over the size limit.
+    fn store(&self, path: &Path, document: &Document) -> io::Result<()> {
+        let bytes = document.to_binary();
+
+        // Write to a temporary file and rename so readers never see partial
+        // entries; the name is unique so concurrent stores don't share it
+        let n = NEXT_TEMP_FILE.fetch_add(1, Ordering::Relaxed);
+        let tmp = path.with_extension(format!("tmp{}-{}", std::process::id(), n));
+        fs::write(&tmp, &bytes)?;
+        let replaced = fs::metadata(path).map_or(0, |m| m.len());
+        fs::rename(&tmp, path)?;
+
+        let mut size = self.size.lock().unwrap();
+        *size = (*size + bytes.len() as u64).saturating_sub(replaced);
+        if *size > self.max_size {
+            *size = self.evict()?;
+        }
+        Ok(())
+    }
+
+    /// Remove least recently used entries until the cache is at 90% of its
+    /// limit, so eviction does not run on every insert. Returns the new size.
+    fn evict(&self) -> io::Result<u64> {
+        let mut entries = entries(&self.dir)?;
+        entries.sort_by_key(|e| e.modified);
+
+        let target = self.max_size / 10 * 9;
+        let mut size: u64 = entries.iter().map(|e| e.len).sum();
+        for entry in entries {
+            if size <= target {
+                break;
+            }
+            if fs::remove_file(&entry.path).is_ok() {
+                size -= entry.len;
+            }
+        }
+        Ok(size)
+    }
+}
+
+struct Entry {
+    path: PathBuf,
+    len: u64,
+    modified: SystemTime,
+}
+
+/// List the cache entries in `dir`.
+fn entries(dir: &Path) -> io::Result<Vec<Entry>> {
+    let mut entries = Vec::new();
+    for entry in fs::read_dir(dir)? {
+        let entry = entry?;
+        let path = entry.path();
+        if path.extension().map_or(true, |ext| ext != ENTRY_EXTENSION) {
+            continue;
+        }
+        let metadata = entry.metadata()?;
+        entries.push(Entry {
+            path,
+            len: metadata.len(),
+            modified: metadata.modified().unwrap_or(SystemTime::UNIX_EPOCH),
+        });
+    }
+    Ok(entries)
+}
+
+/// Cache key for `source`: a 128-bit hash of the source text, the crate
+/// version, the grammar version and the binary format version.
+fn cache_key(source: &str) -> u128 {
+    let version = format!(
+        "{}/{}/{}",
+        env!("CARGO_PKG_VERSION"),
+        PARSER_VERSION,
+        seed_core::binary::BINARY_VERSION
+    );
+    hash128(version.as_bytes(), source.as_bytes())
+}
+
+/// Fast non-cryptographic 128-bit hash of `prefix` followed by `data`.
+///
+/// Two independent 64-bit lanes consume the input a word at a time and are
+/// finished with the MurmurHash3 avalanche step.
+fn hash128(prefix: &[u8], data: &[u8]) -> u128 {
+    const K1: u64 = 0x9E37_79B9_7F4A_7C15;
+    const K2: u64 = 0xC2B2_AE3D_27D4_EB4F;
+
+    let mut a: u64 = 0x243F_6A88_85A3_08D3;
+    let mut b: u64 = 0x1319_8A2E_0370_7344;
+
+    for bytes in [prefix, data] {
+        let mut words = bytes.chunks_exact(8);
+        for word in &mut words {
+            let w = u64::from_le_bytes(word.try_into().unwrap());
+            a = (a ^ w).wrapping_mul(K1).rotate_left(31);
+            b = (b ^ w.rotate_left(17)).wrapping_mul(K2).rotate_left(27);
+        }
+
+        let mut tail = [0u8; 8];
+        tail[..words.remainder().len()].copy_from_slice(words.remainder());
+        let w = u64::from_le_bytes(tail) ^ ((bytes.len() as u64) << 3);
+        a = (a ^ w).wrapping_mul(K1).rotate_left(31);
+        b = (b ^ w.rotate_left(17)).wrapping_mul(K2).rotate_left(27);
+    }
+
+    ((fmix64(a ^ b.rotate_left(32)) as u128) << 64) | fmix64(b ^ a) as u128
+}
+
+fn fmix64(mut k: u64) -> u64 {
+    k ^= k >> 33;
+    k = k.wrapping_mul(0xFF51_AFD7_ED55_8CCD);
+    k ^= k >> 33;
+    k = k.wrapping_mul(0xC4CE_B9FE_1A85_EC53);
+    k ^= k >> 33;
+    k
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    const SOURCE: &str = "Frame Card:\n  fill: #FFFFFF\n  Text Title:\n    content: \"Hi\"\n";
+
+    fn temp_cache(name: &str) -> ParseCache {
+        let dir = std::env::temp_dir().join(format!("seed-parse-cache-{}-{}", name, std::process::id()));
+        let _ = fs::remove_dir_all(&dir);
+        ParseCache::new(dir).unwrap()
+    }
+
+    #[test]
+    fn test_cache_hit_returns_same_document() {
+        let cache = temp_cache("hit");
+
+        let first = cache.parse_document(SOURCE).unwrap();
+        let second = cache.parse_document(SOURCE).unwrap();
+
+        assert_eq!(first, second);
+        assert_eq!(first, crate::parse_document(SOURCE).unwrap());
+        assert_eq!(cache.stats(), CacheStats { hits: 1, misses: 1 });
+        fs::remove_dir_all(cache.dir()).unwrap();
+    }
+
+    #[test]
+    fn test_cache_ignores_corrupt_entries() {
+        let cache = temp_cache("corrupt");
+        fs::write(cache.entry_path(SOURCE), b"garbage").unwrap();
+
+        assert_eq!(cache.parse_document(SOURCE).unwrap(), crate::parse_document(SOURCE).unwrap());
+        assert_eq!(cache.stats().misses, 1);
+        // The corrupt entry was replaced
+        cache.parse_document(SOURCE).unwrap();
+        assert_eq!(cache.stats().hits, 1);
+        fs::remove_dir_all(cache.dir()).unwrap();
+    }
+
+    #[test]
+    fn test_cache_evicts_least_recently_used() {
+        let cache = temp_cache("evict");
+        let sources: Vec<String> = (0..4)
+            .map(|i| format!("Frame F{}:\n  width: {}px\n", i, i))
+            .collect();
+        let entry_size = crate::parse_document(&sources[0]).unwrap().to_binary().len() as u64;
+        let cache = cache.with_max_size(entry_size * 3);
+
+        for source in &sources[..3] {
+            cache.parse_document(source).unwrap();
+        }
+        // Give the entries distinct ages even on coarse-grained filesystems
+        for (i, source) in sources[..3].iter().enumerate() {
+            let age = std::time::Duration::from_secs(60 - i as u64 * 10);
+            fs::File::options().write(true).open(cache.entry_path(source)).unwrap()
+                .set_modified(SystemTime::now() - age).unwrap();
+        }
+        cache.parse_document(&sources[3]).unwrap();
+
+        assert!(!cache.entry_path(&sources[0]).exists());
+        assert!(!cache.entry_path(&sources[1]).exists());
+        assert!(cache.entry_path(&sources[2]).exists());
+        assert!(cache.entry_path(&sources[3]).exists());
+        assert!(entries(cache.dir()).unwrap().len() <= 3);
+        fs::remove_dir_all(cache.dir()).unwrap();
+    }
+
+    #[test]
+    fn test_concurrent_stores_of_one_entry() {
+        let cache = temp_cache("concurrent");
+        let expected = crate::parse_document(SOURCE).unwrap();
+
+        std::thread::scope(|scope| {
+            for _ in 0..8 {
+                scope.spawn(|| {
+                    let document = crate::parse_document(SOURCE).unwrap();
+                    cache.store(&cache.entry_path(SOURCE), &document).unwrap();
+                });
+            }
+        });
+
+        assert_eq!(cache.parse_document(SOURCE).unwrap(), expected);
+        assert_eq!(cache.stats().hits, 1);
+        assert_eq!(fs::read_dir(cache.dir()).unwrap().count(), 1);
+        fs::remove_dir_all(cache.dir()).unwrap();
+    }
+
+    #[test]
+    fn test_cache_key_depends_on_content() {
+        assert_eq!(cache_key(SOURCE), cache_key(SOURCE));
+        assert_ne!(cache_key(SOURCE), cache_key(&SOURCE.replace("Hi", "Ho")));
+        assert_ne!(hash128(b"", b"abc"), hash128(b"", b"abc\0"));
+    }
+}
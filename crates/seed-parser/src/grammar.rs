@@ -1,7 +1,11 @@
 //! Grammar rules for parsing Seed documents.
 //!
 //! This parser uses indentation-based nesting (like Python/YAML).
-//! Lines are first split and tagged with indent levels, then parsed.
+//! [`walk`] pulls lines one at a time from a [`LineCursor`], which tags each
+//! with its indent level, and works out the nesting as it goes. Properties,
+//! constraints and finished elements are built by a [`Sink`], so the same
+//! walk produces the borrowed AST, the arena AST, lazy documents and
+//! validation results.
 
 use nom::{
     sequence::pair,
@@ -9,275 +13,435 @@ use nom::{
 };
 
 use seed_core::{
-    ast::*,
+    borrowed::*,
     types::*,
     ParseError,
 };
 use std::f64::consts::PI;
+use std::iter::Peekable;
+use std::vec::Drain;
 
 use crate::lexer::*;
 
-/// Parse a complete Seed document.
-pub fn parse(input: &str) -> Result<Document, ParseError> {
-    let lines = split_lines(input);
-    let mut parser = Parser::new(&lines);
-    parser.parse_document()
+/// Version of the grammar.
+///
+/// Bump whenever a change to the parser alters the AST produced for any
+/// input, so documents cached by an older parser are not reused.
+pub(crate) const PARSER_VERSION: u32 = 1;
+
+/// Parse a complete Seed document into the owned AST.
+pub fn parse(input: &str) -> Result<seed_core::Document, ParseError> {
+    parse_borrowed(input).map(Document::into_owned)
+}
+
+/// Parse a complete Seed document into a borrowed AST that points into `input`.
+pub fn parse_borrowed(input: &str) -> Result<Document<'_>, ParseError> {
+    parse_borrowed_with_scratch(input, &mut Scratch::default())
 }
 
-/// Stateful parser that tracks position in the line list.
-struct Parser<'a> {
-    lines: &'a [Line<'a>],
-    pos: usize,
+/// Parse into the owned AST, reusing the buffers in `scratch`.
+///
+/// The buffers hold nodes borrowed from the source, so one set can be
+/// reused by any number of sources that live at least as long.
+pub(crate) fn parse_with_scratch<'src>(input: &'src str, scratch: &mut BorrowedScratch<'src>) -> Result<seed_core::Document, ParseError> {
+    parse_borrowed_with_scratch(input, scratch).map(Document::into_owned)
 }
 
-impl<'a> Parser<'a> {
-    fn new(lines: &'a [Line<'a>]) -> Self {
-        Self { lines, pos: 0 }
+fn parse_borrowed_with_scratch<'src>(input: &'src str, scratch: &mut BorrowedScratch<'src>) -> Result<Document<'src>, ParseError> {
+    let elements = walk(input, &mut BorrowedSink, scratch)?.collect();
+
+    Ok(Document {
+        meta: None,
+        tokens: None,
+        elements,
+        span: Span::default(),
+    })
+}
+
+/// Scratch buffers for parsing into the borrowed AST.
+pub(crate) type BorrowedScratch<'src> = Scratch<Property<'src>, Constraint<'src>, Element<'src>>;
+
+/// The kind of element a header line opens.
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub(crate) enum ElementKind {
+    Frame,
+    Text,
+}
+
+impl ElementKind {
+    /// The kind of element `content` is the header of, if it is one.
+    pub(crate) fn of_header(content: &str) -> Option<Self> {
+        if content.starts_with("Frame ") || content == "Frame:" {
+            Some(ElementKind::Frame)
+        } else if content.starts_with("Text ") || content == "Text:" {
+            Some(ElementKind::Text)
+        } else {
+            None
+        }
     }
 
-    /// Get current line, if any.
-    fn current(&self) -> Option<&Line<'a>> {
-        self.lines.get(self.pos)
+    pub(crate) fn keyword(self) -> &'static str {
+        match self {
+            ElementKind::Frame => "Frame",
+            ElementKind::Text => "Text",
+        }
     }
+}
 
-    /// Advance to next line.
-    fn advance(&mut self) {
-        self.pos += 1;
+/// An element header, with the span of the whole element.
+pub(crate) struct Header<'src> {
+    pub(crate) kind: ElementKind,
+    pub(crate) name: Option<&'src str>,
+    pub(crate) span: Span,
+}
+
+/// The body of an element, drained off the scratch stacks in source order.
+pub(crate) struct Body<'a, P, C, E> {
+    pub(crate) properties: Drain<'a, P>,
+    pub(crate) constraints: Drain<'a, C>,
+    /// Child elements; left unread for elements that cannot have children.
+    pub(crate) children: Drain<'a, E>,
+}
+
+/// Builds the nodes of one kind of parse as [`walk`] finds them.
+///
+/// The walk decides which lines are elements, properties and constraints,
+/// and which element they belong to; a sink decides what each becomes.
+pub(crate) trait Sink<'src> {
+    type Property;
+    type Constraint;
+    type Element;
+
+    /// Build a property from its name and raw value text.
+    fn property(&mut self, name: &'src str, value: &'src str) -> Result<Self::Property, ParseError>;
+
+    /// Build a constraint from the text after its `-` marker.
+    fn constraint(&mut self, text: &'src str) -> Result<Option<Self::Constraint>, ParseError>;
+
+    /// Build an element once its whole body has been walked.
+    fn element(
+        &mut self,
+        header: Header<'src>,
+        body: Body<'_, Self::Property, Self::Constraint, Self::Element>,
+    ) -> Self::Element;
+
+    /// Handle an error found on `line`.
+    ///
+    /// Returning the error stops the walk. Returning `Ok` carries on past
+    /// it: the property, constraint or unknown line is left out, and an
+    /// element with a malformed header is built without a name.
+    fn error(&mut self, error: ParseError, line: &Line<'src>) -> Result<(), ParseError> {
+        let _ = line;
+        Err(error)
     }
+}
 
-    /// Parse the full document.
-    fn parse_document(&mut self) -> Result<Document, ParseError> {
-        let mut elements = Vec::new();
+/// Stacks that element bodies are collected on before a [`Sink`] builds the
+/// element from them.
+///
+/// The stacks are empty between elements, so the buffers can be reused for
+/// later elements and, via [`parse_with_scratch`], later documents.
+pub(crate) struct Scratch<P, C, E> {
+    properties: Vec<P>,
+    constraints: Vec<C>,
+    children: Vec<E>,
+}
 
-        while self.current().is_some() {
-            if let Some(elem) = self.parse_element(0)? {
-                elements.push(elem);
-            }
+impl<P, C, E> Default for Scratch<P, C, E> {
+    fn default() -> Self {
+        Self {
+            properties: Vec::new(),
+            constraints: Vec::new(),
+            children: Vec::new(),
         }
-
-        Ok(Document {
-            meta: None,
-            tokens: None,
-            elements,
-            span: Span::default(),
-        })
     }
+}
 
-    /// Parse an element at the given minimum indentation level.
-    fn parse_element(&mut self, min_indent: usize) -> Result<Option<Element>, ParseError> {
-        let line = match self.current() {
-            Some(l) if l.indent >= min_indent => l,
-            _ => return Ok(None),
-        };
+/// Walk the lines of `input`, building nodes with `sink` on the stacks in
+/// `scratch`, and return the top-level elements.
+///
+/// This is the only implementation of the document's indentation
+/// structure; every kind of parse plugs into it with its own [`Sink`].
+pub(crate) fn walk<'s, 'src, S: Sink<'src>>(
+    input: &'src str,
+    sink: &mut S,
+    scratch: &'s mut Scratch<S::Property, S::Constraint, S::Element>,
+) -> Result<Drain<'s, S::Element>, ParseError> {
+    // Left over if an earlier walk with these buffers failed
+    scratch.properties.clear();
+    scratch.constraints.clear();
+    scratch.children.clear();
+
+    let mut walker = Walker {
+        lines: LineCursor::new(input).peekable(),
+        last_end: None,
+        sink,
+        scratch: &mut *scratch,
+    };
+    walker.document()?;
 
-        let content = line.content;
+    Ok(scratch.children.drain(..))
+}
 
-        // Try to parse as Frame
-        if content.starts_with("Frame ") || content == "Frame:" {
-            return self.parse_frame_element().map(|f| Some(Element::Frame(f)));
-        }
+/// Stateful walk that reads lines lazily from a [`LineCursor`].
+struct Walker<'w, 'src, S: Sink<'src>> {
+    lines: Peekable<LineCursor<'src>>,
+    /// End offset of the last consumed line.
+    last_end: Option<usize>,
+    sink: &'w mut S,
+    scratch: &'w mut Scratch<S::Property, S::Constraint, S::Element>,
+}
 
-        // Try to parse as Text
-        if content.starts_with("Text ") || content == "Text:" {
-            return self.parse_text_element().map(|t| Some(Element::Text(t)));
-        }
+impl<'w, 'src, S: Sink<'src>> Walker<'w, 'src, S> {
+    /// Get current line, if any.
+    fn current(&mut self) -> Option<&Line<'src>> {
+        self.lines.peek()
+    }
 
-        Ok(None)
+    /// Advance to next line.
+    fn advance(&mut self) {
+        if let Some(line) = self.lines.next() {
+            self.last_end = Some(line.end);
+        }
     }
 
-    /// Parse a Frame element.
-    fn parse_frame_element(&mut self) -> Result<FrameElement, ParseError> {
-        let line = self.current().ok_or(ParseError::UnexpectedEof)?;
-        let base_indent = line.indent;
-        let content = line.content;
-        let line_num = line.line_number;
+    /// Span from the start of `header` to the end of the last consumed line.
+    fn block_span(&self, header: &Line<'src>) -> Span {
+        let end = self.last_end.unwrap_or(header.end);
 
-        // Parse "Frame Name:" or "Frame:"
-        let name = parse_element_header(content, "Frame")
-            .map_err(|_| ParseError::UnexpectedToken {
-                found: content.to_string(),
-                expected: "Frame element".to_string(),
-                line: line_num as u32,
-                column: 1,
-            })?;
+        Span {
+            start: header.offset,
+            end,
+            line: header.line_number as u32,
+            column: header.indent as u32 + 1,
+        }
+    }
 
-        self.advance();
+    /// Walk the top-level elements onto the children stack.
+    fn document(&mut self) -> Result<(), ParseError> {
+        while let Some(line) = self.current() {
+            let line = line.clone();
+            match ElementKind::of_header(line.content) {
+                Some(kind) => {
+                    let element = self.element(kind, line)?;
+                    self.scratch.children.push(element);
+                }
+                None => {
+                    self.sink.error(unknown_element(&line), &line)?;
+                    self.advance();
+                }
+            }
+        }
 
-        // Parse body (properties, constraints, children)
-        let body = self.parse_element_body(base_indent)?;
-
-        Ok(FrameElement {
-            name: name.map(|s| Identifier(s.to_string())),
-            properties: body.properties,
-            constraints: body.constraints,
-            children: body.children,
-            span: Span {
-                line: line_num as u32,
-                ..Default::default()
-            },
-        })
+        Ok(())
     }
 
-    /// Parse a Text element.
-    fn parse_text_element(&mut self) -> Result<TextElement, ParseError> {
-        let line = self.current().ok_or(ParseError::UnexpectedEof)?;
-        let base_indent = line.indent;
-        let content = line.content;
-        let line_num = line.line_number;
-
-        let name = parse_element_header(content, "Text")
-            .map_err(|_| ParseError::UnexpectedToken {
-                found: content.to_string(),
-                expected: "Text element".to_string(),
-                line: line_num as u32,
-                column: 1,
-            })?;
+    /// Walk the element whose header is the current line.
+    fn element(&mut self, kind: ElementKind, line: Line<'src>) -> Result<S::Element, ParseError> {
+        // Parse "Frame Name:" or "Frame:"
+        let name = match parse_element_header(line.content, kind.keyword()) {
+            Ok(name) => name,
+            Err(()) => {
+                let error = ParseError::UnexpectedToken {
+                    found: line.content.to_string(),
+                    expected: format!("{} element", kind.keyword()),
+                    line: line.line_number as u32,
+                    column: 1,
+                };
+                self.sink.error(error, &line)?;
+                None
+            }
+        };
 
         self.advance();
 
-        let body = self.parse_element_body(base_indent)?;
-
-        // Extract content from properties
-        let text_content = body.properties.iter()
-            .find(|p| p.name == "content")
-            .and_then(|p| match &p.value {
-                PropertyValue::String(s) => Some(TextContent::Literal(s.clone())),
-                PropertyValue::TokenRef(path) => Some(TextContent::TokenRef(path.clone())),
-                _ => None,
-            })
-            .unwrap_or(TextContent::Literal(String::new()));
-
-        Ok(TextElement {
-            name: name.map(|s| Identifier(s.to_string())),
-            content: text_content,
-            properties: body.properties,
-            constraints: body.constraints,
-            span: Span {
-                line: line_num as u32,
-                ..Default::default()
-            },
-        })
+        // Parse body (properties, constraints, children)
+        let properties_mark = self.scratch.properties.len();
+        let constraints_mark = self.scratch.constraints.len();
+        let children_mark = self.scratch.children.len();
+        self.body(line.indent, constraints_mark)?;
+
+        let header = Header {
+            kind,
+            name,
+            span: self.block_span(&line),
+        };
+        let body = Body {
+            properties: self.scratch.properties.drain(properties_mark..),
+            constraints: self.scratch.constraints.drain(constraints_mark..),
+            children: self.scratch.children.drain(children_mark..),
+        };
+        Ok(self.sink.element(header, body))
     }
 
-    /// Parse the body of an element (properties, constraints, children).
-    fn parse_element_body(&mut self, parent_indent: usize) -> Result<ElementBody, ParseError> {
-        let mut properties = Vec::new();
-        let mut constraints = Vec::new();
-        let mut children = Vec::new();
-
+    /// Walk the body of an element onto the scratch stacks.
+    fn body(&mut self, parent_indent: usize, constraints_mark: usize) -> Result<(), ParseError> {
         let child_indent = parent_indent + 2; // Expect 2-space indentation
 
         while let Some(line) = self.current() {
             // Stop if we're back at parent level or less
-            if line.indent <= parent_indent {
-                break;
-            }
-
-            // Must be at child indent level
             if line.indent < child_indent {
                 break;
             }
 
-            let content = line.content;
+            let line = line.clone();
 
-            // Check for constraints block
-            if content == "constraints:" {
-                let constraint_parent_indent = line.indent;
+            // Check for constraints block; a later block replaces an earlier one
+            if line.content == "constraints:" {
                 self.advance();
-                constraints = self.parse_constraints_block(constraint_parent_indent)?;
+                self.scratch.constraints.truncate(constraints_mark);
+                self.constraints(line.indent)?;
                 continue;
             }
 
             // Check for child element
-            if content.starts_with("Frame ") || content.starts_with("Text ")
-               || content == "Frame:" || content == "Text:" {
-                if let Some(elem) = self.parse_element(child_indent)? {
-                    children.push(elem);
-                }
+            if let Some(kind) = ElementKind::of_header(line.content) {
+                let element = self.element(kind, line)?;
+                self.scratch.children.push(element);
                 continue;
             }
 
-            // Try to parse as property
-            if let Some(prop) = self.parse_property(content)? {
-                properties.push(prop);
-                self.advance();
-                continue;
+            // Try to parse as property; other lines are skipped
+            if let Some((name, value)) = split_property(line.content) {
+                match self.sink.property(name, value) {
+                    Ok(property) => self.scratch.properties.push(property),
+                    Err(error) => self.sink.error(error, &line)?,
+                }
             }
-
-            // Unknown line, skip
             self.advance();
         }
 
-        Ok(ElementBody { properties, constraints, children })
+        Ok(())
     }
 
-    /// Parse a constraints block.
-    fn parse_constraints_block(&mut self, parent_indent: usize) -> Result<Vec<Constraint>, ParseError> {
-        let mut constraints = Vec::new();
+    /// Walk a constraints block onto the constraints stack.
+    fn constraints(&mut self, parent_indent: usize) -> Result<(), ParseError> {
         let constraint_indent = parent_indent + 2;
 
         while let Some(line) = self.current() {
-            if line.indent <= parent_indent {
-                break;
-            }
-
             if line.indent < constraint_indent {
                 break;
             }
 
+            let line = line.clone();
             let content = line.content;
 
             // Constraint lines start with "-"
             if let Some(constraint_text) = content.strip_prefix("- ").or_else(|| content.strip_prefix("-")) {
-                if let Some(constraint) = parse_constraint(constraint_text.trim())? {
-                    constraints.push(constraint);
+                match self.sink.constraint(constraint_text.trim()) {
+                    Ok(Some(constraint)) => self.scratch.constraints.push(constraint),
+                    Ok(None) => {}
+                    Err(error) => self.sink.error(error, &line)?,
                 }
             }
 
             self.advance();
         }
 
-        Ok(constraints)
+        Ok(())
     }
+}
 
-    /// Parse a property line.
-    fn parse_property(&mut self, content: &str) -> Result<Option<Property>, ParseError> {
-        // Skip constraint block header
-        if content == "constraints:" {
-            return Ok(None);
-        }
+/// Builds the borrowed AST.
+struct BorrowedSink;
 
-        // Property format: "name: value"
-        let Some(colon_pos) = content.find(':') else {
-            return Ok(None);
-        };
+impl<'src> Sink<'src> for BorrowedSink {
+    type Property = Property<'src>;
+    type Constraint = Constraint<'src>;
+    type Element = Element<'src>;
 
-        let name = content[..colon_pos].trim();
-        let value_str = content[colon_pos + 1..].trim();
+    fn property(&mut self, name: &'src str, value: &'src str) -> Result<Property<'src>, ParseError> {
+        Ok(Property {
+            name,
+            value: parse_property_value(value)?,
+            span: Span::default(),
+        })
+    }
 
-        // Skip if it looks like an element header (ends with just ":")
-        if value_str.is_empty() {
-            return Ok(None);
+    fn constraint(&mut self, text: &'src str) -> Result<Option<Constraint<'src>>, ParseError> {
+        parse_constraint(text)
+    }
+
+    fn element(
+        &mut self,
+        header: Header<'src>,
+        body: Body<'_, Property<'src>, Constraint<'src>, Element<'src>>,
+    ) -> Element<'src> {
+        let properties: Vec<_> = body.properties.collect();
+        let constraints = body.constraints.collect();
+
+        match header.kind {
+            ElementKind::Frame => Element::Frame(FrameElement {
+                name: header.name,
+                properties,
+                constraints,
+                children: body.children.collect(),
+                span: header.span,
+            }),
+            ElementKind::Text => Element::Text(TextElement {
+                name: header.name,
+                content: text_content(&properties),
+                properties,
+                constraints,
+                span: header.span,
+            }),
         }
+    }
+}
+
+/// The content of a Text element, taken from its `content` property.
+pub(crate) fn text_content<'src>(properties: &[Property<'src>]) -> TextContent<'src> {
+    properties.iter()
+        .find(|p| p.name == "content")
+        .and_then(|p| match &p.value {
+            PropertyValue::String(s) => Some(TextContent::Literal(s)),
+            PropertyValue::TokenRef(path) => Some(TextContent::TokenRef(path.clone())),
+            _ => None,
+        })
+        .unwrap_or(TextContent::Literal(""))
+}
 
-        let value = parse_property_value(value_str)?;
+/// Error for a line outside any element that is not an element header.
+pub(crate) fn unknown_element(line: &Line<'_>) -> ParseError {
+    let name = line.content
+        .split(|c: char| c.is_whitespace() || c == ':')
+        .next()
+        .unwrap_or(line.content);
 
-        Ok(Some(Property {
-            name: name.to_string(),
-            value,
-            span: Span::default(),
-        }))
+    ParseError::UnknownElementType {
+        name: name.to_string(),
+        span: Span {
+            start: line.offset,
+            end: line.end,
+            line: line.line_number as u32,
+            column: line.indent as u32 + 1,
+        },
     }
 }
 
-struct ElementBody {
-    properties: Vec<Property>,
-    constraints: Vec<Constraint>,
-    children: Vec<Element>,
+/// Split a property line into its name and raw value text.
+pub(crate) fn split_property(content: &str) -> Option<(&str, &str)> {
+    // Skip constraint block header
+    if content == "constraints:" {
+        return None;
+    }
+
+    // Property format: "name: value"
+    let colon_pos = content.find(':')?;
+
+    let name = content[..colon_pos].trim();
+    let value_str = content[colon_pos + 1..].trim();
+
+    // Skip if it looks like an element header (ends with just ":")
+    if value_str.is_empty() {
+        return None;
+    }
+
+    Some((name, value_str))
 }
 
 /// Parse element header like "Frame Name:" or "Frame:"
-fn parse_element_header<'a>(content: &'a str, keyword: &str) -> Result<Option<&'a str>, ()> {
+pub(crate) fn parse_element_header<'a>(content: &'a str, keyword: &str) -> Result<Option<&'a str>, ()> {
     let content = content.strip_suffix(':').ok_or(())?;
 
     if content == keyword {
@@ -295,98 +459,118 @@ fn parse_element_header<'a>(content: &'a str, keyword: &str) -> Result<Option<&'
 }
 
 /// Parse a property value.
-fn parse_property_value(input: &str) -> Result<PropertyValue, ParseError> {
+pub(crate) fn parse_property_value(input: &str) -> Result<PropertyValue<'_>, ParseError> {
     let input = input.trim();
 
-    // Transform functions
-    if input.starts_with("rotate(") {
-        return parse_rotate_transform(input).map(PropertyValue::Transform);
-    }
-    if input.starts_with("scale(") {
-        return parse_scale_transform(input).map(PropertyValue::Transform);
-    }
-    if input.starts_with("translate(") {
-        return parse_translate_transform(input).map(PropertyValue::Transform);
-    }
-    if input.starts_with("skew(") {
-        return parse_skew_transform(input).map(PropertyValue::Transform);
-    }
-    if input.starts_with("matrix(") {
-        return parse_matrix_transform(input).map(PropertyValue::Transform);
-    }
-
-    // Shadow functions
-    if input.starts_with("drop-shadow(") {
-        return parse_drop_shadow(input).map(PropertyValue::Shadow);
-    }
-    if input.starts_with("box-shadow(") {
-        return parse_box_shadow(input).map(PropertyValue::Shadow);
-    }
-    if input.starts_with("inset-shadow(") {
-        return parse_inset_shadow(input).map(PropertyValue::Shadow);
-    }
+    // Dispatch on the first byte so each value only tries the parsers that can match it
+    match input.as_bytes().first() {
+        // Hex color
+        Some(b'#') => {
+            if let Some(color) = Color::from_hex(&input[1..]) {
+                return Ok(PropertyValue::Color(color));
+            }
+        }
 
-    // Gradient functions
-    if input.starts_with("linear-gradient(") {
-        return parse_linear_gradient(input).map(|g| PropertyValue::Gradient(Gradient::Linear(g)));
-    }
-    if input.starts_with("radial-gradient(") {
-        return parse_radial_gradient(input).map(|g| PropertyValue::Gradient(Gradient::Radial(g)));
-    }
-    if input.starts_with("conic-gradient(") {
-        return parse_conic_gradient(input).map(|g| PropertyValue::Gradient(Gradient::Conic(g)));
-    }
+        // Token reference
+        Some(b'$') => {
+            let path = TokenPath(input[1..].split('.').collect());
+            return Ok(PropertyValue::TokenRef(path));
+        }
 
-    // Hex color
-    if let Some(hex) = input.strip_prefix('#') {
-        if let Some(color) = Color::from_hex(hex) {
-            return Ok(PropertyValue::Color(color));
+        // String literal
+        Some(b'"') => {
+            if input.ends_with('"') && input.len() >= 2 {
+                let content = &input[1..input.len()-1];
+                return Ok(PropertyValue::String(content));
+            }
         }
-    }
 
-    // Token reference
-    if let Some(token_path) = input.strip_prefix('$') {
-        let path = TokenPath(token_path.split('.').map(String::from).collect());
-        return Ok(PropertyValue::TokenRef(path));
-    }
+        // Number, with or without unit
+        Some(b'-' | b'0'..=b'9') => {
+            if let Ok((rest, (num, unit_str))) = parse_number_with_unit(input) {
+                if rest.is_empty() {
+                    return Ok(PropertyValue::Length(make_length(num, unit_str)));
+                }
+            }
+            if let Ok((rest, num)) = number(input) {
+                if rest.is_empty() || rest.chars().all(|c| c.is_whitespace()) {
+                    return Ok(PropertyValue::Number(num));
+                }
+            }
+        }
 
-    // String literal
-    if input.starts_with('"') && input.ends_with('"') && input.len() >= 2 {
-        let content = &input[1..input.len()-1];
-        return Ok(PropertyValue::String(content.to_string()));
-    }
+        // Function call, boolean or enum/identifier
+        Some(_) => {
+            if let Some(paren) = memchr::memchr(b'(', input.as_bytes()) {
+                if let Some(value) = parse_function_value(&input[..paren], input) {
+                    return value;
+                }
+            }
 
-    // Boolean
-    if input == "true" {
-        return Ok(PropertyValue::Boolean(true));
-    }
-    if input == "false" {
-        return Ok(PropertyValue::Boolean(false));
-    }
+            match input {
+                "true" => return Ok(PropertyValue::Boolean(true)),
+                "false" => return Ok(PropertyValue::Boolean(false)),
+                _ => {}
+            }
 
-    // Number with unit
-    if let Ok((rest, (num, unit_str))) = parse_number_with_unit(input) {
-        if rest.is_empty() {
-            return Ok(PropertyValue::Length(make_length(num, unit_str)));
+            if let Ok((rest, ident)) = identifier(input) {
+                if rest.is_empty() {
+                    return Ok(PropertyValue::Enum(ident));
+                }
+            }
         }
-    }
 
-    // Plain number
-    if let Ok((rest, num)) = number(input) {
-        if rest.is_empty() || rest.chars().all(|c| c.is_whitespace()) {
-            return Ok(PropertyValue::Number(num));
-        }
+        None => {}
     }
 
-    // Enum/identifier
-    if let Ok((rest, ident)) = identifier(input) {
-        if rest.is_empty() {
-            return Ok(PropertyValue::Enum(ident.to_string()));
-        }
+    // Fallback: treat as string
+    Ok(PropertyValue::String(input))
+}
+
+/// Check a property value without keeping the result.
+///
+/// Only function values (gradients, shadows, transforms) can fail to parse;
+/// every other value falls back to a string, so nothing else is decoded.
+pub(crate) fn check_property_value(input: &str) -> Result<(), ParseError> {
+    let input = input.trim();
+
+    match input.as_bytes().first() {
+        None | Some(b'#' | b'$' | b'"' | b'-' | b'0'..=b'9') => Ok(()),
+        Some(_) => match memchr::memchr(b'(', input.as_bytes()) {
+            Some(paren) => match parse_function_value(&input[..paren], input) {
+                Some(Err(e)) => Err(e),
+                _ => Ok(()),
+            },
+            None => Ok(()),
+        },
     }
+}
 
-    // Fallback: treat as string
-    Ok(PropertyValue::String(input.to_string()))
+/// Parse a function-call value like `rotate(45deg)` by its function name.
+///
+/// Returns `None` if `name` is not a known value function.
+fn parse_function_value<'a>(name: &str, input: &'a str) -> Option<Result<PropertyValue<'a>, ParseError>> {
+    let value = match name {
+        // Transform functions
+        "rotate" => parse_rotate_transform(input).map(PropertyValue::Transform),
+        "scale" => parse_scale_transform(input).map(PropertyValue::Transform),
+        "translate" => parse_translate_transform(input).map(PropertyValue::Transform),
+        "skew" => parse_skew_transform(input).map(PropertyValue::Transform),
+        "matrix" => parse_matrix_transform(input).map(PropertyValue::Transform),
+
+        // Shadow functions
+        "drop-shadow" => parse_drop_shadow(input).map(PropertyValue::Shadow),
+        "box-shadow" => parse_box_shadow(input).map(PropertyValue::Shadow),
+        "inset-shadow" => parse_inset_shadow(input).map(PropertyValue::Shadow),
+
+        // Gradient functions
+        "linear-gradient" => parse_linear_gradient(input).map(|g| PropertyValue::Gradient(Gradient::Linear(g))),
+        "radial-gradient" => parse_radial_gradient(input).map(|g| PropertyValue::Gradient(Gradient::Radial(g))),
+        "conic-gradient" => parse_conic_gradient(input).map(|g| PropertyValue::Gradient(Gradient::Conic(g))),
+
+        _ => return None,
+    };
+    Some(value)
 }
 
 /// Parse a linear gradient: linear-gradient(90deg, #ff0000, #0000ff)
@@ -956,7 +1140,7 @@ fn parse_simple_position(input: &str) -> Result<(f64, f64), ParseError> {
 }
 
 /// Parse a constraint.
-fn parse_constraint(input: &str) -> Result<Option<Constraint>, ParseError> {
+pub(crate) fn parse_constraint(input: &str) -> Result<Option<Constraint<'_>>, ParseError> {
     let input = input.trim();
     if input.is_empty() {
         return Ok(None);
@@ -984,7 +1168,7 @@ fn parse_constraint(input: &str) -> Result<Option<Constraint>, ParseError> {
 }
 
 /// Try to parse an equality constraint: "width = 100px"
-fn try_parse_equality_constraint(input: &str) -> Result<Option<Constraint>, ParseError> {
+fn try_parse_equality_constraint(input: &str) -> Result<Option<Constraint<'_>>, ParseError> {
     // Find '=' that's not part of '>=' or '<='
     let eq_pos = input.find(|c| c == '=').and_then(|pos| {
         let before = input.chars().nth(pos.saturating_sub(1));
@@ -1006,7 +1190,7 @@ fn try_parse_equality_constraint(input: &str) -> Result<Option<Constraint>, Pars
 
     Ok(Some(Constraint {
         kind: ConstraintKind::Equality {
-            property: property.to_string(),
+            property,
             value: expression,
         },
         priority: None,
@@ -1015,7 +1199,7 @@ fn try_parse_equality_constraint(input: &str) -> Result<Option<Constraint>, Pars
 }
 
 /// Try to parse an inequality constraint: "width >= 100px" or "width <= 200px"
-fn try_parse_inequality_constraint(input: &str) -> Result<Option<Constraint>, ParseError> {
+fn try_parse_inequality_constraint(input: &str) -> Result<Option<Constraint<'_>>, ParseError> {
     let (op, op_str) = if input.contains(">=") {
         (InequalityOp::GreaterThanOrEqual, ">=")
     } else if input.contains("<=") {
@@ -1040,7 +1224,7 @@ fn try_parse_inequality_constraint(input: &str) -> Result<Option<Constraint>, Pa
 
     Ok(Some(Constraint {
         kind: ConstraintKind::Inequality {
-            property: property.to_string(),
+            property,
             op,
             value: expression,
         },
@@ -1050,7 +1234,7 @@ fn try_parse_inequality_constraint(input: &str) -> Result<Option<Constraint>, Pa
 }
 
 /// Try to parse an alignment constraint: "left align Parent" or "center-x align Parent, gap: 16px"
-fn try_parse_alignment_constraint(input: &str) -> Result<Option<Constraint>, ParseError> {
+fn try_parse_alignment_constraint(input: &str) -> Result<Option<Constraint<'_>>, ParseError> {
     if !input.contains(" align ") {
         return Ok(None);
     }
@@ -1102,7 +1286,7 @@ fn try_parse_alignment_constraint(input: &str) -> Result<Option<Constraint>, Par
 }
 
 /// Try to parse a relative constraint: "below Header" or "below Header, gap: 16px"
-fn try_parse_relative_constraint(input: &str) -> Result<Option<Constraint>, ParseError> {
+fn try_parse_relative_constraint(input: &str) -> Result<Option<Constraint<'_>>, ParseError> {
     let relation = if input.starts_with("below ") {
         Some((Relation::Below, "below "))
     } else if input.starts_with("above ") {
@@ -1164,12 +1348,12 @@ fn parse_edge(s: &str) -> Option<Edge> {
 }
 
 /// Parse an element reference.
-fn parse_element_ref(s: &str) -> Result<ElementRef, ParseError> {
+fn parse_element_ref(s: &str) -> Result<ElementRef<'_>, ParseError> {
     match s {
         "Parent" => Ok(ElementRef::Parent),
         "Previous" => Ok(ElementRef::Previous),
         "Next" => Ok(ElementRef::Next),
-        _ => Ok(ElementRef::Named(Identifier(s.to_string()))),
+        _ => Ok(ElementRef::Named(s)),
     }
 }
 
@@ -1184,7 +1368,7 @@ fn parse_gap_value(s: &str) -> Result<Option<Length>, ParseError> {
 }
 
 /// Parse an expression.
-fn parse_expression(input: &str) -> Result<Expression, ParseError> {
+fn parse_expression(input: &str) -> Result<Expression<'_>, ParseError> {
     let input = input.trim();
 
     // Function call: min(...) or max(...)
@@ -1207,7 +1391,7 @@ fn parse_expression(input: &str) -> Result<Expression, ParseError> {
 
     // Token reference
     if let Some(token_path) = input.strip_prefix('$') {
-        let path = TokenPath(token_path.split('.').map(String::from).collect());
+        let path = TokenPath(token_path.split('.').collect());
         return Ok(Expression::TokenRef(path));
     }
 
@@ -1230,7 +1414,7 @@ fn parse_expression(input: &str) -> Result<Expression, ParseError> {
 }
 
 /// Try to parse a binary expression (handles + and -).
-fn try_parse_binary_expression(input: &str) -> Result<Option<Expression>, ParseError> {
+fn try_parse_binary_expression(input: &str) -> Result<Option<Expression<'_>>, ParseError> {
     let mut paren_depth = 0;
     let mut last_op_pos = None;
     let mut last_op = None;
@@ -1269,7 +1453,7 @@ fn try_parse_binary_expression(input: &str) -> Result<Option<Expression>, ParseE
 }
 
 /// Parse a function expression like min(a, b) or max(a, b).
-fn parse_function_expression(input: &str) -> Result<Expression, ParseError> {
+fn parse_function_expression(input: &str) -> Result<Expression<'_>, ParseError> {
     let paren_start = input.find('(').ok_or(ParseError::UnexpectedEof)?;
     let paren_end = input.rfind(')').ok_or(ParseError::UnexpectedEof)?;
 
@@ -1285,13 +1469,13 @@ fn parse_function_expression(input: &str) -> Result<Expression, ParseError> {
     }
 
     Ok(Expression::Function {
-        name: name.to_string(),
+        name,
         args: parsed_args,
     })
 }
 
 /// Try to parse a property reference like Parent.width.
-fn try_parse_property_ref(input: &str) -> Result<Option<Expression>, ParseError> {
+fn try_parse_property_ref(input: &str) -> Result<Option<Expression<'_>>, ParseError> {
     let Some(dot_pos) = input.find('.') else {
         return Ok(None);
     };
@@ -1307,7 +1491,7 @@ fn try_parse_property_ref(input: &str) -> Result<Option<Expression>, ParseError>
 
     Ok(Some(Expression::PropertyRef {
         element,
-        property: property.to_string(),
+        property,
     }))
 }
 
@@ -1360,6 +1544,25 @@ fn make_length(value: f64, unit_str: &str) -> Length {
 #[cfg(test)]
 mod tests {
     use super::*;
+    use seed_core::ast::{
+        BinaryOp, ConstraintKind, Edge, Element, ElementRef, Expression, InequalityOp,
+        PropertyValue, Relation, TextContent,
+    };
+
+    #[test]
+    fn test_scratch_is_reused_across_documents() {
+        let mut scratch = Scratch::default();
+        let source = "Frame A:\n  width: 1px\n  height: 2px\n  Text B:\n    content: \"b\"\n";
+
+        let doc = parse_with_scratch(source, &mut scratch).unwrap();
+        assert_eq!(doc, parse(source).unwrap());
+        let capacity = scratch.properties.capacity();
+        assert!(capacity >= 2);
+
+        parse_with_scratch("Frame C:\n  fill: #FFFFFF\n", &mut scratch).unwrap();
+        assert_eq!(scratch.properties.capacity(), capacity);
+        assert!(scratch.properties.is_empty());
+    }
 
     #[test]
     fn test_parse_simple_frame() {
@@ -1512,9 +1715,78 @@ mod tests {
         }
     }
 
+    #[test]
+    fn test_parse_element_spans() {
+        let input = "Frame A:\n  fill: #FFFFFF\n\nFrame B:\n  Text C:\n    content: \"x\"\n";
+        let doc = parse(input).unwrap();
+
+        if let (Element::Frame(a), Element::Frame(b)) = (&doc.elements[0], &doc.elements[1]) {
+            assert_eq!(&input[a.span.start..a.span.end], "Frame A:\n  fill: #FFFFFF");
+            assert_eq!((b.span.line, b.span.column), (4, 1));
+
+            if let Element::Text(c) = &b.children[0] {
+                assert_eq!(&input[c.span.start..c.span.end], "  Text C:\n    content: \"x\"");
+                assert_eq!((c.span.line, c.span.column), (5, 3));
+            } else {
+                panic!("Expected Text element");
+            }
+        } else {
+            panic!("Expected Frame elements");
+        }
+    }
+
+    #[test]
+    fn test_parse_unknown_top_level_line() {
+        let source = "Frame A:\n  fill: #FFFFFF\nFram Header:\n  fill: #000000\n";
+        match parse(source) {
+            Err(ParseError::UnknownElementType { name, span }) => {
+                assert_eq!(name, "Fram");
+                assert_eq!((span.line, span.column), (3, 1));
+                assert_eq!(&source[span.start..span.end], "Fram Header:");
+            }
+            other => panic!("Expected UnknownElementType, got {:?}", other),
+        }
+
+        assert!(matches!(parse("  fill: #FFFFFF\n"), Err(ParseError::UnknownElementType { .. })));
+    }
+
+    #[test]
+    fn test_parse_borrowed_points_into_source() {
+        let input = r#"Frame Card:
+  fill: $colors.surface
+  Text Title:
+    content: "Hello"
+"#;
+        let doc = parse_borrowed(input).unwrap();
+        let range = input.as_bytes().as_ptr_range();
+
+        if let super::Element::Frame(card) = &doc.elements[0] {
+            let name = card.name.unwrap();
+            assert_eq!(name, "Card");
+            assert!(range.contains(&name.as_ptr()));
+
+            if let super::PropertyValue::TokenRef(path) = &card.properties[0].value {
+                assert_eq!(path.0.as_slice(), &["colors", "surface"]);
+                assert!(range.contains(&path.0[1].as_ptr()));
+            } else {
+                panic!("Expected token reference");
+            }
+
+            if let super::Element::Text(title) = &card.children[0] {
+                assert_eq!(title.content, super::TextContent::Literal("Hello"));
+            } else {
+                panic!("Expected Text element");
+            }
+        } else {
+            panic!("Expected Frame element");
+        }
+
+        assert_eq!(doc.into_owned(), parse(input).unwrap());
+    }
+
     #[test]
     fn test_parse_expression_with_operator() {
-        let expr = parse_expression("Parent.width - 48px").unwrap();
+        let expr = parse_expression("Parent.width - 48px").unwrap().into_owned();
         if let Expression::BinaryOp { op, .. } = expr {
             assert_eq!(op, BinaryOp::Sub);
         } else {
@@ -1524,7 +1796,7 @@ mod tests {
 
     #[test]
     fn test_parse_min_function() {
-        let expr = parse_expression("min(320px, Parent.width)").unwrap();
+        let expr = parse_expression("min(320px, Parent.width)").unwrap().into_owned();
         if let Expression::Function { name, args } = expr {
             assert_eq!(name, "min");
             assert_eq!(args.len(), 2);
@@ -1795,4 +2067,33 @@ mod tests {
             panic!("Expected Frame element");
         }
     }
+
+    #[test]
+    fn test_parse_value_fallbacks() {
+        use seed_core::types::LengthUnit;
+
+        let input = r#"Frame:
+  a: -4px
+  b: 1.5
+  c: #GGG
+  d: calc(1px)
+  e: "open
+  f: true
+  g: row
+"#;
+        let doc = parse(input).unwrap();
+
+        if let Element::Frame(frame) = &doc.elements[0] {
+            let values: Vec<_> = frame.properties.iter().map(|p| &p.value).collect();
+            assert!(matches!(values[0], PropertyValue::Length(l) if l.value == -4.0 && l.unit == LengthUnit::Px));
+            assert_eq!(values[1], &PropertyValue::Number(1.5));
+            assert_eq!(values[2], &PropertyValue::String("#GGG".to_string()));
+            assert_eq!(values[3], &PropertyValue::String("calc(1px)".to_string()));
+            assert_eq!(values[4], &PropertyValue::String("\"open".to_string()));
+            assert_eq!(values[5], &PropertyValue::Boolean(true));
+            assert_eq!(values[6], &PropertyValue::Enum("row".to_string()));
+        } else {
+            panic!("Expected Frame element");
+        }
+    }
 }
@@ -0,0 +1,281 @@
+//! Incremental reparsing for live editing.
+//!
+//! Top-level elements (indent 0) are independent of each other, so an edit
+//! only needs the top-level blocks it touches to be reparsed. The new
+//! elements are spliced into the previous document and the spans of the
+//! elements after the edit are shifted.
+
+use std::ops::Range;
+
+use seed_core::{Document, Element, ParseError, Span};
+
+use crate::grammar::parse;
+
+/// A text edit: replace `range` (byte offsets into the old source) with `replacement`.
+#[derive(Debug, Clone, PartialEq, Eq)]
+pub struct TextEdit {
+    pub range: Range<usize>,
+    pub replacement: String,
+}
+
+impl TextEdit {
+    pub fn new(range: Range<usize>, replacement: impl Into<String>) -> Self {
+        Self {
+            range,
+            replacement: replacement.into(),
+        }
+    }
+
+    /// Apply the edit to `source`, returning the new text.
+    pub fn apply(&self, source: &str) -> String {
+        let mut result = String::with_capacity(
+            source.len() - self.range.len() + self.replacement.len(),
+        );
+        result.push_str(&source[..self.range.start]);
+        result.push_str(&self.replacement);
+        result.push_str(&source[self.range.end..]);
+        result
+    }
+}
+
+/// Reparse `document` after applying `edit` to `old_source`.
+///
+/// `document` must be the result of parsing `old_source`. Only the top-level
+/// blocks overlapping the edit are reparsed, so the cost is proportional to
+/// the edited block rather than the whole file. On success the affected
+/// elements are replaced in place and the index range of the new elements in
+/// `document.elements` is returned. On error `document` is left unchanged.
+///
+/// # Panics
+///
+/// Panics if the edit range is out of bounds or does not lie on `char`
+/// boundaries of `old_source`.
+pub fn reparse(
+    document: &mut Document,
+    old_source: &str,
+    edit: &TextEdit,
+) -> Result<Range<usize>, ParseError> {
+    let Range { start, end } = edit.range.clone();
+    assert!(start <= end && end <= old_source.len(), "edit range out of bounds");
+    assert!(
+        old_source.is_char_boundary(start) && old_source.is_char_boundary(end),
+        "edit range is not on a char boundary"
+    );
+
+    let elements = &document.elements;
+
+    // The block containing the edit is the last one starting at or before it;
+    // indented lines typed after a block belong to that block. An edit at the
+    // very start of a block can remove or indent its header, which moves the
+    // block's lines into the one before, so that block is reparsed too.
+    let mut first = elements.partition_point(|e| element_span(e).start <= start);
+    if first > 0 && element_span(&elements[first - 1]).start == start {
+        first -= 1;
+    }
+    let lo = first.saturating_sub(1);
+    // Blocks starting at or before the end of the edit may have their header changed.
+    let hi = elements.partition_point(|e| element_span(e).start <= end).max(lo);
+
+    let (region_start, base_line) = match elements.get(lo) {
+        Some(element) if first > 0 => (element_span(element).start, element_span(element).line),
+        _ => (0, 1),
+    };
+    let region_end = elements.get(hi).map_or(old_source.len(), |e| element_span(e).start);
+
+    let mut region = String::with_capacity(
+        region_end - region_start - (end - start) + edit.replacement.len(),
+    );
+    region.push_str(&old_source[region_start..start]);
+    region.push_str(&edit.replacement);
+    region.push_str(&old_source[end..region_end]);
+
+    let base_lines = base_line as i64 - 1;
+    let mut reparsed = parse(&region)
+        .map_err(|e| shift_error(e, region_start as isize, base_lines))?
+        .elements;
+    for element in &mut reparsed {
+        shift_element(element, region_start as isize, base_lines);
+    }
+
+    let byte_delta = edit.replacement.len() as isize - (end - start) as isize;
+    let line_delta = count_newlines(&edit.replacement) as i64
+        - count_newlines(&old_source[start..end]) as i64;
+    if byte_delta != 0 || line_delta != 0 {
+        for element in &mut document.elements[hi..] {
+            shift_element(element, byte_delta, line_delta);
+        }
+    }
+
+    let count = reparsed.len();
+    document.elements.splice(lo..hi, reparsed);
+    Ok(lo..lo + count)
+}
+
+fn count_newlines(s: &str) -> usize {
+    s.bytes().filter(|&b| b == b'\n').count()
+}
+
+fn element_span(element: &Element) -> &Span {
+    match element {
+        Element::Frame(f) => &f.span,
+        Element::Text(t) => &t.span,
+        Element::Part(p) => &p.span,
+        Element::Component(c) => &c.span,
+        Element::Slot(s) => &s.span,
+    }
+}
+
+/// Shift the spans of an element subtree by a byte and line delta.
+pub(crate) fn shift_element(element: &mut Element, bytes: isize, lines: i64) {
+    match element {
+        Element::Frame(f) => {
+            shift_span(&mut f.span, bytes, lines);
+            for child in &mut f.children {
+                shift_element(child, bytes, lines);
+            }
+        }
+        Element::Text(t) => shift_span(&mut t.span, bytes, lines),
+        Element::Part(p) => shift_span(&mut p.span, bytes, lines),
+        Element::Component(c) => {
+            shift_span(&mut c.span, bytes, lines);
+            for child in &mut c.children {
+                shift_element(child, bytes, lines);
+            }
+        }
+        Element::Slot(s) => {
+            shift_span(&mut s.span, bytes, lines);
+            for child in &mut s.fallback {
+                shift_element(child, bytes, lines);
+            }
+        }
+    }
+}
+
+/// Shift the location of an error from parsing a fragment back to the whole input.
+///
+/// Locations that were never filled in (line 0 / default span) are left as is.
+pub(crate) fn shift_error(mut error: ParseError, bytes: isize, lines: i64) -> ParseError {
+    match &mut error {
+        ParseError::UnexpectedToken { line, .. }
+        | ParseError::InvalidIndentation { line, .. }
+        | ParseError::UnterminatedString { line } => {
+            if *line != 0 {
+                *line = (*line as i64 + lines) as u32;
+            }
+        }
+        ParseError::InvalidNumber { span, .. }
+        | ParseError::InvalidColor { span, .. }
+        | ParseError::UnknownElementType { span, .. } => {
+            if *span != Span::default() {
+                shift_span(span, bytes, lines);
+            }
+        }
+        ParseError::UnexpectedEof | ParseError::Io(_) => {}
+    }
+    error
+}
+
+fn shift_span(span: &mut Span, bytes: isize, lines: i64) {
+    span.start = (span.start as isize + bytes) as usize;
+    span.end = (span.end as isize + bytes) as usize;
+    span.line = (span.line as i64 + lines) as u32;
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    const SOURCE: &str = r#"Frame Header:
+  fill: #FFFFFF
+  constraints:
+    - height = 48px
+
+// Main content
+Frame Content:
+  fill: #F3F4F6
+  Text Body:
+    content: "Hello"
+
+Frame Footer:
+  fill: #000000
+"#;
+
+    /// Reparse with `edit` and check the result matches a full parse of the new text.
+    fn check_edit(edit: TextEdit) -> Range<usize> {
+        let mut doc = parse(SOURCE).unwrap();
+        let replaced = reparse(&mut doc, SOURCE, &edit).unwrap();
+        let expected = parse(&edit.apply(SOURCE)).unwrap();
+        assert_eq!(doc, expected);
+        replaced
+    }
+
+    fn offset_of(needle: &str) -> usize {
+        SOURCE.find(needle).unwrap()
+    }
+
+    #[test]
+    fn test_edit_property_in_middle_block() {
+        let start = offset_of("#F3F4F6");
+        let replaced = check_edit(TextEdit::new(start..start + 7, "#111827"));
+        assert_eq!(replaced, 1..2);
+    }
+
+    #[test]
+    fn test_edit_adds_lines() {
+        let start = offset_of("  Text Body:");
+        let replaced = check_edit(TextEdit::new(start..start, "  cornerRadius: 8px\n  padding: 4px\n"));
+        assert_eq!(replaced, 1..2);
+    }
+
+    #[test]
+    fn test_edit_inserts_new_block() {
+        let start = offset_of("Frame Footer:");
+        check_edit(TextEdit::new(start..start, "Frame Sidebar:\n  fill: #EEEEEE\n\n"));
+    }
+
+    #[test]
+    fn test_edit_removes_block() {
+        let range = offset_of("Frame Content:")..offset_of("Frame Footer:");
+        check_edit(TextEdit::new(range, ""));
+    }
+
+    #[test]
+    fn test_edit_spanning_blocks() {
+        let range = offset_of("48px")..offset_of("Hello");
+        check_edit(TextEdit::new(range, "16px\n\nText Note:\n  content: \""));
+    }
+
+    #[test]
+    fn test_edit_at_end_of_source() {
+        let end = SOURCE.len();
+        check_edit(TextEdit::new(end..end, "  opacity: 0.5\n"));
+    }
+
+    #[test]
+    fn test_edit_removes_header() {
+        let start = offset_of("Frame Footer:");
+        let replaced = check_edit(TextEdit::new(start..start + "Frame Footer:\n".len(), ""));
+        assert_eq!(replaced, 1..2);
+    }
+
+    #[test]
+    fn test_edit_inserts_lines_before_header() {
+        let start = offset_of("Frame Footer:");
+        check_edit(TextEdit::new(start..start, "  opacity: 0.5\n"));
+    }
+
+    #[test]
+    fn test_edit_before_first_block() {
+        check_edit(TextEdit::new(0..0, "// Layout\n\n"));
+    }
+
+    #[test]
+    fn test_failed_reparse_leaves_document_unchanged() {
+        let mut doc = parse(SOURCE).unwrap();
+        let start = offset_of("#F3F4F6");
+        let edit = TextEdit::new(start..start + 7, "linear-gradient()");
+
+        assert!(reparse(&mut doc, SOURCE, &edit).is_err());
+        assert_eq!(doc, parse(SOURCE).unwrap());
+    }
+}
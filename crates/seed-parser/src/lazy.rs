@@ -0,0 +1,307 @@
+//! Lazy property value decoding.
+//!
+//! [`parse_lazy`] builds the element tree but keeps every property value as
+//! its raw source text. A value is decoded the first time it is read and the
+//! result is memoized, so documents whose consumers only look at a few
+//! properties per element skip decoding gradients, shadows and transforms
+//! they never use.
+//!
+//! Decoding errors surface when a value is read. Set
+//! [`LazyOptions::validate`] to decode everything up front and report the
+//! first error from [`parse_lazy`] instead, like [`parse`](crate::parse).
+
+use std::cell::OnceCell;
+
+use seed_core::borrowed::{self, Constraint, PropertyValue, Span, TextContent};
+use seed_core::{ParseError, PropertyName};
+
+use crate::grammar::{
+    parse_constraint, parse_property_value, text_content, walk, Body, ElementKind, Header, Scratch, Sink,
+};
+
+/// Options for [`parse_lazy`].
+#[derive(Debug, Clone, Copy, Default)]
+pub struct LazyOptions {
+    /// Decode every value while parsing and fail on the first invalid one.
+    pub validate: bool,
+}
+
+/// Parse a Seed document, deferring property value decoding until first use.
+pub fn parse_lazy<'src>(input: &'src str, options: &LazyOptions) -> Result<LazyDocument<'src>, ParseError> {
+    let mut sink = LazySink { validate: options.validate };
+    let elements = walk(input, &mut sink, &mut Scratch::default())?.collect();
+    Ok(LazyDocument { elements, span: Span::default() })
+}
+
+/// A property value that is decoded from its source text on first access.
+#[derive(Debug)]
+pub struct LazyValue<'src> {
+    raw: &'src str,
+    decoded: OnceCell<Result<PropertyValue<'src>, ParseError>>,
+}
+
+impl<'src> LazyValue<'src> {
+    /// A value that will be decoded from `raw` when first read.
+    pub fn new(raw: &'src str) -> Self {
+        Self { raw, decoded: OnceCell::new() }
+    }
+
+    /// The value text as written in the source.
+    pub fn raw(&self) -> &'src str {
+        self.raw
+    }
+
+    /// Whether the value has been decoded yet.
+    pub fn is_decoded(&self) -> bool {
+        self.decoded.get().is_some()
+    }
+
+    /// Decode the value, or return the memoized result.
+    pub fn get(&self) -> Result<&PropertyValue<'src>, &ParseError> {
+        self.decoded.get_or_init(|| parse_property_value(self.raw)).as_ref()
+    }
+
+    /// Take the decoded value, decoding it if it was never read.
+    pub fn into_value(self) -> Result<PropertyValue<'src>, ParseError> {
+        match self.decoded.into_inner() {
+            Some(result) => result,
+            None => parse_property_value(self.raw),
+        }
+    }
+}
+
+/// A property whose value is decoded lazily.
+#[derive(Debug)]
+pub struct LazyProperty<'src> {
+    pub name: PropertyName,
+    pub value: LazyValue<'src>,
+    pub span: Span,
+}
+
+/// A document whose property values are decoded lazily.
+#[derive(Debug)]
+pub struct LazyDocument<'src> {
+    pub elements: Vec<LazyElement<'src>>,
+    pub span: Span,
+}
+
+impl<'src> LazyDocument<'src> {
+    /// Decode every remaining value into a borrowed document.
+    pub fn into_borrowed(self) -> Result<borrowed::Document<'src>, ParseError> {
+        Ok(borrowed::Document {
+            meta: None,
+            tokens: None,
+            elements: into_borrowed_elements(self.elements)?,
+            span: self.span,
+        })
+    }
+
+    /// Decode every remaining value into an owned document.
+    pub fn into_owned(self) -> Result<seed_core::Document, ParseError> {
+        self.into_borrowed().map(borrowed::Document::into_owned)
+    }
+}
+
+/// An element with lazily decoded properties.
+///
+/// Only the element kinds produced by the parser are represented.
+#[derive(Debug)]
+pub enum LazyElement<'src> {
+    Frame(LazyFrame<'src>),
+    Text(LazyText<'src>),
+}
+
+impl<'src> LazyElement<'src> {
+    /// The element's properties.
+    pub fn properties(&self) -> &[LazyProperty<'src>] {
+        match self {
+            LazyElement::Frame(f) => &f.properties,
+            LazyElement::Text(t) => &t.properties,
+        }
+    }
+
+    /// The value of the first property called `name`.
+    pub fn property(&self, name: PropertyName) -> Option<&LazyValue<'src>> {
+        self.properties().iter().find(|p| p.name == name).map(|p| &p.value)
+    }
+
+    fn into_borrowed(self) -> Result<borrowed::Element<'src>, ParseError> {
+        Ok(match self {
+            LazyElement::Frame(f) => borrowed::Element::Frame(borrowed::FrameElement {
+                name: f.name,
+                properties: into_borrowed_properties(f.properties)?,
+                constraints: f.constraints,
+                children: into_borrowed_elements(f.children)?,
+                span: f.span,
+            }),
+            LazyElement::Text(t) => {
+                let properties = into_borrowed_properties(t.properties)?;
+                borrowed::Element::Text(borrowed::TextElement {
+                    name: t.name,
+                    content: text_content(&properties),
+                    properties,
+                    constraints: t.constraints,
+                    span: t.span,
+                })
+            }
+        })
+    }
+}
+
+/// A Frame element with lazily decoded properties.
+#[derive(Debug)]
+pub struct LazyFrame<'src> {
+    pub name: Option<&'src str>,
+    pub properties: Vec<LazyProperty<'src>>,
+    pub constraints: Vec<Constraint<'src>>,
+    pub children: Vec<LazyElement<'src>>,
+    pub span: Span,
+}
+
+/// A Text element with lazily decoded properties.
+#[derive(Debug)]
+pub struct LazyText<'src> {
+    pub name: Option<&'src str>,
+    pub properties: Vec<LazyProperty<'src>>,
+    pub constraints: Vec<Constraint<'src>>,
+    pub span: Span,
+}
+
+impl<'src> LazyText<'src> {
+    /// The text content, decoding the `content` property if needed.
+    pub fn content(&self) -> TextContent<'src> {
+        let value = self.properties.iter()
+            .find(|p| p.name == PropertyName::Content)
+            .and_then(|p| p.value.get().ok());
+        match value {
+            Some(PropertyValue::String(s)) => TextContent::Literal(s),
+            Some(PropertyValue::TokenRef(path)) => TextContent::TokenRef(path.clone()),
+            _ => TextContent::Literal(""),
+        }
+    }
+}
+
+fn into_borrowed_elements(elements: Vec<LazyElement<'_>>) -> Result<Vec<borrowed::Element<'_>>, ParseError> {
+    elements.into_iter().map(LazyElement::into_borrowed).collect()
+}
+
+fn into_borrowed_properties(properties: Vec<LazyProperty<'_>>) -> Result<Vec<borrowed::Property<'_>>, ParseError> {
+    properties.into_iter()
+        .map(|p| Ok(borrowed::Property {
+            name: p.name.as_str(),
+            value: p.value.into_value()?,
+            span: p.span,
+        }))
+        .collect()
+}
+
+/// Builds lazy elements, keeping each property value as raw text.
+struct LazySink {
+    validate: bool,
+}
+
+impl<'src> Sink<'src> for LazySink {
+    type Property = LazyProperty<'src>;
+    type Constraint = Constraint<'src>;
+    type Element = LazyElement<'src>;
+
+    fn property(&mut self, name: &'src str, raw: &'src str) -> Result<LazyProperty<'src>, ParseError> {
+        let value = LazyValue::new(raw);
+        if self.validate {
+            let decoded = parse_property_value(raw)?;
+            let _ = value.decoded.set(Ok(decoded));
+        }
+
+        Ok(LazyProperty {
+            name: PropertyName::new(name),
+            value,
+            span: Span::default(),
+        })
+    }
+
+    fn constraint(&mut self, text: &'src str) -> Result<Option<Constraint<'src>>, ParseError> {
+        parse_constraint(text)
+    }
+
+    fn element(
+        &mut self,
+        header: Header<'src>,
+        body: Body<'_, LazyProperty<'src>, Constraint<'src>, LazyElement<'src>>,
+    ) -> LazyElement<'src> {
+        match header.kind {
+            ElementKind::Frame => LazyElement::Frame(LazyFrame {
+                name: header.name,
+                properties: body.properties.collect(),
+                constraints: body.constraints.collect(),
+                children: body.children.collect(),
+                span: header.span,
+            }),
+            ElementKind::Text => LazyElement::Text(LazyText {
+                name: header.name,
+                properties: body.properties.collect(),
+                constraints: body.constraints.collect(),
+                span: header.span,
+            }),
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::grammar::parse;
+
+    const SOURCE: &str = r#"Frame Card:
+  fill: linear-gradient(90deg, #FFFFFF, #000000)
+  shadow: drop-shadow(0px 2px 4px #00000040)
+  width: 320px
+  constraints:
+    - height = 200px
+  Text Title:
+    content: "Hello"
+    transform: matrix(1, 0, 0, 1, 10, 20)
+"#;
+
+    #[test]
+    fn test_values_decode_on_first_access() {
+        let doc = parse_lazy(SOURCE, &LazyOptions::default()).unwrap();
+        let card = &doc.elements[0];
+
+        let fill = card.property(PropertyName::Fill).unwrap();
+        assert!(!fill.is_decoded());
+        assert_eq!(fill.raw(), "linear-gradient(90deg, #FFFFFF, #000000)");
+
+        let width = card.property(PropertyName::Width).unwrap();
+        assert_eq!(width.get().unwrap(), &PropertyValue::Length(seed_core::Length::px(320.0)));
+        assert!(width.is_decoded());
+        assert!(!fill.is_decoded());
+    }
+
+    #[test]
+    fn test_lazy_document_matches_parse() {
+        let doc = parse_lazy(SOURCE, &LazyOptions::default()).unwrap();
+        let LazyElement::Frame(card) = &doc.elements[0] else { panic!("expected frame") };
+        let LazyElement::Text(title) = &card.children[0] else { panic!("expected text") };
+        assert_eq!(title.content(), TextContent::Literal("Hello"));
+
+        assert_eq!(doc.into_owned().unwrap(), parse(SOURCE).unwrap());
+    }
+
+    #[test]
+    fn test_invalid_value_errors_on_access_or_validate() {
+        let source = "Frame Card:\n  fill: linear-gradient()\n  width: 10px\n";
+
+        let doc = parse_lazy(source, &LazyOptions::default()).unwrap();
+        assert!(doc.elements[0].property(PropertyName::Width).unwrap().get().is_ok());
+        assert!(doc.elements[0].property(PropertyName::Fill).unwrap().get().is_err());
+        assert!(doc.into_borrowed().is_err());
+
+        let validated = parse_lazy(source, &LazyOptions { validate: true });
+        assert_eq!(
+            validated.unwrap_err().to_string(),
+            parse(source).unwrap_err().to_string(),
+        );
+        let valid = parse_lazy(SOURCE, &LazyOptions { validate: true }).unwrap();
+        assert!(valid.elements[0].properties().iter().all(|p| p.value.is_decoded()));
+    }
+}
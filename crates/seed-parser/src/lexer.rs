@@ -44,36 +44,152 @@ pub fn unit(input: &str) -> IResult<&str, &str> {
     ))(input)
 }
 
-/// Count leading spaces for indentation.
-pub fn count_indent(line: &str) -> usize {
-    line.chars().take_while(|&c| c == ' ').count()
-}
-
 /// A line of input with its indentation level.
 #[derive(Debug, Clone)]
 pub struct Line<'a> {
     pub indent: usize,
     pub content: &'a str,
     pub line_number: usize,
+    /// Byte offset of the start of the line in the input.
+    pub offset: usize,
+    /// Byte offset just past the trimmed content.
+    pub end: usize,
+}
+
+/// Lazy cursor over the non-blank, non-comment lines of the input.
+///
+/// Newlines are located with `memchr`, which scans many bytes at a time, and
+/// lines are produced on demand so the parser never materializes the whole
+/// line list.
+#[derive(Debug, Clone)]
+pub struct LineCursor<'a> {
+    input: &'a str,
+    /// Byte offset of the next unread line.
+    pos: usize,
+    /// Number of the next unread line.
+    line_number: usize,
+}
+
+impl<'a> LineCursor<'a> {
+    pub fn new(input: &'a str) -> Self {
+        Self {
+            input,
+            pos: 0,
+            line_number: 1,
+        }
+    }
 }
 
-/// Split input into lines with indentation info.
-pub fn split_lines(input: &str) -> Vec<Line<'_>> {
-    input
-        .lines()
-        .enumerate()
-        .filter_map(|(i, line)| {
-            let trimmed = line.trim();
+impl<'a> Iterator for LineCursor<'a> {
+    type Item = Line<'a>;
+
+    fn next(&mut self) -> Option<Line<'a>> {
+        let bytes = self.input.as_bytes();
+
+        while self.pos < bytes.len() {
+            let offset = self.pos;
+            let line_number = self.line_number;
+            let newline = memchr::memchr(b'\n', &bytes[offset..]).map_or(bytes.len(), |i| offset + i);
+            self.pos = newline + 1;
+            self.line_number += 1;
+
+            let indent = bytes[offset..newline].iter().take_while(|&&b| b == b' ').count();
+            let raw = &self.input[offset + indent..newline];
+            let trimmed = raw.trim();
             // Skip empty lines and comment-only lines
             if trimmed.is_empty() || trimmed.starts_with("//") {
-                None
-            } else {
-                Some(Line {
-                    indent: count_indent(line),
-                    content: trimmed,
-                    line_number: i + 1,
-                })
+                continue;
             }
-        })
-        .collect()
+
+            let start = offset + indent + (trimmed.as_ptr() as usize - raw.as_ptr() as usize);
+            return Some(Line {
+                indent,
+                content: trimmed,
+                line_number,
+                offset,
+                end: start + trimmed.len(),
+            });
+        }
+
+        None
+    }
+}
+
+/// Whether a raw line starts a top-level (indent 0) block.
+pub fn is_top_level(line: &str) -> bool {
+    if line.starts_with(' ') {
+        return false;
+    }
+    let trimmed = line.trim_start();
+    !trimmed.is_empty() && !trimmed.starts_with("//")
+}
+
+/// A top-level block of source text.
+#[derive(Debug, Clone)]
+pub struct Block<'a> {
+    pub text: &'a str,
+    /// Byte offset of the block in the input.
+    pub offset: usize,
+    /// Line number of the first line of the block.
+    pub line_number: usize,
+}
+
+/// Split input into top-level blocks without parsing them.
+///
+/// Each block starts at a line with indent 0 and runs until the next such
+/// line. Comments and blank lines before the first block are attached to it.
+pub fn split_blocks(input: &str) -> Vec<Block<'_>> {
+    let mut blocks = Vec::new();
+    let mut start = 0;
+    let mut start_line = 1;
+    let mut has_header = false;
+    let mut offset = 0;
+
+    let mut line_number = 1;
+
+    while offset < input.len() {
+        let next = memchr::memchr(b'\n', &input.as_bytes()[offset..])
+            .map_or(input.len(), |i| offset + i + 1);
+        if is_top_level(&input[offset..next]) {
+            if has_header {
+                blocks.push(Block {
+                    text: &input[start..offset],
+                    offset: start,
+                    line_number: start_line,
+                });
+                start = offset;
+                start_line = line_number;
+            }
+            has_header = true;
+        }
+        offset = next;
+        line_number += 1;
+    }
+
+    if start < input.len() {
+        blocks.push(Block {
+            text: &input[start..],
+            offset: start,
+            line_number: start_line,
+        });
+    }
+
+    blocks
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_line_cursor() {
+        let input = "Frame A:\r\n\n  // note\n    fill: #FFF  \nText B:";
+        let lines: Vec<_> = LineCursor::new(input).collect();
+
+        assert_eq!(lines.len(), 3);
+        assert_eq!((lines[0].content, lines[0].line_number), ("Frame A:", 1));
+        assert_eq!((lines[1].indent, lines[1].content, lines[1].line_number), (4, "fill: #FFF", 4));
+        assert_eq!(&input[lines[1].offset..lines[1].end], "    fill: #FFF");
+        assert_eq!((lines[2].offset, lines[2].line_number), (input.len() - 7, 5));
+    }
 }
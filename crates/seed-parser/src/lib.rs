@@ -5,8 +5,28 @@
 
 mod lexer;
 mod grammar;
+mod arena;
+mod lazy;
+mod validate;
+mod incremental;
+mod parallel;
+mod stream;
+mod cache;
+mod batch;
 
-pub use grammar::parse;
+pub use grammar::{parse, parse_borrowed};
+pub use arena::parse_arena;
+pub use lazy::{parse_lazy, LazyDocument, LazyElement, LazyFrame, LazyOptions, LazyProperty, LazyText, LazyValue};
+pub use incremental::{reparse, TextEdit};
+pub use parallel::parse_parallel;
+pub use validate::validate;
+pub use stream::{stream_elements, ElementStream};
+pub use cache::{CacheStats, ParseCache, DEFAULT_CACHE_SIZE};
+pub use batch::{parse_many, parse_many_with_stats, BatchStats};
+
+// Line scanning on its own, for the benchmarks.
+#[doc(hidden)]
+pub use lexer::{Line, LineCursor};
 
 use seed_core::{Document, ParseError};
 
@@ -30,3 +50,13 @@ use seed_core::{Document, ParseError};
 pub fn parse_document(source: &str) -> Result<Document, ParseError> {
     parse(source)
 }
+
+/// Parse a Seed document without copying any strings out of `source`.
+///
+/// Identifiers, property names, string literals and token path segments in
+/// the returned AST are slices of `source`. Call
+/// [`into_owned`](seed_core::borrowed::Document::into_owned) when the
+/// document needs to outlive the source buffer.
+pub fn parse_document_borrowed(source: &str) -> Result<seed_core::borrowed::Document<'_>, ParseError> {
+    parse_borrowed(source)
+}
@@ -0,0 +1,89 @@
+//! Parallel parsing of independent top-level blocks.
+//!
+//! Top-level blocks (indent 0) never share state, so the source is
+//! pre-scanned for block boundaries and each block is parsed on its own.
+//! With the `parallel` feature the blocks are parsed on the rayon thread
+//! pool; without it they are parsed sequentially.
+
+#[cfg(feature = "parallel")]
+use rayon::prelude::*;
+
+use seed_core::{Document, Element, ParseError, Span};
+
+use crate::grammar::parse;
+use crate::incremental::{shift_element, shift_error};
+use crate::lexer::{split_blocks, Block};
+
+/// Parse a document by parsing its top-level blocks in parallel.
+///
+/// Produces the same document as [`parse`](crate::parse), with spans relative
+/// to the whole input. Results are merged in source order; if several blocks
+/// fail, the error from the earliest one is returned.
+pub fn parse_parallel(input: &str) -> Result<Document, ParseError> {
+    let blocks = split_blocks(input);
+
+    #[cfg(feature = "parallel")]
+    let parsed: Vec<_> = blocks.par_iter().map(parse_block).collect();
+    #[cfg(not(feature = "parallel"))]
+    let parsed: Vec<_> = blocks.iter().map(parse_block).collect();
+
+    let mut elements = Vec::with_capacity(parsed.len());
+    for result in parsed {
+        elements.extend(result?);
+    }
+
+    Ok(Document {
+        meta: None,
+        tokens: None,
+        elements,
+        span: Span::default(),
+    })
+}
+
+/// Parse one block and move its spans to their position in the whole input.
+fn parse_block(block: &Block<'_>) -> Result<Vec<Element>, ParseError> {
+    let bytes = block.offset as isize;
+    let lines = block.line_number as i64 - 1;
+
+    let mut elements = parse(block.text)
+        .map_err(|e| shift_error(e, bytes, lines))?
+        .elements;
+    for element in &mut elements {
+        shift_element(element, bytes, lines);
+    }
+    Ok(elements)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_parse_parallel_matches_parse() {
+        let card = include_str!("../../../tests/fixtures/card.seed");
+        let button = include_str!("../../../tests/fixtures/button.seed");
+        let input = format!("// Generated\n{}\n{}\n\n{}", card, button, card);
+
+        let doc = parse_parallel(&input).unwrap();
+        assert_eq!(doc.elements.len(), 3);
+        assert_eq!(doc, parse(&input).unwrap());
+    }
+
+    #[test]
+    fn test_parse_parallel_reports_first_error_line() {
+        let input = "Frame A:\n  fill: #FFFFFF\nFrame B:\n  fill: #000000\nFrame C\nFrame D\n";
+
+        match parse_parallel(input) {
+            Err(ParseError::UnexpectedToken { line, .. }) => assert_eq!(line, 5),
+            other => panic!("Expected UnexpectedToken, got {:?}", other),
+        }
+    }
+
+    #[test]
+    fn test_split_blocks() {
+        let blocks = split_blocks("// c\nFrame A:\n  x: 1\n\nText B:\n  content: \"b\"");
+        assert_eq!(blocks.len(), 2);
+        assert_eq!(blocks[0].text, "// c\nFrame A:\n  x: 1\n\n");
+        assert_eq!((blocks[1].offset, blocks[1].line_number), (22, 5));
+    }
+}
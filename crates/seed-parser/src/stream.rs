@@ -0,0 +1,202 @@
+//! Streaming parser for top-level elements.
+//!
+//! Reads a document line by line from a [`BufRead`] and yields each top-level
+//! element as soon as its indented block closes (i.e. when the next line at
+//! indent 0 is seen, or at end of input). Only the block currently being read
+//! is held in memory.
+
+use std::collections::VecDeque;
+use std::io::BufRead;
+
+use seed_core::{Element, ParseError};
+
+use crate::grammar::parse;
+use crate::incremental::{shift_element, shift_error};
+use crate::lexer::is_top_level;
+
+/// Stream the top-level elements of a Seed document from `reader`.
+///
+/// Element spans are relative to the whole input, exactly as if the document
+/// had been parsed in one piece. The iterator stops after the first error.
+///
+/// # Example
+///
+/// ```ignore
+/// let file = std::io::BufReader::new(std::fs::File::open("layout.seed")?);
+/// for element in seed_parser::stream_elements(file) {
+///     let element = element?;
+///     // lay out / export `element` while the rest is still being read
+/// }
+/// ```
+pub fn stream_elements<R: BufRead>(reader: R) -> ElementStream<R> {
+    ElementStream {
+        reader,
+        block: String::new(),
+        block_offset: 0,
+        block_line: 1,
+        has_header: false,
+        line: String::new(),
+        offset: 0,
+        line_number: 1,
+        ready: VecDeque::new(),
+        done: false,
+    }
+}
+
+/// Iterator over the top-level elements of a document read from a [`BufRead`].
+pub struct ElementStream<R> {
+    reader: R,
+    /// Text of the block being accumulated.
+    block: String,
+    /// Byte offset of the start of `block` in the input.
+    block_offset: usize,
+    /// Line number of the first line of `block`.
+    block_line: usize,
+    /// Whether `block` already contains a top-level line.
+    has_header: bool,
+    /// Scratch buffer for the line being read.
+    line: String,
+    /// Byte offset of the next line to be read.
+    offset: usize,
+    /// Line number of the next line to be read.
+    line_number: usize,
+    /// Parsed elements not yet yielded.
+    ready: VecDeque<Element>,
+    done: bool,
+}
+
+impl<R: BufRead> ElementStream<R> {
+    /// Read lines until the current block closes, then parse it.
+    fn read_block(&mut self) -> Result<(), ParseError> {
+        loop {
+            self.line.clear();
+            let read = self.reader.read_line(&mut self.line)?;
+            if read == 0 {
+                self.done = true;
+                return self.flush();
+            }
+
+            let starts_block = is_top_level(&self.line);
+            if starts_block && self.has_header {
+                // The current block is complete; this line starts the next one
+                self.flush()?;
+            }
+            self.has_header |= starts_block;
+
+            self.block.push_str(&self.line);
+            self.offset += read;
+            self.line_number += 1;
+
+            if !self.ready.is_empty() {
+                return Ok(());
+            }
+        }
+    }
+
+    /// Parse the accumulated block and queue its elements.
+    fn flush(&mut self) -> Result<(), ParseError> {
+        if !self.block.is_empty() {
+            let lines = self.block_line as i64 - 1;
+            let doc = parse(&self.block)
+                .map_err(|e| shift_error(e, self.block_offset as isize, lines))?;
+            for mut element in doc.elements {
+                shift_element(&mut element, self.block_offset as isize, lines);
+                self.ready.push_back(element);
+            }
+            self.block.clear();
+        }
+
+        self.block_offset = self.offset;
+        self.block_line = self.line_number;
+        self.has_header = false;
+        Ok(())
+    }
+}
+
+impl<R: BufRead> Iterator for ElementStream<R> {
+    type Item = Result<Element, ParseError>;
+
+    fn next(&mut self) -> Option<Self::Item> {
+        loop {
+            if let Some(element) = self.ready.pop_front() {
+                return Some(Ok(element));
+            }
+            if self.done {
+                return None;
+            }
+            if let Err(e) = self.read_block() {
+                self.done = true;
+                self.ready.clear();
+                return Some(Err(e));
+            }
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use std::io::{self, Read};
+
+    const SOURCE: &str = r#"// Header comment
+Frame Header:
+  fill: #FFFFFF
+
+  constraints:
+    - height = 48px
+
+Frame Content:
+  Text Body:
+    content: "Hello"
+Text Footer:
+  content: "Bye""#;
+
+    #[test]
+    fn test_stream_matches_full_parse() {
+        let streamed: Vec<Element> = stream_elements(SOURCE.as_bytes())
+            .collect::<Result<_, _>>()
+            .unwrap();
+
+        assert_eq!(streamed, parse(SOURCE).unwrap().elements);
+    }
+
+    #[test]
+    fn test_stream_empty_input() {
+        assert!(stream_elements("".as_bytes()).next().is_none());
+        assert!(stream_elements("// nothing\n\n".as_bytes()).next().is_none());
+    }
+
+    /// A reader that fails once `limit` bytes have been read.
+    struct FailingReader<'a> {
+        data: &'a [u8],
+        limit: usize,
+    }
+
+    impl Read for FailingReader<'_> {
+        fn read(&mut self, buf: &mut [u8]) -> io::Result<usize> {
+            if self.limit == 0 {
+                return Err(io::Error::new(io::ErrorKind::Other, "connection lost"));
+            }
+            let n = buf.len().min(self.limit).min(self.data.len());
+            buf[..n].copy_from_slice(&self.data[..n]);
+            self.data = &self.data[n..];
+            self.limit -= n;
+            Ok(n)
+        }
+    }
+
+    #[test]
+    fn test_stream_yields_before_reading_everything() {
+        // Enough to see the start of the second block, but not the rest
+        let limit = SOURCE.find("  Text Body").unwrap();
+        let reader = io::BufReader::with_capacity(16, FailingReader { data: SOURCE.as_bytes(), limit });
+        let mut stream = stream_elements(reader);
+
+        match stream.next() {
+            Some(Ok(Element::Frame(frame))) => assert_eq!(frame.name.unwrap().0, "Header"),
+            other => panic!("Expected Header frame, got {:?}", other),
+        }
+        assert!(matches!(stream.next(), Some(Err(ParseError::Io(_)))));
+        assert!(stream.next().is_none());
+    }
+}
@@ -0,0 +1,118 @@
+//! Syntax-only validation.
+//!
+//! [`validate`] runs the parser's line walk with a sink that builds nothing.
+//! Values that cannot fail to parse are not decoded at all, and the walk
+//! continues after an error so every problem in the file is reported.
+
+use seed_core::ParseError;
+
+use crate::grammar::{check_property_value, parse_constraint, walk, Body, Header, Scratch, Sink};
+use crate::lexer::Line;
+
+/// Check that `source` is a well-formed Seed document.
+///
+/// Returns every error found, in source order; an empty list means the
+/// document parses. Errors from inside values and constraints, which the
+/// parser reports without a location, are given the line they occur on.
+pub fn validate(source: &str) -> Vec<ParseError> {
+    let mut checker = Checker { errors: Vec::new() };
+    // The checker carries on past every error, so the walk itself succeeds
+    if let Err(error) = walk(source, &mut checker, &mut Scratch::default()) {
+        checker.errors.push(error);
+    }
+    checker.errors
+}
+
+/// Checks each node without building it, and collects the errors.
+struct Checker {
+    errors: Vec<ParseError>,
+}
+
+impl<'src> Sink<'src> for Checker {
+    type Property = ();
+    type Constraint = ();
+    type Element = ();
+
+    fn property(&mut self, _name: &'src str, value: &'src str) -> Result<(), ParseError> {
+        check_property_value(value)
+    }
+
+    fn constraint(&mut self, text: &'src str) -> Result<Option<()>, ParseError> {
+        parse_constraint(text).map(|_| None)
+    }
+
+    fn element(&mut self, _header: Header<'src>, _body: Body<'_, (), (), ()>) {}
+
+    fn error(&mut self, error: ParseError, line: &Line<'src>) -> Result<(), ParseError> {
+        self.errors.push(locate(error, line));
+        Ok(())
+    }
+}
+
+/// Fill in the location of an error raised without one.
+fn locate(mut error: ParseError, at: &Line<'_>) -> ParseError {
+    if let ParseError::UnexpectedToken { line, column, .. } = &mut error {
+        if *line == 0 {
+            *line = at.line_number as u32;
+            *column = at.indent as u32 + 1;
+        }
+    }
+    error
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::grammar::parse;
+
+    #[test]
+    fn test_valid_document_has_no_errors() {
+        let source = r#"Frame Card:
+  fill: linear-gradient(90deg, #FFFFFF, #000000)
+  constraints:
+    - width = Parent.width - 32px
+    - center-x align Parent
+  Text Title:
+    content: "Hello"
+    transform: rotate(45deg)
+"#;
+        assert!(parse(source).is_ok());
+        assert!(validate(source).is_empty());
+    }
+
+    #[test]
+    fn test_reports_every_error_with_location() {
+        let source = r#"Frame Card:
+  fill: linear-gradient()
+  Frame Broken
+    shadow: drop-shadow(1px)
+  constraints:
+    - middle align Parent
+Frame Footer:
+  width: 10px
+"#;
+        let errors = validate(source);
+        let lines: Vec<u32> = errors.iter().map(|e| match e {
+            ParseError::UnexpectedToken { line, .. } => *line,
+            other => panic!("unexpected error {:?}", other),
+        }).collect();
+        assert_eq!(lines, vec![2, 3, 4, 6]);
+
+        // The first error is the one the parser stops at
+        assert!(matches!(parse(source), Err(ParseError::UnexpectedToken { .. })));
+    }
+
+    #[test]
+    fn test_reports_unknown_top_level_lines() {
+        let source = "fill: #FFFFFF\nFrame Card:\n  width: 10px\nFram Header:\n  fill: linear-gradient()\n";
+        let errors = validate(source);
+        let names: Vec<(&str, u32)> = errors.iter().map(|e| match e {
+            ParseError::UnknownElementType { name, span } => (name.as_str(), span.line),
+            other => panic!("unexpected error {:?}", other),
+        }).collect();
+        assert_eq!(names, vec![("fill", 1), ("Fram", 4), ("fill", 5)]);
+
+        // The parser stops at the first one
+        assert!(matches!(parse(source), Err(ParseError::UnknownElementType { .. })));
+    }
+}
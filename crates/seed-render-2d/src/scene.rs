@@ -1,7 +1,7 @@
 //! Scene building from documents and layouts.
 
 use seed_core::{
-    ast::{Element, FrameElement, TextElement, Property, PropertyValue},
+    ast::{Element, FrameElement, TextElement, Property, PropertyName, PropertyValue},
     types::{Color, Gradient, LinearGradient as AstLinearGradient, RadialGradient as AstRadialGradient, ConicGradient as AstConicGradient},
     Document,
 };
@@ -189,9 +189,9 @@ impl<'a> SceneBuilder<'a> {
         };
 
         // Get text properties
-        let color = get_color_from_properties(&text.properties, "color")
+        let color = get_color_from_properties(&text.properties, PropertyName::Color)
             .unwrap_or_else(|| Color::rgb(0.0, 0.0, 0.0));
-        let font_size = get_length_from_properties(&text.properties, "font-size")
+        let font_size = get_length_from_properties(&text.properties, PropertyName::FontSize)
             .unwrap_or(16.0);
 
         let text_prim = TextPrimitive::new(bounds.x as f32, bounds.y as f32, content)
@@ -207,7 +207,7 @@ impl<'a> SceneBuilder<'a> {
 fn get_fill_from_properties(properties: &[Property], x: f32, y: f32, width: f32, height: f32) -> Option<Fill> {
     // First check for gradient fills
     for prop in properties {
-        if prop.name == "fill" || prop.name == "background" || prop.name == "background-color" {
+        if matches!(prop.name, PropertyName::Fill | PropertyName::Background | PropertyName::BackgroundColor) {
             if let PropertyValue::Gradient(gradient) = &prop.value {
                 return Some(convert_gradient(gradient, x, y, width, height));
             }
@@ -215,9 +215,9 @@ fn get_fill_from_properties(properties: &[Property], x: f32, y: f32, width: f32,
     }
 
     // Fall back to solid color
-    get_color_from_properties(properties, "fill")
-        .or_else(|| get_color_from_properties(properties, "background"))
-        .or_else(|| get_color_from_properties(properties, "background-color"))
+    get_color_from_properties(properties, PropertyName::Fill)
+        .or_else(|| get_color_from_properties(properties, PropertyName::Background))
+        .or_else(|| get_color_from_properties(properties, PropertyName::BackgroundColor))
         .map(Fill::Solid)
 }
 
@@ -296,11 +296,11 @@ fn convert_gradient(gradient: &Gradient, x: f32, y: f32, width: f32, height: f32
 }
 
 fn get_stroke_from_properties(properties: &[Property]) -> Option<Stroke> {
-    let color = get_color_from_properties(properties, "stroke")
-        .or_else(|| get_color_from_properties(properties, "border-color"))?;
+    let color = get_color_from_properties(properties, PropertyName::Stroke)
+        .or_else(|| get_color_from_properties(properties, PropertyName::BorderColor))?;
 
-    let width = get_length_from_properties(properties, "stroke-width")
-        .or_else(|| get_length_from_properties(properties, "border-width"))
+    let width = get_length_from_properties(properties, PropertyName::StrokeWidth)
+        .or_else(|| get_length_from_properties(properties, PropertyName::BorderWidth))
         .unwrap_or(1.0);
 
     Some(Stroke::new(color, width as f32))
@@ -308,17 +308,17 @@ fn get_stroke_from_properties(properties: &[Property]) -> Option<Stroke> {
 
 fn get_corner_radius_from_properties(properties: &[Property]) -> Option<CornerRadius> {
     // Try uniform radius first
-    if let Some(radius) = get_length_from_properties(properties, "corner-radius")
-        .or_else(|| get_length_from_properties(properties, "border-radius"))
+    if let Some(radius) = get_length_from_properties(properties, PropertyName::CornerRadius)
+        .or_else(|| get_length_from_properties(properties, PropertyName::BorderRadius))
     {
         return Some(CornerRadius::uniform(radius as f32));
     }
 
     // Try individual corners
-    let top_left = get_length_from_properties(properties, "corner-radius-top-left").unwrap_or(0.0);
-    let top_right = get_length_from_properties(properties, "corner-radius-top-right").unwrap_or(0.0);
-    let bottom_right = get_length_from_properties(properties, "corner-radius-bottom-right").unwrap_or(0.0);
-    let bottom_left = get_length_from_properties(properties, "corner-radius-bottom-left").unwrap_or(0.0);
+    let top_left = get_length_from_properties(properties, PropertyName::CornerRadiusTopLeft).unwrap_or(0.0);
+    let top_right = get_length_from_properties(properties, PropertyName::CornerRadiusTopRight).unwrap_or(0.0);
+    let bottom_right = get_length_from_properties(properties, PropertyName::CornerRadiusBottomRight).unwrap_or(0.0);
+    let bottom_left = get_length_from_properties(properties, PropertyName::CornerRadiusBottomLeft).unwrap_or(0.0);
 
     if top_left > 0.0 || top_right > 0.0 || bottom_right > 0.0 || bottom_left > 0.0 {
         Some(CornerRadius::new(
@@ -335,7 +335,7 @@ fn get_corner_radius_from_properties(properties: &[Property]) -> Option<CornerRa
 fn get_shadow_from_properties(properties: &[Property]) -> Option<AstShadow> {
     // Check for shadow, box-shadow, or drop-shadow properties
     for prop in properties {
-        if prop.name == "shadow" || prop.name == "box-shadow" || prop.name == "drop-shadow" {
+        if matches!(prop.name, PropertyName::Shadow | PropertyName::BoxShadow | PropertyName::DropShadow) {
             if let PropertyValue::Shadow(shadow) = &prop.value {
                 return Some(*shadow);
             }
@@ -344,7 +344,7 @@ fn get_shadow_from_properties(properties: &[Property]) -> Option<AstShadow> {
     None
 }
 
-fn get_color_from_properties(properties: &[Property], name: &str) -> Option<Color> {
+fn get_color_from_properties(properties: &[Property], name: PropertyName) -> Option<Color> {
     properties.iter().find(|p| p.name == name).and_then(|p| {
         match &p.value {
             PropertyValue::Color(c) => Some(*c),
@@ -354,7 +354,7 @@ fn get_color_from_properties(properties: &[Property], name: &str) -> Option<Colo
     })
 }
 
-fn get_length_from_properties(properties: &[Property], name: &str) -> Option<f64> {
+fn get_length_from_properties(properties: &[Property], name: PropertyName) -> Option<f64> {
     properties.iter().find(|p| p.name == name).and_then(|p| {
         match &p.value {
             PropertyValue::Length(l) => l.to_px(None),
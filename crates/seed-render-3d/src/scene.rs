@@ -1,7 +1,7 @@
 //! 3D scene building from documents.
 
 use glam::{Vec3, Mat4};
-use seed_core::{Document, ast::{Element, PartElement, Property, PropertyValue}, types::Color};
+use seed_core::{Document, ast::{Element, PartElement, Property, PropertyName, PropertyValue}, types::Color};
 
 use crate::geometry::{Shape, Mesh, BoundingBox};
 use crate::material::{Material, Light};
@@ -299,18 +299,18 @@ fn extract_material(properties: &[Property]) -> Material {
     let mut material = Material::default();
 
     for prop in properties {
-        match prop.name.as_str() {
-            "color" | "fill" => {
+        match prop.name {
+            PropertyName::Color | PropertyName::Fill => {
                 if let PropertyValue::Color(c) = &prop.value {
                     material.color = *c;
                 }
             }
-            "metallic" => {
+            PropertyName::Metallic => {
                 if let PropertyValue::Number(n) = &prop.value {
                     material.metallic = (*n as f32).clamp(0.0, 1.0);
                 }
             }
-            "roughness" => {
+            PropertyName::Roughness => {
                 if let PropertyValue::Number(n) = &prop.value {
                     material.roughness = (*n as f32).clamp(0.0, 1.0);
                 }
@@ -0,0 +1,304 @@
+//! Token dependency graph.
+//!
+//! A token defined as a reference to another token depends on it. Each
+//! token refers to at most one other, so the graph is a forest once cycles
+//! are ruled out: resolution runs in topological order, and after an edit
+//! only the edited token's descendants need resolving again.
+
+use std::collections::{HashMap, HashSet, VecDeque};
+use indexmap::IndexMap;
+use seed_core::{
+    ResolveError, ResolvedToken, TokenMap,
+    ast::{Span, TokenValue},
+    types::TokenId,
+};
+
+/// Token definitions and the references between them.
+#[derive(Debug, Clone, Default)]
+pub struct TokenGraph {
+    /// Definitions in declaration order.
+    nodes: IndexMap<TokenId, TokenNode>,
+    /// Tokens defined as a reference to each token. The referenced token
+    /// need not be defined in the graph.
+    dependents: HashMap<TokenId, Vec<TokenId>>,
+}
+
+#[derive(Debug, Clone)]
+struct TokenNode {
+    path: String,
+    value: TokenValue,
+}
+
+impl TokenGraph {
+    /// Build the graph for a list of definitions. A later definition of the
+    /// same path replaces an earlier one.
+    pub fn new(definitions: &[(String, TokenValue)]) -> Self {
+        let mut graph = Self::default();
+        for (path, value) in definitions {
+            graph.define(TokenId::from_dotted(path), path, value.clone());
+        }
+        graph
+    }
+
+    /// Number of defined tokens.
+    pub fn len(&self) -> usize {
+        self.nodes.len()
+    }
+
+    /// Check if no tokens are defined.
+    pub fn is_empty(&self) -> bool {
+        self.nodes.is_empty()
+    }
+
+    /// Resolve every definition into `tokens`, each after the token it
+    /// refers to.
+    ///
+    /// References to tokens that are not defined in the graph are looked up
+    /// in `tokens`, so a base theme can be loaded first.
+    pub fn resolve(&self, tokens: &mut TokenMap) -> Result<(), ResolveError> {
+        // A token is ready once the token it refers to is resolved, or at
+        // once if that token is not part of the graph
+        let mut queue: VecDeque<TokenId> = self.nodes.iter()
+            .filter(|(_, node)| self.reference_in_graph(node).is_none())
+            .map(|(id, _)| *id)
+            .collect();
+        let mut resolved = HashSet::with_capacity(self.nodes.len());
+
+        while let Some(id) = queue.pop_front() {
+            self.resolve_node(id, tokens)?;
+            resolved.insert(id);
+            if let Some(dependents) = self.dependents.get(&id) {
+                queue.extend(dependents);
+            }
+        }
+
+        // Whatever was never ready lies on or behind a cycle
+        match self.nodes.keys().find(|id| !resolved.contains(*id)) {
+            Some(&start) => Err(self.find_cycle(start)),
+            None => Ok(()),
+        }
+    }
+
+    /// Define or redefine one token and re-resolve it and every token that
+    /// depends on it, directly or through other references.
+    ///
+    /// Returns the ids of the re-resolved tokens in resolution order. An
+    /// edit that would create a cycle or refers to a token that is not
+    /// resolved in `tokens` is rejected and leaves the graph and `tokens`
+    /// unchanged.
+    pub fn update_token(
+        &mut self,
+        tokens: &mut TokenMap,
+        path: &str,
+        value: TokenValue,
+    ) -> Result<Vec<TokenId>, ResolveError> {
+        let id = TokenId::from_dotted(path);
+        if let TokenValue::Reference(target) = &value {
+            self.check_acyclic(id, path, target.id())?;
+            if tokens.get_by_path(target).is_none() {
+                return Err(ResolveError::UndefinedToken {
+                    path: target.0.join("."),
+                    span: Span::default(),
+                });
+            }
+        }
+        self.define(id, path, value);
+
+        // Dependents form a tree below the edited token, so breadth-first
+        // order resolves each token after the one it refers to
+        let mut order = vec![id];
+        let mut next = 0;
+        while let Some(&id) = order.get(next) {
+            self.resolve_node(id, tokens)?;
+            if let Some(dependents) = self.dependents.get(&id) {
+                order.extend(dependents);
+            }
+            next += 1;
+        }
+
+        Ok(order)
+    }
+
+    /// Add or replace a definition, keeping the dependent lists in step.
+    fn define(&mut self, id: TokenId, path: &str, value: TokenValue) {
+        if let Some(TokenValue::Reference(old)) = self.nodes.get(&id).map(|node| &node.value) {
+            if let Some(dependents) = self.dependents.get_mut(&old.id()) {
+                dependents.retain(|&dependent| dependent != id);
+            }
+        }
+        if let TokenValue::Reference(target) = &value {
+            self.dependents.entry(target.id()).or_default().push(id);
+        }
+        self.nodes.insert(id, TokenNode { path: path.to_string(), value });
+    }
+
+    /// The defined token that `node` refers to, if any.
+    fn reference_in_graph(&self, node: &TokenNode) -> Option<TokenId> {
+        match &node.value {
+            TokenValue::Reference(target) => Some(target.id()).filter(|id| self.nodes.contains_key(id)),
+            _ => None,
+        }
+    }
+
+    fn resolve_node(&self, id: TokenId, tokens: &mut TokenMap) -> Result<(), ResolveError> {
+        let node = &self.nodes[&id];
+        let resolved = match &node.value {
+            TokenValue::Color(c) => ResolvedToken::Color(*c),
+            TokenValue::Length(l) => ResolvedToken::Length(*l),
+            TokenValue::Number(n) => ResolvedToken::Number(*n),
+            TokenValue::String(s) => ResolvedToken::String(s.clone()),
+            TokenValue::Reference(target) => tokens.get_by_path(target).cloned()
+                .ok_or_else(|| ResolveError::UndefinedToken {
+                    path: target.0.join("."),
+                    span: Span::default(),
+                })?,
+        };
+        tokens.insert(&node.path, resolved);
+        Ok(())
+    }
+
+    /// Fail if making `id` refer to `target` would close a cycle.
+    fn check_acyclic(&self, id: TokenId, path: &str, target: TokenId) -> Result<(), ResolveError> {
+        let mut chain = vec![path.to_string()];
+        let mut current = target;
+        // Bounded in case the graph already holds an unrelated cycle
+        for _ in 0..=self.nodes.len() {
+            if current == id {
+                chain.push(path.to_string());
+                return Err(ResolveError::CircularTokenReference { cycle: chain });
+            }
+            let Some(node) = self.nodes.get(&current) else { break };
+            chain.push(node.path.clone());
+            match &node.value {
+                TokenValue::Reference(next) => current = next.id(),
+                _ => break,
+            }
+        }
+        Ok(())
+    }
+
+    /// Follow references from `start` until a token repeats, and report the
+    /// loop that was found.
+    fn find_cycle(&self, start: TokenId) -> ResolveError {
+        let mut seen: HashMap<TokenId, usize> = HashMap::new();
+        let mut chain: Vec<TokenId> = Vec::new();
+        let mut current = start;
+
+        while let Some(node) = self.nodes.get(&current) {
+            if let Some(&first) = seen.get(&current) {
+                let mut cycle: Vec<String> = chain[first..].iter()
+                    .map(|id| self.nodes[id].path.clone())
+                    .collect();
+                cycle.push(node.path.clone());
+                return ResolveError::CircularTokenReference { cycle };
+            }
+            seen.insert(current, chain.len());
+            chain.push(current);
+            match &node.value {
+                TokenValue::Reference(next) => current = next.id(),
+                _ => break,
+            }
+        }
+
+        ResolveError::CircularTokenReference {
+            cycle: chain.iter().map(|id| self.nodes[id].path.clone()).collect(),
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use seed_core::ast::TokenPath;
+    use seed_core::types::Length;
+
+    fn reference(path: &str) -> TokenValue {
+        TokenValue::Reference(TokenPath(path.split('.').map(String::from).collect()))
+    }
+
+    fn definitions() -> Vec<(String, TokenValue)> {
+        vec![
+            ("button.padding".to_string(), reference("spacing.md")),
+            ("card.padding".to_string(), reference("button.padding")),
+            ("spacing.md".to_string(), TokenValue::Length(Length::px(16.0))),
+            ("spacing.lg".to_string(), TokenValue::Length(Length::px(24.0))),
+        ]
+    }
+
+    #[test]
+    fn test_resolves_forward_references() {
+        let mut tokens = TokenMap::new();
+        TokenGraph::new(&definitions()).resolve(&mut tokens).unwrap();
+
+        assert_eq!(tokens.get("card.padding"), Some(&ResolvedToken::Length(Length::px(16.0))));
+        assert_eq!(tokens.len(), 4);
+    }
+
+    #[test]
+    fn test_detects_cycles() {
+        let mut definitions = definitions();
+        definitions.push(("spacing.md".to_string(), reference("card.padding")));
+
+        let result = TokenGraph::new(&definitions).resolve(&mut TokenMap::new());
+        match result {
+            Err(ResolveError::CircularTokenReference { cycle }) => {
+                assert_eq!(cycle, ["button.padding", "spacing.md", "card.padding", "button.padding"]);
+            }
+            other => panic!("expected a cycle, got {:?}", other),
+        }
+    }
+
+    #[test]
+    fn test_update_re_resolves_dependents_only() {
+        let mut tokens = TokenMap::new();
+        let mut graph = TokenGraph::new(&definitions());
+        graph.resolve(&mut tokens).unwrap();
+
+        let updated = graph.update_token(&mut tokens, "spacing.md", TokenValue::Length(Length::px(20.0))).unwrap();
+        assert_eq!(updated, [
+            TokenId::from_dotted("spacing.md"),
+            TokenId::from_dotted("button.padding"),
+            TokenId::from_dotted("card.padding"),
+        ]);
+        assert_eq!(tokens.get("card.padding"), Some(&ResolvedToken::Length(Length::px(20.0))));
+
+        // Repointing a reference moves the token to its new parent
+        graph.update_token(&mut tokens, "button.padding", reference("spacing.lg")).unwrap();
+        let updated = graph.update_token(&mut tokens, "spacing.lg", TokenValue::Length(Length::px(32.0))).unwrap();
+        assert_eq!(updated.len(), 3);
+        let updated = graph.update_token(&mut tokens, "spacing.md", TokenValue::Length(Length::px(8.0))).unwrap();
+        assert_eq!(updated, [TokenId::from_dotted("spacing.md")]);
+        assert_eq!(tokens.get("card.padding"), Some(&ResolvedToken::Length(Length::px(32.0))));
+    }
+
+    #[test]
+    fn test_update_rejects_cycle() {
+        let mut tokens = TokenMap::new();
+        let mut graph = TokenGraph::new(&definitions());
+        graph.resolve(&mut tokens).unwrap();
+
+        let result = graph.update_token(&mut tokens, "spacing.md", reference("card.padding"));
+        assert!(matches!(result, Err(ResolveError::CircularTokenReference { .. })));
+
+        // The graph is unchanged and still resolves
+        graph.resolve(&mut tokens).unwrap();
+        assert_eq!(tokens.get("card.padding"), Some(&ResolvedToken::Length(Length::px(16.0))));
+    }
+
+    #[test]
+    fn test_update_rejects_undefined_reference() {
+        let mut tokens = TokenMap::new();
+        let mut graph = TokenGraph::new(&definitions());
+        graph.resolve(&mut tokens).unwrap();
+
+        let result = graph.update_token(&mut tokens, "button.padding", reference("spacing.xl"));
+        assert!(matches!(result, Err(ResolveError::UndefinedToken { ref path, .. }) if path == "spacing.xl"));
+
+        // The old definition is kept and still has its dependents
+        assert_eq!(tokens.get("button.padding"), Some(&ResolvedToken::Length(Length::px(16.0))));
+        let updated = graph.update_token(&mut tokens, "spacing.md", TokenValue::Length(Length::px(20.0))).unwrap();
+        assert_eq!(updated.len(), 3);
+        assert_eq!(tokens.get("card.padding"), Some(&ResolvedToken::Length(Length::px(20.0))));
+        assert!(!graph.dependents.contains_key(&TokenId::from_dotted("spacing.xl")));
+    }
+}
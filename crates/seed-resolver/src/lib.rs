@@ -7,15 +7,30 @@
 
 mod tokens;
 mod references;
+mod graph;
+mod usage;
+mod parallel;
 
-pub use tokens::resolve_tokens;
-pub use references::resolve_references;
+pub use tokens::{
+    resolve_tokens, resolve_tokens_in_place, resolve_tokens_tracked, resolve_token_definitions,
+    TokenResolver,
+};
+pub use graph::TokenGraph;
+pub use parallel::{
+    is_large, link_references_parallel, resolve_tokens_parallel, PARALLEL_THRESHOLD,
+};
+pub use usage::{TokenChange, TokenUsage};
+pub use references::{
+    has_resolved_references, link_references, relink_references, resolve_references,
+    unlink_references, validate_references, ReferenceScope,
+};
 
 use seed_core::{Document, TokenMap, ResolveError};
 
 /// Resolve all tokens and references in a document.
 pub fn resolve(doc: &Document, tokens: &TokenMap) -> Result<Document, ResolveError> {
-    let doc = resolve_tokens(doc, tokens)?;
-    let doc = resolve_references(&doc)?;
+    let mut doc = doc.clone();
+    resolve_tokens_in_place(&mut doc, tokens)?;
+    link_references(&mut doc)?;
     Ok(doc)
 }
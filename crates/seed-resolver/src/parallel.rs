@@ -0,0 +1,223 @@
+//! Parallel resolution of independent top-level subtrees.
+//!
+//! Token references and element references inside one top-level element
+//! never depend on another top-level element's subtree, so each subtree
+//! can be resolved on its own. With the `parallel` feature the subtrees are
+//! resolved on the rayon thread pool; without it they are resolved
+//! sequentially. Either way the output, including element ids, and the
+//! error returned are the same as those of the sequential passes.
+
+#[cfg(feature = "parallel")]
+use rayon::prelude::*;
+
+use seed_core::{
+    Document, ResolveError, TokenMap,
+    ast::Element,
+    types::ElementId,
+};
+
+use crate::references::{relink_children, relink_level, validate_element};
+use crate::{ReferenceScope, TokenResolver};
+
+/// Number of elements above which a document is worth resolving in
+/// parallel.
+///
+/// With the `parallel` feature, [`resolve_tokens_in_place`] and
+/// [`link_references`] switch to the parallel passes for documents at least
+/// this large.
+///
+/// [`resolve_tokens_in_place`]: crate::resolve_tokens_in_place
+/// [`link_references`]: crate::link_references
+pub const PARALLEL_THRESHOLD: usize = 4096;
+
+/// Check if a document has at least [`PARALLEL_THRESHOLD`] elements spread
+/// over more than one top-level subtree.
+pub fn is_large(doc: &Document) -> bool {
+    fn count(elements: &[Element], total: &mut usize) -> bool {
+        for element in elements {
+            *total += 1;
+            if *total >= PARALLEL_THRESHOLD || count(element.children(), total) {
+                return true;
+            }
+        }
+        false
+    }
+    doc.elements.len() > 1 && count(&doc.elements, &mut 0)
+}
+
+/// Resolve all token references in a document, one top-level subtree at a
+/// time in parallel.
+///
+/// Produces the same document as
+/// [`resolve_tokens_in_place`](crate::resolve_tokens_in_place). If several
+/// subtrees fail, the error from the earliest one is returned.
+pub fn resolve_tokens_parallel(doc: &mut Document, tokens: &TokenMap) -> Result<(), ResolveError> {
+    let resolve = |element: &mut Element| TokenResolver::new(tokens).resolve_element(element);
+
+    #[cfg(feature = "parallel")]
+    let results: Vec<_> = doc.elements.par_iter_mut().map(resolve).collect();
+    #[cfg(not(feature = "parallel"))]
+    let results: Vec<_> = doc.elements.iter_mut().map(resolve).collect();
+
+    results.into_iter().collect()
+}
+
+/// Check every element reference in a document, one top-level subtree at a
+/// time in parallel, and rewrite it in place to the id of its target.
+///
+/// Produces the same document as [`link_references`](crate::link_references).
+/// If several subtrees hold a broken reference, the error from the earliest
+/// one is returned.
+pub fn link_references_parallel(doc: &mut Document) -> Result<(), ResolveError> {
+    let scope = ReferenceScope::new(&doc.elements, false);
+    let validate = |(i, element): (usize, &Element)| validate_element(&scope, i, element);
+
+    #[cfg(feature = "parallel")]
+    let results: Vec<_> = doc.elements.par_iter().enumerate().map(validate).collect();
+    #[cfg(not(feature = "parallel"))]
+    let results: Vec<_> = doc.elements.iter().enumerate().map(validate).collect();
+
+    results.into_iter().collect::<Result<(), _>>()?;
+
+    // Ids are handed out depth first, so each subtree's block starts after
+    // the top level and every earlier subtree
+    relink_level(&mut doc.elements, None, 0);
+    let mut next_id = doc.elements.len() as u64;
+    let starts: Vec<u64> = doc.elements.iter()
+        .map(|element| {
+            let start = next_id;
+            next_id += descendant_count(element);
+            start
+        })
+        .collect();
+
+    let relink = |(i, (element, mut start)): (usize, (&mut Element, u64))| {
+        relink_children(element, ElementId(i as u64), &mut start);
+    };
+
+    #[cfg(feature = "parallel")]
+    doc.elements.par_iter_mut().zip(starts).enumerate().for_each(relink);
+    #[cfg(not(feature = "parallel"))]
+    doc.elements.iter_mut().zip(starts).enumerate().for_each(relink);
+
+    Ok(())
+}
+
+fn descendant_count(element: &Element) -> u64 {
+    element.children().iter().map(|child| 1 + descendant_count(child)).sum()
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use seed_core::{
+        ResolvedToken,
+        ast::{
+            Constraint, ConstraintKind, ElementRef, FrameElement, Property, PropertyValue,
+            Relation, Span, TokenPath,
+        },
+        types::{Identifier, Length},
+    };
+    use crate::{link_references, resolve_tokens_in_place};
+
+    fn frame(name: &str, properties: Vec<Property>, constraints: Vec<ElementRef>, children: Vec<Element>) -> Element {
+        Element::Frame(FrameElement {
+            name: Some(Identifier(name.to_string())),
+            properties,
+            constraints: constraints.into_iter()
+                .map(|target| Constraint {
+                    kind: ConstraintKind::Relative { relation: Relation::Below, target, gap: None },
+                    priority: None,
+                    span: Span::default(),
+                })
+                .collect(),
+            children: children.into(),
+            span: Span::default(),
+        })
+    }
+
+    fn padding(token: &str) -> Property {
+        Property {
+            name: "padding".into(),
+            value: PropertyValue::TokenRef(TokenPath(token.split('.').map(String::from).collect())),
+            span: Span::default(),
+        }
+    }
+
+    /// Top-level cards, each with a header and a row of items below it.
+    fn dashboard(cards: usize, items: usize) -> Document {
+        let elements = (0..cards)
+            .map(|c| {
+                let row = (0..items)
+                    .map(|i| {
+                        let after = if i == 0 { vec![ElementRef::Parent] } else { vec![ElementRef::Previous] };
+                        frame(&format!("Item{}", i), vec![padding("spacing.md")], after, vec![])
+                    })
+                    .collect();
+                let children = vec![
+                    frame("Header", vec![], vec![ElementRef::Parent], vec![]),
+                    frame("Row", vec![], vec![ElementRef::Named(Identifier("Header".to_string()))], row),
+                ];
+                let above = if c == 0 { vec![] } else { vec![ElementRef::Previous] };
+                frame(&format!("Card{}", c), vec![padding("spacing.md")], above, children)
+            })
+            .collect();
+
+        Document { meta: None, tokens: None, elements, span: Span::default() }
+    }
+
+    fn tokens() -> TokenMap {
+        let mut tokens = TokenMap::new();
+        tokens.insert("spacing.md", ResolvedToken::Length(Length::px(16.0)));
+        tokens
+    }
+
+    #[test]
+    fn test_parallel_matches_sequential() {
+        let doc = dashboard(8, 600);
+        assert!(is_large(&doc));
+        assert!(!is_large(&dashboard(1, 5000)));
+
+        let tokens = tokens();
+        let mut sequential = doc.clone();
+        let mut resolver = TokenResolver::new(&tokens);
+        sequential.elements.iter_mut().try_for_each(|e| resolver.resolve_element(e)).unwrap();
+        crate::validate_references(&sequential).unwrap();
+        crate::relink_references(&mut sequential);
+
+        let mut parallel = doc.clone();
+        resolve_tokens_parallel(&mut parallel, &tokens).unwrap();
+        link_references_parallel(&mut parallel).unwrap();
+        assert_eq!(parallel, sequential);
+
+        // The public passes agree whichever way they dispatch
+        let mut dispatched = doc;
+        resolve_tokens_in_place(&mut dispatched, &tokens).unwrap();
+        link_references(&mut dispatched).unwrap();
+        assert_eq!(dispatched, sequential);
+    }
+
+    #[test]
+    fn test_parallel_reports_earliest_error() {
+        let mut doc = dashboard(6, 10);
+        for c in [2, 4] {
+            let Element::Frame(card) = &mut doc.elements[c] else { unreachable!() };
+            card.properties.push(padding(&format!("missing.card{}", c)));
+            let Element::Frame(header) = &mut card.children[0] else { unreachable!() };
+            header.constraints[0].kind = ConstraintKind::Relative {
+                relation: Relation::Below,
+                target: ElementRef::Named(Identifier(format!("Ghost{}", c))),
+                gap: None,
+            };
+        }
+
+        match resolve_tokens_parallel(&mut doc.clone(), &tokens()) {
+            Err(ResolveError::UndefinedToken { path, .. }) => assert_eq!(path, "missing.card2"),
+            other => panic!("expected an undefined token, got {:?}", other),
+        }
+        match link_references_parallel(&mut doc) {
+            Err(ResolveError::InvalidReference { reference, .. }) => assert_eq!(reference, "Ghost2"),
+            other => panic!("expected an invalid reference, got {:?}", other),
+        }
+    }
+}
@@ -1,282 +1,364 @@
 //! Element reference resolution.
 //!
-//! Resolves element references (Parent, Named, Previous, Next) to ensure
-//! they are valid and can be looked up during constraint solving.
+//! Checks that element references (Parent, Named, Previous, Next) point at
+//! an element, and rewrites them to [`ElementRef::Resolved`] ids, so that
+//! constraint building looks elements up by index rather than by name.
+//!
+//! Ids are handed out a sibling list at a time: the top-level elements get
+//! `0..n`, then each element's children get the next free block, depth
+//! first in document order. Every sibling's id is known before its
+//! constraints are linked, including the ids of later siblings.
 
 use std::collections::HashMap;
 use seed_core::{
     Document, ResolveError,
-    ast::{
-        Element, FrameElement, TextElement, PartElement, ComponentElement,
-        Constraint, ConstraintKind, ElementRef,
-    },
+    ast::{Element, Constraint, ConstraintKind, ElementRef, Expression},
+    types::{ElementId, Identifier},
 };
 
 /// Resolve all element references in a document.
+///
+/// In the copy, every reference is rewritten to the id of its target.
 pub fn resolve_references(doc: &Document) -> Result<Document, ResolveError> {
-    let mut resolver = ReferenceResolver::new();
-    resolver.resolve_document(doc)
+    let mut doc = doc.clone();
+    link_references(&mut doc)?;
+    Ok(doc)
 }
 
-/// Element resolution context.
-struct ElementContext {
-    /// Named elements at this level.
-    named_elements: HashMap<String, usize>,
-    /// Whether we have a parent.
-    has_parent: bool,
-    /// Index of current element (for sibling references).
-    current_index: usize,
-    /// Total number of siblings.
-    sibling_count: usize,
+/// Check every element reference in a document without copying it.
+pub fn validate_references(doc: &Document) -> Result<(), ResolveError> {
+    validate_elements(&doc.elements, false)
 }
 
-impl ElementContext {
-    fn new() -> Self {
-        Self {
-            named_elements: HashMap::new(),
-            has_parent: false,
-            current_index: 0,
-            sibling_count: 0,
-        }
+/// Check every element reference in a document and rewrite it in place to
+/// the id of its target.
+pub fn link_references(doc: &mut Document) -> Result<(), ResolveError> {
+    #[cfg(feature = "parallel")]
+    if crate::parallel::is_large(doc) {
+        return crate::link_references_parallel(doc);
     }
+    validate_references(doc)?;
+    relink_references(doc);
+    Ok(())
+}
 
-    fn with_parent() -> Self {
-        Self {
-            named_elements: HashMap::new(),
-            has_parent: true,
-            current_index: 0,
-            sibling_count: 0,
-        }
+/// Rewrite the element references that have a target to the target's id,
+/// and keep the others as they are.
+///
+/// For trees whose references were checked before they were restructured,
+/// such as expanded components. References that are already resolved are
+/// kept, so ids from an earlier tree must be unlinked first (see
+/// [`unlink_references`]).
+pub fn relink_references(doc: &mut Document) {
+    let mut next_id = 0;
+    relink_elements(&mut doc.elements, None, &mut next_id);
+}
+
+/// Turn resolved references back into references by relation or name, so
+/// that the tree can be restructured and linked again.
+///
+/// A reference to a sibling that is neither adjacent nor named is kept.
+pub fn unlink_references(doc: &mut Document) {
+    let mut next_id = 0;
+    unlink_elements(&mut doc.elements, None, &mut next_id);
+}
+
+/// Check if any element reference in the document is resolved to an id.
+pub fn has_resolved_references(doc: &Document) -> bool {
+    fn any_resolved(elements: &[Element]) -> bool {
+        elements.iter().any(|element| {
+            let mut found = false;
+            visit_refs(constraints(element), &mut |r| found |= matches!(r, ElementRef::Resolved(_)));
+            found || any_resolved(element.children())
+        })
     }
+    any_resolved(&doc.elements)
 }
 
-struct ReferenceResolver {
-    /// Stack of contexts as we descend into nested elements.
-    context_stack: Vec<ElementContext>,
+fn validate_elements(elements: &[Element], has_parent: bool) -> Result<(), ResolveError> {
+    let scope = ReferenceScope::new(elements, has_parent);
+    elements.iter().enumerate().try_for_each(|(i, element)| validate_element(&scope, i, element))
 }
 
-impl ReferenceResolver {
-    fn new() -> Self {
-        Self {
-            context_stack: Vec::new(),
+/// Check the references of the sibling at `index` and of its subtree.
+pub(crate) fn validate_element(scope: &ReferenceScope, index: usize, element: &Element) -> Result<(), ResolveError> {
+    match element {
+        Element::Frame(frame) => {
+            scope.validate_constraints(index, &frame.constraints)?;
+            validate_elements(&frame.children, true)
         }
+        Element::Part(part) => scope.validate_constraints(index, &part.constraints),
+        Element::Component(comp) => validate_elements(&comp.children, true),
+        // Text elements don't have constraints or children, and slots
+        // are replaced during component expansion
+        Element::Text(_) | Element::Slot(_) => Ok(()),
     }
+}
 
-    fn resolve_document(&mut self, doc: &Document) -> Result<Document, ResolveError> {
-        let mut resolved = doc.clone();
+fn relink_elements(elements: &mut [Element], parent: Option<ElementId>, next_id: &mut u64) {
+    let first = *next_id;
+    *next_id += elements.len() as u64;
+    relink_level(elements, parent, first);
 
-        // Build element name index at document level
-        let mut ctx = ElementContext::new();
-        ctx.sibling_count = doc.elements.len();
-        for (i, element) in doc.elements.iter().enumerate() {
-            if let Some(name) = get_element_name(element) {
-                ctx.named_elements.insert(name.clone(), i);
-            }
-        }
-        self.context_stack.push(ctx);
+    for (i, element) in elements.iter_mut().enumerate() {
+        relink_children(element, ElementId(first + i as u64), next_id);
+    }
+}
 
-        // Resolve elements
-        resolved.elements = doc.elements
-            .iter()
-            .enumerate()
-            .map(|(i, e)| {
-                if let Some(ctx) = self.context_stack.last_mut() {
-                    ctx.current_index = i;
-                }
-                self.resolve_element(e)
-            })
-            .collect::<Result<Vec<_>, _>>()?;
-
-        self.context_stack.pop();
-        Ok(resolved)
-    }
-
-    fn resolve_element(&mut self, element: &Element) -> Result<Element, ResolveError> {
-        match element {
-            Element::Frame(frame) => Ok(Element::Frame(self.resolve_frame(frame)?)),
-            Element::Text(text) => Ok(Element::Text(self.resolve_text(text)?)),
-            Element::Part(part) => Ok(Element::Part(self.resolve_part(part)?)),
-            Element::Component(comp) => Ok(Element::Component(self.resolve_component(comp)?)),
-            Element::Slot(slot) => Ok(Element::Slot(slot.clone())),
-        }
+/// Link the references below `element`, whose id is `id`.
+///
+/// A subtree with nothing to link is only counted, so that a child list
+/// shared with another tree is not copied.
+pub(crate) fn relink_children(element: &mut Element, id: ElementId, next_id: &mut u64) {
+    match size_unless(element.children(), &|r| !matches!(r, ElementRef::Resolved(_))) {
+        Some(size) => *next_id += size,
+        None => relink_elements(children_mut(element), Some(id), next_id),
     }
+}
 
-    fn resolve_frame(&mut self, frame: &FrameElement) -> Result<FrameElement, ResolveError> {
-        let mut resolved = frame.clone();
+/// Link the references of one list of siblings, whose ids start at `first`.
+pub(crate) fn relink_level(elements: &mut [Element], parent: Option<ElementId>, first: u64) {
+    // Find every target while the siblings are borrowed, then write them
+    let mut targets = Vec::new();
+    let scope = ReferenceScope::new(elements, parent.is_some());
+    for (i, element) in elements.iter().enumerate() {
+        visit_refs(constraints(element), &mut |element_ref| {
+            targets.push(match scope.target(i, element_ref) {
+                Ok(Target::Parent) => parent,
+                Ok(Target::Sibling(j)) => Some(ElementId(first + j as u64)),
+                Ok(Target::Resolved) | Err(_) => None,
+            });
+        });
+    }
 
-        // Validate constraints
-        resolved.constraints = frame.constraints
-            .iter()
-            .map(|c| self.validate_constraint(c))
-            .collect::<Result<Vec<_>, _>>()?;
-
-        // Resolve children
-        if !frame.children.is_empty() {
-            // Push new context for children
-            let mut child_ctx = ElementContext::with_parent();
-            child_ctx.sibling_count = frame.children.len();
-            for (i, child) in frame.children.iter().enumerate() {
-                if let Some(name) = get_element_name(child) {
-                    child_ctx.named_elements.insert(name.clone(), i);
-                }
+    let mut targets = targets.into_iter();
+    for element in elements.iter_mut() {
+        visit_refs_mut(constraints_mut(element), &mut |element_ref| {
+            if let Some(id) = targets.next().flatten() {
+                *element_ref = ElementRef::Resolved(id);
             }
-            self.context_stack.push(child_ctx);
-
-            resolved.children = frame.children
-                .iter()
-                .enumerate()
-                .map(|(i, e)| {
-                    if let Some(ctx) = self.context_stack.last_mut() {
-                        ctx.current_index = i;
-                    }
-                    self.resolve_element(e)
-                })
-                .collect::<Result<Vec<_>, _>>()?;
-
-            self.context_stack.pop();
-        }
-
-        Ok(resolved)
+        });
     }
+}
 
-    fn resolve_text(&mut self, text: &TextElement) -> Result<TextElement, ResolveError> {
-        // Text elements don't have constraints or children
-        Ok(text.clone())
+fn unlink_elements(elements: &mut [Element], parent: Option<ElementId>, next_id: &mut u64) {
+    let first = *next_id;
+    *next_id += elements.len() as u64;
+
+    let mut replacements = Vec::new();
+    for (i, element) in elements.iter().enumerate() {
+        visit_refs(constraints(element), &mut |element_ref| {
+            let ElementRef::Resolved(id) = element_ref else {
+                return replacements.push(None);
+            };
+            let sibling = id.0.checked_sub(first).map(|j| j as usize).filter(|&j| j < elements.len());
+            replacements.push(match sibling {
+                _ if Some(*id) == parent => Some(ElementRef::Parent),
+                Some(j) if j + 1 == i => Some(ElementRef::Previous),
+                Some(j) if j == i + 1 => Some(ElementRef::Next),
+                Some(j) => elements[j].name().map(|name| ElementRef::Named(Identifier(name.to_string()))),
+                None => None,
+            });
+        });
     }
 
-    fn resolve_part(&mut self, part: &PartElement) -> Result<PartElement, ResolveError> {
-        let mut resolved = part.clone();
+    let mut replacements = replacements.into_iter();
+    for element in elements.iter_mut() {
+        visit_refs_mut(constraints_mut(element), &mut |element_ref| {
+            if let Some(replacement) = replacements.next().flatten() {
+                *element_ref = replacement;
+            }
+        });
+    }
 
-        // Validate constraints
-        resolved.constraints = part.constraints
-            .iter()
-            .map(|c| self.validate_constraint(c))
-            .collect::<Result<Vec<_>, _>>()?;
+    for (i, element) in elements.iter_mut().enumerate() {
+        // As when linking, leave subtrees with nothing to unlink shared
+        match size_unless(element.children(), &|r| matches!(r, ElementRef::Resolved(_))) {
+            Some(size) => *next_id += size,
+            None => unlink_elements(children_mut(element), Some(ElementId(first + i as u64)), next_id),
+        }
+    }
+}
 
-        Ok(resolved)
+/// Number of elements in a subtree, or `None` if any of their references
+/// match `pred`.
+fn size_unless(elements: &[Element], pred: &impl Fn(&ElementRef) -> bool) -> Option<u64> {
+    let mut size = 0;
+    for element in elements {
+        let mut found = false;
+        visit_refs(constraints(element), &mut |element_ref| found |= pred(element_ref));
+        if found {
+            return None;
+        }
+        size += 1 + size_unless(element.children(), pred)?;
     }
+    Some(size)
+}
 
-    fn resolve_component(&mut self, comp: &ComponentElement) -> Result<ComponentElement, ResolveError> {
-        let mut resolved = comp.clone();
+/// What an element reference points at, relative to the referring element.
+enum Target {
+    Parent,
+    /// The sibling at this index.
+    Sibling(usize),
+    /// Whatever element the reference was resolved to earlier.
+    Resolved,
+}
 
-        // Resolve children
-        if !comp.children.is_empty() {
-            // Push new context for children
-            let mut child_ctx = ElementContext::with_parent();
-            child_ctx.sibling_count = comp.children.len();
-            for (i, child) in comp.children.iter().enumerate() {
-                if let Some(name) = get_element_name(child) {
-                    child_ctx.named_elements.insert(name.clone(), i);
-                }
-            }
-            self.context_stack.push(child_ctx);
-
-            resolved.children = comp.children
-                .iter()
-                .enumerate()
-                .map(|(i, e)| {
-                    if let Some(ctx) = self.context_stack.last_mut() {
-                        ctx.current_index = i;
-                    }
-                    self.resolve_element(e)
-                })
-                .collect::<Result<Vec<_>, _>>()?;
+/// The sibling list that element references are resolved against.
+pub struct ReferenceScope<'a> {
+    /// Named elements at this level.
+    named_elements: HashMap<&'a str, usize>,
+    /// Whether we have a parent.
+    has_parent: bool,
+    /// Total number of siblings.
+    sibling_count: usize,
+}
+
+impl<'a> ReferenceScope<'a> {
+    /// Build the scope for a list of siblings.
+    pub fn new(siblings: &'a [Element], has_parent: bool) -> Self {
+        let named_elements = siblings
+            .iter()
+            .enumerate()
+            .filter_map(|(i, element)| element.name().map(|name| (name, i)))
+            .collect();
 
-            self.context_stack.pop();
+        Self {
+            named_elements,
+            has_parent,
+            sibling_count: siblings.len(),
         }
+    }
 
-        Ok(resolved)
+    /// Check the element references in the constraints of the sibling at `index`.
+    pub fn validate_constraints(&self, index: usize, constraints: &[Constraint]) -> Result<(), ResolveError> {
+        constraints.iter().try_for_each(|c| self.validate_constraint(index, c))
     }
 
-    fn validate_constraint(&self, constraint: &Constraint) -> Result<Constraint, ResolveError> {
+    fn validate_constraint(&self, index: usize, constraint: &Constraint) -> Result<(), ResolveError> {
         // Validate element references in the constraint
         match &constraint.kind {
-            ConstraintKind::Alignment { target, .. } => {
-                self.validate_element_ref(target, &constraint.span)?;
-            }
-            ConstraintKind::Relative { target, .. } => {
-                self.validate_element_ref(target, &constraint.span)?;
+            ConstraintKind::Alignment { target, .. } | ConstraintKind::Relative { target, .. } => {
+                self.target(index, target).map(|_| ()).map_err(|(reference, reason)| {
+                    ResolveError::InvalidReference { reference, reason, span: constraint.span }
+                })
             }
             ConstraintKind::Equality { .. } | ConstraintKind::Inequality { .. } => {
                 // Equality/Inequality constraints use expressions, not direct element refs
+                Ok(())
             }
         }
-        Ok(constraint.clone())
     }
 
-    fn validate_element_ref(
-        &self,
-        element_ref: &ElementRef,
-        span: &seed_core::ast::Span,
-    ) -> Result<(), ResolveError> {
-        let ctx = self.context_stack.last();
-
+    /// Find the target of a reference made by the sibling at `index`, or
+    /// the reference and the reason it has none.
+    fn target(&self, index: usize, element_ref: &ElementRef) -> Result<Target, (String, String)> {
         match element_ref {
-            ElementRef::Parent => {
-                if let Some(ctx) = ctx {
-                    if !ctx.has_parent {
-                        return Err(ResolveError::InvalidReference {
-                            reference: "Parent".to_string(),
-                            reason: "no parent element exists at document level".to_string(),
-                            span: *span,
-                        });
-                    }
-                }
-            }
-            ElementRef::Named(name) => {
-                let name_str = &name.0;
-                let found = ctx.map(|c| c.named_elements.contains_key(name_str)).unwrap_or(false);
-                if !found {
-                    return Err(ResolveError::InvalidReference {
-                        reference: name_str.clone(),
-                        reason: format!("no element named '{}' found in scope", name_str),
-                        span: *span,
-                    });
-                }
-            }
-            ElementRef::Previous => {
-                if let Some(ctx) = ctx {
-                    if ctx.current_index == 0 {
-                        return Err(ResolveError::InvalidReference {
-                            reference: "Previous".to_string(),
-                            reason: "no previous sibling exists (this is the first element)".to_string(),
-                            span: *span,
-                        });
-                    }
-                }
+            ElementRef::Parent if self.has_parent => Ok(Target::Parent),
+            ElementRef::Parent => Err((
+                "Parent".to_string(),
+                "no parent element exists at document level".to_string(),
+            )),
+            ElementRef::Named(name) => match self.named_elements.get(name.0.as_str()) {
+                Some(&sibling) => Ok(Target::Sibling(sibling)),
+                None => Err((
+                    name.0.clone(),
+                    format!("no element named '{}' found in scope", name.0),
+                )),
+            },
+            ElementRef::Previous if index > 0 => Ok(Target::Sibling(index - 1)),
+            ElementRef::Previous => Err((
+                "Previous".to_string(),
+                "no previous sibling exists (this is the first element)".to_string(),
+            )),
+            ElementRef::Next if index + 1 < self.sibling_count => Ok(Target::Sibling(index + 1)),
+            ElementRef::Next => Err((
+                "Next".to_string(),
+                "no next sibling exists (this is the last element)".to_string(),
+            )),
+            ElementRef::Resolved(_) => Ok(Target::Resolved),
+        }
+    }
+}
+
+fn constraints(element: &Element) -> &[Constraint] {
+    match element {
+        Element::Frame(f) => &f.constraints,
+        Element::Text(t) => &t.constraints,
+        Element::Part(p) => &p.constraints,
+        Element::Component(_) | Element::Slot(_) => &[],
+    }
+}
+
+fn constraints_mut(element: &mut Element) -> &mut [Constraint] {
+    match element {
+        Element::Frame(f) => &mut f.constraints,
+        Element::Text(t) => &mut t.constraints,
+        Element::Part(p) => &mut p.constraints,
+        Element::Component(_) | Element::Slot(_) => &mut [],
+    }
+}
+
+fn children_mut(element: &mut Element) -> &mut [Element] {
+    match element {
+        Element::Frame(f) => &mut f.children,
+        Element::Component(c) => &mut c.children,
+        Element::Text(_) | Element::Part(_) | Element::Slot(_) => &mut [],
+    }
+}
+
+/// Call `f` with every element reference in `constraints`, in order.
+fn visit_refs<'c>(constraints: &'c [Constraint], f: &mut impl FnMut(&'c ElementRef)) {
+    fn visit_expression<'c>(expression: &'c Expression, f: &mut impl FnMut(&'c ElementRef)) {
+        match expression {
+            Expression::PropertyRef { element, .. } => f(element),
+            Expression::BinaryOp { left, right, .. } => {
+                visit_expression(left, f);
+                visit_expression(right, f);
             }
-            ElementRef::Next => {
-                if let Some(ctx) = ctx {
-                    if ctx.current_index + 1 >= ctx.sibling_count {
-                        return Err(ResolveError::InvalidReference {
-                            reference: "Next".to_string(),
-                            reason: "no next sibling exists (this is the last element)".to_string(),
-                            span: *span,
-                        });
-                    }
-                }
+            Expression::Function { args, .. } => args.iter().for_each(|arg| visit_expression(arg, f)),
+            Expression::Literal(_) | Expression::Length(_) | Expression::TokenRef(_) => {}
+        }
+    }
+
+    for constraint in constraints {
+        match &constraint.kind {
+            ConstraintKind::Alignment { target, .. } | ConstraintKind::Relative { target, .. } => f(target),
+            ConstraintKind::Equality { value, .. } | ConstraintKind::Inequality { value, .. } => {
+                visit_expression(value, f)
             }
         }
-        Ok(())
     }
 }
 
-/// Get the name of an element if it has one.
-fn get_element_name(element: &Element) -> Option<String> {
-    match element {
-        Element::Frame(f) => f.name.as_ref().map(|id| id.0.clone()),
-        Element::Text(t) => t.name.as_ref().map(|id| id.0.clone()),
-        Element::Part(p) => p.name.as_ref().map(|id| id.0.clone()),
-        Element::Component(c) => c.instance_name.as_ref().map(|id| id.0.clone()),
-        Element::Slot(_) => None, // Slots don't have names
+/// Like [`visit_refs`], for rewriting the references.
+fn visit_refs_mut(constraints: &mut [Constraint], f: &mut impl FnMut(&mut ElementRef)) {
+    fn visit_expression(expression: &mut Expression, f: &mut impl FnMut(&mut ElementRef)) {
+        match expression {
+            Expression::PropertyRef { element, .. } => f(element),
+            Expression::BinaryOp { left, right, .. } => {
+                visit_expression(left, f);
+                visit_expression(right, f);
+            }
+            Expression::Function { args, .. } => args.iter_mut().for_each(|arg| visit_expression(arg, f)),
+            Expression::Literal(_) | Expression::Length(_) | Expression::TokenRef(_) => {}
+        }
+    }
+
+    for constraint in constraints {
+        match &mut constraint.kind {
+            ConstraintKind::Alignment { target, .. } | ConstraintKind::Relative { target, .. } => f(target),
+            ConstraintKind::Equality { value, .. } | ConstraintKind::Inequality { value, .. } => {
+                visit_expression(value, f)
+            }
+        }
     }
 }
 
 #[cfg(test)]
 mod tests {
     use super::*;
-    use seed_core::ast::Span;
-    use seed_core::types::Identifier;
+    use seed_core::ast::{FrameElement, Span};
 
     #[test]
     fn test_resolve_empty_document() {
@@ -306,7 +388,7 @@ mod tests {
                 priority: None,
                 span: Span::default(),
             }],
-            children: vec![],
+            children: vec![].into(),
             span: Span::default(),
         };
 
@@ -336,7 +418,7 @@ mod tests {
                 priority: None,
                 span: Span::default(),
             }],
-            children: vec![],
+            children: vec![].into(),
             span: Span::default(),
         };
 
@@ -344,7 +426,7 @@ mod tests {
             name: None,
             properties: vec![],
             constraints: vec![],
-            children: vec![Element::Frame(child)],
+            children: vec![Element::Frame(child)].into(),
             span: Span::default(),
         };
 
@@ -373,7 +455,7 @@ mod tests {
                 priority: None,
                 span: Span::default(),
             }],
-            children: vec![],
+            children: vec![].into(),
             span: Span::default(),
         };
 
@@ -394,7 +476,7 @@ mod tests {
             name: Some(Identifier("Header".to_string())),
             properties: vec![],
             constraints: vec![],
-            children: vec![],
+            children: vec![].into(),
             span: Span::default(),
         };
 
@@ -410,7 +492,7 @@ mod tests {
                 priority: None,
                 span: Span::default(),
             }],
-            children: vec![],
+            children: vec![].into(),
             span: Span::default(),
         };
 
@@ -439,7 +521,7 @@ mod tests {
                 priority: None,
                 span: Span::default(),
             }],
-            children: vec![],
+            children: vec![].into(),
             span: Span::default(),
         };
 
@@ -460,7 +542,7 @@ mod tests {
             name: None,
             properties: vec![],
             constraints: vec![],
-            children: vec![],
+            children: vec![].into(),
             span: Span::default(),
         };
 
@@ -476,7 +558,7 @@ mod tests {
                 priority: None,
                 span: Span::default(),
             }],
-            children: vec![],
+            children: vec![].into(),
             span: Span::default(),
         };
 
@@ -490,4 +572,68 @@ mod tests {
         let result = resolve_references(&doc);
         assert!(result.is_ok());
     }
+
+    fn frame(name: &str, constraints: Vec<ConstraintKind>, children: Vec<Element>) -> Element {
+        Element::Frame(FrameElement {
+            name: Some(Identifier(name.to_string())),
+            properties: vec![],
+            constraints: constraints
+                .into_iter()
+                .map(|kind| Constraint { kind, priority: None, span: Span::default() })
+                .collect(),
+            children: children.into(),
+            span: Span::default(),
+        })
+    }
+
+    fn below(target: ElementRef) -> ConstraintKind {
+        ConstraintKind::Relative { relation: seed_core::ast::Relation::Below, target, gap: None }
+    }
+
+    fn targets(doc: &Document) -> Vec<ElementRef> {
+        fn collect(elements: &[Element], out: &mut Vec<ElementRef>) {
+            for element in elements {
+                visit_refs(constraints(element), &mut |r| out.push(r.clone()));
+                collect(element.children(), out);
+            }
+        }
+        let mut out = Vec::new();
+        collect(&doc.elements, &mut out);
+        out
+    }
+
+    fn linked_document() -> Document {
+        let width_of_parent = ConstraintKind::Equality {
+            property: "width".to_string(),
+            value: Expression::PropertyRef { element: ElementRef::Parent, property: "width".to_string() },
+        };
+        let content = frame("Content", vec![below(ElementRef::Named(Identifier("Header".to_string())))], vec![
+            frame("Icon", vec![width_of_parent], vec![]),
+            frame("Label", vec![below(ElementRef::Previous)], vec![]),
+        ]);
+        Document {
+            meta: None,
+            tokens: None,
+            elements: vec![frame("Header", vec![], vec![]), frame("Spacer", vec![], vec![]), content],
+            span: Span::default(),
+        }
+    }
+
+    #[test]
+    fn test_links_references_to_ids() {
+        let doc = linked_document();
+        let mut linked = resolve_references(&doc).unwrap();
+
+        // Top-level elements are 0..3, the children of Content 3..5
+        assert_eq!(targets(&linked), [
+            ElementRef::Resolved(ElementId(0)),
+            ElementRef::Resolved(ElementId(2)),
+            ElementRef::Resolved(ElementId(3)),
+        ]);
+        assert!(has_resolved_references(&linked));
+        assert!(!has_resolved_references(&doc));
+
+        unlink_references(&mut linked);
+        assert_eq!(linked, doc);
+    }
 }
@@ -2,183 +2,137 @@
 //!
 //! Resolves token references ($token.path) to their actual values.
 
-use std::collections::HashSet;
 use seed_core::{
     Document, TokenMap, ResolveError, ResolvedToken,
     ast::{
-        Element, FrameElement, TextElement, PartElement, ComponentElement,
-        Property, PropertyValue, TextContent, TokenPath, Constraint,
+        Element, Property, PropertyValue, TextContent, TokenPath, Constraint,
         Expression, ConstraintKind,
     },
 };
+use crate::{TokenGraph, TokenUsage};
 
 /// Resolve all token references in a document.
 pub fn resolve_tokens(doc: &Document, tokens: &TokenMap) -> Result<Document, ResolveError> {
+    let mut resolved = doc.clone();
+    resolve_tokens_in_place(&mut resolved, tokens)?;
+    Ok(resolved)
+}
+
+/// Resolve all token references in a document without copying it.
+///
+/// Only the token reference nodes are rewritten. If an error is returned the
+/// document may be left partially resolved.
+pub fn resolve_tokens_in_place(doc: &mut Document, tokens: &TokenMap) -> Result<(), ResolveError> {
+    #[cfg(feature = "parallel")]
+    if crate::parallel::is_large(doc) {
+        return crate::resolve_tokens_parallel(doc, tokens);
+    }
+    let mut resolver = TokenResolver::new(tokens);
+    resolver.resolve_elements(&mut doc.elements)
+}
+
+/// Like [`resolve_tokens_in_place`], also recording every slot that held a
+/// token reference, so another theme can later be applied with
+/// [`TokenUsage::apply`].
+pub fn resolve_tokens_tracked(doc: &mut Document, tokens: &TokenMap) -> Result<TokenUsage, ResolveError> {
     let mut resolver = TokenResolver::new(tokens);
-    resolver.resolve_document(doc)
+    resolver.usage = Some(TokenUsage::default());
+    resolver.resolve_elements(&mut doc.elements)?;
+    Ok(resolver.usage.unwrap_or_default())
 }
 
-struct TokenResolver<'a> {
+/// Resolves token references one node at a time.
+///
+/// Used by passes that walk the document themselves, such as the fused
+/// resolve-and-expand pass in `seed-expander`.
+pub struct TokenResolver<'a> {
     tokens: &'a TokenMap,
     /// Track the current resolution path for circular reference detection.
     resolution_stack: Vec<String>,
+    /// Where tokens were consumed, when tracking.
+    usage: Option<TokenUsage>,
+    /// Child indices leading to the current element.
+    element_path: Vec<u32>,
 }
 
 impl<'a> TokenResolver<'a> {
-    fn new(tokens: &'a TokenMap) -> Self {
+    pub fn new(tokens: &'a TokenMap) -> Self {
         Self {
             tokens,
             resolution_stack: Vec::new(),
+            usage: None,
+            element_path: Vec::new(),
         }
     }
 
-    fn resolve_document(&mut self, doc: &Document) -> Result<Document, ResolveError> {
-        let mut resolved = doc.clone();
-
-        // Resolve elements
-        resolved.elements = doc.elements
-            .iter()
-            .map(|e| self.resolve_element(e))
-            .collect::<Result<Vec<_>, _>>()?;
-
-        Ok(resolved)
+    fn resolve_elements(&mut self, elements: &mut [Element]) -> Result<(), ResolveError> {
+        for (i, element) in elements.iter_mut().enumerate() {
+            self.element_path.push(i as u32);
+            if let Some(usage) = &mut self.usage {
+                usage.record(&self.element_path, element);
+            }
+            self.resolve_element(element)?;
+            self.element_path.pop();
+        }
+        Ok(())
     }
 
-    fn resolve_element(&mut self, element: &Element) -> Result<Element, ResolveError> {
+    pub(crate) fn resolve_element(&mut self, element: &mut Element) -> Result<(), ResolveError> {
         match element {
             Element::Frame(frame) => {
-                Ok(Element::Frame(self.resolve_frame(frame)?))
+                self.resolve_properties(&mut frame.properties)?;
+                self.resolve_constraints(&mut frame.constraints)?;
+                self.resolve_elements(&mut frame.children)
             }
             Element::Text(text) => {
-                Ok(Element::Text(self.resolve_text(text)?))
+                self.resolve_text_content(&mut text.content)?;
+                self.resolve_properties(&mut text.properties)
             }
             Element::Part(part) => {
-                Ok(Element::Part(self.resolve_part(part)?))
+                self.resolve_properties(&mut part.properties)?;
+                self.resolve_constraints(&mut part.constraints)
             }
             Element::Component(comp) => {
-                Ok(Element::Component(self.resolve_component(comp)?))
-            }
-            Element::Slot(slot) => {
-                // Slots are handled during component expansion, pass through
-                Ok(Element::Slot(slot.clone()))
+                self.resolve_properties(&mut comp.props)?;
+                self.resolve_elements(&mut comp.children)
             }
+            // Slots are handled during component expansion
+            Element::Slot(_) => Ok(()),
         }
     }
 
-    fn resolve_frame(&mut self, frame: &FrameElement) -> Result<FrameElement, ResolveError> {
-        let mut resolved = frame.clone();
-
-        // Resolve properties
-        resolved.properties = frame.properties
-            .iter()
-            .map(|p| self.resolve_property(p))
-            .collect::<Result<Vec<_>, _>>()?;
-
-        // Resolve constraints
-        resolved.constraints = frame.constraints
-            .iter()
-            .map(|c| self.resolve_constraint(c))
-            .collect::<Result<Vec<_>, _>>()?;
-
-        // Resolve children
-        resolved.children = frame.children
-            .iter()
-            .map(|e| self.resolve_element(e))
-            .collect::<Result<Vec<_>, _>>()?;
-
-        Ok(resolved)
+    /// Resolve the token references in a list of properties.
+    pub fn resolve_properties(&mut self, properties: &mut [Property]) -> Result<(), ResolveError> {
+        properties.iter_mut().try_for_each(|p| self.resolve_property(p))
     }
 
-    fn resolve_text(&mut self, text: &TextElement) -> Result<TextElement, ResolveError> {
-        let mut resolved = text.clone();
-
-        // Resolve text content if it's a token reference
-        resolved.content = self.resolve_text_content(&text.content)?;
-
-        // Resolve properties
-        resolved.properties = text.properties
-            .iter()
-            .map(|p| self.resolve_property(p))
-            .collect::<Result<Vec<_>, _>>()?;
-
-        Ok(resolved)
-    }
-
-    fn resolve_part(&mut self, part: &PartElement) -> Result<PartElement, ResolveError> {
-        let mut resolved = part.clone();
-
-        // Resolve properties
-        resolved.properties = part.properties
-            .iter()
-            .map(|p| self.resolve_property(p))
-            .collect::<Result<Vec<_>, _>>()?;
-
-        // Resolve constraints
-        resolved.constraints = part.constraints
-            .iter()
-            .map(|c| self.resolve_constraint(c))
-            .collect::<Result<Vec<_>, _>>()?;
-
-        Ok(resolved)
-    }
-
-    fn resolve_component(&mut self, comp: &ComponentElement) -> Result<ComponentElement, ResolveError> {
-        let mut resolved = comp.clone();
-
-        // Resolve props
-        resolved.props = comp.props
-            .iter()
-            .map(|p| self.resolve_property(p))
-            .collect::<Result<Vec<_>, _>>()?;
-
-        // Resolve children
-        resolved.children = comp.children
-            .iter()
-            .map(|e| self.resolve_element(e))
-            .collect::<Result<Vec<_>, _>>()?;
-
-        Ok(resolved)
-    }
-
-    fn resolve_property(&mut self, prop: &Property) -> Result<Property, ResolveError> {
-        let mut resolved = prop.clone();
-        resolved.value = self.resolve_property_value(&prop.value, &prop.span)?;
-        Ok(resolved)
+    fn resolve_property(&mut self, prop: &mut Property) -> Result<(), ResolveError> {
+        if let PropertyValue::TokenRef(path) = &prop.value {
+            prop.value = self.resolve_token_to_property_value(path, &prop.span)?;
+        }
+        Ok(())
     }
 
-    fn resolve_property_value(
-        &mut self,
-        value: &PropertyValue,
-        span: &seed_core::ast::Span,
-    ) -> Result<PropertyValue, ResolveError> {
-        match value {
-            PropertyValue::TokenRef(path) => {
-                self.resolve_token_to_property_value(path, span)
-            }
-            _ => Ok(value.clone()),
+    /// Look up a token, failing if it is part of the current resolution path.
+    fn lookup(&self, path: &TokenPath) -> Result<Option<&'a ResolvedToken>, ResolveError> {
+        if self.resolution_stack.iter().any(|p| path.matches(p)) {
+            let mut cycle = self.resolution_stack.clone();
+            cycle.push(path.0.join("."));
+            return Err(ResolveError::CircularTokenReference { cycle });
         }
+
+        Ok(self.tokens.get_by_path(path))
     }
 
-    fn resolve_token_to_property_value(
+    pub(crate) fn resolve_token_to_property_value(
         &mut self,
         path: &TokenPath,
         span: &seed_core::ast::Span,
     ) -> Result<PropertyValue, ResolveError> {
-        let path_str = path.0.join(".");
-
-        // Check for circular reference
-        if self.resolution_stack.contains(&path_str) {
-            let mut cycle = self.resolution_stack.clone();
-            cycle.push(path_str);
-            return Err(ResolveError::CircularTokenReference { cycle });
-        }
-
-        // Get the token
-        let token = self.tokens.get(&path_str)
-            .ok_or_else(|| ResolveError::UndefinedToken {
-                path: path_str.clone(),
-                span: span.clone(),
-            })?;
+        let token = self.lookup(path)?.ok_or_else(|| ResolveError::UndefinedToken {
+            path: path.0.join("."),
+            span: *span,
+        })?;
 
         // Convert ResolvedToken to PropertyValue
         match token {
@@ -189,181 +143,83 @@ impl<'a> TokenResolver<'a> {
         }
     }
 
-    fn resolve_text_content(&mut self, content: &TextContent) -> Result<TextContent, ResolveError> {
-        match content {
-            TextContent::TokenRef(path) => {
-                let path_str = path.0.join(".");
-
-                // Check for circular reference
-                if self.resolution_stack.contains(&path_str) {
-                    let mut cycle = self.resolution_stack.clone();
-                    cycle.push(path_str);
-                    return Err(ResolveError::CircularTokenReference { cycle });
-                }
+    /// Replace a token reference in text content with the token's text.
+    pub fn resolve_text_content(&mut self, content: &mut TextContent) -> Result<(), ResolveError> {
+        let TextContent::TokenRef(path) = content else {
+            return Ok(());
+        };
 
-                // Get the token
-                if let Some(token) = self.tokens.get(&path_str) {
-                    // Convert to literal string
-                    let text = match token {
-                        ResolvedToken::String(s) => s.clone(),
-                        ResolvedToken::Number(n) => n.to_string(),
-                        ResolvedToken::Color(c) => {
-                            let (r, g, b, _) = c.to_rgba8();
-                            format!("#{:02x}{:02x}{:02x}", r, g, b)
-                        }
-                        ResolvedToken::Length(l) => format!("{:?}", l),
-                    };
-                    Ok(TextContent::Literal(text))
-                } else {
-                    // Keep as token ref if not found (might be resolved later)
-                    Ok(content.clone())
+        // Keep as token ref if not found (might be resolved later)
+        if let Some(token) = self.lookup(path)? {
+            // Convert to literal string
+            let text = match token {
+                ResolvedToken::String(s) => s.clone(),
+                ResolvedToken::Number(n) => n.to_string(),
+                ResolvedToken::Color(c) => {
+                    let (r, g, b, _) = c.to_rgba8();
+                    format!("#{:02x}{:02x}{:02x}", r, g, b)
                 }
-            }
-            TextContent::Literal(_) => Ok(content.clone()),
+                ResolvedToken::Length(l) => format!("{:?}", l),
+            };
+            *content = TextContent::Literal(text);
         }
+        Ok(())
     }
 
-    fn resolve_constraint(&mut self, constraint: &Constraint) -> Result<Constraint, ResolveError> {
-        let mut resolved = constraint.clone();
-        resolved.kind = self.resolve_constraint_kind(&constraint.kind, &constraint.span)?;
-        Ok(resolved)
-    }
-
-    fn resolve_constraint_kind(
-        &mut self,
-        kind: &ConstraintKind,
-        span: &seed_core::ast::Span,
-    ) -> Result<ConstraintKind, ResolveError> {
-        match kind {
-            ConstraintKind::Equality { property, value } => {
-                Ok(ConstraintKind::Equality {
-                    property: property.clone(),
-                    value: self.resolve_expression(value, span)?,
-                })
-            }
+    /// Resolve the token references in constraint expressions.
+    pub fn resolve_constraints(&mut self, constraints: &mut [Constraint]) -> Result<(), ResolveError> {
+        for constraint in constraints {
             // Other constraint kinds don't contain token references
-            _ => Ok(kind.clone()),
+            if let ConstraintKind::Equality { value, .. } = &mut constraint.kind {
+                self.resolve_expression(value, &constraint.span)?;
+            }
         }
+        Ok(())
     }
 
-    fn resolve_expression(
+    pub(crate) fn resolve_expression(
         &mut self,
-        expr: &Expression,
+        expr: &mut Expression,
         span: &seed_core::ast::Span,
-    ) -> Result<Expression, ResolveError> {
+    ) -> Result<(), ResolveError> {
         match expr {
             Expression::TokenRef(path) => {
-                let path_str = path.0.join(".");
-
-                // Check for circular reference
-                if self.resolution_stack.contains(&path_str) {
-                    let mut cycle = self.resolution_stack.clone();
-                    cycle.push(path_str);
-                    return Err(ResolveError::CircularTokenReference { cycle });
-                }
-
-                // Get the token
-                if let Some(token) = self.tokens.get(&path_str) {
-                    match token {
-                        ResolvedToken::Number(n) => Ok(Expression::Literal(*n)),
-                        ResolvedToken::Length(l) => {
-                            if let Some(px) = l.to_px(None) {
-                                Ok(Expression::Literal(px))
-                            } else {
-                                Ok(expr.clone())
-                            }
-                        }
-                        _ => Ok(expr.clone()),
-                    }
-                } else {
-                    Err(ResolveError::UndefinedToken {
-                        path: path_str,
-                        span: span.clone(),
-                    })
+                let literal = match self.lookup(path)? {
+                    Some(ResolvedToken::Number(n)) => Some(*n),
+                    Some(ResolvedToken::Length(l)) => l.to_px(None),
+                    Some(_) => None,
+                    None => return Err(ResolveError::UndefinedToken {
+                        path: path.0.join("."),
+                        span: *span,
+                    }),
+                };
+                if let Some(value) = literal {
+                    *expr = Expression::Literal(value);
                 }
             }
-            Expression::BinaryOp { left, op, right } => {
-                Ok(Expression::BinaryOp {
-                    left: Box::new(self.resolve_expression(left, span)?),
-                    op: *op,
-                    right: Box::new(self.resolve_expression(right, span)?),
-                })
+            Expression::BinaryOp { left, right, .. } => {
+                self.resolve_expression(left, span)?;
+                self.resolve_expression(right, span)?;
             }
-            Expression::Function { name, args } => {
-                let resolved_args = args
-                    .iter()
-                    .map(|a| self.resolve_expression(a, span))
-                    .collect::<Result<Vec<_>, _>>()?;
-                Ok(Expression::Function {
-                    name: name.clone(),
-                    args: resolved_args,
-                })
+            Expression::Function { args, .. } => {
+                for arg in args {
+                    self.resolve_expression(arg, span)?;
+                }
             }
-            _ => Ok(expr.clone()),
+            _ => {}
         }
+        Ok(())
     }
 }
 
 /// Resolve token definitions within a token block (handles token-to-token references).
+///
+/// Definitions may refer to tokens declared after them; see [`TokenGraph`].
 pub fn resolve_token_definitions(
     tokens: &mut TokenMap,
     definitions: &[(String, seed_core::ast::TokenValue)],
 ) -> Result<(), ResolveError> {
-    let mut resolved_set: HashSet<String> = HashSet::new();
-
-    for (path, value) in definitions {
-        resolve_token_value(tokens, path, value, &mut resolved_set, &mut Vec::new())?;
-    }
-
-    Ok(())
-}
-
-fn resolve_token_value(
-    tokens: &mut TokenMap,
-    path: &str,
-    value: &seed_core::ast::TokenValue,
-    resolved_set: &mut HashSet<String>,
-    stack: &mut Vec<String>,
-) -> Result<ResolvedToken, ResolveError> {
-    // Already resolved?
-    if let Some(resolved) = tokens.get(path) {
-        return Ok(resolved.clone());
-    }
-
-    // Check for circular reference
-    if stack.contains(&path.to_string()) {
-        let mut cycle = stack.clone();
-        cycle.push(path.to_string());
-        return Err(ResolveError::CircularTokenReference { cycle });
-    }
-
-    stack.push(path.to_string());
-
-    let resolved = match value {
-        seed_core::ast::TokenValue::Color(c) => ResolvedToken::Color(*c),
-        seed_core::ast::TokenValue::Length(l) => ResolvedToken::Length(*l),
-        seed_core::ast::TokenValue::Number(n) => ResolvedToken::Number(*n),
-        seed_core::ast::TokenValue::String(s) => ResolvedToken::String(s.clone()),
-        seed_core::ast::TokenValue::Reference(ref_path) => {
-            let ref_path_str = ref_path.0.join(".");
-
-            // The referenced token should already be defined
-            if let Some(ref_value) = tokens.get(&ref_path_str) {
-                ref_value.clone()
-            } else {
-                return Err(ResolveError::UndefinedToken {
-                    path: ref_path_str,
-                    span: seed_core::ast::Span::default(),
-                });
-            }
-        }
-    };
-
-    stack.pop();
-    tokens.insert(path, resolved.clone());
-    resolved_set.insert(path.to_string());
-
-    Ok(resolved)
+    TokenGraph::new(definitions).resolve(tokens)
 }
 
 #[cfg(test)]
@@ -381,16 +237,16 @@ mod tests {
         let mut tokens = TokenMap::new();
         tokens.insert("colors.primary", ResolvedToken::Color(Color::rgb(1.0, 0.0, 0.0)));
 
-        let prop = Property {
-            name: "fill".to_string(),
+        let mut prop = Property {
+            name: "fill".into(),
             value: PropertyValue::TokenRef(make_token_path(&["colors", "primary"])),
             span: Span::default(),
         };
 
         let mut resolver = TokenResolver::new(&tokens);
-        let resolved = resolver.resolve_property(&prop).unwrap();
+        resolver.resolve_property(&mut prop).unwrap();
 
-        match resolved.value {
+        match prop.value {
             PropertyValue::Color(c) => {
                 assert!((c.r - 1.0).abs() < 0.001);
                 assert!(c.g.abs() < 0.001);
@@ -404,16 +260,16 @@ mod tests {
         let mut tokens = TokenMap::new();
         tokens.insert("spacing.medium", ResolvedToken::Length(Length::px(16.0)));
 
-        let prop = Property {
-            name: "padding".to_string(),
+        let mut prop = Property {
+            name: "padding".into(),
             value: PropertyValue::TokenRef(make_token_path(&["spacing", "medium"])),
             span: Span::default(),
         };
 
         let mut resolver = TokenResolver::new(&tokens);
-        let resolved = resolver.resolve_property(&prop).unwrap();
+        resolver.resolve_property(&mut prop).unwrap();
 
-        match resolved.value {
+        match prop.value {
             PropertyValue::Length(l) => {
                 assert!((l.to_px(None).unwrap() - 16.0).abs() < 0.001);
             }
@@ -425,14 +281,14 @@ mod tests {
     fn test_undefined_token_error() {
         let tokens = TokenMap::new();
 
-        let prop = Property {
-            name: "fill".to_string(),
+        let mut prop = Property {
+            name: "fill".into(),
             value: PropertyValue::TokenRef(make_token_path(&["nonexistent", "token"])),
             span: Span::default(),
         };
 
         let mut resolver = TokenResolver::new(&tokens);
-        let result = resolver.resolve_property(&prop);
+        let result = resolver.resolve_property(&mut prop);
 
         assert!(matches!(result, Err(ResolveError::UndefinedToken { .. })));
     }
@@ -442,12 +298,12 @@ mod tests {
         let mut tokens = TokenMap::new();
         tokens.insert("labels.submit", ResolvedToken::String("Submit".to_string()));
 
-        let content = TextContent::TokenRef(make_token_path(&["labels", "submit"]));
+        let mut content = TextContent::TokenRef(make_token_path(&["labels", "submit"]));
 
         let mut resolver = TokenResolver::new(&tokens);
-        let resolved = resolver.resolve_text_content(&content).unwrap();
+        resolver.resolve_text_content(&mut content).unwrap();
 
-        match resolved {
+        match content {
             TextContent::Literal(s) => assert_eq!(s, "Submit"),
             _ => panic!("Expected literal"),
         }
@@ -469,6 +325,48 @@ mod tests {
         assert!(matches!(result, Err(ResolveError::CircularTokenReference { .. })));
     }
 
+    #[test]
+    fn test_resolve_tokens_in_place() {
+        use seed_core::ast::{FrameElement, TextElement};
+
+        let mut tokens = TokenMap::new();
+        tokens.insert("spacing.medium", ResolvedToken::Length(Length::px(16.0)));
+        tokens.insert("labels.submit", ResolvedToken::String("Submit".to_string()));
+
+        let text = TextElement {
+            name: None,
+            content: TextContent::TokenRef(make_token_path(&["labels", "submit"])),
+            properties: vec![],
+            constraints: vec![],
+            span: Span::default(),
+        };
+        let mut doc = Document {
+            meta: None,
+            tokens: None,
+            elements: vec![Element::Frame(FrameElement {
+                name: None,
+                properties: vec![Property {
+                    name: "padding".into(),
+                    value: PropertyValue::TokenRef(make_token_path(&["spacing", "medium"])),
+                    span: Span::default(),
+                }],
+                constraints: vec![],
+                children: vec![Element::Text(text)].into(),
+                span: Span::default(),
+            })],
+            span: Span::default(),
+        };
+        let expected = resolve_tokens(&doc, &tokens).unwrap();
+
+        resolve_tokens_in_place(&mut doc, &tokens).unwrap();
+        assert_eq!(doc, expected);
+
+        let Element::Frame(frame) = &doc.elements[0] else { panic!("Expected frame") };
+        assert_eq!(frame.properties[0].value, PropertyValue::Length(Length::px(16.0)));
+        let Element::Text(text) = &frame.children[0] else { panic!("Expected text") };
+        assert_eq!(text.content, TextContent::Literal("Submit".to_string()));
+    }
+
     #[test]
     fn test_resolve_empty_document() {
         let tokens = TokenMap::new();
@@ -0,0 +1,450 @@
+//! Token consumer tracking.
+//!
+//! [`resolve_tokens_tracked`](crate::resolve_tokens_tracked) records every
+//! slot of the document that held a token reference. Applying another
+//! theme then only rewrites those slots, instead of resolving a fresh copy
+//! of the original document.
+//!
+//! The usage also indexes the slots by token, so changing a single token
+//! only touches the elements that consume it.
+
+use std::collections::{HashMap, HashSet};
+use std::ops::Range;
+use seed_core::{
+    Document, ResolveError, TokenMap,
+    ast::{ConstraintKind, Element, Expression, PropertyValue, TextContent, TokenPath},
+    types::TokenId,
+};
+
+use crate::TokenResolver;
+
+/// The slots of a resolved document that consumed tokens.
+#[derive(Debug, Clone, Default)]
+pub struct TokenUsage {
+    /// Child indices leading to each consuming element, concatenated.
+    paths: Vec<u32>,
+    slots: Vec<TokenSlot>,
+    /// Indices of the slots that consume each token, in ascending order.
+    consumers: HashMap<TokenId, Vec<usize>>,
+    /// Tokens consumed where no slot could be recorded, such as the props
+    /// of an expanded component instance.
+    unplaced: HashSet<TokenId>,
+}
+
+/// The elements rewritten by [`TokenUsage::apply_token`].
+#[derive(Debug, Clone, Default, PartialEq)]
+pub struct TokenChange {
+    /// Paths of the rewritten elements, as child indices from the root.
+    pub elements: Vec<Vec<u32>>,
+    /// Whether a rewritten slot can move or resize elements: a length or
+    /// number property, text content or a constraint.
+    pub affects_layout: bool,
+}
+
+#[derive(Debug, Clone)]
+struct TokenSlot {
+    /// Range of `paths` locating the element.
+    element: Range<usize>,
+    target: SlotTarget,
+}
+
+#[derive(Debug, Clone)]
+enum SlotTarget {
+    /// A property (or component prop) whose value was a token.
+    Property { index: usize, token: TokenPath },
+    /// Text content that was a token.
+    Text { token: TokenPath },
+    /// A constraint whose expression used tokens, kept unresolved.
+    Constraint { index: usize, expression: Expression },
+}
+
+impl TokenUsage {
+    /// Number of recorded slots.
+    pub fn len(&self) -> usize {
+        self.slots.len()
+    }
+
+    /// Check if no slot consumed a token.
+    pub fn is_empty(&self) -> bool {
+        self.slots.is_empty()
+    }
+
+    /// Check if changing the token `id` needs the document to be resolved
+    /// again from scratch, because some of its consumers were not recorded.
+    pub fn requires_rebuild(&self, id: TokenId) -> bool {
+        self.unplaced.contains(&id)
+    }
+
+    /// Check if any token has consumers that were not recorded, so that
+    /// [`apply`](Self::apply) cannot switch the whole theme on its own.
+    pub fn requires_rebuild_any(&self) -> bool {
+        !self.unplaced.is_empty()
+    }
+
+    /// Paths of the elements with a slot that consumes the token `id`.
+    pub fn elements_using(&self, id: TokenId) -> impl Iterator<Item = &[u32]> {
+        let mut last = None;
+        self.consumers.get(&id).into_iter().flatten().filter_map(move |&slot| {
+            // Slots of one element share a path range, so repeats are adjacent
+            let element = self.slots[slot].element.clone();
+            if last.as_ref() == Some(&element) {
+                return None;
+            }
+            last = Some(element.clone());
+            Some(&self.paths[element])
+        })
+    }
+
+    /// Re-resolve every recorded slot of `doc` against `tokens`.
+    ///
+    /// `doc` must be the document the usage was recorded for, or a copy of
+    /// it. Other slots are left untouched, including the consumers that
+    /// could not be recorded: if [`requires_rebuild_any`](Self::requires_rebuild_any)
+    /// holds, resolve the document again instead.
+    pub fn apply(&self, doc: &mut Document, tokens: &TokenMap) -> Result<(), ResolveError> {
+        let mut resolver = TokenResolver::new(tokens);
+        for slot in &self.slots {
+            self.apply_slot(slot, doc, &mut resolver)?;
+        }
+        Ok(())
+    }
+
+    /// Re-resolve only the slots of `doc` that consume the token `id`.
+    ///
+    /// If [`requires_rebuild`](Self::requires_rebuild) holds for `id`, the
+    /// slots that could not be recorded are left stale.
+    pub fn apply_token(
+        &self,
+        doc: &mut Document,
+        tokens: &TokenMap,
+        id: TokenId,
+    ) -> Result<TokenChange, ResolveError> {
+        let mut resolver = TokenResolver::new(tokens);
+        let mut affects_layout = false;
+        for &slot in self.consumers.get(&id).into_iter().flatten() {
+            affects_layout |= self.apply_slot(&self.slots[slot], doc, &mut resolver)?;
+        }
+
+        Ok(TokenChange {
+            elements: self.elements_using(id).map(<[u32]>::to_vec).collect(),
+            affects_layout,
+        })
+    }
+
+    /// Re-resolve one slot, returning whether it can affect layout.
+    fn apply_slot(
+        &self,
+        slot: &TokenSlot,
+        doc: &mut Document,
+        resolver: &mut TokenResolver,
+    ) -> Result<bool, ResolveError> {
+        let element = element_at(&mut doc.elements, &self.paths[slot.element.clone()]);
+        match &slot.target {
+            SlotTarget::Property { index, token } => {
+                let property = &mut properties_mut(element)[*index];
+                let value = resolver.resolve_token_to_property_value(token, &property.span)?;
+                // Numbers size things too, such as a unitless font size
+                let was_metric = is_metric(&property.value);
+                property.value = value;
+                Ok(was_metric || is_metric(&property.value))
+            }
+            SlotTarget::Text { token } => {
+                if let Element::Text(text) = element {
+                    text.content = TextContent::TokenRef(token.clone());
+                    resolver.resolve_text_content(&mut text.content)?;
+                }
+                Ok(true)
+            }
+            SlotTarget::Constraint { index, expression } => {
+                let constraint = match element {
+                    Element::Frame(frame) => &mut frame.constraints[*index],
+                    Element::Part(part) => &mut part.constraints[*index],
+                    _ => return Ok(false),
+                };
+                if let ConstraintKind::Equality { value, .. } = &mut constraint.kind {
+                    restore_tokens(value, expression);
+                    resolver.resolve_expression(value, &constraint.span)?;
+                }
+                Ok(true)
+            }
+        }
+    }
+
+    /// Record the token references in `element`, found at `path`, before
+    /// they are resolved.
+    pub fn record(&mut self, path: &[u32], element: &Element) {
+        for_each_target(element, |target| self.push(path, target));
+    }
+
+    /// Record the token references in `element` as consumed somewhere that
+    /// cannot be patched, so that changing them calls for a rebuild.
+    pub fn record_unplaced(&mut self, element: &Element) {
+        for_each_target(element, |target| {
+            target.for_each_token(&mut |id| {
+                self.unplaced.insert(id);
+            });
+        });
+    }
+
+    fn push(&mut self, path: &[u32], target: SlotTarget) {
+        // Slots of the same element share one copy of its path
+        let element = match self.slots.last() {
+            Some(last) if self.paths[last.element.clone()] == *path => last.element.clone(),
+            _ => {
+                let start = self.paths.len();
+                self.paths.extend_from_slice(path);
+                start..self.paths.len()
+            }
+        };
+
+        let slot = self.slots.len();
+        target.for_each_token(&mut |id| {
+            let consumers = self.consumers.entry(id).or_default();
+            // An expression may use the same token more than once
+            if consumers.last() != Some(&slot) {
+                consumers.push(slot);
+            }
+        });
+        self.slots.push(TokenSlot { element, target });
+    }
+}
+
+impl SlotTarget {
+    fn for_each_token(&self, f: &mut impl FnMut(TokenId)) {
+        match self {
+            SlotTarget::Property { token, .. } | SlotTarget::Text { token } => f(token.id()),
+            SlotTarget::Constraint { expression, .. } => expression_tokens(expression, f),
+        }
+    }
+}
+
+/// Call `f` with each slot of `element` that holds a token reference.
+fn for_each_target(element: &Element, mut f: impl FnMut(SlotTarget)) {
+    let (properties, constraints) = match element {
+        Element::Frame(frame) => (&frame.properties, &frame.constraints[..]),
+        Element::Text(text) => {
+            if let TextContent::TokenRef(token) = &text.content {
+                f(SlotTarget::Text { token: token.clone() });
+            }
+            // Constraints on text are not resolved
+            (&text.properties, &[][..])
+        }
+        Element::Part(part) => (&part.properties, &part.constraints[..]),
+        Element::Component(comp) => (&comp.props, &[][..]),
+        Element::Slot(_) => return,
+    };
+
+    for (index, property) in properties.iter().enumerate() {
+        if let PropertyValue::TokenRef(token) = &property.value {
+            f(SlotTarget::Property { index, token: token.clone() });
+        }
+    }
+    for (index, constraint) in constraints.iter().enumerate() {
+        if let ConstraintKind::Equality { value, .. } = &constraint.kind {
+            if uses_tokens(value) {
+                f(SlotTarget::Constraint { index, expression: value.clone() });
+            }
+        }
+    }
+}
+
+/// Put the token references of `original` back into `resolved`, keeping
+/// everything else, such as element references linked since.
+fn restore_tokens(resolved: &mut Expression, original: &Expression) {
+    match (resolved, original) {
+        (resolved, Expression::TokenRef(_)) => *resolved = original.clone(),
+        (Expression::BinaryOp { left, right, .. }, Expression::BinaryOp { left: l, right: r, .. }) => {
+            restore_tokens(left, l);
+            restore_tokens(right, r);
+        }
+        (Expression::Function { args, .. }, Expression::Function { args: a, .. }) => {
+            args.iter_mut().zip(a).for_each(|(arg, original)| restore_tokens(arg, original));
+        }
+        _ => {}
+    }
+}
+
+fn is_metric(value: &PropertyValue) -> bool {
+    matches!(value, PropertyValue::Length(_) | PropertyValue::Number(_))
+}
+
+fn expression_tokens(expression: &Expression, f: &mut impl FnMut(TokenId)) {
+    match expression {
+        Expression::TokenRef(token) => f(token.id()),
+        Expression::BinaryOp { left, right, .. } => {
+            expression_tokens(left, f);
+            expression_tokens(right, f);
+        }
+        Expression::Function { args, .. } => args.iter().for_each(|arg| expression_tokens(arg, f)),
+        _ => {}
+    }
+}
+
+fn uses_tokens(expression: &Expression) -> bool {
+    match expression {
+        Expression::TokenRef(_) => true,
+        Expression::BinaryOp { left, right, .. } => uses_tokens(left) || uses_tokens(right),
+        Expression::Function { args, .. } => args.iter().any(uses_tokens),
+        _ => false,
+    }
+}
+
+/// The element reached by following child indices from the document root.
+fn element_at<'d>(elements: &'d mut [Element], path: &[u32]) -> &'d mut Element {
+    let (&index, rest) = path.split_first().expect("element paths are never empty");
+    let element = &mut elements[index as usize];
+    if rest.is_empty() {
+        return element;
+    }
+    match element {
+        Element::Frame(frame) => element_at(&mut frame.children, rest),
+        Element::Component(comp) => element_at(&mut comp.children, rest),
+        _ => panic!("token usage does not match the document"),
+    }
+}
+
+fn properties_mut(element: &mut Element) -> &mut [seed_core::ast::Property] {
+    match element {
+        Element::Frame(frame) => &mut frame.properties,
+        Element::Text(text) => &mut text.properties,
+        Element::Part(part) => &mut part.properties,
+        Element::Component(comp) => &mut comp.props,
+        Element::Slot(_) => &mut [],
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use std::sync::Arc;
+    use seed_core::ResolvedToken;
+    use seed_core::ast::{BinaryOp, Constraint, FrameElement, Property, Span, TextElement};
+    use seed_core::types::{Color, Length};
+    use crate::{resolve_tokens, resolve_tokens_tracked};
+
+    fn token(path: &str) -> TokenPath {
+        TokenPath(path.split('.').map(String::from).collect())
+    }
+
+    fn prop(name: &str, value: PropertyValue) -> Property {
+        Property { name: name.into(), value, span: Span::default() }
+    }
+
+    fn document() -> Document {
+        let title = TextElement {
+            name: None,
+            content: TextContent::TokenRef(token("labels.title")),
+            properties: vec![prop("color", PropertyValue::TokenRef(token("colors.text")))],
+            constraints: vec![],
+            span: Span::default(),
+        };
+        let card = FrameElement {
+            name: None,
+            properties: vec![
+                prop("fill", PropertyValue::TokenRef(token("colors.surface"))),
+                prop("width", PropertyValue::Length(Length::px(240.0))),
+            ],
+            constraints: vec![Constraint {
+                kind: ConstraintKind::Equality {
+                    property: "height".to_string(),
+                    value: Expression::BinaryOp {
+                        left: Box::new(Expression::TokenRef(token("spacing.md"))),
+                        op: BinaryOp::Mul,
+                        right: Box::new(Expression::Literal(4.0)),
+                    },
+                },
+                priority: None,
+                span: Span::default(),
+            }],
+            children: vec![Element::Text(title)].into(),
+            span: Span::default(),
+        };
+        Document { meta: None, tokens: None, elements: vec![Element::Frame(card)], span: Span::default() }
+    }
+
+    fn themes() -> (TokenMap, TokenMap) {
+        let mut light = TokenMap::new();
+        light.insert("colors.surface", ResolvedToken::Color(Color::WHITE));
+        light.insert("colors.text", ResolvedToken::Color(Color::BLACK));
+        light.insert("spacing.md", ResolvedToken::Length(Length::px(16.0)));
+        light.insert("labels.title", ResolvedToken::String("Title".to_string()));
+        let light = Arc::new(light);
+
+        let mut dark = TokenMap::overlay(light.clone());
+        dark.insert("colors.surface", ResolvedToken::Color(Color::BLACK));
+        dark.insert("colors.text", ResolvedToken::Color(Color::WHITE));
+        dark.insert("spacing.md", ResolvedToken::Length(Length::px(12.0)));
+
+        (Arc::try_unwrap(light).unwrap_or_else(|light| (*light).clone()), dark)
+    }
+
+    #[test]
+    fn test_apply_switches_theme() {
+        let (light, dark) = themes();
+        let original = document();
+
+        let mut doc = original.clone();
+        let usage = resolve_tokens_tracked(&mut doc, &light).unwrap();
+        assert_eq!(usage.len(), 4);
+        assert!(!usage.requires_rebuild_any());
+        assert_eq!(doc, resolve_tokens(&original, &light).unwrap());
+
+        usage.apply(&mut doc, &dark).unwrap();
+        assert_eq!(doc, resolve_tokens(&original, &dark).unwrap());
+
+        usage.apply(&mut doc, &light).unwrap();
+        assert_eq!(doc, resolve_tokens(&original, &light).unwrap());
+    }
+
+    #[test]
+    fn test_apply_reports_missing_token() {
+        let (light, _) = themes();
+        let mut doc = document();
+        let usage = resolve_tokens_tracked(&mut doc, &light).unwrap();
+
+        let result = usage.apply(&mut doc, &TokenMap::new());
+        assert!(matches!(result, Err(ResolveError::UndefinedToken { .. })));
+    }
+
+    #[test]
+    fn test_apply_token_rewrites_consumers_only() {
+        let (light, mut dark) = themes();
+        let original = document();
+        let mut doc = original.clone();
+        let usage = resolve_tokens_tracked(&mut doc, &light).unwrap();
+
+        let id = TokenId::from_dotted("colors.text");
+        assert_eq!(usage.elements_using(id).collect::<Vec<_>>(), [&[0, 0][..]]);
+        assert!(!usage.requires_rebuild(id));
+
+        let change = usage.apply_token(&mut doc, &dark, id).unwrap();
+        assert_eq!(change, TokenChange { elements: vec![vec![0, 0]], affects_layout: false });
+        // The surface color still comes from the light theme
+        let Element::Frame(card) = &doc.elements[0] else { unreachable!() };
+        assert_eq!(card.properties[0].value, PropertyValue::Color(Color::WHITE));
+
+        dark.insert("spacing.md", ResolvedToken::Length(Length::px(8.0)));
+        let change = usage.apply_token(&mut doc, &dark, TokenId::from_dotted("spacing.md")).unwrap();
+        assert_eq!(change.elements, [vec![0]]);
+        assert!(change.affects_layout);
+    }
+
+    #[test]
+    fn test_number_token_affects_layout() {
+        let title = TextElement {
+            name: None,
+            content: TextContent::Literal("Title".to_string()),
+            properties: vec![prop("font-size", PropertyValue::TokenRef(token("type.size")))],
+            constraints: vec![],
+            span: Span::default(),
+        };
+        let mut doc = Document { meta: None, tokens: None, elements: vec![Element::Text(title)], span: Span::default() };
+        let mut tokens = TokenMap::new();
+        tokens.insert("type.size", ResolvedToken::Number(14.0));
+        let usage = resolve_tokens_tracked(&mut doc, &tokens).unwrap();
+
+        tokens.insert("type.size", ResolvedToken::Number(18.0));
+        let change = usage.apply_token(&mut doc, &tokens, TokenId::from_dotted("type.size")).unwrap();
+        assert_eq!(change, TokenChange { elements: vec![vec![0]], affects_layout: true });
+    }
+}
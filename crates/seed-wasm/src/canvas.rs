@@ -5,7 +5,7 @@
 use wasm_bindgen::prelude::*;
 use wasm_bindgen::JsCast;
 use web_sys::{CanvasRenderingContext2d, HtmlCanvasElement};
-use seed_core::{Document, ast::Element};
+use seed_core::{Document, ast::{Element, PropertyName}};
 use seed_layout::{LayoutTree, LayoutNode, LayoutNodeId};
 use crate::types::RenderOptionsJs;
 
@@ -147,7 +147,7 @@ impl CanvasRenderer {
 
         // Extract fill color
         let fill = properties.iter()
-            .find(|p| p.name == "fill")
+            .find(|p| p.name == PropertyName::Fill)
             .and_then(|p| match &p.value {
                 seed_core::ast::PropertyValue::Color(c) => Some(color_to_css(c)),
                 _ => None,
@@ -155,7 +155,7 @@ impl CanvasRenderer {
 
         // Extract stroke color
         let stroke = properties.iter()
-            .find(|p| p.name == "stroke")
+            .find(|p| p.name == PropertyName::Stroke)
             .and_then(|p| match &p.value {
                 seed_core::ast::PropertyValue::Color(c) => Some(color_to_css(c)),
                 _ => None,
@@ -163,7 +163,7 @@ impl CanvasRenderer {
 
         // Extract corner radius
         let radius = properties.iter()
-            .find(|p| p.name == "corner-radius" || p.name == "cornerRadius")
+            .find(|p| p.name == PropertyName::CornerRadius || p.name == "cornerRadius")
             .and_then(|p| match &p.value {
                 seed_core::ast::PropertyValue::Length(l) => l.to_px(None),
                 seed_core::ast::PropertyValue::Number(n) => Some(*n),
@@ -208,7 +208,7 @@ impl CanvasRenderer {
 
         // Extract text color
         let color = properties.iter()
-            .find(|p| p.name == "color" || p.name == "fill")
+            .find(|p| matches!(p.name, PropertyName::Color | PropertyName::Fill))
             .and_then(|p| match &p.value {
                 seed_core::ast::PropertyValue::Color(c) => Some(color_to_css(c)),
                 _ => None,
@@ -217,7 +217,7 @@ impl CanvasRenderer {
 
         // Extract font size
         let font_size = properties.iter()
-            .find(|p| p.name == "font-size" || p.name == "fontSize")
+            .find(|p| p.name == PropertyName::FontSize || p.name == "fontSize")
             .and_then(|p| match &p.value {
                 seed_core::ast::PropertyValue::Length(l) => l.to_px(None),
                 seed_core::ast::PropertyValue::Number(n) => Some(*n),
@@ -227,7 +227,7 @@ impl CanvasRenderer {
 
         // Extract font family
         let font_family = properties.iter()
-            .find(|p| p.name == "font-family" || p.name == "fontFamily")
+            .find(|p| p.name == PropertyName::FontFamily || p.name == "fontFamily")
             .and_then(|p| match &p.value {
                 seed_core::ast::PropertyValue::String(s) => Some(s.clone()),
                 _ => None,
@@ -30,11 +30,11 @@
 //! ```
 
 use wasm_bindgen::prelude::*;
-use seed_core::{Document, TokenMap, ResolvedToken};
-use seed_core::types::{Color, Length};
-use seed_parser::parse_document;
-use seed_resolver::{resolve_tokens, resolve_references};
-use seed_expander::{ComponentRegistry, expand_components};
+use seed_core::{Document, TokenMap, ResolvedToken, ResolveError, SeedError};
+use seed_core::types::{Color, Length, TokenId};
+use seed_parser::{parse_document, reparse, TextEdit};
+use seed_resolver::TokenUsage;
+use seed_expander::{ComponentRegistry, resolve_and_expand_tracked};
 use seed_layout::{compute_layout, LayoutTree, LayoutOptions};
 
 mod canvas;
@@ -55,7 +55,13 @@ pub fn init() {
 pub struct SeedEngine {
     tokens: TokenMap,
     components: ComponentRegistry,
+    /// Source text of the last parsed document (for incremental edits).
+    last_source: Option<String>,
+    /// Raw parse result of `last_source`, before resolution and expansion.
+    last_parsed: Option<Document>,
     last_document: Option<Document>,
+    /// Where tokens were consumed in `last_document`.
+    last_usage: TokenUsage,
     last_layout: Option<LayoutTree>,
     layout_options: LayoutOptions,
 }
@@ -68,7 +74,10 @@ impl SeedEngine {
         Self {
             tokens: TokenMap::new(),
             components: ComponentRegistry::new(),
+            last_source: None,
+            last_parsed: None,
             last_document: None,
+            last_usage: TokenUsage::default(),
             last_layout: None,
             layout_options: LayoutOptions::default(),
         }
@@ -100,6 +109,46 @@ impl SeedEngine {
         Ok(())
     }
 
+    /// Set a single design token and update the last parsed document.
+    ///
+    /// `value` takes the same forms as in `loadTokens`. Only the elements
+    /// that use the token are rewritten, and the layout is only invalidated
+    /// if the change can move or resize them, as with a length token.
+    /// Returns which elements must be repainted.
+    #[wasm_bindgen(js_name = setToken)]
+    pub fn set_token(&mut self, path: &str, value: JsValue) -> Result<JsValue, JsError> {
+        let value: serde_json::Value = serde_wasm_bindgen::from_value(value)
+            .map_err(|e| JsError::new(&format!("Invalid token: {}", e)))?;
+        let token = token_from_json(&value)
+            .ok_or_else(|| JsError::new(&format!("Invalid value for token '{}'", path)))?;
+        self.tokens.insert(path, token);
+
+        let id = TokenId::from_dotted(path);
+        let change = match self.last_document.as_mut() {
+            None => TokenChangeJs::default(),
+            Some(_) if self.last_usage.requires_rebuild(id) => {
+                let parsed = self.last_parsed.as_ref()
+                    .ok_or_else(|| JsError::new("No document parsed. Call parse() first."))?;
+                let (doc, usage) = self.process(parsed)?;
+                self.last_document = Some(doc);
+                self.last_usage = usage;
+                self.last_layout = None;
+                TokenChangeJs { elements: Vec::new(), layout: true, rebuilt: true }
+            }
+            Some(doc) => {
+                let change = self.last_usage.apply_token(doc, &self.tokens, id)
+                    .map_err(|e| JsError::new(&format!("Token resolution error: {}", e)))?;
+                if change.affects_layout {
+                    self.last_layout = None;
+                }
+                TokenChangeJs { elements: change.elements, layout: change.affects_layout, rebuilt: false }
+            }
+        };
+
+        serde_wasm_bindgen::to_value(&change)
+            .map_err(|e| JsError::new(&format!("Serialization error: {}", e)))
+    }
+
     /// Clear all loaded tokens.
     #[wasm_bindgen(js_name = clearTokens)]
     pub fn clear_tokens(&mut self) {
@@ -133,27 +182,51 @@ impl SeedEngine {
     #[wasm_bindgen]
     pub fn parse(&mut self, source: &str) -> Result<JsValue, JsError> {
         // Parse the document
-        let doc = parse_document(source)
+        let parsed = parse_document(source)
             .map_err(|e| JsError::new(&format!("Parse error: {}", e)))?;
 
-        // Resolve tokens
-        let doc = resolve_tokens(&doc, &self.tokens)
-            .map_err(|e| JsError::new(&format!("Token resolution error: {}", e)))?;
+        let doc = self.process(&parsed)?;
+        self.last_source = Some(source.to_string());
+        self.last_parsed = Some(parsed);
+        self.finish(doc)
+    }
 
-        // Resolve element references
-        let doc = resolve_references(&doc)
-            .map_err(|e| JsError::new(&format!("Reference resolution error: {}", e)))?;
+    /// Apply a text edit to the last parsed source and reparse incrementally.
+    ///
+    /// `start` and `end` are UTF-8 byte offsets into the previous source. Only
+    /// the top-level blocks touched by the edit are reparsed.
+    #[wasm_bindgen(js_name = applyEdit)]
+    pub fn apply_edit(&mut self, start: usize, end: usize, replacement: &str) -> Result<JsValue, JsError> {
+        let source = self.last_source.as_mut()
+            .ok_or_else(|| JsError::new("No document parsed. Call parse() first."))?;
 
-        // Expand components
-        let doc = expand_components(&doc, &self.components)
-            .map_err(|e| JsError::new(&format!("Component expansion error: {}", e)))?;
+        if start > end || end > source.len()
+            || !source.is_char_boundary(start) || !source.is_char_boundary(end) {
+            return Err(JsError::new("Edit range is out of bounds"));
+        }
 
-        let result = serde_wasm_bindgen::to_value(&doc)
-            .map_err(|e| JsError::new(&format!("Serialization error: {}", e)))?;
+        let edit = TextEdit::new(start..end, replacement);
+        let reparsed = match self.last_parsed.as_mut() {
+            Some(parsed) => reparse(parsed, source, &edit).is_ok(),
+            None => false,
+        };
+        source.replace_range(start..end, replacement);
+
+        if !reparsed {
+            // Fall back to a full parse so errors are reported against the new
+            // text; until it succeeds there is no document for the source
+            self.last_parsed = None;
+            self.last_document = None;
+            self.last_usage = TokenUsage::default();
+            self.last_layout = None;
+            let parsed = parse_document(source)
+                .map_err(|e| JsError::new(&format!("Parse error: {}", e)))?;
+            self.last_parsed = Some(parsed);
+        }
 
-        self.last_document = Some(doc);
-        self.last_layout = None; // Invalidate layout
-        Ok(result)
+        let parsed = self.last_parsed.as_ref().expect("document was just parsed");
+        let doc = self.process(parsed)?;
+        self.finish(doc)
     }
 
     /// Parse a Seed document without any resolution (raw AST).
@@ -338,6 +411,30 @@ impl SeedEngine {
 }
 
 impl SeedEngine {
+    /// Run token resolution, reference resolution and component expansion.
+    fn process(&self, parsed: &Document) -> Result<(Document, TokenUsage), JsError> {
+        resolve_and_expand_tracked(parsed, &self.tokens, &self.components).map_err(|e| {
+            let stage = match &e {
+                SeedError::Resolve(ResolveError::UndefinedToken { .. })
+                | SeedError::Resolve(ResolveError::CircularTokenReference { .. }) => "Token resolution",
+                SeedError::Resolve(_) => "Reference resolution",
+                _ => "Component expansion",
+            };
+            JsError::new(&format!("{} error: {}", stage, e))
+        })
+    }
+
+    /// Store a processed document and return its JS representation.
+    fn finish(&mut self, (doc, usage): (Document, TokenUsage)) -> Result<JsValue, JsError> {
+        let result = serde_wasm_bindgen::to_value(&doc)
+            .map_err(|e| JsError::new(&format!("Serialization error: {}", e)))?;
+
+        self.last_document = Some(doc);
+        self.last_usage = usage;
+        self.last_layout = None; // Invalidate layout
+        Ok(result)
+    }
+
     fn parse_tokens_recursive(&mut self, value: &serde_json::Value, prefix: &str) {
         match value {
             serde_json::Value::Object(map) => {
@@ -350,22 +447,11 @@ impl SeedEngine {
                     self.parse_tokens_recursive(val, &path);
                 }
             }
-            serde_json::Value::String(s) => {
-                // Try to parse as color first
-                if let Some(color) = Color::from_hex(s) {
-                    self.tokens.insert(prefix, ResolvedToken::Color(color));
-                } else if let Some(length) = parse_length_string(s) {
-                    self.tokens.insert(prefix, ResolvedToken::Length(length));
-                } else {
-                    self.tokens.insert(prefix, ResolvedToken::String(s.clone()));
+            value => {
+                if let Some(token) = token_from_json(value) {
+                    self.tokens.insert(prefix, token);
                 }
             }
-            serde_json::Value::Number(n) => {
-                if let Some(f) = n.as_f64() {
-                    self.tokens.insert(prefix, ResolvedToken::Number(f));
-                }
-            }
-            _ => {}
         }
     }
 }
@@ -376,6 +462,25 @@ impl Default for SeedEngine {
     }
 }
 
+/// Convert a JSON token value: strings become colors or lengths where they
+/// parse as one, numbers become numbers.
+fn token_from_json(value: &serde_json::Value) -> Option<ResolvedToken> {
+    match value {
+        serde_json::Value::String(s) => {
+            // Try to parse as color first
+            if let Some(color) = Color::from_hex(s) {
+                Some(ResolvedToken::Color(color))
+            } else if let Some(length) = parse_length_string(s) {
+                Some(ResolvedToken::Length(length))
+            } else {
+                Some(ResolvedToken::String(s.clone()))
+            }
+        }
+        serde_json::Value::Number(n) => n.as_f64().map(ResolvedToken::Number),
+        _ => None,
+    }
+}
+
 /// Parse a length string like "16px", "10mm", "50%"
 fn parse_length_string(s: &str) -> Option<Length> {
     let s = s.trim();
@@ -46,6 +46,19 @@ pub struct HitTestResultJs {
     pub height: f64,
 }
 
+/// Result of changing a single token, for JavaScript.
+#[derive(Debug, Clone, Default, Serialize, Deserialize)]
+#[serde(rename_all = "camelCase")]
+pub struct TokenChangeJs {
+    /// Paths (child indices from the root) of the elements to repaint.
+    pub elements: Vec<Vec<u32>>,
+    /// Whether the layout was invalidated and must be recomputed.
+    pub layout: bool,
+    /// Whether the whole document was resolved again, so every element
+    /// must be repainted.
+    pub rebuilt: bool,
+}
+
 /// Layout options from JavaScript.
 #[derive(Debug, Clone, Default, Serialize, Deserialize)]
 #[serde(rename_all = "camelCase")]